@@ -7,13 +7,19 @@ database dump files using Graphviz to create SVG output.
 """
 import argparse
 import getpass
+import json
 import os
 import subprocess
 import sys
 import logging
 
+from .catalog_backend import SCHEMA_BACKENDS
+from .database_service import DatabaseService
 from .db_parser import parse_sql_dump, extract_constraint_info
 from .erd_generator import generate_erd_with_graphviz
+from .profiling import Profiler, profile, span
+from .memory import plan_memory_strategies, estimate_peak_mb, read_schema_dump, dump_size
+from . import render_pool, render_service
 
 
 log = logging.getLogger("pypgsvg")
@@ -121,6 +127,12 @@ def fetch_schema_from_database(host, port, database, user):
     return sql_dump, view_columns
 
 
+def fetch_catalog_model_from_database(host, port, database, user):
+    """Build the schema model from the system catalogs, without pg_dump or parsing."""
+    password = getpass.getpass("Enter PostgreSQL password: ")
+    return DatabaseService().fetch_catalog_model(host, port, database, user, password)
+
+
 def _unpack_parse_result(parse_result):
     """Support both legacy and extended parse_sql_dump return signatures."""
     if len(parse_result) == 4:
@@ -140,11 +152,14 @@ def main():
     parser.add_argument('-o', '--output', default='schema_erd', help='Output file name (without extension)')
     parser.add_argument('--show-standalone', default='true', help='Hide standalone tables')
     parser.add_argument('--view', action='store_true', help='Trigger the host to open the generated SVG in default app usually the browser')
+    parser.add_argument('--watch', action='store_true', help='With a dump file: serve the ERD (implies --view), regenerate when the file changes and push the update to open browsers')
+    parser.add_argument('--prewarm', action='store_true', help='With --view/--watch: after the first page, render the other orientations, the optimizer\'s suggested layout and hub-table neighbourhoods in the background so the first click is served from cache')
 
     parser.add_argument('--host', help='PostgreSQL host')
     parser.add_argument('--port', help='PostgreSQL port')
     parser.add_argument('--database', help='PostgreSQL database name')
     parser.add_argument('--user', help='PostgreSQL user')
+    parser.add_argument('--schema-backend', default='pg_dump', choices=SCHEMA_BACKENDS, help='How to read a database schema: parse pg_dump -s output, or query pg_catalog directly (one round trip, no dump to parse; PostgreSQL 11+)')
     parser.add_argument('--exclude', nargs='+', help='Exclude tables/views by prefix or pattern')
     parser.add_argument('--include', nargs='+', help='Include only the listed tables')
 
@@ -165,13 +180,95 @@ def main():
     # New Graphviz/ERD parameters
     parser.add_argument('--saturate', type=float, default=1.8, help='Saturation factor for table colors')
     parser.add_argument('--brightness', type=float, default=1.0, help='Brightness factor for table colors')
+    parser.add_argument('--detail-level', default='full', choices=['full', 'keys', 'tables'], help='Columns shown per table: all, only primary/foreign keys, or none')
+    parser.add_argument('--variant', action='append', metavar='NAME:key=value[;key=value]', help='Also render a variant from the same parsed schema to <output>_NAME.svg (repeatable), e.g. lr:rankdir=LR or core:include_tables=users,orders;detail_level=keys')
+    parser.add_argument('--split-schemas', action='store_true', help='Render one ERD per PostgreSQL schema plus an overview graph (<output>.svg) linking to them')
+    parser.add_argument('--batch', metavar='MANIFEST', help='Render every source/variant job listed in a JSON or TOML manifest')
+    parser.add_argument('--workers', type=int, help='Worker processes for --batch (default: manifest value or CPU count)')
+    parser.add_argument('--batch-report', metavar='PATH', help='Write the --batch timing report as JSON')
+    parser.add_argument('--compress-details', action='store_true', help='Embed SQL/trigger/function text as a gzip blob inflated lazily by the browser (smaller offline SVGs)')
+    parser.add_argument('--deterministic', action='store_true', help='Byte-identical output for identical inputs (generated time from SOURCE_DATE_EPOCH, else the Unix epoch)')
+    parser.add_argument('--skip-unchanged', action='store_true', help='Skip layout and rendering when the existing output was produced from the same schema, settings and version')
+    parser.add_argument('--content-addressed', action='store_true', help='Write <output>.<hash>.svg keyed by schema, settings and version; reuse it if it already exists')
+    parser.add_argument('--profile', action='store_true', help='Print a per-phase timing table (read, parse, filter, DOT build, layout, post-process, minimap, metadata, write)')
+    parser.add_argument('--profile-json', metavar='PATH', help='Write the per-phase timing report as JSON')
+    parser.add_argument('--max-memory', type=float, metavar='MB', help='Memory budget in MiB: switch to lower-memory strategies as needed and report per-phase tracemalloc/RSS peaks')
+    parser.add_argument('--dot-processes', type=int, metavar='N', help='Graphviz dot processes allowed to run at once; further renders queue in arrival order (default: CPU count)')
+    parser.add_argument('--dot-memory-limit', type=float, metavar='MB', help='Address-space limit per dot process in MiB (POSIX); a render over it fails instead of exhausting the host')
+    parser.add_argument('--dot-cpu-limit', type=int, metavar='SECONDS', help='CPU-time limit per dot process in seconds (POSIX)')
+    parser.add_argument('--render-max-jobs', type=int, metavar='N', help='With --view: uploads POST /api/render reads or renders at once; more get 429 with Retry-After (default 8)')
+    parser.add_argument('--render-max-queued', type=float, metavar='MB', help='With --view: total MiB of uploads admitted to /api/render at once (default 256)')
 
 
     args = parser.parse_args()
 
+    if args.dot_processes or args.dot_memory_limit or args.dot_cpu_limit:
+        render_pool.configure(args.dot_processes, args.dot_memory_limit, args.dot_cpu_limit)
+    if args.render_max_jobs or args.render_max_queued:
+        render_service.configure(args.render_max_jobs, args.render_max_queued)
+
+    if args.profile or args.profile_json or args.max_memory:
+        with profile(Profiler(track_memory=bool(args.max_memory))) as profiler:
+            _run(args, profiler)
+    else:
+        _run(args, None)
+
+
+def _report_profile(profiler, json_path=None):
+    """Print the --profile table and optionally write the JSON report."""
+    print(profiler.format_table())
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(profiler.report(), f, indent=2)
+        print(f"Profile written to {json_path}")
+
+
+def _report_memory_budget(profiler, max_memory_mb):
+    """Compare the measured peak RSS against the --max-memory budget."""
+    peak = profiler.peak_rss_mb()
+    if peak is None:
+        print("Peak RSS is not available on this platform")
+    elif peak > max_memory_mb:
+        print(f"WARNING: peak RSS {peak:.1f} MiB exceeded the {max_memory_mb:g} MiB budget")
+    else:
+        print(f"Peak RSS {peak:.1f} MiB within the {max_memory_mb:g} MiB budget")
+
+
+def _run(args, profiler):
+    """
+    Generate the ERD(s) requested on the command line.
+
+    Args:
+        args: Parsed command-line arguments
+        profiler: Active Profiler when --profile/--profile-json is set, else None
+    """
+    if args.batch:
+        from .batch import run_batch
+        try:
+            report = run_batch(args.batch, workers=args.workers, report_path=args.batch_report)
+        except (OSError, ValueError) as e:
+            print(f"Batch failed: {e}")
+            sys.exit(1)
+            return
+        if report['failed']:
+            sys.exit(1)
+        return
+
     output_file = args.output
     show_standalone = args.show_standalone != 'false'
 
+    variants = {}
+    if args.variant:
+        from .erd_service import parse_variant_spec
+        for spec in args.variant:
+            try:
+                name, overrides = parse_variant_spec(spec)
+            except ValueError as e:
+                print(f"Invalid --variant: {e}")
+                sys.exit(1)
+                return
+            variants[name] = overrides
+
     db_params = [args.host, args.port, args.database, args.user]
     any_db_params = any(db_params)
     all_db_params = all(db_params)
@@ -194,6 +291,7 @@ def main():
     source_type = 'file'
     source_params = {}
     view_columns_from_db = {}
+    catalog_model = None
 
     try:
         if all_db_params:
@@ -204,15 +302,25 @@ def main():
                 'database': args.database,
                 'user': args.user,
             }
-            sql_dump, view_columns_from_db = fetch_schema_from_database(
-                args.host, args.port, args.database, args.user
-            )
+            if args.schema_backend == 'catalog':
+                with span('read', source='catalog'):
+                    catalog_model = fetch_catalog_model_from_database(
+                        args.host, args.port, args.database, args.user
+                    )
+                sql_dump = ''
+            else:
+                with span('read', source='database'):
+                    sql_dump, view_columns_from_db = fetch_schema_from_database(
+                        args.host, args.port, args.database, args.user
+                    )
             input_source = f"{args.user}@{args.host}:{args.port}/{args.database}"
+            memory_plan = plan_memory_strategies(len(sql_dump), args.max_memory)
         else:
             source_type = 'file'
             source_params = {'filepath': args.input_file}
-            with open(args.input_file, 'r', encoding='utf-8') as f:
-                sql_dump = f.read()
+            memory_plan = plan_memory_strategies(dump_size(args.input_file), args.max_memory)
+            with span('read', source='file'):
+                sql_dump = read_schema_dump(args.input_file, stream=memory_plan['stream_read'])
             input_source = args.input_file
     except FileNotFoundError:
         print(f"Error: Input file not found: {args.input_file}")
@@ -227,7 +335,19 @@ def main():
         sys.exit(1)
         return
 
-    tables, foreign_keys, triggers, errors, views, functions, settings = _unpack_parse_result(parse_sql_dump(sql_dump))
+    if args.max_memory:
+        enabled = [name for name, on in memory_plan.items() if on]
+        print(f"Memory budget {args.max_memory:g} MiB: estimated peak "
+              f"{estimate_peak_mb(len(sql_dump), enabled):.0f} MiB using "
+              f"{', '.join(enabled) if enabled else 'default strategies'}")
+
+    if catalog_model is not None:
+        tables, foreign_keys, triggers, errors, views, functions, settings = (
+            catalog_model[key] for key in
+            ('tables', 'foreign_keys', 'triggers', 'errors', 'views', 'functions', 'settings'))
+    else:
+        with span('parse', bytes=len(sql_dump)):
+            tables, foreign_keys, triggers, errors, views, functions, settings = _unpack_parse_result(parse_sql_dump(sql_dump))
 
     # Merge live view-column metadata when available (database mode)
     for view_name, columns in view_columns_from_db.items():
@@ -244,51 +364,108 @@ def main():
             print(error)
     else:
         try:
-            generate_erd_with_graphviz(
-                tables, foreign_keys, output_file,
-                input_file_path=input_source,
-                show_standalone=show_standalone,
-                exclude_patterns=args.exclude,
-                include_tables=args.include,
-                packmode=args.packmode,
-                rankdir=args.rankdir,
-                esep=args.esep,
-                fontname=args.fontname,
-                fontsize=args.fontsize,
-                node_fontsize=args.node_fontsize,
-                edge_fontsize=args.edge_fontsize,
-                node_style=args.node_style,
-                node_shape=args.node_shape,
-                node_sep=args.node_sep,
-                rank_sep=args.rank_sep,
-                constraints=constraints,
-                triggers=triggers,
-                views=views,
-                functions=functions,
-                settings=settings,
-            )
-
-            print(f"Successfully generated ERD: {output_file}.svg")
-
-            if args.view:
+            generation_params = {
+                'show_standalone': show_standalone,
+                'exclude_patterns': args.exclude,
+                'include_tables': args.include,
+                'packmode': args.packmode,
+                'rankdir': args.rankdir,
+                'esep': args.esep,
+                'fontname': args.fontname,
+                'fontsize': args.fontsize,
+                'node_fontsize': args.node_fontsize,
+                'edge_fontsize': args.edge_fontsize,
+                'node_style': args.node_style,
+                'node_shape': args.node_shape,
+                'node_sep': args.node_sep,
+                'rank_sep': args.rank_sep,
+                'compress_details': args.compress_details or memory_plan['compress_details'],
+                'detail_level': args.detail_level,
+                'deterministic': args.deterministic,
+                'skip_if_unchanged': args.skip_unchanged,
+                'content_addressed': args.content_addressed,
+                'minimap_from_coordinates': memory_plan['minimap_from_coordinates'],
+                'spill_svg': memory_plan['spill_svg'],
+            }
+            model = {
+                'tables': tables,
+                'foreign_keys': foreign_keys,
+                'triggers': triggers,
+                'views': views,
+                'functions': functions,
+                'settings': settings,
+                'constraints': constraints,
+            }
+
+            server_params = generation_params
+            if args.split_schemas:
+                from .erd_service import SCHEMA_PARAM
+                from .schema_split import DEFAULT_SCHEMA, render_schema_split
+                split = render_schema_split(model, output_file, input_source, generation_params)
+                for schema, schema_path in split['schemas'].items():
+                    print(f"Successfully generated ERD for schema {schema}: {schema_path}")
+                print(f"Successfully generated schema overview: {split['overview']}")
+                svg_path = f"{output_file}.svg"
+                # The overview is a static graph; --view serves an interactive per-schema ERD,
+                # and the server's reloads re-render that schema only
+                schema_paths = split['schemas']
+                view_schema = DEFAULT_SCHEMA if DEFAULT_SCHEMA in schema_paths else min(schema_paths, default=None)
+                view_path = schema_paths[view_schema] if view_schema else svg_path
+                if view_schema:
+                    server_params = dict(generation_params, **{SCHEMA_PARAM: view_schema})
+            else:
+                svg_path = generate_erd_with_graphviz(
+                    tables, foreign_keys, output_file,
+                    input_file_path=input_source,
+                    show_standalone=show_standalone,
+                    exclude_patterns=args.exclude,
+                    include_tables=args.include,
+                    packmode=args.packmode,
+                    rankdir=args.rankdir,
+                    esep=args.esep,
+                    fontname=args.fontname,
+                    fontsize=args.fontsize,
+                    node_fontsize=args.node_fontsize,
+                    edge_fontsize=args.edge_fontsize,
+                    node_style=args.node_style,
+                    node_shape=args.node_shape,
+                    node_sep=args.node_sep,
+                    rank_sep=args.rank_sep,
+                    constraints=constraints,
+                    triggers=triggers,
+                    views=views,
+                    functions=functions,
+                    settings=settings,
+                    compress_details=generation_params['compress_details'],
+                    minimap_from_coordinates=generation_params['minimap_from_coordinates'],
+                    spill_svg=generation_params['spill_svg'],
+                    detail_level=args.detail_level,
+                    deterministic=args.deterministic,
+                    skip_if_unchanged=args.skip_unchanged,
+                    content_addressed=args.content_addressed,
+                )
+                if not (args.content_addressed and svg_path):
+                    svg_path = f"{output_file}.svg"
+
+                print(f"Successfully generated ERD: {svg_path}")
+                view_path = svg_path
+
+            if variants:
+                from .erd_service import render_schema_variants
+                outputs = render_schema_variants(model, output_file, input_source, generation_params, variants)
+                for name, variant_path in outputs.items():
+                    print(f"Successfully generated variant {name}: {variant_path}")
+
+            if profiler is not None:
+                _report_profile(profiler, args.profile_json)
+                if args.max_memory:
+                    _report_memory_budget(profiler, args.max_memory)
+
+            if args.view or args.watch:
                 from . import server
-                generation_params = {
-                    'show_standalone': show_standalone,
-                    'exclude_patterns': args.exclude,
-                    'include_tables': args.include,
-                    'packmode': args.packmode,
-                    'rankdir': args.rankdir,
-                    'esep': args.esep,
-                    'fontname': args.fontname,
-                    'fontsize': args.fontsize,
-                    'node_fontsize': args.node_fontsize,
-                    'edge_fontsize': args.edge_fontsize,
-                    'node_style': args.node_style,
-                    'node_shape': args.node_shape,
-                    'node_sep': args.node_sep,
-                    'rank_sep': args.rank_sep,
-                }
-                server.start_server(f"{output_file}.svg", source_type, source_params, generation_params)
+                server.start_server(view_path, source_type, source_params, server_params,
+                                    watch=args.watch, prewarm=args.prewarm,
+                                    schema_backend=args.schema_backend)
 
         except Exception as e:
             print(f"--- ERROR during ERD generation ---")
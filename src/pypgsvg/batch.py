@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Batch rendering for pypgsvg - many ERDs from one manifest in one process pool.
+
+A manifest (JSON or TOML) lists dump sources and render variants. Every
+distinct source is read and parsed exactly once; the resulting models are
+handed to a pool of worker processes that render the source x variant jobs.
+
+Example manifest (TOML)::
+
+    output_dir = "erds"
+    workers = 8
+
+    [defaults]
+    rankdir = "TB"
+
+    [[sources]]
+    name = "billing"
+    file = "dumps/billing.sql"
+
+    [[sources]]
+    name = "orders"
+    host = "db.internal"
+    port = "5432"
+    database = "orders"
+    user = "readonly"
+
+    [[variants]]
+    name = "full"
+
+    [[variants]]
+    name = "payments-team"
+    rankdir = "LR"
+    include_tables = ["invoices", "payments"]
+    sources = ["billing"]
+"""
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional, Tuple
+
+from .database_service import DatabaseService
+from .erd_service import GENERATION_DEFAULTS, build_schema_model, render_schema_model
+
+
+DEFAULT_OUTPUT_TEMPLATE = '{source}_{variant}'
+DB_SOURCE_KEYS = ('host', 'port', 'database', 'user')
+
+# Models shared with render workers; populated once per worker process.
+_WORKER_MODELS: Dict[str, Tuple[Dict[str, Any], str]] = {}
+
+
+def load_manifest(path: str) -> Dict[str, Any]:
+    """
+    Load a batch manifest from a JSON or TOML file.
+
+    Raises:
+        ValueError: If the file cannot be parsed or has no sources
+    """
+    with open(path, 'rb') as f:
+        raw = f.read()
+
+    if path.endswith('.toml'):
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ValueError("TOML manifests require Python 3.11+ or the 'tomli' package")
+        manifest = tomllib.loads(raw.decode('utf-8'))
+    else:
+        try:
+            manifest = json.loads(raw.decode('utf-8'))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON manifest {path}: {e}")
+
+    if not manifest.get('sources'):
+        raise ValueError(f"Manifest {path} does not define any sources")
+    return manifest
+
+
+def expand_jobs(manifest: Dict[str, Any], base_dir: str = '.') -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Resolve manifest sources and variants into concrete render jobs.
+
+    Returns:
+        Tuple of (sources, jobs). Each job references its source by name and
+        carries fully merged generation params and an output path.
+    """
+    output_dir = os.path.join(base_dir, manifest.get('output_dir', '.'))
+    template = manifest.get('output', DEFAULT_OUTPUT_TEMPLATE)
+    defaults = manifest.get('defaults', {})
+    variants = manifest.get('variants') or [{'name': 'erd'}]
+    unknown = set(defaults) - set(GENERATION_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Manifest defaults have unknown settings: {', '.join(sorted(unknown))}")
+
+    sources = []
+    seen = set()
+    for index, source in enumerate(manifest['sources']):
+        source = dict(source)
+        name = source.setdefault('name', f"source{index}")
+        if name in seen:
+            raise ValueError(f"Duplicate source name: {name}")
+        seen.add(name)
+        if 'file' in source:
+            source['file'] = os.path.join(base_dir, source['file'])
+        elif not all(source.get(key) for key in DB_SOURCE_KEYS):
+            raise ValueError(f"Source {name} needs either 'file' or host/port/database/user")
+        sources.append(source)
+
+    jobs = []
+    for index, variant in enumerate(variants):
+        variant_name = variant.get('name', f"variant{index}")
+        unknown = set(variant) - set(GENERATION_DEFAULTS) - {'name', 'sources', 'output'}
+        if unknown:
+            raise ValueError(f"Variant {variant_name} has unknown settings: {', '.join(sorted(unknown))}")
+
+        params = dict(defaults)
+        params.update({k: v for k, v in variant.items() if k in GENERATION_DEFAULTS})
+        for source in sources:
+            if variant.get('sources') and source['name'] not in variant['sources']:
+                continue
+            output = variant.get('output', template).format(source=source['name'], variant=variant_name)
+            jobs.append({
+                'name': f"{source['name']}/{variant_name}",
+                'source': source['name'],
+                'variant': variant_name,
+                'output_file': os.path.join(output_dir, output),
+                'generation_params': params,
+            })
+    return sources, jobs
+
+
+def _load_source(source: Dict[str, Any]) -> Dict[str, Any]:
+    """Read and parse one source. Runs in a worker process."""
+    result = {'source': source['name'], 'error': None}
+    try:
+        start = time.perf_counter()
+        if 'file' in source:
+            with open(source['file'], 'r', encoding='utf-8') as f:
+                sql_dump = f.read()
+            view_columns = {}
+            input_source = source['file']
+        else:
+            database_service = DatabaseService()
+            password = source.get('password')
+            sql_dump = database_service.fetch_schema(
+                source['host'], source['port'], source['database'], source['user'], password
+            )
+            view_columns = database_service.fetch_view_columns(
+                source['host'], source['port'], source['database'], source['user'],
+                database_service.cached_password
+            )
+            input_source = f"{source['user']}@{source['host']}:{source['port']}/{source['database']}"
+        read_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        model = build_schema_model(sql_dump, view_columns)
+        result.update(
+            model=model,
+            input_source=input_source,
+            bytes=len(sql_dump),
+            tables=len(model['tables']),
+            read_seconds=read_seconds,
+            parse_seconds=time.perf_counter() - start,
+        )
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+
+def _init_render_worker(models: Dict[str, Tuple[Dict[str, Any], str]]) -> None:
+    """Pool initializer: receive every parsed model once per worker."""
+    _WORKER_MODELS.clear()
+    _WORKER_MODELS.update(models)
+
+
+def _render_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Render one job from the worker's model table. Runs in a worker process."""
+    model, input_source = _WORKER_MODELS[job['source']]
+    result = {key: job[key] for key in ('name', 'source', 'variant')}
+    start = time.perf_counter()
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(job['output_file'])), exist_ok=True)
+        svg_file = render_schema_model(model, job['output_file'], input_source, job['generation_params'])
+        if os.path.exists(svg_file):
+            result.update(status='ok', output=svg_file, error=None)
+        else:
+            result.update(status='failed', output=None, error='Graphviz produced no output')
+    except Exception as e:
+        result.update(status='failed', output=None, error=str(e))
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def _pool(workers: int, **kwargs: Any) -> ProcessPoolExecutor:
+    # fork lets workers inherit the parsed models copy-on-write on Linux.
+    context = multiprocessing.get_context('fork') if sys.platform.startswith('linux') else None
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context, **kwargs)
+
+
+def run_batch(manifest_path: str, workers: Optional[int] = None,
+              report_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run every job in a batch manifest.
+
+    Args:
+        manifest_path: Path to a .json or .toml manifest
+        workers: Number of worker processes (manifest 'workers', else CPU count)
+        report_path: Optional path for a JSON report
+
+    Returns:
+        Report dict with per-source parse timings, per-job render timings,
+        total wall time and the number of failed jobs
+    """
+    wall_start = time.perf_counter()
+    manifest = load_manifest(manifest_path)
+    sources, jobs = expand_jobs(manifest, os.path.dirname(os.path.abspath(manifest_path)))
+    workers = max(1, workers or manifest.get('workers') or os.cpu_count() or 1)
+
+    print(f"Batch: {len(sources)} sources, {len(jobs)} jobs, {workers} workers")
+
+    # Stage 1: parse each distinct source once
+    if workers == 1 or len(sources) == 1:
+        loaded = [_load_source(source) for source in sources]
+    else:
+        with _pool(min(workers, len(sources))) as pool:
+            loaded = list(pool.map(_load_source, sources))
+
+    models = {}
+    source_reports = []
+    for item in loaded:
+        model = item.pop('model', None)
+        if model is not None:
+            models[item['source']] = (model, item['input_source'])
+        item.pop('input_source', None)
+        source_reports.append(item)
+
+    # Stage 2: fan renders out across the pool
+    job_reports = []
+    runnable = []
+    for job in jobs:
+        if job['source'] in models:
+            runnable.append(job)
+        else:
+            job_reports.append({
+                'name': job['name'], 'source': job['source'], 'variant': job['variant'],
+                'status': 'failed', 'output': None, 'seconds': 0.0,
+                'error': 'source could not be loaded',
+            })
+
+    if workers == 1 or len(runnable) <= 1:
+        _init_render_worker(models)
+        job_reports.extend(_render_job(job) for job in runnable)
+    elif runnable:
+        with _pool(min(workers, len(runnable)), initializer=_init_render_worker,
+                   initargs=(models,)) as pool:
+            futures = [pool.submit(_render_job, job) for job in runnable]
+            for future in as_completed(futures):
+                job_reports.append(future.result())
+
+    job_reports.sort(key=lambda r: r['name'])
+    report = {
+        'manifest': manifest_path,
+        'workers': workers,
+        'sources': source_reports,
+        'jobs': job_reports,
+        'failed': sum(1 for r in job_reports if r['status'] != 'ok'),
+        'wall_seconds': time.perf_counter() - wall_start,
+    }
+
+    print(format_batch_report(report))
+    if report_path:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def format_batch_report(report: Dict[str, Any]) -> str:
+    """Format a run_batch report as a plain-text summary table."""
+    lines = ['', f"{'source':<30}{'tables':>8}{'read s':>10}{'parse s':>10}  error"]
+    for source in report['sources']:
+        if source['error']:
+            lines.append(f"{source['source']:<30}{'-':>8}{'-':>10}{'-':>10}  {source['error']}")
+        else:
+            lines.append(
+                f"{source['source']:<30}{source['tables']:>8}"
+                f"{source['read_seconds']:>10.3f}{source['parse_seconds']:>10.3f}"
+            )
+    lines.append('')
+    lines.append(f"{'job':<40}{'status':>8}{'render s':>10}  output")
+    for job in report['jobs']:
+        detail = job['output'] if job['status'] == 'ok' else job['error']
+        lines.append(f"{job['name']:<40}{job['status']:>8}{job['seconds']:>10.3f}  {detail}")
+    ok = len(report['jobs']) - report['failed']
+    lines.append('')
+    lines.append(f"{ok}/{len(report['jobs'])} jobs succeeded in {report['wall_seconds']:.2f}s "
+                 f"using {report['workers']} workers")
+    return '\n'.join(lines)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Render cache keys for pypgsvg.
+
+An ERD is a pure function of the (filtered) schema model, the generation
+settings and the pypgsvg version. Hashing those inputs gives a key that is
+embedded in every generated SVG, so a later run can skip layout and rendering
+when the existing output was produced from the same inputs, or name outputs
+by content for build-system caches.
+"""
+import hashlib
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+
+CACHE_KEY_MARKER = 'pypgsvg-cache-key:'
+# The key comment is the last thing written, so only the tail needs reading
+_TAIL_BYTES = 512
+# '.<16 hex digits>' that content_addressed_path adds before '.svg'
+_KEY_SUFFIX = re.compile(r'\.[0-9a-f]{16}$')
+
+
+def pypgsvg_version() -> str:
+    """Installed pypgsvg version, or 'unknown' when running from a source tree."""
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:
+        return 'unknown'
+    try:
+        return version('pypgsvg')
+    except PackageNotFoundError:
+        return 'unknown'
+
+
+def _canonical(value: Any) -> Any:
+    """JSON fallback that keeps unordered containers deterministic."""
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    return repr(value)
+
+
+def render_cache_key(*parts: Any) -> str:
+    """
+    Hash render inputs into a hex cache key.
+
+    Args:
+        *parts: JSON-serializable inputs (model pieces, settings, source info);
+                the pypgsvg version is always mixed in
+
+    Returns:
+        SHA-256 hex digest
+    """
+    digest = hashlib.sha256()
+    digest.update(pypgsvg_version().encode('utf-8'))
+    for part in parts:
+        digest.update(b'\0')
+        digest.update(json.dumps(part, sort_keys=True, default=_canonical).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def cache_key_comment(key: str) -> str:
+    """XML comment carrying the cache key, appended after the root element."""
+    return f'\n<!-- {CACHE_KEY_MARKER}{key} -->\n'
+
+
+def read_cache_key(svg_path: str) -> Optional[str]:
+    """
+    Read the cache key embedded in an existing SVG.
+
+    Returns:
+        The key, or None if the file is missing or carries no key
+    """
+    try:
+        with open(svg_path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - _TAIL_BYTES))
+            tail = f.read().decode('utf-8', errors='ignore')
+    except OSError:
+        return None
+    start = tail.rfind(CACHE_KEY_MARKER)
+    if start == -1:
+        return None
+    return tail[start + len(CACHE_KEY_MARKER):].split('-->', 1)[0].strip() or None
+
+
+def content_addressed_path(output_file: str, key: str) -> str:
+    """Output path ``<output_file>.<key prefix>.svg`` for a cache key."""
+    return f"{output_file}.{key[:16]}.svg"
+
+
+def output_stem(svg_file: str) -> str:
+    """
+    Output path (without extension) that rendered ``svg_file``.
+
+    Drops the key prefix of a content-addressed name, so re-rendering
+    ``erd.<key prefix>.svg`` writes ``erd.<new prefix>.svg`` rather than
+    stacking prefixes.
+    """
+    return _KEY_SUFFIX.sub('', os.path.splitext(svg_file)[0])
+
+
+def generated_timestamp(deterministic: bool = False) -> str:
+    """
+    Timestamp recorded as 'generated' in the SVG metadata.
+
+    SOURCE_DATE_EPOCH is honoured when set (reproducible-builds convention);
+    in deterministic mode without it the Unix epoch is used.
+    """
+    epoch = os.environ.get('SOURCE_DATE_EPOCH')
+    if epoch is not None:
+        try:
+            stamp = datetime.fromtimestamp(int(epoch), tz=timezone.utc)
+            return stamp.strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            pass
+    if deterministic:
+        return datetime.fromtimestamp(0, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    return datetime.fromtimestamp(time.time()).strftime("%Y-%m-%d %H:%M:%S")
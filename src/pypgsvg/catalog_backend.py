@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Schema model straight from the PostgreSQL catalogs (``--schema-backend catalog``).
+
+The default backend runs ``pg_dump -s``, which takes a lock on every
+relation and emits the whole schema as text, then re-parses that text with
+regexes and runs a second psql for view columns. This backend sends one
+read-only query to ``pg_class``, ``pg_attribute``, ``pg_constraint``,
+``pg_trigger``, ``pg_proc`` and the view definitions, in which each set-based
+subquery is folded into a single JSON document with ``json_agg``. It then
+builds the model that build_schema_model returns, without parsing any text.
+
+Names, column lines and constraint lines follow what the parser extracts
+from a pg_dump of the same schema, so ERDs, filters and the metadata panels
+behave the same; view columns come with the query instead of a second psql.
+Like pg_dump, it skips system schemas, partitions (their parent is shown)
+and objects that belong to extensions. It needs PostgreSQL 11 or later.
+"""
+from typing import Any, Dict, List, Tuple
+
+from .db_parser import extract_constraint_info
+
+SCHEMA_BACKENDS = ('pg_dump', 'catalog')
+
+# Schemas pg_dump never dumps
+_USER_NAMESPACE = (
+    "n.nspname NOT IN ('pg_catalog', 'information_schema')"
+    " AND n.nspname NOT LIKE 'pg\\_toast%' AND n.nspname NOT LIKE 'pg\\_temp\\_%'"
+)
+
+
+def _not_extension_member(catalog: str, oid: str) -> str:
+    return (f"NOT EXISTS (SELECT 1 FROM pg_catalog.pg_depend d WHERE d.classid = '{catalog}'::regclass"
+            f" AND d.objid = {oid} AND d.deptype = 'e')")
+
+
+def _column_names(relid: str, attnums: str) -> str:
+    return (f"(SELECT json_agg(a.attname ORDER BY k.i) FROM unnest({attnums}) WITH ORDINALITY AS k(attnum, i)"
+            f" JOIN pg_catalog.pg_attribute a ON a.attrelid = {relid} AND a.attnum = k.attnum)")
+
+
+# Run with this search_path so pg_get_*def() schema-qualifies every user
+# object, as pg_dump does. It is passed as a connection option (PGOPTIONS):
+# a SET in the query would make psql 15+ print a status line before the JSON.
+CATALOG_SEARCH_PATH = 'pg_catalog'
+
+CATALOG_QUERY = f"""
+WITH rels AS (
+    SELECT c.oid, n.nspname || '.' || c.relname AS name, c.relkind
+    FROM pg_catalog.pg_class c
+    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.relkind IN ('r', 'p', 'v') AND NOT c.relispartition AND {_USER_NAMESPACE}
+      AND {_not_extension_member('pg_catalog.pg_class', 'c.oid')}
+)
+SELECT json_build_object(
+    'relations', (SELECT coalesce(json_agg(json_build_object(
+        'name', r.name,
+        'kind', r.relkind,
+        'definition', CASE WHEN r.relkind = 'v' THEN pg_catalog.pg_get_viewdef(r.oid) END,
+        'columns', (SELECT coalesce(json_agg(json_build_object(
+                'name', a.attname,
+                'type', pg_catalog.format_type(a.atttypid, a.atttypmod),
+                'not_null', a.attnotnull,
+                'default', pg_catalog.pg_get_expr(ad.adbin, ad.adrelid)
+            ) ORDER BY a.attnum), '[]')
+            FROM pg_catalog.pg_attribute a
+            LEFT JOIN pg_catalog.pg_attrdef ad ON ad.adrelid = a.attrelid AND ad.adnum = a.attnum
+            WHERE a.attrelid = r.oid AND a.attnum > 0 AND NOT a.attisdropped)
+    ) ORDER BY r.name), '[]') FROM rels r),
+    'constraints', (SELECT coalesce(json_agg(json_build_object(
+        'table', r.name,
+        'name', con.conname,
+        'type', con.contype,
+        'columns', {_column_names('con.conrelid', 'con.conkey')},
+        'ref_table', fr.name,
+        'ref_columns', {_column_names('con.confrelid', 'con.confkey')},
+        'definition', pg_catalog.pg_get_constraintdef(con.oid)
+    ) ORDER BY r.name, con.conname), '[]')
+        FROM pg_catalog.pg_constraint con
+        JOIN rels r ON r.oid = con.conrelid
+        LEFT JOIN rels fr ON fr.oid = con.confrelid
+        WHERE con.contype IN ('p', 'f') AND con.conparentid = 0),
+    'triggers', (SELECT coalesce(json_agg(json_build_object(
+        'table', r.name,
+        'name', t.tgname,
+        'type', t.tgtype,
+        'function', pn.nspname || '.' || p.proname,
+        'arguments', CASE WHEN t.tgnargs > 0 THEN substring(pg_catalog.pg_get_triggerdef(t.oid)
+                          FROM 'EXECUTE (?:FUNCTION|PROCEDURE) [^(]+\\((.*)\\)$') END,
+        'definition', pg_catalog.pg_get_triggerdef(t.oid)
+    ) ORDER BY r.name, t.tgname), '[]')
+        FROM pg_catalog.pg_trigger t
+        JOIN rels r ON r.oid = t.tgrelid
+        JOIN pg_catalog.pg_proc p ON p.oid = t.tgfoid
+        JOIN pg_catalog.pg_namespace pn ON pn.oid = p.pronamespace
+        WHERE NOT t.tgisinternal),
+    'functions', (SELECT coalesce(json_agg(json_build_object(
+        'name', n.nspname || '.' || p.proname,
+        'arguments', pg_catalog.pg_get_function_arguments(p.oid),
+        'result', pg_catalog.pg_get_function_result(p.oid),
+        'language', l.lanname,
+        'body', p.prosrc,
+        'definition', pg_catalog.pg_get_functiondef(p.oid)
+    ) ORDER BY n.nspname, p.proname), '[]')
+        FROM pg_catalog.pg_proc p
+        JOIN pg_catalog.pg_namespace n ON n.oid = p.pronamespace
+        JOIN pg_catalog.pg_language l ON l.oid = p.prolang
+        WHERE p.prokind IN ('f', 'p') AND {_USER_NAMESPACE}
+          AND {_not_extension_member('pg_catalog.pg_proc', 'p.oid')}),
+    'settings', (SELECT json_object_agg(name, setting ORDER BY name) FROM pg_catalog.pg_settings
+        WHERE name IN ('statement_timeout', 'lock_timeout', 'idle_in_transaction_session_timeout',
+                       'client_encoding', 'standard_conforming_strings', 'check_function_bodies',
+                       'xmloption', 'client_min_messages', 'row_security'))
+);
+"""
+
+# pg_trigger.tgtype bits
+_TRIGGER_ROW = 1 << 0
+_TRIGGER_BEFORE = 1 << 1
+_TRIGGER_INSTEAD = 1 << 6
+_TRIGGER_EVENTS = ((1 << 2, 'INSERT'), (1 << 3, 'DELETE'), (1 << 4, 'UPDATE'), (1 << 5, 'TRUNCATE'))
+
+# The parser shortens long view definitions the same way
+_VIEW_DEFINITION_LIMIT = 500
+
+
+def _quote_ident(name: str) -> str:
+    if name.isidentifier() and name == name.lower():
+        return name
+    return '"' + name.replace('"', '""') + '"'
+
+
+def column_line(column: Dict[str, Any]) -> str:
+    """A column as pg_dump writes it in CREATE TABLE, e.g. ``id integer DEFAULT 0 NOT NULL``."""
+    line = f"{_quote_ident(column['name'])} {column['type']}"
+    if column.get('default') is not None:
+        line += f" DEFAULT {column['default']}"
+    if column.get('not_null'):
+        line += " NOT NULL"
+    return line
+
+
+def trigger_event(tgtype: int) -> str:
+    """Timing and events of a trigger from its tgtype, e.g. ``BEFORE INSERT OR UPDATE``."""
+    if tgtype & _TRIGGER_INSTEAD:
+        timing = 'INSTEAD OF'
+    elif tgtype & _TRIGGER_BEFORE:
+        timing = 'BEFORE'
+    else:
+        timing = 'AFTER'
+    return f"{timing} {' OR '.join(name for bit, name in _TRIGGER_EVENTS if tgtype & bit)}"
+
+
+def build_catalog_model(catalog: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the schema model from the result of CATALOG_QUERY.
+
+    Args:
+        catalog: The query's JSON document (relations, constraints,
+                 triggers, functions, settings)
+
+    Returns:
+        Dict with tables, foreign_keys, triggers, errors, views, functions,
+        settings and constraints, as build_schema_model returns
+    """
+    tables: Dict[str, Dict[str, Any]] = {}
+    views: Dict[str, Dict[str, Any]] = {}
+    errors: List[str] = []
+
+    for relation in catalog.get('relations') or []:
+        name = relation['name']
+        if relation['kind'] == 'v':
+            definition = (relation.get('definition') or '').strip()
+            if len(definition) > _VIEW_DEFINITION_LIMIT:
+                definition = definition[:_VIEW_DEFINITION_LIMIT] + '...'
+            columns = [{'name': column['name'], 'type': column['type'],
+                        'is_primary_key': False, 'is_foreign_key': False}
+                       for column in relation['columns']]
+            views[name] = {'definition': definition, 'type': 'view', 'columns': columns}
+            tables[name] = {'lines': name, 'columns': columns, 'type': 'view', 'definition': definition}
+        else:
+            columns = [{'name': column['name'], 'type': column['type'], 'line': column_line(column),
+                        'is_primary_key': False, 'is_foreign_key': False}
+                       for column in relation['columns']]
+            tables[name] = {
+                'lines': '\n'.join([name] + [column['line'] for column in columns]),
+                'columns': columns,
+                'type': 'table',
+            }
+
+    foreign_keys: List[Tuple[Any, ...]] = []
+    for constraint in catalog.get('constraints') or []:
+        table = tables.get(constraint['table'])
+        if table is None:
+            continue
+        by_name = {column['name']: column for column in table['columns']}
+        if constraint['type'] == 'p':
+            for name in constraint['columns'] or []:
+                if name in by_name:
+                    by_name[name]['is_primary_key'] = True
+            continue
+
+        line = (f"ALTER TABLE ONLY {constraint['table']} ADD CONSTRAINT "
+                f"{_quote_ident(constraint['name'])} {constraint['definition']};")
+        ref_table = constraint.get('ref_table')
+        if ref_table not in tables:
+            # Referenced table in a skipped schema or extension
+            errors.append(f"FK parsing issue: {line}")
+            continue
+        columns, ref_columns = constraint['columns'] or [], constraint['ref_columns'] or []
+        foreign_keys.append((constraint['table'], ', '.join(columns), ref_table, ', '.join(ref_columns),
+                             line, {}, {}))
+        for name, ref_column in zip(columns, ref_columns):
+            if name in by_name:
+                by_name[name]['is_foreign_key'] = True
+                by_name[name]['references'] = {'table': ref_table, 'column': ref_column}
+
+    triggers: Dict[str, List[Dict[str, Any]]] = {}
+    for trigger in catalog.get('triggers') or []:
+        triggers.setdefault(trigger['table'], []).append({
+            'trigger_name': trigger['name'],
+            'event': trigger_event(trigger['type']),
+            'function': trigger['function'],
+            'function_args': trigger.get('arguments') or '',
+            'full_line': trigger['definition'] + ';',
+        })
+
+    functions = {
+        function['name']: {
+            'name': function['name'],
+            'parameters': function['arguments'],
+            'return_type': function['result'],
+            'language': function['language'],
+            'body': (function.get('body') or '').strip(),
+            'full_definition': function['definition'],
+        }
+        for function in catalog.get('functions') or []
+    }
+
+    return {
+        'tables': tables,
+        'foreign_keys': foreign_keys,
+        'triggers': triggers,
+        'errors': errors,
+        'views': views,
+        'functions': functions,
+        'settings': dict(catalog.get('settings') or {}),
+        'constraints': extract_constraint_info(foreign_keys),
+    }
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Request coalescing for the ERD server's regenerate endpoints.
+
+``SingleFlight`` lets identical concurrent calls share one execution: the
+first caller runs it and the others wait for its result. ``LatestWins``
+handles bursts such as a Graphviz settings slider being dragged: each request
+waits a short debounce before rendering and gives up if a newer one arrives,
+and a newer request with different settings cancels renders already in
+flight through their CancelToken (killing the running ``dot``).
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+from .jobs import CancelToken, current_token
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Share one execution among identical concurrent calls."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run ``fn`` unless a call with the same key is already running.
+
+        Args:
+            key: Identity of the call
+            fn: Work to run
+
+        Returns:
+            (result, shared) where shared is True when the result came from
+            another caller's execution. Exceptions propagate to every caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+class Ticket:
+    """One request in a LatestWins group."""
+
+    __slots__ = ('generation', 'key', 'token', 'superseded')
+
+    def __init__(self, generation: int, key: Hashable, token: CancelToken):
+        self.generation = generation
+        self.key = key
+        self.token = token
+        self.superseded = False
+
+
+class LatestWins:
+    """Newer requests debounce and cancel older ones; only the latest renders."""
+
+    def __init__(self, debounce: float = 0.15):
+        """
+        Initialize the group.
+
+        Args:
+            debounce: Seconds a request waits for a newer one before rendering
+        """
+        self.debounce = debounce
+        self._changed = threading.Condition()
+        self._generation = 0
+        self._active: List[Ticket] = []
+
+    def begin(self, key: Hashable) -> Ticket:
+        """
+        Register a request, superseding active requests with a different key.
+
+        Requests with the same key are left running so they can share one
+        render (see SingleFlight). The ticket's token is a child of the
+        current job's token, if any, so cancelling the job cancels it too.
+        """
+        parent = current_token()
+        token = parent.child() if parent is not None else CancelToken()
+        with self._changed:
+            self._generation += 1
+            ticket = Ticket(self._generation, key, token)
+            older = [other for other in self._active if other.key != key]
+            for other in older:
+                other.superseded = True
+            self._active.append(ticket)
+            self._changed.notify_all()
+        for other in older:
+            other.token.cancel()
+        return ticket
+
+    def settle(self, ticket: Ticket) -> bool:
+        """Wait out the debounce; False if a newer request arrived meanwhile."""
+        with self._changed:
+            self._changed.wait_for(lambda: self._generation != ticket.generation or ticket.superseded,
+                                   self.debounce)
+            if self._generation != ticket.generation:
+                ticket.superseded = True
+            return not ticket.superseded
+
+    def end(self, ticket: Ticket) -> None:
+        with self._changed:
+            self._active.remove(ticket)
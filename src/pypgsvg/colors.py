@@ -1,4 +1,5 @@
 import colorsys
+from functools import lru_cache
 
 # Predefined accessible colors (muted/desaturated versions).
 color_palette = [
@@ -7,6 +8,7 @@ color_palette = [
     "#C4D8A8", "#E8D8A8", "#7BB8B0", "#6B8B73"
 ]
 
+@lru_cache(maxsize=1024)
 def saturate_color(hex_color, saturation_factor=1.8, brightness_factor=1.0):
     """
     Increase the saturation and optionally brightness of a hex color.
@@ -31,6 +33,7 @@ def saturate_color(hex_color, saturation_factor=1.8, brightness_factor=1.0):
     return '#{:02x}{:02x}{:02x}'.format(int(r * 255), int(g * 255), int(b * 255))
 
 
+@lru_cache(maxsize=1024)
 def desaturate_color(hex_color, desaturation_factor=0.2):
     """
     Heavily desaturate a color for dimming non-highlighted elements.
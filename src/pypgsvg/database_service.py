@@ -4,9 +4,24 @@ Database service for pypgsvg - handles PostgreSQL database operations.
 
 Extracted from server.py for better testability and separation of concerns.
 """
+import contextvars
+import json
 import os
 import subprocess
-from typing import Dict, Any, List, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, Iterator, List, Tuple, Optional
+
+from .catalog_backend import CATALOG_QUERY, CATALOG_SEARCH_PATH, build_catalog_model
+from .jobs import run_cancellable
+
+# psql processes counting tables at once in list_databases
+LIST_DATABASES_WORKERS = 8
+# Seconds allowed for one database's table count
+TABLE_COUNT_TIMEOUT = 5
+TABLE_COUNT_QUERY = (
+    "SELECT COUNT(*) FROM information_schema.tables"
+    " WHERE table_schema NOT IN ('pg_catalog', 'information_schema');"
+)
 
 
 class DatabaseService:
@@ -15,6 +30,8 @@ class DatabaseService:
     def __init__(self):
         """Initialize database service."""
         self.cached_password: Optional[str] = None
+        # 'pg_dump' (parse a schema dump) or 'catalog' (see fetch_catalog_model)
+        self.schema_backend = 'pg_dump'
 
     def fetch_schema(self, host: str, port: str, database: str,
                     user: str, password: Optional[str] = None) -> str:
@@ -60,7 +77,7 @@ class DatabaseService:
         ]
 
         try:
-            result = subprocess.run(
+            result = run_cancellable(
                 cmd,
                 env=env,
                 capture_output=True,
@@ -73,6 +90,72 @@ class DatabaseService:
         except FileNotFoundError:
             raise Exception("pg_dump command not found. Please install PostgreSQL client tools.")
 
+    def fetch_catalog_model(self, host: str, port: str, database: str,
+                            user: str, password: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Build the schema model from the system catalogs with one psql query.
+
+        Unlike fetch_schema there is no pg_dump and no text to parse; see
+        catalog_backend for what the query reads.
+
+        Args:
+            host: Database host
+            port: Database port
+            database: Database name
+            user: Database user
+            password: Database password (optional for passwordless connections)
+
+        Returns:
+            Schema model (see build_schema_model), view columns included
+
+        Raises:
+            Exception: If the connection or query fails or psql is not found
+        """
+        if password is None and self.cached_password is not None:
+            password = self.cached_password
+        if password is None:
+            password = ''
+        self.cached_password = password
+
+        env = os.environ.copy()
+        if password:
+            env['PGPASSWORD'] = password
+        env['PGOPTIONS'] = f"{env.get('PGOPTIONS', '')} -c search_path={CATALOG_SEARCH_PATH}".strip()
+
+        cmd = [
+            'psql',
+            '-X',  # Ignore ~/.psqlrc, it could change the output format
+            '-h', host,
+            '-p', str(port),
+            '-U', user,
+            '-d', database,
+            '-t',
+            '-A',
+            '-v', 'ON_ERROR_STOP=1',
+            '-c', CATALOG_QUERY
+        ]
+
+        try:
+            result = run_cancellable(
+                cmd,
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True
+            )
+        except subprocess.CalledProcessError as e:
+            raise Exception(f"Catalog query failed: {e.stderr}")
+        except FileNotFoundError:
+            raise Exception("psql command not found. Please install PostgreSQL client tools.")
+
+        # The document is one line; anything before it is psql chatter such as a command tag
+        lines = [line for line in result.stdout.splitlines() if line.strip()]
+        try:
+            catalog = json.loads(lines[-1] if lines else '')
+        except ValueError as e:
+            raise Exception(f"Unexpected catalog query output: {e}")
+        return build_catalog_model(catalog)
+
     def fetch_view_columns(self, host: str, port: str, database: str,
                           user: str, password: str) -> Dict[str, List[Dict[str, Any]]]:
         """
@@ -118,7 +201,7 @@ class DatabaseService:
         ]
 
         try:
-            result = subprocess.run(
+            result = run_cancellable(
                 cmd,
                 env=env,
                 capture_output=True,
@@ -154,6 +237,68 @@ class DatabaseService:
             print(f"Warning: Error parsing view columns: {e}")
             return {}
 
+    def catalog_fingerprint(self, host: str, port: str, database: str,
+                            user: str, password: str) -> Optional[str]:
+        """
+        Hash of the row versions of the catalogs an ERD is built from.
+
+        Any DDL touching tables, columns, constraints, triggers, view
+        definitions (pg_rewrite, which CREATE OR REPLACE VIEW may change on
+        its own) or user functions rewrites catalog rows and so changes the
+        fingerprint. One
+        psql round trip is much cheaper than pg_dump, so callers use it to
+        decide whether a cached schema is still current.
+
+        Args:
+            host: Database host
+            port: Database port
+            database: Database name
+            user: Database user
+            password: Database password
+
+        Returns:
+            Fingerprint string, or None if it could not be computed
+        """
+        env = os.environ.copy()
+        if password:
+            env['PGPASSWORD'] = password
+
+        query = (
+            "SELECT md5(string_agg(k, ',' ORDER BY k)) FROM ("
+            " SELECT 'c' || oid::text || ':' || xmin::text FROM pg_catalog.pg_class"
+            " UNION ALL SELECT 'a' || attrelid::text || '.' || attnum::text || ':' || xmin::text"
+            "  FROM pg_catalog.pg_attribute WHERE attnum > 0"
+            " UNION ALL SELECT 'o' || oid::text || ':' || xmin::text FROM pg_catalog.pg_constraint"
+            " UNION ALL SELECT 't' || oid::text || ':' || xmin::text FROM pg_catalog.pg_trigger"
+            " UNION ALL SELECT 'r' || ev_class::text || '.' || oid::text || ':' || xmin::text"
+            "  FROM pg_catalog.pg_rewrite"
+            " UNION ALL SELECT 'p' || oid::text || ':' || xmin::text FROM pg_catalog.pg_proc"
+            "  WHERE pronamespace NOT IN ('pg_catalog'::regnamespace, 'information_schema'::regnamespace)"
+            ") AS catalog(k);"
+        )
+        cmd = [
+            'psql',
+            '-h', host,
+            '-p', str(port),
+            '-U', user,
+            '-d', database,
+            '-t',
+            '-A',
+            '-c', query
+        ]
+
+        try:
+            result = run_cancellable(
+                cmd,
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True
+            )
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            return None
+        return result.stdout.strip() or None
+
     def test_connection(self, host: str, port: str, database: str,
                        user: str, password: str) -> Dict[str, Any]:
         """
@@ -182,19 +327,9 @@ class DatabaseService:
                 "message": str(e)
             }
 
-    def list_databases(self, host: str, port: str, user: str,
-                      password: str = '') -> List[Dict[str, Any]]:
+    def database_names(self, host: str, port: str, user: str, password: str = '') -> List[str]:
         """
-        List all databases on PostgreSQL server with table counts.
-
-        Args:
-            host: Database host
-            port: Database port
-            user: Database user
-            password: Database password (optional)
-
-        Returns:
-            List of dicts with 'name' and 'table_count' keys
+        Names of the non-template databases on a PostgreSQL server.
 
         Raises:
             Exception: If psql command fails or is not found
@@ -203,7 +338,6 @@ class DatabaseService:
         if password:
             env['PGPASSWORD'] = password
 
-        # First get list of databases
         cmd = [
             'psql',
             '-h', host,
@@ -216,7 +350,7 @@ class DatabaseService:
         ]
 
         try:
-            result = subprocess.run(
+            result = run_cancellable(
                 cmd,
                 env=env,
                 capture_output=True,
@@ -228,44 +362,98 @@ class DatabaseService:
         except FileNotFoundError:
             raise Exception("psql command not found. Please install PostgreSQL client tools.")
 
-        # Parse database list
-        database_names = [db.strip() for db in result.stdout.strip().split('\n') if db.strip()]
-
-        # Get table count for each database
-        databases = []
-        for db_name in database_names:
-            try:
-                # Query table count for this database
-                count_cmd = [
-                    'psql',
-                    '-h', host,
-                    '-p', str(port),
-                    '-U', user,
-                    '-d', db_name,
-                    '-t',
-                    '-A',
-                    '-c', "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema NOT IN ('pg_catalog', 'information_schema');"
-                ]
-
-                count_result = subprocess.run(
-                    count_cmd,
-                    env=env,
-                    capture_output=True,
-                    text=True,
-                    check=True,
-                    timeout=5  # Timeout after 5 seconds per database
-                )
-
-                table_count = int(count_result.stdout.strip() or 0)
-                databases.append({
-                    "name": db_name,
-                    "table_count": table_count
-                })
-            except (subprocess.CalledProcessError, subprocess.TimeoutExpired, ValueError):
-                # If we can't get table count, include database with unknown count
-                databases.append({
-                    "name": db_name,
-                    "table_count": -1  # -1 indicates unknown
-                })
-
-        return databases
+        return [db.strip() for db in result.stdout.strip().split('\n') if db.strip()]
+
+    def _table_count(self, host: str, port: str, user: str, database: str,
+                     env: Dict[str, str]) -> Dict[str, Any]:
+        """Table count of one database, -1 if it cannot be read in time."""
+        cmd = [
+            'psql',
+            '-h', host,
+            '-p', str(port),
+            '-U', user,
+            '-d', database,
+            '-w',  # Never prompt: concurrent prompts would fight over the terminal
+            '-t',
+            '-A',
+            '-c', TABLE_COUNT_QUERY
+        ]
+        try:
+            result = run_cancellable(
+                cmd,
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+                timeout=TABLE_COUNT_TIMEOUT
+            )
+            return {"name": database, "table_count": int(result.stdout.strip() or 0)}
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, ValueError, FileNotFoundError):
+            # If we can't get table count, include database with unknown count
+            return {"name": database, "table_count": -1}  # -1 indicates unknown
+
+    def iter_table_counts(self, host: str, port: str, user: str, databases: List[str],
+                          password: str = '',
+                          max_workers: int = LIST_DATABASES_WORKERS) -> Iterator[Dict[str, Any]]:
+        """
+        Count the tables of each database, yielding results as they finish.
+
+        Each database needs its own connection, so the counts run as up to
+        ``max_workers`` concurrent psql processes instead of one after the
+        other; a slow or unreachable database costs at most its timeout and
+        does not hold up the others. Inside a job, cancelling it kills the
+        running counts.
+
+        Args:
+            host: Database host
+            port: Database port
+            user: Database user
+            databases: Database names (see database_names)
+            password: Database password (optional)
+            max_workers: psql processes at once
+
+        Yields:
+            Dicts with 'name' and 'table_count' (-1 if unknown), in completion order
+        """
+        if not databases:
+            return
+        env = os.environ.copy()
+        if password:
+            env['PGPASSWORD'] = password
+
+        executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(databases))),
+                                      thread_name_prefix='pypgsvg-count')
+        # Each count runs in a copy of this context so the current job's cancel token applies
+        futures = [executor.submit(contextvars.copy_context().run, self._table_count, host, port, user, name, env)
+                   for name in databases]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # Abandoned (e.g. the client went away): start no further counts
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def list_databases(self, host: str, port: str, user: str,
+                      password: str = '', max_workers: int = LIST_DATABASES_WORKERS) -> List[Dict[str, Any]]:
+        """
+        List all databases on PostgreSQL server with table counts.
+
+        Args:
+            host: Database host
+            port: Database port
+            user: Database user
+            password: Database password (optional)
+            max_workers: Table counts run at once (see iter_table_counts)
+
+        Returns:
+            List of dicts with 'name' and 'table_count' keys, ordered by name
+
+        Raises:
+            Exception: If psql command fails or is not found
+        """
+        names = self.database_names(host, port, user, password)
+        counts = {entry['name']: entry
+                  for entry in self.iter_table_counts(host, port, user, names, password, max_workers)}
+        return [counts[name] for name in names]
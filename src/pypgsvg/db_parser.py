@@ -1,6 +1,8 @@
 import re
 from typing import List, Tuple, Dict
 
+from .profiling import PhaseTimer
+
 
 def parse_sql_dump(sql_dump):
     """
@@ -92,12 +94,14 @@ def parse_sql_dump(sql_dump):
         re.I | re.S
     )
 
+    phases = PhaseTimer('parse.')
     try:
         # Extract settings (SET statements)
         for match in set_pattern.finditer(sql_dump):
             setting_name = match.group(1).strip()
             setting_value = match.group(2).strip()
             settings[setting_name] = setting_value
+        phases.mark('settings', settings=len(settings))
 
         # Extract tables and their columns
         for match in table_pattern.finditer(sql_dump):
@@ -144,6 +148,7 @@ def parse_sql_dump(sql_dump):
             tables[table_name]['lines'] = "\n".join(_lines)
             tables[table_name]['columns'] = columns
             tables[table_name]['type'] = 'table'
+        phases.mark('tables', tables=len(tables), bytes=len(sql_dump))
 
         # Extract functions
         for match in function_pattern.finditer(sql_dump):
@@ -165,6 +170,7 @@ def parse_sql_dump(sql_dump):
                 'body': function_body,
                 'full_definition': full_definition
             }
+        phases.mark('functions', functions=len(functions))
 
         # Extract views
         for match in view_pattern.finditer(sql_dump):
@@ -188,6 +194,7 @@ def parse_sql_dump(sql_dump):
                 'type': 'view',
                 'definition': view_definition
             }
+        phases.mark('views', views=len(views))
 
         # Extract foreign keys from ALTER TABLE
         triggers = {}
@@ -203,6 +210,7 @@ def parse_sql_dump(sql_dump):
                 foreign_keys.append((table_name, fk_column, ref_table, ref_column, _line, triggers, constraints))
             else:
                 parsing_errors.append(f"FK parsing issue: {match.group(0)}")
+        phases.mark('foreign_keys', foreign_keys=len(foreign_keys))
 
         # Extract primary keys from ALTER TABLE
         for match in alter_pk_pattern.finditer(sql_dump):
@@ -240,6 +248,7 @@ def parse_sql_dump(sql_dump):
                         column['references'] = {
                             'table': ref_table, 'column': ref_column
                         }
+        phases.mark('keys', primary_keys=len(primary_keys))
 
         # Extract triggers (with and without args)
         for match in trigger_pattern.finditer(sql_dump):
@@ -275,6 +284,7 @@ def parse_sql_dump(sql_dump):
                 "full_line": full_line
             }
             triggers.setdefault(table_name, []).append(trigger_info)
+        phases.mark('triggers', triggers=sum(len(t) for t in triggers.values()))
 
     except Exception as e:
         parsing_errors.append(f"Parsing error: {str(e)}")
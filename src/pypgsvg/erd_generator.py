@@ -2,24 +2,56 @@ import os
 import logging
 import json
 
-from datetime import datetime
-from graphviz import Digraph
 from typing import Dict, List, Optional
 from .utils import (
     should_exclude_table,
-    is_standalone_table,
     get_contrasting_text_color,
     sanitize_label
 )
 from .colors import color_palette, saturate_color, desaturate_color
 from .metadata_injector import inject_metadata_into_svg
+from .profiling import PhaseTimer, span
+from .jobs import JobCancelled, pipe_svg, render_svg_file
+from .metrics import cache_lookup
+from .cache import (
+    render_cache_key,
+    read_cache_key,
+    cache_key_comment,
+    content_addressed_path,
+    generated_timestamp,
+)
 import re
-from .svg_utils import wrap_main_erd_content
+from .svg_utils import (
+    wrap_main_erd_content,
+    split_graph_details,
+    compress_graph_details,
+)
 from xml.etree import ElementTree as ET
 
 log = logging.getLogger(__name__)
 
 
+def _digraph():
+    """
+    The graphviz ``Digraph`` class, imported on first use.
+
+    graphviz pulls in subprocess and backend modules, so importing it lazily
+    keeps ``import pypgsvg`` and ``pypgsvg --help`` fast. Once loaded (or
+    patched in tests) it is the module global ``Digraph``.
+    """
+    digraph = globals().get('Digraph')
+    if digraph is None:
+        from graphviz import Digraph as digraph
+        globals()['Digraph'] = digraph
+    return digraph
+
+
+def __getattr__(name):
+    if name == 'Digraph':
+        return _digraph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def generate_erd_with_graphviz(
     tables,
     foreign_keys,
@@ -43,7 +75,15 @@ def generate_erd_with_graphviz(
     triggers={},
     views={},
     functions={},
-    settings={}
+    settings={},
+    compress_details=False,
+    detail_level='full',
+    filtered=None,
+    deterministic=False,
+    skip_if_unchanged=False,
+    content_addressed=False,
+    minimap_from_coordinates=False,
+    spill_svg=False,
 ):
     """
     Generate an ERD using Graphviz with explicit side connections.
@@ -72,36 +112,38 @@ def generate_erd_with_graphviz(
         views: Dictionary of view definitions extracted during parsing
         functions: Dictionary of function definitions extracted during parsing
         settings: Dictionary of configuration settings (SET statements) extracted during parsing
-
+        compress_details: Embed SQL/FK/trigger/function text as a base64 gzip blob that the
+                          browser inflates lazily, instead of inline JSON
+        detail_level: Column detail per table: 'full' (all columns), 'keys' (primary and
+                      foreign key columns only) or 'tables' (table names only)
+        filtered: Optional (filtered_tables, filtered_foreign_keys) tuple from filter_schema,
+                  so several renders of one model can share the filtering work
+        deterministic: Record a fixed 'generated' timestamp (SOURCE_DATE_EPOCH, else the
+                       Unix epoch) so identical inputs produce byte-identical SVGs
+        skip_if_unchanged: Skip layout and rendering when the existing output carries
+                           the same cache key
+        content_addressed: Write to ``<output_file>.<key prefix>.svg``; an existing file
+                           with that name is reused as-is
+        minimap_from_coordinates: Draw the minimap from node/edge coordinates instead of
+                                  embedding a scaled copy of the full ERD
+        spill_svg: Have Graphviz write its SVG to disk and release the DOT source before
+                   post-processing, lowering peak memory for very large schemas
+
+    Returns:
+        Path to the SVG file, or None if Graphviz failed
     """
+    phases = PhaseTimer()
     # Filter tables based on include/exclude patterns and standalone option
-    filtered_tables = {}
-    for table_name, columns in tables.items():
-        # If include_tables is specified (whitelist mode), only include those tables
-        if include_tables is not None and len(include_tables) > 0:
-            if table_name not in include_tables:
-                continue
-
-        # Skip if matches exclusion patterns (only applies when not in whitelist mode)
-        if should_exclude_table(table_name, exclude_patterns):
-            continue
-
-        # Skip standalone tables if option is disabled
-        if not show_standalone and is_standalone_table(table_name, foreign_keys):
-            continue
-
-        filtered_tables[table_name] = columns
-
-    filtered_foreign_keys = [
-        fk for fk in foreign_keys
-        if fk[0] in filtered_tables and fk[2] in filtered_tables
-    ]
+    if filtered is None:
+        filtered = filter_schema(tables, foreign_keys, show_standalone, exclude_patterns, include_tables)
+    filtered_tables, filtered_foreign_keys = filtered
 
     # Calculate metadata
     total_tables = len(filtered_tables)
     total_columns = sum(len(cols['columns']) for cols in filtered_tables.values())
     total_foreign_keys = len(filtered_foreign_keys)
     total_edges = len(filtered_foreign_keys)
+    phases.mark('filter', tables=total_tables, edges=total_edges)
 
     # Source information (file or database connection)
     file_info = {}
@@ -111,6 +153,9 @@ def generate_erd_with_graphviz(
         # Database connection format: user@host:port/database
         file_info['source_type'] = 'database'
         file_info['connection'] = input_file_path
+        # Shown as the source in the metadata panel
+        file_info['filename'] = input_file_path
+        file_info['filesize'] = "N/A (database)"
         # Parse the connection string for display
         if '@' in input_file_path and '/' in input_file_path:
             user_host = input_file_path.split('@')[0]
@@ -132,9 +177,30 @@ def generate_erd_with_graphviz(
         file_info['filename'] = "Unknown"
         file_info['filesize'] = "Unknown"
 
-    file_info['generated'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    dot = Digraph(comment='Database ERD', format='svg')
+    # Everything the SVG depends on, except the timestamp
+    cache_key = render_cache_key(
+        filtered_tables, filtered_foreign_keys, constraints, triggers, views,
+        functions, settings, file_info,
+        [show_standalone, packmode, rankdir, esep, fontname, fontsize, node_fontsize,
+         edge_fontsize, node_sep, rank_sep, node_style, node_shape, compress_details,
+         detail_level, minimap_from_coordinates, deterministic, include_tables],
+    )
+    if content_addressed:
+        actual_svg_path = content_addressed_path(output_file, cache_key)
+    else:
+        actual_svg_path = output_file + ".svg"
+    if skip_if_unchanged or content_addressed:
+        unchanged = read_cache_key(actual_svg_path) == cache_key
+        cache_lookup('render', unchanged)
+        if unchanged:
+            phases.mark('cache_key', hit=True)
+            print(f"--- ERD unchanged, skipping render: {actual_svg_path} ---")
+            return actual_svg_path
+    phases.mark('cache_key', hit=False)
+
+    file_info['generated'] = generated_timestamp(deterministic)
+
+    dot = _digraph()(comment='Database ERD', format='svg')
     dot.attr(
         nodesep=node_sep,
         style=node_style,
@@ -169,79 +235,20 @@ def generate_erd_with_graphviz(
     )
 
     # Use deterministic color assignment based on table name
-    sorted_tables = sorted(filtered_tables.keys())
-    table_colors = {table_name: color_palette[i % len(color_palette)] for i, table_name in enumerate(sorted_tables)}
+    table_colors = assign_table_colors(filtered_tables)
     # --- Data for JS Highlighting ---
-    graph_data = {
-        "tables": {},
-        "edges": {},
-        "views": {},
-        "functions": {},
-        "settings": settings,  # Configuration settings from the database dump
-        "defaultColor": "#cccccc",
-        "highlightColor": "#ff0000",
-        "includedTables": list(filtered_tables.keys()) if include_tables else None,  # Store which tables were included (for focused ERD)
-    }
-
-    # Populate table data
-    for table_name in filtered_tables:
-        safe_name = sanitize_label(table_name)
-        table_data = filtered_tables[table_name]
-        column_count = len(table_data.get('columns', [])) if isinstance(table_data, dict) else 0
-
-        graph_data["tables"][safe_name] = {
-            "originalName": table_name,  # Store original name for reverse lookup
-            "defaultColor": table_colors[table_name],
-            "highlightColor": saturate_color(table_colors[table_name], saturation_factor=4.0),
-            "desaturatedColor": desaturate_color(table_colors[table_name], desaturation_factor=0.1),
-            "triggers": triggers.get(table_name, []),
-            "constraints": [],
-            "edges": [],
-            "columnCount": column_count,
-            "sql": table_data.get('lines', ''),  # Include the CREATE TABLE SQL
-            "type": table_data.get('type', 'table')  # Include the type (table or view)
-        }
-
-    # Populate edge data and update table data with connected edges
-    for i, (ltbl, _, rtbl, _, _, triggers, constraints) in enumerate(filtered_foreign_keys):
-        edge_id = f"edge-{i}"
-        safe_ltbl = sanitize_label(ltbl)
-        safe_rtbl = sanitize_label(rtbl)
-
-        graph_data["edges"][edge_id] = {
-            "tables": [safe_ltbl, safe_rtbl],
-            "defaultColor": table_colors[ltbl],
-            "highlightColor": saturate_color(table_colors[ltbl], saturation_factor=2.0),
-            "desaturatedColor": desaturate_color(table_colors[ltbl], desaturation_factor=0.5),
-            "triggers": triggers,
-            "constraints": constraints,
-        }
-
-        if safe_ltbl in graph_data["tables"]:
-            graph_data["tables"][safe_ltbl]["edges"].append(edge_id)
-        if safe_rtbl in graph_data["tables"]:
-            graph_data["tables"][safe_rtbl]["edges"].append(edge_id)
-
-    # Populate views data
-    for view_name, view_data in views.items():
-        safe_name = sanitize_label(view_name)
-        graph_data["views"][safe_name] = {
-            "name": view_name,
-            "definition": view_data.get('definition', ''),
-            "type": "view"
-        }
+    graph_data = build_graph_data(
+        filtered_tables, filtered_foreign_keys, table_colors,
+        include_tables=include_tables, triggers=triggers, views=views,
+        functions=functions, settings=settings,
+    )
 
-    # Populate functions data
-    for function_name, function_data in functions.items():
-        safe_name = sanitize_label(function_name)
-        graph_data["functions"][safe_name] = {
-            "name": function_name,
-            "parameters": function_data.get('parameters', ''),
-            "return_type": function_data.get('return_type', ''),
-            "language": function_data.get('language', ''),
-            "body": function_data.get('body', ''),
-            "full_definition": function_data.get('full_definition', '')
-        }
+    if detail_level not in DETAIL_LEVELS:
+        raise ValueError(f"Unknown detail_level {detail_level!r}; expected one of {', '.join(DETAIL_LEVELS)}")
+    key_columns = set()
+    for ltbl, col, rtbl, rcol, *_ in filtered_foreign_keys:
+        key_columns.add((ltbl, col))
+        key_columns.add((rtbl, rcol))
 
     for table_name, cols in filtered_tables.items():
         safe_table_name = sanitize_label(table_name)
@@ -272,7 +279,7 @@ def generate_erd_with_graphviz(
             f'<FONT COLOR="{text_color}" POINT-SIZE="24">{table_name}</FONT></TD></TR>'
         )
         # Table background rows (desaturated color)
-        for column in cols['columns']:
+        for column in visible_columns(table_name, cols['columns'], detail_level, key_columns):
             # Build column display with icons
             column_icons = ""
 
@@ -310,20 +317,8 @@ def generate_erd_with_graphviz(
     # --- Update edge creation to use parallel splines with enhanced styling
     for i, (ltbl, col, rtbl, rcol, _line, 
             triggers, constraints) in enumerate(filtered_foreign_keys):
-        edge_id = f"edge-{i}"
         safe_ltbl = sanitize_label(ltbl)
         safe_rtbl = sanitize_label(rtbl)
-        graph_data["edges"][edge_id] = {
-            "tables": [safe_ltbl, safe_rtbl],
-            "defaultColor": table_colors[ltbl],
-            "highlightColor": saturate_color(table_colors[ltbl], saturation_factor=2.0),
-            "desaturatedColor": desaturate_color(table_colors[ltbl], desaturation_factor=0.5),
-            "triggers": triggers,
-            "constraints": constraints,
-            "fkText": _line,
-            "fromColumn": col,
-            "toColumn": rcol,
-        }
 
         # Use Graphviz's color="A:B" syntax for parallel splines
         color1 = table_colors[ltbl]
@@ -353,19 +348,42 @@ def generate_erd_with_graphviz(
         else:
             edge_attrs["arrowhead"] = "vee"
 
-        dot.edge(
-            f"{safe_ltbl}:{col}:e",
-            f"{safe_rtbl}:{rcol}:w",
-            **edge_attrs
-        )
+        if detail_level == 'tables':
+            # No column rows means no ports to attach to
+            dot.edge(safe_ltbl, safe_rtbl, **edge_attrs)
+        else:
+            dot.edge(
+                f"{safe_ltbl}:{col}:e",
+                f"{safe_rtbl}:{rcol}:w",
+                **edge_attrs
+            )
+
+    phases.mark('dot_build', nodes=total_tables, edges=total_edges)
 
     # Render the graph and get SVG content directly
     try:
-        # Use pipe() to get the SVG content directly without file I/O issues
-        svg_bytes = dot.pipe(format='svg')
-        svg_content = svg_bytes.decode('utf-8') if isinstance(svg_bytes, bytes) else svg_bytes
-        actual_svg_path = output_file + ".svg"
+        if spill_svg:
+            # dot writes to disk instead of a captured stdout buffer, and the
+            # DOT source is dropped before the SVG is read back
+            spill_path = actual_svg_path + '.layout.svg'
+            try:
+                render_svg_file(dot, spill_path)
+                del dot
+                with open(spill_path, 'r', encoding='utf-8') as f:
+                    svg_content = f.read()
+            finally:
+                # Also after a failed or cancelled render, which can leave a partial file
+                if os.path.exists(spill_path):
+                    os.remove(spill_path)
+        else:
+            # Pipe the SVG content directly without file I/O issues
+            svg_bytes = pipe_svg(dot)
+            svg_content = svg_bytes.decode('utf-8') if isinstance(svg_bytes, bytes) else svg_bytes
+        phases.mark('layout', bytes=len(svg_content))
         print(f"--- ERD generated successfully: {actual_svg_path} ---")
+    except JobCancelled:
+        # Not a Graphviz error: the caller's job was cancelled
+        raise
     except Exception as e:
         log.error(f"Error rendering graph with Graphviz: {e}")
         return
@@ -393,24 +411,274 @@ def generate_erd_with_graphviz(
         r'\1 class="edge"\2',
         svg_content
     )
+    details_script = ''
+    if compress_details:
+        # Keep only what the first paint needs inline; SQL text, FK text and
+        # trigger/function bodies are inflated by the browser on first use.
+        graph_data, details = split_graph_details(graph_data)
+        details_script = (
+            '<script id="graph-data-details" type="application/gzip" data-encoding="base64">'
+            f'{compress_graph_details(details)}</script>\n'
+        )
     graph_data_json = json.dumps(graph_data)
     graph_data_script = f'<script id="graph-data" type="application/json">{graph_data_json}</script>';
-    svg_content = svg_content.replace('</svg>', f'{graph_data_script}\n</svg>')
+    svg_content = svg_content.replace('</svg>', f'{graph_data_script}\n{details_script}</svg>')
 
     wrapped_svg = wrap_main_erd_content(svg_content)
+    phases.mark('postprocess', bytes=len(wrapped_svg))
 
     gen_min_erd = True
-    svg_content = inject_metadata_into_svg(
-        wrapped_svg, file_info, total_tables, total_columns,
-        total_foreign_keys, total_edges, tables=filtered_tables,
-        foreign_keys=filtered_foreign_keys, show_standalone=show_standalone,
-        gen_min_erd=gen_min_erd, packmode=packmode, rankdir=rankdir,
-        esep=esep, fontname=fontname, fontsize=fontsize,
-        node_fontsize=node_fontsize, edge_fontsize=edge_fontsize,
-        node_style=node_style, node_shape=node_shape,
-        node_sep=node_sep, rank_sep=rank_sep, triggers=triggers,
-        views=views, functions=functions, settings=settings,
-    )
+    with span('metadata') as metadata_span:
+        svg_content = inject_metadata_into_svg(
+            wrapped_svg, file_info, total_tables, total_columns,
+            total_foreign_keys, total_edges, tables=filtered_tables,
+            foreign_keys=filtered_foreign_keys, show_standalone=show_standalone,
+            gen_min_erd=gen_min_erd, packmode=packmode, rankdir=rankdir,
+            esep=esep, fontname=fontname, fontsize=fontsize,
+            node_fontsize=node_fontsize, edge_fontsize=edge_fontsize,
+            node_style=node_style, node_shape=node_shape,
+            node_sep=node_sep, rank_sep=rank_sep, triggers=triggers,
+            views=views, functions=functions, settings=settings,
+            minimap_from_coordinates=minimap_from_coordinates,
+        )
+        if metadata_span:
+            metadata_span.count(bytes=len(svg_content))
+
+    with span('write', bytes=len(svg_content)):
+        with open(actual_svg_path, 'w', encoding='utf-8') as f:
+            f.write(svg_content)
+            f.write(cache_key_comment(cache_key))
+    return actual_svg_path
+
+
+DETAIL_LEVELS = ('full', 'keys', 'tables')
+
+
+def filter_schema(tables, foreign_keys, show_standalone=True, exclude_patterns=None, include_tables=None,
+                  linked_tables=None):
+    """
+    Apply include/exclude patterns and the standalone option to a parsed schema.
+
+    ``linked_tables`` are tables with foreign keys to tables outside ``tables``
+    (e.g. another schema's, see schema_split); they are not standalone.
 
-    with open(actual_svg_path, 'w', encoding='utf-8') as f:
-        f.write(svg_content)
+    Returns:
+        Tuple of (filtered_tables, filtered_foreign_keys)
+    """
+    include_set = set(include_tables) if include_tables else None
+    connected = None
+    if not show_standalone:
+        connected = {fk[0] for fk in foreign_keys} | {fk[2] for fk in foreign_keys} | set(linked_tables or ())
+
+    filtered_tables = {}
+    for table_name, columns in tables.items():
+        # If include_tables is specified (whitelist mode), only include those tables
+        if include_set is not None and table_name not in include_set:
+            continue
+
+        # Skip if matches exclusion patterns (only applies when not in whitelist mode)
+        if should_exclude_table(table_name, exclude_patterns):
+            continue
+
+        # Skip standalone tables if option is disabled
+        if connected is not None and table_name not in connected:
+            continue
+
+        filtered_tables[table_name] = columns
+
+    filtered_foreign_keys = [
+        fk for fk in foreign_keys
+        if fk[0] in filtered_tables and fk[2] in filtered_tables
+    ]
+    return filtered_tables, filtered_foreign_keys
+
+
+def assign_table_colors(filtered_tables):
+    """Deterministic palette color per table, assigned in sorted name order."""
+    return {
+        table_name: color_palette[i % len(color_palette)]
+        for i, table_name in enumerate(sorted(filtered_tables.keys()))
+    }
+
+
+def visible_columns(table_name, columns, detail_level, key_columns):
+    """Columns to draw for a table at the given detail level."""
+    if detail_level == 'tables':
+        return []
+    if detail_level == 'keys':
+        return [
+            column for column in columns
+            if column.get('is_primary_key') or column.get('is_foreign_key')
+            or (table_name, column['name']) in key_columns
+        ]
+    return columns
+
+
+def build_graph_data(
+    filtered_tables,
+    filtered_foreign_keys,
+    table_colors,
+    include_tables=None,
+    triggers={},
+    views={},
+    functions={},
+    settings={},
+):
+    """
+    Build the ``graph-data`` payload consumed by svg_interactivity.js.
+
+    Args:
+        filtered_tables: Tables that survived include/exclude/standalone filtering
+        filtered_foreign_keys: Foreign keys between filtered tables
+        table_colors: Mapping of table name to its palette color
+        include_tables: Whitelist used for this render (focused ERDs)
+        triggers: Triggers keyed by table name
+        views: View definitions
+        functions: Function definitions
+        settings: SET statements from the dump
+
+    Returns:
+        Dict ready to be serialized with json.dumps
+    """
+    graph_data = {
+        "tables": {},
+        "edges": {},
+        "views": {},
+        "functions": {},
+        "settings": settings,  # Configuration settings from the database dump
+        "defaultColor": "#cccccc",
+        "highlightColor": "#ff0000",
+        "includedTables": list(filtered_tables.keys()) if include_tables else None,  # Store which tables were included (for focused ERD)
+    }
+
+    # Populate table data
+    for table_name in filtered_tables:
+        safe_name = sanitize_label(table_name)
+        table_data = filtered_tables[table_name]
+        column_count = len(table_data.get('columns', [])) if isinstance(table_data, dict) else 0
+
+        graph_data["tables"][safe_name] = {
+            "originalName": table_name,  # Store original name for reverse lookup
+            "defaultColor": table_colors[table_name],
+            "highlightColor": saturate_color(table_colors[table_name], saturation_factor=4.0),
+            "desaturatedColor": desaturate_color(table_colors[table_name], desaturation_factor=0.1),
+            "triggers": triggers.get(table_name, []),
+            "constraints": [],
+            "edges": [],
+            "columnCount": column_count,
+            "sql": table_data.get('lines', ''),  # Include the CREATE TABLE SQL
+            "type": table_data.get('type', 'table')  # Include the type (table or view)
+        }
+
+    # Populate edge data and update table data with connected edges
+    for i, (ltbl, col, rtbl, rcol, _line, edge_triggers, edge_constraints) in enumerate(filtered_foreign_keys):
+        edge_id = f"edge-{i}"
+        safe_ltbl = sanitize_label(ltbl)
+        safe_rtbl = sanitize_label(rtbl)
+
+        graph_data["edges"][edge_id] = {
+            "tables": [safe_ltbl, safe_rtbl],
+            "defaultColor": table_colors[ltbl],
+            "highlightColor": saturate_color(table_colors[ltbl], saturation_factor=2.0),
+            "desaturatedColor": desaturate_color(table_colors[ltbl], desaturation_factor=0.5),
+            "triggers": edge_triggers,
+            "constraints": edge_constraints,
+            "fkText": _line,
+            "fromColumn": col,
+            "toColumn": rcol,
+        }
+
+        if safe_ltbl in graph_data["tables"]:
+            graph_data["tables"][safe_ltbl]["edges"].append(edge_id)
+        if safe_rtbl in graph_data["tables"]:
+            graph_data["tables"][safe_rtbl]["edges"].append(edge_id)
+
+    # Populate views data
+    for view_name, view_data in views.items():
+        safe_name = sanitize_label(view_name)
+        graph_data["views"][safe_name] = {
+            "name": view_name,
+            "definition": view_data.get('definition', ''),
+            "type": "view"
+        }
+
+    # Populate functions data
+    for function_name, function_data in functions.items():
+        safe_name = sanitize_label(function_name)
+        graph_data["functions"][safe_name] = {
+            "name": function_name,
+            "parameters": function_data.get('parameters', ''),
+            "return_type": function_data.get('return_type', ''),
+            "language": function_data.get('language', ''),
+            "body": function_data.get('body', ''),
+            "full_definition": function_data.get('full_definition', '')
+        }
+
+    return graph_data
+
+
+def generate_schema_overview(
+    schemas,
+    cross_schema_edges,
+    output_file,
+    links=None,
+    rankdir='LR',
+    fontname='Arial',
+    fontsize=18,
+):
+    """
+    Generate an overview graph with one node per PostgreSQL schema.
+
+    Args:
+        schemas: Mapping of schema name to counts ({'tables': n, 'views': n, 'foreign_keys': n})
+        cross_schema_edges: Mapping of (from_schema, to_schema) to the number of foreign keys
+        output_file: Output file name (without extension)
+        links: Optional mapping of schema name to the href of its ERD
+        rankdir: Graphviz 'rankdir'
+        fontname: Font name for nodes and edges
+        fontsize: Font size for node labels
+
+    Returns:
+        Path to the generated SVG, or None if Graphviz failed
+    """
+    links = links or {}
+    dot = _digraph()(comment='Database schema overview', format='svg')
+    dot.attr(rankdir=rankdir, fontname=fontname)
+    dot.attr('node', shape='rect', style='rounded,filled', fontname=fontname, fontsize=str(fontsize))
+    dot.attr('edge', fontname=fontname, fontsize=str(max(int(fontsize) - 4, 8)))
+
+    colors = assign_table_colors(schemas)
+    for schema_name, counts in schemas.items():
+        safe_name = sanitize_label(schema_name)
+        label = (
+            f'<<TABLE BORDER="0" CELLSPACING="0" CELLPADDING="4">'
+            f'<TR><TD><B>{schema_name}</B></TD></TR>'
+            f'<TR><TD><FONT POINT-SIZE="{max(int(fontsize) - 4, 8)}">'
+            f'{counts.get("tables", 0)} tables · {counts.get("views", 0)} views · '
+            f'{counts.get("foreign_keys", 0)} FKs</FONT></TD></TR></TABLE>>'
+        )
+        node_attrs = {'id': safe_name, 'fillcolor': colors[schema_name]}
+        if schema_name in links:
+            node_attrs.update(href=links[schema_name], target='_top', tooltip=f"Open {schema_name} ERD")
+        dot.node(safe_name, label=label, **node_attrs)
+
+    for (src, dst), count in sorted(cross_schema_edges.items()):
+        dot.edge(
+            sanitize_label(src), sanitize_label(dst),
+            label=str(count), penwidth=str(min(1 + count / 2, 8)),
+            color=colors.get(src, '#999999'),
+        )
+
+    try:
+        svg_bytes = pipe_svg(dot)
+    except JobCancelled:
+        raise
+    except Exception as e:
+        log.error(f"Error rendering schema overview with Graphviz: {e}")
+        return None
+
+    svg_path = output_file + ".svg"
+    with open(svg_path, 'wb') as f:
+        f.write(svg_bytes if isinstance(svg_bytes, bytes) else svg_bytes.encode('utf-8'))
+    print(f"--- Schema overview generated successfully: {svg_path} ---")
+    return svg_path
@@ -4,15 +4,361 @@ ERD service for pypgsvg - handles ERD generation operations.
 
 Extracted from server.py for better testability and separation of concerns.
 """
+import contextvars
 import os
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 
 from .db_parser import parse_sql_dump, extract_constraint_info
-from .erd_generator import generate_erd_with_graphviz
+from .erd_generator import generate_erd_with_graphviz, filter_schema
 from .database_service import DatabaseService
+from .profiling import span
+
+
+# generate_erd_with_graphviz keywords read from generation_params, with their defaults
+GENERATION_DEFAULTS = {
+    'show_standalone': True,
+    'exclude_patterns': None,
+    'include_tables': None,
+    'packmode': 'array',
+    'rankdir': 'TB',
+    'esep': '8',
+    'fontname': 'Arial',
+    'fontsize': 18,
+    'node_fontsize': 14,
+    'edge_fontsize': 12,
+    'node_style': 'rounded,filled',
+    'node_shape': 'rect',
+    'node_sep': '0.5',
+    'rank_sep': '1.2',
+    'compress_details': False,
+    'detail_level': 'full',
+    'deterministic': False,
+    'skip_if_unchanged': False,
+    'content_addressed': False,
+    'minimap_from_coordinates': False,
+    'spill_svg': False,
+}
+
+# generation_params key restricting render_schema_model to one schema: set for
+# the server's view of a --split-schemas ERD so its reloads render that schema
+SCHEMA_PARAM = 'schema'
+
+# Settings that change which tables/edges survive filtering
+FILTER_KEYS = ('show_standalone', 'exclude_patterns', 'include_tables')
+
+
+def build_schema_model(
+    sql_dump: str,
+    view_columns_from_db: Optional[Dict[str, List[Dict[str, Any]]]] = None
+) -> Dict[str, Any]:
+    """
+    Parse a schema dump into the model consumed by render_schema_model.
+
+    Args:
+        sql_dump: SQL schema dump
+        view_columns_from_db: Optional view column data from database
+
+    Returns:
+        Dict with tables, foreign_keys, triggers, errors, views, functions,
+        settings and constraints
+    """
+    with span('parse', bytes=len(sql_dump)):
+        tables, foreign_keys, triggers, errors, views, functions, settings = parse_sql_dump(sql_dump)
+
+    # Enhance views with column information from database (if available)
+    for view_name, columns in (view_columns_from_db or {}).items():
+        if view_name in views:
+            views[view_name]['columns'] = columns
+        if view_name in tables:
+            tables[view_name]['columns'] = columns
+
+    return {
+        'tables': tables,
+        'foreign_keys': foreign_keys,
+        'triggers': triggers,
+        'errors': errors,
+        'views': views,
+        'functions': functions,
+        'settings': settings,
+        'constraints': extract_constraint_info(foreign_keys),
+    }
+
+
+def diff_schema_models(old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> Dict[str, List[str]]:
+    """
+    Summarize table/view changes between two parsed models.
+
+    Args:
+        old: Previous model (None means everything is new)
+        new: Current model
+
+    Returns:
+        Dict with sorted 'added', 'removed' and 'changed' table names; a table
+        counts as changed when its definition or its outgoing foreign keys differ
+    """
+    old_tables = old['tables'] if old else {}
+    new_tables = new['tables']
+
+    def outgoing(model):
+        fks: Dict[str, List] = {}
+        for fk in (model['foreign_keys'] if model else []):
+            fks.setdefault(fk[0], []).append(fk[:4])
+        return fks
+
+    old_fks, new_fks = outgoing(old), outgoing(new)
+    return {
+        'added': sorted(set(new_tables) - set(old_tables)),
+        'removed': sorted(set(old_tables) - set(new_tables)),
+        'changed': sorted(
+            name for name in set(new_tables) & set(old_tables)
+            if new_tables[name] != old_tables[name] or new_fks.get(name) != old_fks.get(name)
+        ),
+    }
+
+
+# Directions for schema_adjacency and table_neighborhood: 'referenced' follows
+# foreign keys to the tables they point at, 'referencing' to the tables
+# pointing at a table
+NEIGHBORHOOD_DIRECTIONS = ('both', 'referencing', 'referenced')
+
+
+def schema_adjacency(model: Dict[str, Any], direction: str = 'both') -> Dict[str, List[str]]:
+    """
+    Tables linked to each table by a foreign key.
+
+    Args:
+        model: Model returned by build_schema_model
+        direction: 'both', 'referenced' (tables this table's foreign keys
+                   point at) or 'referencing' (tables whose foreign keys
+                   point at this table)
+
+    Returns:
+        Mapping of table name to sorted neighbouring table names
+    """
+    if direction not in NEIGHBORHOOD_DIRECTIONS:
+        raise ValueError(f"Unknown direction: {direction}")
+    adjacency: Dict[str, set] = {name: set() for name in model['tables']}
+    for fk in model['foreign_keys']:
+        source, target = fk[0], fk[2]
+        if direction != 'referencing':
+            adjacency.setdefault(source, set()).add(target)
+        if direction != 'referenced':
+            adjacency.setdefault(target, set()).add(source)
+    return {name: sorted(neighbours - {name}) for name, neighbours in adjacency.items()}
+
+
+def table_neighborhood(adjacency: Dict[str, List[str]], seeds: List[str], hops: int) -> Dict[str, int]:
+    """
+    Tables within ``hops`` foreign-key steps of the seed tables.
+
+    A breadth-first walk of an index from schema_adjacency, so the cost is
+    proportional to the neighbourhood rather than the schema.
+
+    Args:
+        adjacency: Index returned by schema_adjacency
+        seeds: Starting table names (must be keys of ``adjacency``)
+        hops: Radius; 0 returns just the seeds
+
+    Returns:
+        Mapping of table name to its distance from the nearest seed, in
+        breadth-first order
+    """
+    distances = {seed: 0 for seed in seeds}
+    frontier = list(distances)
+    for hop in range(1, hops + 1):
+        next_frontier = []
+        for table in frontier:
+            for neighbour in adjacency.get(table, ()):
+                if neighbour not in distances:
+                    distances[neighbour] = hop
+                    next_frontier.append(neighbour)
+        if not next_frontier:
+            break
+        frontier = next_frontier
+    return distances
+
+
+def hub_tables(adjacency: Dict[str, List[str]], count: int) -> List[str]:
+    """
+    The ``count`` most connected tables, ties broken by name.
+
+    Args:
+        adjacency: Index returned by schema_adjacency
+        count: Number of tables to return
+
+    Returns:
+        Table names with at least one neighbour, most neighbours first
+    """
+    ranked = sorted((name for name, neighbours in adjacency.items() if neighbours),
+                    key=lambda name: (-len(adjacency[name]), name))
+    return ranked[:count]
+
+
+def render_schema_model(
+    model: Dict[str, Any],
+    output_file: str,
+    input_source: str,
+    generation_params: Dict[str, Any],
+    **overrides: Any
+) -> str:
+    """
+    Render a parsed schema model to ``output_file``.svg.
+
+    Args:
+        model: Model returned by build_schema_model
+        output_file: Path for output SVG file (without extension)
+        input_source: Source description for metadata
+        generation_params: Parameters for ERD generation; SCHEMA_PARAM, when
+                           set, renders only that schema (see schema_split)
+        **overrides: Keyword arguments passed to generate_erd_with_graphviz as-is
+
+    Returns:
+        Path to the generated SVG file
+
+    Raises:
+        JobCancelled: If the render's job was cancelled
+        Exception: If Graphviz fails to render
+    """
+    if generation_params.get(SCHEMA_PARAM):
+        from .schema_split import select_schema
+        model = select_schema(model, generation_params[SCHEMA_PARAM])
+
+    kwargs = {
+        key: generation_params.get(key, default)
+        for key, default in GENERATION_DEFAULTS.items()
+    }
+    kwargs.update(
+        constraints=model['constraints'],
+        triggers=model['triggers'],
+        views=model['views'],
+        functions=model['functions'],
+        settings=model['settings'],
+    )
+    if model.get('linked_tables'):
+        # A schema's tables whose foreign keys all cross to other schemas are not standalone
+        kwargs['filtered'] = filter_schema(
+            model['tables'], model['foreign_keys'], *[kwargs[key] for key in FILTER_KEYS],
+            linked_tables=model['linked_tables']
+        )
+    kwargs.update(overrides)
 
+    with span('render', output=os.path.basename(output_file)):
+        svg_path = generate_erd_with_graphviz(
+            model['tables'], model['foreign_keys'], output_file,
+            input_file_path=input_source,
+            **kwargs
+        )
+    if svg_path is None:
+        # generate_erd_with_graphviz logs Graphviz errors and returns None
+        raise Exception(f"Failed to render {output_file}.svg with Graphviz")
+    if kwargs['content_addressed']:
+        # The file name depends on the cache key computed during rendering
+        return svg_path
+    return output_file + ".svg"
+
+
+
+def render_schema_variants(
+    model: Dict[str, Any],
+    output_file: str,
+    input_source: str,
+    generation_params: Dict[str, Any],
+    variants: Dict[str, Dict[str, Any]],
+    max_workers: Optional[int] = None
+) -> Dict[str, str]:
+    """
+    Render several variants of one parsed model concurrently.
+
+    Each variant overrides ``generation_params`` and is written to
+    ``<output_file>_<name>.svg``. Variants with the same include/exclude/
+    standalone settings share one filter_schema pass; Graphviz layouts run
+    in parallel threads since the heavy lifting happens in ``dot``.
+
+    Args:
+        model: Model returned by build_schema_model
+        output_file: Base path for output SVG files (without extension)
+        input_source: Source description for metadata
+        generation_params: Settings shared by every variant
+        variants: Mapping of variant name to setting overrides
+        max_workers: Render threads (default: one per variant, capped at CPU count)
+
+    Returns:
+        Mapping of variant name to generated SVG path
+    """
+    filtered_by_key: Dict[Any, Any] = {}
+    jobs = []
+    for name, overrides in variants.items():
+        params = dict(generation_params)
+        params.update(overrides)
+        filter_args = [
+            params.get(key, GENERATION_DEFAULTS[key]) for key in FILTER_KEYS
+        ]
+        filter_key = tuple(
+            tuple(value) if isinstance(value, (list, tuple)) else value
+            for value in filter_args
+        )
+        if filter_key not in filtered_by_key:
+            filtered_by_key[filter_key] = filter_schema(
+                model['tables'], model['foreign_keys'], *filter_args
+            )
+        jobs.append((name, params, filtered_by_key[filter_key]))
+
+    workers = max_workers or min(len(jobs), os.cpu_count() or 1) or 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            # copy_context keeps the caller's --profile spans in worker threads
+            name: pool.submit(
+                contextvars.copy_context().run, render_schema_model,
+                model, f"{output_file}_{name}", input_source, params, filtered=filtered
+            )
+            for name, params, filtered in jobs
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+
+def parse_variant_spec(spec: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Parse a CLI variant spec ``NAME:key=value[;key=value...]``.
+
+    List settings (include_tables, exclude_patterns) take comma-separated
+    values, e.g. ``core:include_tables=users,orders;detail_level=keys``.
+
+    Raises:
+        ValueError: If the spec is malformed or names an unknown setting
+    """
+    name, _, body = spec.partition(':')
+    name = name.strip()
+    if not name:
+        raise ValueError(f"Variant spec needs a name: {spec!r}")
+
+    overrides: Dict[str, Any] = {}
+    for item in filter(None, (part.strip() for part in body.split(';'))):
+        key, sep, value = item.partition('=')
+        key = key.strip().replace('-', '_')
+        if not sep or key not in GENERATION_DEFAULTS:
+            raise ValueError(f"Invalid setting {item!r} in variant {name!r}")
+        overrides[key] = parse_setting(key, value)
+    return name, overrides
+
+
+def parse_setting(key: str, value: str) -> Any:
+    """
+    Convert a generation setting given as text to its type in GENERATION_DEFAULTS.
+
+    Raises:
+        ValueError: If an integer setting is not a number
+    """
+    value = value.strip()
+    if key in ('include_tables', 'exclude_patterns'):
+        return [v.strip() for v in value.split(',') if v.strip()]
+    if isinstance(GENERATION_DEFAULTS[key], bool):
+        return value.lower() not in ('false', '0', 'no')
+    if isinstance(GENERATION_DEFAULTS[key], int):
+        return int(value)
+    return value
 
 class ERDService:
     """Service class for ERD generation operations."""
@@ -26,6 +372,37 @@ class ERDService:
         """
         self.database_service = database_service
 
+    def load_database_model(
+        self,
+        host: str,
+        port: str,
+        database: str,
+        user: str,
+        password: str
+    ) -> Dict[str, Any]:
+        """
+        Schema model of a database, read with the service's schema backend.
+
+        The 'pg_dump' backend parses ``pg_dump -s`` output and fetches view
+        columns separately; the 'catalog' backend queries the catalogs
+        directly (see catalog_backend).
+
+        Returns:
+            Model as returned by build_schema_model
+        """
+        if self.database_service.schema_backend == 'catalog':
+            with span('read', source='catalog'):
+                return self.database_service.fetch_catalog_model(host, port, database, user, password)
+
+        with span('read', source='database'):
+            sql_dump = self.database_service.fetch_schema(host, port, database, user, password)
+
+        # Also fetch view column information
+        view_columns_from_db = self.database_service.fetch_view_columns(
+            host, port, database, user, password
+        )
+        return build_schema_model(sql_dump, view_columns_from_db)
+
     def generate_from_database(
         self,
         host: str,
@@ -55,57 +432,16 @@ class ERDService:
             Exception: If schema fetch or generation fails
         """
         print(f"Generating ERD from {database}@{host}:{port}...")
-        sql_dump = self.database_service.fetch_schema(host, port, database, user, password)
-
-        # Also fetch view column information
-        view_columns_from_db = self.database_service.fetch_view_columns(
-            host, port, database, user, password
-        )
-
-        # Parse and generate new ERD
-        tables, foreign_keys, triggers, errors, views, functions, settings = parse_sql_dump(sql_dump)
-
-        # Enhance views with column information from database (if available)
-        for view_name, columns in view_columns_from_db.items():
-            if view_name in views:
-                views[view_name]['columns'] = columns
-            if view_name in tables:
-                tables[view_name]['columns'] = columns
-
-        constraints = extract_constraint_info(foreign_keys)
+        model = self.load_database_model(host, port, database, user, password)
 
-        if errors:
+        if model['errors']:
             print("Parsing errors encountered:")
-            for error in errors:
+            for error in model['errors']:
                 print(f"  - {error}")
 
         input_source = f"{user}@{host}:{port}/{database}"
 
-        generate_erd_with_graphviz(
-            tables, foreign_keys, output_file,
-            input_file_path=input_source,
-            show_standalone=generation_params.get('show_standalone', True),
-            exclude_patterns=generation_params.get('exclude_patterns'),
-            include_tables=generation_params.get('include_tables'),
-            packmode=generation_params.get('packmode', 'array'),
-            rankdir=generation_params.get('rankdir', 'TB'),
-            esep=generation_params.get('esep', '8'),
-            fontname=generation_params.get('fontname', 'Arial'),
-            fontsize=generation_params.get('fontsize', 18),
-            node_fontsize=generation_params.get('node_fontsize', 14),
-            edge_fontsize=generation_params.get('edge_fontsize', 12),
-            node_style=generation_params.get('node_style', 'rounded,filled'),
-            node_shape=generation_params.get('node_shape', 'rect'),
-            node_sep=generation_params.get('node_sep', '0.5'),
-            rank_sep=generation_params.get('rank_sep', '1.2'),
-            constraints=constraints,
-            triggers=triggers,
-            views=views,
-            functions=functions,
-            settings=settings,
-        )
-
-        svg_file = output_file + ".svg"
+        svg_file = render_schema_model(model, output_file, input_source, generation_params)
         print(f"ERD generated successfully! File: {svg_file}")
         return svg_file, True
 
@@ -135,46 +471,73 @@ class ERDService:
         if not os.path.exists(filepath):
             raise FileNotFoundError(f"File not found: {filepath}")
 
-        with open(filepath, 'r', encoding='utf-8') as f:
+        with span('read', source='file'), open(filepath, 'r', encoding='utf-8') as f:
             sql_dump = f.read()
 
         # Parse and generate new ERD
-        tables, foreign_keys, triggers, errors, views, functions, settings = parse_sql_dump(sql_dump)
-        constraints = extract_constraint_info(foreign_keys)
+        model = build_schema_model(sql_dump)
 
-        if errors:
+        if model['errors']:
             print("Parsing errors encountered:")
-            for error in errors:
+            for error in model['errors']:
                 print(f"  - {error}")
 
-        generate_erd_with_graphviz(
-            tables, foreign_keys, output_file,
-            input_file_path=filepath,
-            show_standalone=generation_params.get('show_standalone', True),
-            exclude_patterns=generation_params.get('exclude_patterns'),
-            include_tables=generation_params.get('include_tables'),
-            packmode=generation_params.get('packmode', 'array'),
-            rankdir=generation_params.get('rankdir', 'TB'),
-            esep=generation_params.get('esep', '8'),
-            fontname=generation_params.get('fontname', 'Arial'),
-            fontsize=generation_params.get('fontsize', 18),
-            node_fontsize=generation_params.get('node_fontsize', 14),
-            edge_fontsize=generation_params.get('edge_fontsize', 12),
-            node_style=generation_params.get('node_style', 'rounded,filled'),
-            node_shape=generation_params.get('node_shape', 'rect'),
-            node_sep=generation_params.get('node_sep', '0.5'),
-            rank_sep=generation_params.get('rank_sep', '1.2'),
-            constraints=constraints,
-            triggers=triggers,
-            views=views,
-            functions=functions,
-            settings=settings,
-        )
-
-        svg_file = output_file + ".svg"
+        svg_file = render_schema_model(model, output_file, filepath, generation_params)
         print("ERD generated successfully!")
         return svg_file, True
 
+    def generate_variants_from_file(
+        self,
+        filepath: str,
+        output_file: str,
+        generation_params: Dict[str, Any],
+        variants: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, str]:
+        """
+        Read and parse a dump once, then render every variant from that model.
+
+        Args:
+            filepath: Path to SQL dump file
+            output_file: Base path for output SVG files (without extension)
+            generation_params: Settings shared by every variant
+            variants: Mapping of variant name to setting overrides
+
+        Returns:
+            Mapping of variant name to generated SVG path
+
+        Raises:
+            FileNotFoundError: If input file doesn't exist
+        """
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(f"File not found: {filepath}")
+
+        with span('read', source='file'), open(filepath, 'r', encoding='utf-8') as f:
+            sql_dump = f.read()
+
+        model = build_schema_model(sql_dump)
+        return render_schema_variants(model, output_file, filepath, generation_params, variants)
+
+    def generate_variants_from_database(
+        self,
+        host: str,
+        port: str,
+        database: str,
+        user: str,
+        password: str,
+        output_file: str,
+        generation_params: Dict[str, Any],
+        variants: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, str]:
+        """
+        Fetch and parse a database schema once, then render every variant.
+
+        Returns:
+            Mapping of variant name to generated SVG path
+        """
+        model = self.load_database_model(host, port, database, user, password)
+        input_source = f"{user}@{host}:{port}/{database}"
+        return render_schema_variants(model, output_file, input_source, generation_params, variants)
+
     def generate_focused_erd(
         self,
         sql_dump: str,
@@ -182,7 +545,9 @@ class ERDService:
         output_dir: str,
         input_source: str,
         graphviz_settings: Dict[str, Any],
-        view_columns_from_db: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        view_columns_from_db: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        model: Optional[Dict[str, Any]] = None,
+        output_name: str = 'focused_erd'
     ) -> str:
         """
         Generate focused ERD with only selected tables (interactive).
@@ -194,6 +559,8 @@ class ERDService:
             input_source: Source description for metadata
             graphviz_settings: Graphviz layout settings
             view_columns_from_db: Optional view column data from database
+            model: Already parsed model of ``sql_dump`` (skips parsing)
+            output_name: Output file name in ``output_dir`` (without extension)
 
         Returns:
             Path to generated SVG file
@@ -202,47 +569,19 @@ class ERDService:
             Exception: If parsing or generation fails
         """
         # Parse the schema
-        tables, foreign_keys, triggers, errors, views, functions, settings = parse_sql_dump(sql_dump)
-
-        # Enhance views with column information from database (if available)
-        if view_columns_from_db:
-            for view_name, columns in view_columns_from_db.items():
-                if view_name in views:
-                    views[view_name]['columns'] = columns
-                if view_name in tables:
-                    tables[view_name]['columns'] = columns
-
-        constraints = extract_constraint_info(foreign_keys)
+        if model is None:
+            model = build_schema_model(sql_dump, view_columns_from_db)
 
         # Generate output filename
-        focused_filename = 'focused_erd'
-        output_file = os.path.join(output_dir, focused_filename)
+        output_file = os.path.join(output_dir, output_name)
 
         # Generate interactive ERD (with JavaScript/interactivity)
         # Use include_tables to filter to only provided tables
-        generate_erd_with_graphviz(
-            tables,
-            foreign_keys,
-            output_file,
-            input_file_path=input_source,
+        render_schema_model(
+            model, output_file, input_source, graphviz_settings,
             show_standalone=False,  # Don't show standalone tables
             exclude_patterns=None,
             include_tables=table_ids,  # WHITELIST: Only include provided tables
-            packmode=graphviz_settings.get('packmode', 'array'),
-            rankdir=graphviz_settings.get('rankdir', 'TB'),
-            esep=graphviz_settings.get('esep', '8'),
-            fontname=graphviz_settings.get('fontname', 'Arial'),
-            fontsize=graphviz_settings.get('fontsize', 18),
-            node_fontsize=graphviz_settings.get('node_fontsize', 14),
-            edge_fontsize=graphviz_settings.get('edge_fontsize', 12),
-            node_style=graphviz_settings.get('node_style', 'rounded,filled'),
-            node_shape=graphviz_settings.get('node_shape', 'rect'),
-            node_sep=graphviz_settings.get('node_sep', '0.5'),
-            rank_sep=graphviz_settings.get('rank_sep', '1.2'),
-            constraints=constraints,
-            triggers=triggers,
-            views=views,
-            functions=functions,
             settings=graphviz_settings,
         )
 
@@ -255,7 +594,8 @@ class ERDService:
         output_dir: str,
         input_source: str,
         graphviz_settings: Dict[str, Any],
-        view_columns_from_db: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        view_columns_from_db: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        model: Optional[Dict[str, Any]] = None
     ) -> str:
         """
         Generate standalone SVG with only selected tables (no JavaScript).
@@ -267,6 +607,7 @@ class ERDService:
             input_source: Source description for metadata
             graphviz_settings: Graphviz layout settings
             view_columns_from_db: Optional view column data from database
+            model: Already parsed model of ``sql_dump`` (skips parsing)
 
         Returns:
             SVG content as string
@@ -275,17 +616,8 @@ class ERDService:
             Exception: If parsing or generation fails
         """
         # Parse the schema
-        tables, foreign_keys, triggers, errors, views, functions, settings = parse_sql_dump(sql_dump)
-
-        # Enhance views with column information from database (if available)
-        if view_columns_from_db:
-            for view_name, columns in view_columns_from_db.items():
-                if view_name in views:
-                    views[view_name]['columns'] = columns
-                if view_name in tables:
-                    tables[view_name]['columns'] = columns
-
-        constraints = extract_constraint_info(foreign_keys)
+        if model is None:
+            model = build_schema_model(sql_dump, view_columns_from_db)
 
         # Generate temporary SVG file with selected elements only
         with tempfile.NamedTemporaryFile(
@@ -301,29 +633,11 @@ class ERDService:
 
         # Generate standalone SVG (without JavaScript/interactivity)
         # Use include_tables to filter to only selected tables
-        generate_erd_with_graphviz(
-            tables,
-            foreign_keys,
-            output_file_base,
-            input_file_path=input_source,
+        render_schema_model(
+            model, output_file_base, input_source, graphviz_settings,
             show_standalone=True,  # Show all selected tables (standalone or not)
             exclude_patterns=None,
             include_tables=table_ids,  # WHITELIST: Only include selected tables
-            packmode=graphviz_settings.get('packmode', 'array'),
-            rankdir=graphviz_settings.get('rankdir', 'TB'),
-            esep=graphviz_settings.get('esep', '8'),
-            fontname=graphviz_settings.get('fontname', 'Arial'),
-            fontsize=graphviz_settings.get('fontsize', 18),
-            node_fontsize=graphviz_settings.get('node_fontsize', 14),
-            edge_fontsize=graphviz_settings.get('edge_fontsize', 12),
-            node_style=graphviz_settings.get('node_style', 'rounded,filled'),
-            node_shape=graphviz_settings.get('node_shape', 'rect'),
-            node_sep=graphviz_settings.get('node_sep', '0.5'),
-            rank_sep=graphviz_settings.get('rank_sep', '1.2'),
-            constraints=constraints,
-            triggers=triggers,
-            views=views,
-            functions=functions,
             settings=graphviz_settings,
         )
 
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Compressed, ETagged representations of files served by the ERD server.
+
+Each served file is turned once per version (path, mtime, size) into an
+identity body plus gzip and, when the optional ``brotli`` package is
+installed, brotli variants. Precompressed sidecars next to a file
+(``erd.svg.gz``, ``erd.svg.br``) are used as-is when they are at least as new
+as the file; other variants are written to the server's cache directory so
+every response body is a plain file that can be sent with ``sendfile``.
+
+Each coding gets its own strong ETag derived from the served identity body,
+so revalidation works whichever coding the client cached.
+"""
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from .metrics import cache_lookup
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+
+# Content types worth compressing; images and archives are sent as-is
+COMPRESSIBLE_TYPES = ('text/', 'image/svg+xml', 'application/json', 'application/javascript')
+
+# Preferred first when the client accepts several
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+SIDECAR_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available) -> Optional[str]:
+    """
+    Pick a content coding from an ``Accept-Encoding`` header.
+
+    Args:
+        accept_encoding: Header value (None means identity only)
+        available: Codings the representation exists in
+
+    Returns:
+        'br', 'gzip' or None for identity
+    """
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip().lower()] = q
+    best = None
+    for coding in ENCODINGS:
+        if coding not in available:
+            continue
+        q = weights.get(coding, weights.get('*', 0.0))
+        if q > 0 and (best is None or q > best[1]):
+            best = (coding, q)
+    return best[0] if best else None
+
+
+def parse_etags(if_none_match: Optional[str]):
+    """Entity tags listed in an ``If-None-Match`` header, weak prefixes dropped."""
+    if not if_none_match:
+        return set()
+    return {tag.strip()[2:] if tag.strip().startswith('W/') else tag.strip()
+            for tag in if_none_match.split(',')}
+
+
+class Representation:
+    """One version of a served file: content hash, content type and body file per coding."""
+
+    __slots__ = ('digest', 'content_type', 'files')
+
+    def __init__(self, digest: str, content_type: str, files: Dict[Optional[str], str]):
+        self.digest = digest
+        self.content_type = content_type
+        self.files = files
+
+    def etag(self, coding: Optional[str] = None) -> str:
+        """Strong ETag of one coding; every coding is a distinct entity."""
+        return f'"{self.digest}-{coding}"' if coding else f'"{self.digest}"'
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """True when an ``If-None-Match`` header names any coding of this version."""
+        tags = parse_etags(if_none_match)
+        return '*' in tags or any(self.etag(coding) in tags for coding in self.files)
+
+    def size(self, coding: Optional[str]) -> int:
+        return os.path.getsize(self.files[coding])
+
+
+class RepresentationCache:
+    """Builds and remembers Representations, writing variants to a private directory."""
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        # Created on first write, so unused caches touch no disk
+        self.directory = None
+        self._entries: 'OrderedDict[tuple, Representation]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        """Forget every entry and remove the cache directory."""
+        with self._lock:
+            self._entries.clear()
+            directory, self.directory = self.directory, None
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def get(self, path: str, content_type: str,
+            transform: Optional[Callable[[bytes], bytes]] = None) -> Representation:
+        """
+        Representation of ``path``, built on first request for each file version.
+
+        Args:
+            path: File to serve
+            content_type: Content-Type of the file
+            transform: Rewrites the body before serving (sidecars are then ignored)
+
+        Raises:
+            OSError: If the file cannot be read
+        """
+        st = os.stat(path)
+        key = (os.path.abspath(path), st.st_mtime_ns, st.st_size, transform)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        cache_lookup('http', entry is not None)
+        if entry is not None:
+            return entry
+
+        while True:
+            entry = self._build(path, st, content_type, transform)
+            with self._lock:
+                # Variants are named by content, so an eviction while building
+                # may have removed one this entry reuses; build it again
+                if all(os.path.exists(name) for name in self._own_files(entry)):
+                    self._entries[key] = entry
+                    self._evict()
+                    return entry
+
+    def _own_files(self, entry: Representation):
+        """Files of ``entry`` written to the cache directory (not the served file or its sidecars)."""
+        return [name for name in entry.files.values()
+                if self.directory is not None and os.path.dirname(name) == self.directory]
+
+    def _evict(self) -> None:
+        """Drop the oldest entries and delete their variants no remaining entry uses. Holds the lock."""
+        evicted = []
+        while len(self._entries) > self.max_entries:
+            evicted.append(self._entries.popitem(last=False)[1])
+        if not evicted:
+            return
+        in_use = {name for entry in self._entries.values() for name in entry.files.values()}
+        for entry in evicted:
+            for name in self._own_files(entry):
+                # A response still sending the file keeps its open handle
+                if name not in in_use and os.path.exists(name):
+                    os.remove(name)
+
+    def _write(self, name: str, body: bytes) -> str:
+        with self._lock:
+            if self.directory is None:
+                self.directory = tempfile.mkdtemp(prefix='pypgsvg-http-')
+            directory = self.directory
+        target = os.path.join(directory, name)
+        if not os.path.exists(target):
+            fd, tmp = tempfile.mkstemp(dir=directory)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(body)
+            os.replace(tmp, target)
+        return target
+
+    def _build(self, path: str, st: os.stat_result, content_type: str,
+               transform: Optional[Callable[[bytes], bytes]]) -> Representation:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        body = transform(raw) if transform is not None else raw
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        files: Dict[Optional[str], str] = {
+            None: path if transform is None else self._write(digest, body)
+        }
+        if not is_compressible(content_type):
+            return Representation(digest, content_type, files)
+
+        for coding in ENCODINGS:
+            sidecar = path + SIDECAR_SUFFIXES[coding]
+            if transform is None and os.path.exists(sidecar) and os.stat(sidecar).st_mtime_ns >= st.st_mtime_ns:
+                files[coding] = sidecar
+            elif coding == 'gzip':
+                files[coding] = self._write(digest + '.gz', gzip.compress(body, compresslevel=6, mtime=0))
+            else:
+                files[coding] = self._write(digest + '.br', brotli.compress(body))
+        return Representation(digest, content_type, files)
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Background generation jobs for the ERD server.
+
+A job runs one API request (reload, apply settings, focused/selected ERD,
+layout optimization) on its own thread and records its progress phase by
+phase from the instrumentation spans. Clients poll the job or stream its
+events, and cancelling a job kills the ``pg_dump``/``psql``/``dot`` process
+it is waiting on. Subprocesses are started through ``run_cancellable`` so
+that the job owning the current context can terminate them.
+"""
+import itertools
+import os
+import subprocess
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+from .metrics import SUBPROCESS_FAILURES, observe_subprocess
+from .profiling import Span
+from .render_pool import RenderLimitExceeded, get_pool
+
+
+_TOKEN = ContextVar('pypgsvg_cancel_token', default=None)  # type: ContextVar[Optional[CancelToken]]
+
+JOB_STATES = ('queued', 'running', 'succeeded', 'failed', 'cancelled')
+FINISHED_STATES = ('succeeded', 'failed', 'cancelled')
+
+
+class JobCancelled(Exception):
+    """Raised inside a job's work once the job has been cancelled."""
+
+
+class CancelToken:
+    """Cancellation flag plus the subprocesses to kill when it is set."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._processes = set()
+        self._children = weakref.WeakSet()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """Set the flag, cancel child tokens and kill every registered subprocess."""
+        self._event.set()
+        with self._lock:
+            processes = list(self._processes)
+            children = list(self._children)
+        for child in children:
+            child.cancel()
+        for process in processes:
+            try:
+                process.kill()
+            except OSError:
+                pass
+
+    def check(self) -> None:
+        """Raise JobCancelled if the token is cancelled."""
+        if self._event.is_set():
+            raise JobCancelled("Job cancelled")
+
+    def child(self) -> 'CancelToken':
+        """New token cancelled along with this one, but cancellable on its own."""
+        token = CancelToken()
+        with self._lock:
+            self._children.add(token)
+        if self.cancelled:
+            token.cancel()
+        return token
+
+    def register(self, process: subprocess.Popen) -> None:
+        with self._lock:
+            self._processes.add(process)
+        if self.cancelled:
+            process.kill()
+
+    def unregister(self, process: subprocess.Popen) -> None:
+        with self._lock:
+            self._processes.discard(process)
+
+
+def current_token() -> Optional[CancelToken]:
+    """Cancel token of the job running in this context, if any."""
+    return _TOKEN.get()
+
+
+@contextmanager
+def cancel_scope(token: CancelToken):
+    """Make ``token`` the current cancel token for run_cancellable/pipe_svg."""
+    reset = _TOKEN.set(token)
+    try:
+        yield token
+    finally:
+        _TOKEN.reset(reset)
+
+
+def run_cancellable(cmd: List[str], **kwargs: Any) -> subprocess.CompletedProcess:
+    """
+    ``subprocess.run`` that the current job can interrupt.
+
+    Outside a job this is plain ``subprocess.run``. Inside one, the process is
+    registered with the job's cancel token so cancelling kills it, and
+    JobCancelled is raised instead of returning its partial output. Either
+    way the run time and any failure are recorded in the subprocess metrics.
+    """
+    command = os.path.basename(str(cmd[0] if isinstance(cmd, (list, tuple)) else cmd))
+    token = _TOKEN.get()
+    if token is None:
+        with observe_subprocess(command):
+            result = subprocess.run(cmd, **kwargs)
+        if getattr(result, 'returncode', 0) != 0:
+            SUBPROCESS_FAILURES.inc(command=command)
+        return result
+
+    token.check()
+    input = kwargs.pop('input', None)
+    check = kwargs.pop('check', False)
+    timeout = kwargs.pop('timeout', None)
+    if kwargs.pop('capture_output', False):
+        kwargs['stdout'] = kwargs['stderr'] = subprocess.PIPE
+    if input is not None:
+        kwargs['stdin'] = subprocess.PIPE
+    with observe_subprocess(command), subprocess.Popen(cmd, **kwargs) as process:
+        token.register(process)
+        try:
+            stdout, stderr = process.communicate(input, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            raise
+        finally:
+            token.unregister(process)
+        # Killed by cancellation counts as a failure
+        token.check()
+    result = subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+    if result.returncode != 0:
+        SUBPROCESS_FAILURES.inc(command=command)
+    if check:
+        result.check_returncode()
+    return result
+
+
+def _run_dot(dot, args: List[str], pool) -> subprocess.CompletedProcess:
+    """Run ``dot`` on the graph's source directly, under the pool's rlimits."""
+    engine = getattr(dot, 'engine', 'dot') or 'dot'
+    try:
+        return run_cancellable(
+            pool.command([engine] + args),
+            input=dot.source.encode(getattr(dot, 'encoding', None) or 'utf-8'),
+            capture_output=True, check=True, preexec_fn=pool.preexec_fn(),
+        )
+    except subprocess.CalledProcessError as e:
+        if not pool.limits_processes:
+            raise
+        stderr = (e.stderr or b'').decode('utf-8', 'replace').strip()
+        raise RenderLimitExceeded(
+            f"dot failed under the render limits ({pool.describe_limits()}): {stderr or f'exit {e.returncode}'}"
+        ) from e
+
+
+def pipe_svg(dot) -> bytes:
+    """
+    Lay out a graphviz graph as SVG.
+
+    The layout waits for a slot in the process-wide DotPool. graphviz's own
+    ``pipe`` cannot be interrupted or given rlimits, so inside a job, or
+    when the pool has memory/CPU limits, ``dot`` is run directly through
+    run_cancellable.
+    """
+    pool = get_pool()
+    token = _TOKEN.get()
+    with pool.slot(check=token.check if token is not None else None):
+        if token is None and not pool.limits_processes:
+            with observe_subprocess(getattr(dot, 'engine', 'dot') or 'dot'):
+                return dot.pipe(format='svg')
+        return _run_dot(dot, ['-Tsvg'], pool).stdout
+
+
+def render_svg_file(dot, path: str) -> None:
+    """
+    Lay out a graphviz graph straight to an SVG file (no captured output).
+
+    Takes a DotPool slot and applies its limits like pipe_svg.
+    """
+    pool = get_pool()
+    token = _TOKEN.get()
+    with pool.slot(check=token.check if token is not None else None):
+        if token is None and not pool.limits_processes:
+            with observe_subprocess(getattr(dot, 'engine', 'dot') or 'dot'):
+                dot.render(outfile=path, format='svg', cleanup=True)
+            return
+        _run_dot(dot, ['-Tsvg', '-o', path], pool)
+
+
+class Job:
+    """One background request and its progress."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, kind: str):
+        self.id = f"{next(self._ids)}-{uuid.uuid4().hex[:8]}"
+        self.kind = kind
+        self.state = 'queued'
+        self.phase = None
+        self.progress: List[Dict[str, Any]] = []
+        self.response: Optional[Dict[str, Any]] = None
+        # (content type, body) of the finished request, served at .../result
+        self.result = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.finished = None
+        self.token = CancelToken()
+        self._changed = threading.Condition()
+        self._version = 0
+
+    @property
+    def done(self) -> bool:
+        return self.state in FINISHED_STATES
+
+    def _touch(self) -> None:
+        with self._changed:
+            self._version += 1
+            self._changed.notify_all()
+
+    def on_span(self, event: str, span: Span) -> None:
+        """Profiler listener: record phase starts/ends and honour cancellation."""
+        if event == 'start':
+            self.phase = span.name
+        else:
+            self.progress.append({'phase': span.name, 'seconds': round(span.seconds, 4),
+                                  'counts': dict(span.counts)})
+        self._touch()
+        self.token.check()
+
+    def wait(self, since: int, timeout: float) -> int:
+        """Block until the job changes after version ``since``; returns the new version."""
+        with self._changed:
+            self._changed.wait_for(lambda: self._version > since or self.done, timeout)
+            return self._version
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'state': self.state,
+            'phase': self.phase,
+            'progress': list(self.progress),
+            'response': self.response,
+            'error': self.error,
+            'created': self.created,
+            'finished': self.finished,
+        }
+
+
+class JobManager:
+    """Runs jobs on daemon threads and keeps the most recent finished ones."""
+
+    def __init__(self, max_finished: int = 20):
+        """
+        Initialize the manager.
+
+        Args:
+            max_finished: Finished jobs to retain (least recently used are
+                          dropped); running jobs are always kept
+        """
+        self.max_finished = max_finished
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, work: Callable[[Job], Optional[Dict[str, Any]]]) -> Job:
+        """
+        Start ``work(job)`` in the background.
+
+        ``work`` returns the job's response; it runs with the job's cancel
+        token active, so run_cancellable/pipe_svg calls can be killed.
+        """
+        job = Job(kind)
+        with self._lock:
+            self._jobs[job.id] = job
+        threading.Thread(target=self._run, args=(job, work), name=f"pypgsvg-job-{job.id}",
+                         daemon=True).start()
+        return job
+
+    def _run(self, job: Job, work: Callable[[Job], Optional[Dict[str, Any]]]) -> None:
+        token = _TOKEN.set(job.token)
+        state = 'failed'
+        try:
+            job.token.check()
+            job.state = 'running'
+            job._touch()
+            job.response = work(job)
+            state = 'succeeded'
+        except JobCancelled:
+            pass
+        except Exception as e:
+            job.error = str(e)
+        finally:
+            _TOKEN.reset(token)
+            job.phase = None
+            job.finished = time.time()
+            # Set last: readers treat a finished state as the final snapshot
+            job.state = 'cancelled' if job.token.cancelled else state
+            job._touch()
+            self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            finished = [job_id for job_id, job in self._jobs.items() if job.done]
+            for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+                del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job, marking it recently used."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                self._jobs.move_to_end(job_id)
+            return job
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a job; returns None if it is unknown."""
+        job = self.get(job_id)
+        if job is not None and not job.done:
+            job.token.cancel()
+            job._touch()
+        return job
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [job.to_dict() for job in self._jobs.values()]
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Memory budget planning for pypgsvg's --max-memory mode.
+
+Estimates the peak memory of the parse -> layout -> post-process pipeline from
+the dump size and turns on lower-memory strategies, cheapest first, until the
+estimate fits the budget:
+
+``stream_read``
+    Read the dump line by line, dropping COPY data blocks and sequence
+    setval calls instead of holding the whole file in memory.
+``spill_svg``
+    Let Graphviz write its SVG straight to disk (no captured stdout buffer)
+    and release the DOT source before post-processing.
+``minimap_from_coordinates``
+    Draw the overview minimap from node and edge coordinates rather than
+    embedding a second full copy of the ERD.
+``compress_details``
+    Store SQL, trigger and function bodies as a gzip blob the browser inflates
+    lazily (see --compress-details).
+"""
+import os
+from typing import Dict, Iterable, Iterator, Optional
+
+
+# Ordered by cost to the output: the first two leave the SVG unchanged
+LOW_MEMORY_STRATEGIES = ('stream_read', 'spill_svg', 'minimap_from_coordinates', 'compress_details')
+
+# Rough model of the pipeline: interpreter + graphviz baseline, then MiB of
+# peak per MiB of schema dump. The --max-memory report shows real peaks.
+BASELINE_MB = 40.0
+PEAK_PER_DUMP_MB = 24.0
+# Fraction of the per-dump peak remaining after each strategy
+STRATEGY_FACTORS = {
+    'stream_read': 0.9,
+    'spill_svg': 0.75,
+    'minimap_from_coordinates': 0.6,
+    'compress_details': 0.85,
+}
+
+
+def estimate_peak_mb(dump_bytes: int, strategies: Iterable[str] = ()) -> float:
+    """
+    Estimate peak process memory for rendering a dump.
+
+    Args:
+        dump_bytes: Size of the schema dump
+        strategies: Low-memory strategies in effect
+
+    Returns:
+        Estimated peak in MiB
+    """
+    per_dump = PEAK_PER_DUMP_MB * dump_bytes / (1024 * 1024)
+    for strategy in strategies:
+        per_dump *= STRATEGY_FACTORS[strategy]
+    return BASELINE_MB + per_dump
+
+
+def plan_memory_strategies(dump_bytes: int, max_memory_mb: Optional[float]) -> Dict[str, bool]:
+    """
+    Choose the low-memory strategies needed to fit a budget.
+
+    Args:
+        dump_bytes: Size of the schema dump
+        max_memory_mb: Budget in MiB, or None for no budget
+
+    Returns:
+        Mapping of every strategy name to whether it is enabled. When even all
+        strategies do not fit, all of them are enabled.
+    """
+    enabled = []
+    if max_memory_mb is not None:
+        for strategy in LOW_MEMORY_STRATEGIES:
+            if estimate_peak_mb(dump_bytes, enabled) <= max_memory_mb:
+                break
+            enabled.append(strategy)
+    return {strategy: strategy in enabled for strategy in LOW_MEMORY_STRATEGIES}
+
+
+def iter_schema_lines(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Yield the lines of a dump that can matter to the ERD.
+
+    Skips COPY ... FROM stdin data blocks and ``SELECT pg_catalog.setval``
+    calls, which make up most of a dump taken without --schema-only.
+    """
+    in_copy = False
+    for line in lines:
+        if in_copy:
+            if line.rstrip('\r\n') == '\\.':
+                in_copy = False
+            continue
+        stripped = line.lstrip()
+        if stripped.startswith('SELECT pg_catalog.setval'):
+            continue
+        if stripped.startswith('COPY ') and stripped.rstrip().endswith('FROM stdin;'):
+            in_copy = True
+            continue
+        yield line
+
+
+def read_schema_dump(path: str, stream: bool = False) -> str:
+    """
+    Read a dump file.
+
+    Args:
+        path: Dump file path
+        stream: Filter the file line by line with iter_schema_lines rather than
+                reading it whole; the parse result is the same
+
+    Returns:
+        Dump text
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if stream:
+            return ''.join(iter_schema_lines(f))
+        return f.read()
+
+
+def dump_size(path: str) -> int:
+    """Size of a dump file in bytes, or 0 if it cannot be read."""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
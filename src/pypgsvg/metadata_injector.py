@@ -3,12 +3,12 @@ import re
 import tempfile
 import base64
 import xml.etree.ElementTree as ET
-from graphviz import Digraph
 from datetime import datetime
 
 from .colors import color_palette, saturate_color, desaturate_color
 from .utils import get_contrasting_text_color, sanitize_label
-from .svg_utils import SVG_INTERACTIVITY_SCRIPT, SVG_CSS_STYLE
+from . import svg_utils
+from .profiling import span
 
 xml_decl = '<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
 doctype = '<!DOCTYPE svg PUBLIC "-//W3C//DTD SVG 1.1//EN" "http://www.w3.org/Graphics/SVG/1.1/DTD/svg11.dtd">\n'
@@ -63,6 +63,72 @@ def generate_miniature_erd(
     return (scaled_svg, miniature_width, miniature_height)
 
 
+_ELEMENT_START = re.compile(r'<g\b[^>]*\bid="([^"]+)"[^>]*\bclass="(node|edge)"[^>]*>')
+_POINTS = re.compile(r'\bpoints="([^"]+)"')
+_PATH_D = re.compile(r'<path\b[^>]*\bd="([^"]+)"')
+_FILL = re.compile(r'\bfill="(#[0-9a-fA-F]{3,8})"')
+_STROKE = re.compile(r'\bstroke="([^"]+)"')
+
+
+def generate_miniature_from_coordinates(main_svg_content):
+    """
+    Build a lightweight minimap from node and edge coordinates.
+
+    Instead of a scaled copy of the whole ERD (labels, icons and embedded
+    scripts included), each table becomes one filled polygon over its bounding
+    box and each relationship one path, keeping the ids the highlighting code
+    looks up.
+
+    Returns:
+        Tuple of (svg, width, height) like generate_miniature_erd
+    """
+    width, height = extract_svg_dimensions_from_content(main_svg_content)
+    max_dim = 500
+    scale = min(max_dim / width, max_dim / height, 1.0)
+    miniature_width = int(width * scale)
+    miniature_height = int(height * scale)
+
+    viewbox = re.search(r'<svg[^>]*\bviewBox="([^"]+)"', main_svg_content)
+    graph_group = re.search(r'<g\b[^>]*(?:id="graph0"|class="graph")[^>]*\btransform="([^"]+)"', main_svg_content)
+    end = main_svg_content.find('<script')
+    if end == -1:
+        end = main_svg_content.rfind('</svg>')
+
+    starts = [m for m in _ELEMENT_START.finditer(main_svg_content, 0, end)]
+    parts = []
+    for index, match in enumerate(starts):
+        element_id, kind = match.groups()
+        segment = main_svg_content[match.end():starts[index + 1].start() if index + 1 < len(starts) else end]
+        if kind == 'node':
+            coords = [float(v) for points in _POINTS.findall(segment)
+                      for pair in points.split() for v in pair.split(',')]
+            if not coords:
+                continue
+            xs, ys = coords[0::2], coords[1::2]
+            fills = [f for f in _FILL.findall(segment) if f.lower() not in ('#fff', '#ffffff')]
+            fill = fills[0] if fills else '#cccccc'
+            box = (f"{min(xs):.1f},{min(ys):.1f} {max(xs):.1f},{min(ys):.1f} "
+                   f"{max(xs):.1f},{max(ys):.1f} {min(xs):.1f},{max(ys):.1f}")
+            parts.append(f'<g id="{element_id}" class="node"><polygon fill="{fill}" stroke="{fill}" points="{box}"/></g>')
+        else:
+            path = _PATH_D.search(segment)
+            if not path:
+                continue
+            stroke = _STROKE.search(segment)
+            color = stroke.group(1).split(':')[0] if stroke else '#888888'
+            parts.append(f'<g id="{element_id}" class="edge"><path fill="none" stroke="{color}" '
+                         f'stroke-width="3" d="{path.group(1)}"/></g>')
+
+    svg_attrs = f'width="{miniature_width}" height="{miniature_height}"'
+    if viewbox:
+        svg_attrs += f' viewBox="{viewbox.group(1)}"'
+    group_attrs = 'id="graph0" class="graph"'
+    if graph_group:
+        group_attrs += f' transform="{graph_group.group(1)}"'
+    svg = f'<svg {svg_attrs}><g {group_attrs}>{"".join(parts)}</g></svg>'
+    return (svg, miniature_width, miniature_height)
+
+
 def prefix_svg_ids(svg_content, prefix='mini-'):
     """
     Prefix all IDs and references to IDs in the SVG content with the given prefix.
@@ -108,6 +174,7 @@ def inject_metadata_into_svg(
     views=None,
     functions=None,
     settings=None,
+    minimap_from_coordinates=False,
 ):
     if views is None:
         views = {}
@@ -151,16 +218,22 @@ def inject_metadata_into_svg(
     miniature_width = 0
     miniature_height = 0
     if tables and foreign_keys and gen_min_erd:
-        miniature_data = generate_miniature_erd(
-            tables, foreign_keys, file_info, total_tables, total_columns,
-            total_foreign_keys, total_edges, show_standalone, main_svg_content=svg_content,
-            packmode=packmode, rankdir=rankdir, esep=esep, fontname=fontname,
-            fontsize=fontsize, node_fontsize=node_fontsize, edge_fontsize=edge_fontsize,
-            node_style=node_style, node_shape=node_shape, node_sep=node_sep,
-            rank_sep=rank_sep)
-        if miniature_data:
-            miniature_svg, miniature_width, miniature_height = miniature_data
-            miniature_svg = prefix_svg_ids(miniature_svg, prefix='mini-')
+        with span('minimap') as minimap_span:
+            if minimap_from_coordinates:
+                miniature_data = generate_miniature_from_coordinates(svg_content)
+            else:
+                miniature_data = generate_miniature_erd(
+                    tables, foreign_keys, file_info, total_tables, total_columns,
+                    total_foreign_keys, total_edges, show_standalone, main_svg_content=svg_content,
+                    packmode=packmode, rankdir=rankdir, esep=esep, fontname=fontname,
+                    fontsize=fontsize, node_fontsize=node_fontsize, edge_fontsize=edge_fontsize,
+                    node_style=node_style, node_shape=node_shape, node_sep=node_sep,
+                    rank_sep=rank_sep)
+            if miniature_data:
+                miniature_svg, miniature_width, miniature_height = miniature_data
+                miniature_svg = prefix_svg_ids(miniature_svg, prefix='mini-')
+                if minimap_span:
+                    minimap_span.count(bytes=len(miniature_svg))
 
     # HTML overlays
     metadata_html = f"""
@@ -330,8 +403,8 @@ def inject_metadata_into_svg(
 
    
 # JavaScript for interactivity (copy from your original __init__.py, use triple braces for JS blocks)
-    javascript_code = SVG_INTERACTIVITY_SCRIPT
-    svg_css = SVG_CSS_STYLE
+    javascript_code = svg_utils.SVG_INTERACTIVITY_SCRIPT
+    svg_css = svg_utils.SVG_CSS_STYLE
     all_injected_elements = svg_css + overlay_container_html + javascript_code
     svg_content = svg_content.replace('</svg>', f'{all_injected_elements}\n</svg>')
     # Ensure XML declaration and DOCTYPE are at the very top
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Background pre-warming for the ERD server (``--prewarm``).
+
+After the first page has been served, a low-priority thread renders the views
+a user is likely to ask for next, so the first click does not pay for a full
+layout: the ERD in the other rankdir orientations and with the heuristic
+layout-optimizer settings (kept in the server's variant cache and copied into
+place by a matching reload), and the 1-hop neighbourhoods of the most
+connected tables (kept in the neighbourhood cache). Candidates are rendered
+one at a time and only while no other generation is running or queued.
+"""
+import threading
+from typing import Any, Dict, List, Tuple
+
+from .erd_service import GENERATION_DEFAULTS, hub_tables
+from .jobs import CancelToken, JobCancelled, cancel_scope
+from .layout_optimizer import analyze_schema_complexity, heuristic_optimize_layout
+from .metrics import GENERATIONS_IN_FLIGHT
+from .render_pool import get_pool
+
+RANKDIRS = ('TB', 'LR', 'BT', 'RL')
+
+# Settings the viewer's Graphviz panel sends with focused/neighbourhood requests
+GRAPHVIZ_KEYS = (
+    'packmode', 'rankdir', 'esep', 'fontname', 'fontsize', 'node_fontsize',
+    'edge_fontsize', 'node_sep', 'rank_sep', 'node_style', 'node_shape',
+)
+
+
+def graphviz_settings(generation_params: Dict[str, Any]) -> Dict[str, Any]:
+    """The Graphviz panel settings contained in ``generation_params``."""
+    return {key: generation_params[key] for key in GRAPHVIZ_KEYS if key in generation_params}
+
+
+def prewarm_candidates(generation_params: Dict[str, Any], schema: Dict[str, Any],
+                       hubs: int = 3) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Views to render ahead of time, most likely first.
+
+    Args:
+        generation_params: Settings of the ERD being viewed
+        schema: Schema entry from ERDServer.load_schema
+        hubs: Number of hub-table neighbourhoods
+
+    Returns:
+        List of ('variant', generation params) and ('neighborhood',
+        render_neighborhood keyword arguments)
+    """
+    candidates: List[Tuple[str, Dict[str, Any]]] = []
+    current = generation_params.get('rankdir', GENERATION_DEFAULTS['rankdir'])
+    for rankdir in RANKDIRS:
+        if rankdir != current:
+            candidates.append(('variant', dict(generation_params, rankdir=rankdir)))
+
+    model = schema['model']
+    complexity = analyze_schema_complexity(model['tables'], model['foreign_keys'],
+                                           model['views'], model['triggers'])
+    optimized, _ = heuristic_optimize_layout(graphviz_settings(generation_params), complexity)
+    params = dict(generation_params, **optimized)
+    if params != generation_params and all(params != spec for _, spec in candidates):
+        candidates.append(('variant', params))
+
+    settings = graphviz_settings(generation_params)
+    for table in hub_tables(schema['adjacency']['both'], hubs):
+        candidates.append(('neighborhood', {
+            'seeds': [table], 'hops': 1, 'direction': 'both', 'graphviz_settings': settings,
+        }))
+    return candidates
+
+
+class Prewarmer:
+    """Render likely next views of an ERDServer in a background thread."""
+
+    def __init__(self, server, hubs: int = 3, first_page_timeout: float = 10.0,
+                 idle_poll: float = 0.2):
+        """
+        Initialize the pre-warmer.
+
+        Args:
+            server: ERDServer whose caches to fill
+            hubs: Number of hub-table neighbourhoods to render
+            first_page_timeout: Seconds to wait for the first page before
+                                starting anyway
+            idle_poll: Seconds between checks for other generations
+        """
+        self.server = server
+        self.hubs = hubs
+        self.first_page_timeout = first_page_timeout
+        self.idle_poll = idle_poll
+        self.token = CancelToken()
+        self.state = 'waiting'
+        self.rendered: List[str] = []
+        self.failed: List[str] = []
+        self._first_page = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> 'Prewarmer':
+        """Start pre-warming in a daemon thread."""
+        self._thread = threading.Thread(target=self._run, name='pypgsvg-prewarm', daemon=True)
+        self._thread.start()
+        return self
+
+    def page_served(self) -> None:
+        """Called when an ERD has been served; pre-warming may begin."""
+        self._first_page.set()
+
+    def stop(self) -> None:
+        """Stop pre-warming, killing a dot process it has running."""
+        self._stop.set()
+        self.token.cancel()
+        self._first_page.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def status(self) -> Dict[str, Any]:
+        return {'state': self.state, 'rendered': list(self.rendered), 'failed': list(self.failed)}
+
+    def wait_idle(self) -> None:
+        """Block until no generation is running or queued for dot."""
+        while GENERATIONS_IN_FLIGHT.value() > 0 or get_pool().stats()['queued'] > 0:
+            if self._stop.wait(self.idle_poll):
+                break
+        self.token.check()
+
+    def _run(self) -> None:
+        self._first_page.wait(self.first_page_timeout)
+        try:
+            self.token.check()
+            self.state = 'running'
+            _, _, generation_params = self.server.snapshot()
+            schema = self.server.load_schema()
+            candidates = prewarm_candidates(generation_params, schema, self.hubs)
+        except JobCancelled:
+            self.state = 'stopped'
+            return
+        except Exception as e:
+            print(f"Pre-warm skipped: {e}")
+            self.state = 'failed'
+            return
+
+        for kind, spec in candidates:
+            label = self.describe(kind, spec)
+            try:
+                self.wait_idle()
+                with cancel_scope(self.token):
+                    if kind == 'variant':
+                        self.server.render_variant(spec)
+                    else:
+                        self.server.render_neighborhood(**spec)
+                self.rendered.append(label)
+            except JobCancelled:
+                self.state = 'stopped'
+                return
+            except Exception as e:
+                print(f"Pre-warm of {label} failed: {e}")
+                self.failed.append(label)
+        self.state = 'done'
+        print(f"Pre-warmed {len(self.rendered)} views")
+
+    @staticmethod
+    def describe(kind: str, spec: Dict[str, Any]) -> str:
+        if kind == 'variant':
+            return f"variant rankdir={spec.get('rankdir')} packmode={spec.get('packmode')}"
+        return f"neighborhood of {', '.join(spec['seeds'])}"
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Lightweight phase instrumentation for pypgsvg.
+
+Code marks its phases with ``span()`` blocks or a ``PhaseTimer``; timings
+and counts (tables, edges, bytes) are only recorded while a ``Profiler`` is
+active in the current context, so uninstrumented runs pay one context-variable
+lookup per phase::
+
+    with profile() as profiler:
+        generate_erd_with_graphviz(...)
+    print(profiler.format_table())
+"""
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+_ACTIVE = ContextVar('pypgsvg_profiler', default=None)  # type: ContextVar[Optional[Profiler]]
+_CURRENT = ContextVar('pypgsvg_span', default=None)  # type: ContextVar[Optional[Span]]
+
+
+def peak_rss_mb(children: bool = False) -> Optional[float]:
+    """
+    High-water resident set size of this process (or of its finished children,
+    e.g. ``dot``) in MiB, or None where the resource module is unavailable.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return usage.ru_maxrss / divisor
+
+
+class Span:
+    """One timed phase with optional counts."""
+
+    __slots__ = ('name', 'parent', 'depth', 'start', 'seconds', 'counts', 'memory', 'py_peak')
+
+    def __init__(self, name: str, parent: Optional['Span'], start: float, counts: Dict[str, Any]):
+        self.name = name
+        self.parent = parent
+        self.depth = parent.depth + 1 if parent else 0
+        self.start = start
+        self.seconds = 0.0
+        self.counts = counts
+        self.memory: Dict[str, Any] = {}
+        self.py_peak = 0
+
+    def count(self, **counts: Any) -> None:
+        """Attach or overwrite counts on this span."""
+        self.counts.update(counts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            'name': self.name,
+            'depth': self.depth,
+            'seconds': self.seconds,
+            'counts': dict(self.counts),
+        }
+        if self.memory:
+            data['memory'] = dict(self.memory)
+        return data
+
+
+class Profiler:
+    """Collects spans in the order they start."""
+
+    def __init__(self, track_memory: bool = False,
+                 listener: Optional[Callable[[str, Span], None]] = None):
+        """
+        Initialize the profiler.
+
+        Args:
+            track_memory: Also record per-span Python allocation peaks
+                          (tracemalloc, which slows Python code down) and the
+                          process/child peak RSS at the end of each span
+            listener: Called with ('start', span) when a span opens and
+                      ('end', span) when it is finished; exceptions it raises
+                      propagate into the instrumented code
+        """
+        self.spans: List[Span] = []
+        self.started = time.perf_counter()
+        self.track_memory = track_memory
+        self.listener = listener
+        self._lock = threading.Lock()
+        self._started_tracemalloc = False
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def close(self) -> None:
+        """Stop tracemalloc if this profiler started it."""
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def _memory_checkpoint(self) -> int:
+        """Fold the traced peak since the last checkpoint into every open span."""
+        _, peak = tracemalloc.get_traced_memory()
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        span = _CURRENT.get()
+        while span is not None:
+            span.py_peak = max(span.py_peak, peak)
+            span = span.parent
+        return peak
+
+    def _finish_memory(self, span: Span, peak: int) -> None:
+        span.py_peak = max(span.py_peak, peak)
+        span.memory = {
+            'py_peak_mb': round(span.py_peak / (1024 * 1024), 1),
+            'rss_peak_mb': peak_rss_mb(),
+            'child_rss_peak_mb': peak_rss_mb(children=True),
+        }
+
+    def _open(self, name: str, counts: Dict[str, Any], start: Optional[float] = None) -> Span:
+        if self.track_memory and tracemalloc.is_tracing():
+            self._memory_checkpoint()
+        span = Span(name, _CURRENT.get(), time.perf_counter() if start is None else start, counts)
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    @contextmanager
+    def span(self, name: str, **counts: Any) -> Iterator[Span]:
+        """Time the enclosed block as a child of the current span."""
+        span = self._open(name, counts)
+        token = _CURRENT.set(span)
+        try:
+            if self.listener is not None:
+                self.listener('start', span)
+            yield span
+        finally:
+            span.seconds = time.perf_counter() - span.start
+            if self.track_memory and tracemalloc.is_tracing():
+                self._finish_memory(span, self._memory_checkpoint())
+            _CURRENT.reset(token)
+        if self.listener is not None:
+            self.listener('end', span)
+
+    def record(self, name: str, start: float, **counts: Any) -> Span:
+        """Record a phase that started at ``start`` (perf_counter) and ends now."""
+        if self.track_memory and tracemalloc.is_tracing():
+            # Sequential marks: the peak since the previous checkpoint is this phase's
+            peak = self._memory_checkpoint()
+            span = self._open(name, counts, start)
+            self._finish_memory(span, peak)
+        else:
+            span = self._open(name, counts, start)
+        span.seconds = time.perf_counter() - start
+        if self.listener is not None:
+            self.listener('end', span)
+        return span
+
+    def peak_rss_mb(self) -> Optional[float]:
+        """Highest RSS recorded on any span (process or child), in MiB."""
+        peaks = [value for span in self.spans
+                 for key, value in span.memory.items()
+                 if key.endswith('rss_peak_mb') and value is not None]
+        return max(peaks) if peaks else None
+
+    def totals(self) -> Dict[str, float]:
+        """Total seconds per span name (a phase may run more than once)."""
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            totals[span.name] = totals.get(span.name, 0.0) + span.seconds
+        return totals
+
+    def report(self) -> Dict[str, Any]:
+        """JSON-serializable report of every span."""
+        return {
+            'wall_seconds': time.perf_counter() - self.started,
+            'spans': [span.to_dict() for span in self.spans],
+        }
+
+    def format_table(self) -> str:
+        """Human-readable table of spans, indented by nesting depth."""
+        memory_header = f"{'py peak MB':>12}{'rss peak MB':>13}" if self.track_memory else ''
+        lines = [f"{'phase':<36}{'ms':>10}{memory_header}  counts"]
+        for span in self.spans:
+            name = '  ' * span.depth + span.name
+            counts = ', '.join(f"{key}={value:,}" if isinstance(value, int) else f"{key}={value}"
+                               for key, value in span.counts.items())
+            memory = ''
+            if self.track_memory:
+                rss = span.memory.get('rss_peak_mb')
+                memory = (f"{span.memory.get('py_peak_mb', 0):>12.1f}"
+                          f"{rss if rss is not None else float('nan'):>13.1f}")
+            lines.append(f"{name:<36}{span.seconds * 1000:>10.1f}{memory}  {counts}")
+        lines.append(f"{'total (wall)':<36}{(time.perf_counter() - self.started) * 1000:>10.1f}")
+        return '\n'.join(lines)
+
+    def server_timing(self) -> str:
+        """Top-level spans formatted for a ``Server-Timing`` response header."""
+        return ', '.join(
+            f"{span.name.replace(' ', '_')};dur={span.seconds * 1000:.1f}"
+            for span in self.spans if span.depth == 0
+        )
+
+
+def active_profiler() -> Optional[Profiler]:
+    """Profiler collecting spans in this context, if any."""
+    return _ACTIVE.get()
+
+
+@contextmanager
+def profile(profiler: Optional[Profiler] = None) -> Iterator[Profiler]:
+    """Activate a profiler (a new one by default) for the enclosed block."""
+    profiler = profiler or Profiler()
+    token = _ACTIVE.set(profiler)
+    span_token = _CURRENT.set(None)
+    try:
+        yield profiler
+    finally:
+        _CURRENT.reset(span_token)
+        _ACTIVE.reset(token)
+        profiler.close()
+
+
+@contextmanager
+def span(name: str, **counts: Any) -> Iterator[Optional[Span]]:
+    """Time a block on the active profiler; a no-op when none is active."""
+    profiler = _ACTIVE.get()
+    if profiler is None:
+        yield None
+        return
+    with profiler.span(name, **counts) as current:
+        yield current
+
+
+class PhaseTimer:
+    """
+    Sequential phase marks for long functions.
+
+    ``mark(name)`` closes the phase that started at the previous mark (or at
+    construction), avoiding a ``with`` block per phase.
+    """
+
+    def __init__(self, prefix: str = ''):
+        self.prefix = prefix
+        self.profiler = _ACTIVE.get()
+        self._last = time.perf_counter()
+
+    def mark(self, name: str, **counts: Any) -> None:
+        """Record the phase since the previous mark as ``<prefix><name>``."""
+        now = time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.record(self.prefix + name, self._last, **counts)
+        self._last = now
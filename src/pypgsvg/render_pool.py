@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Process-wide limits on Graphviz ``dot`` runs.
+
+Every layout (see jobs.pipe_svg) takes a slot in the DotPool, which caps how
+many ``dot`` processes run at once. Callers beyond the cap wait in arrival
+order, so a burst of large renders cannot starve earlier requests. When
+memory or CPU limits are configured, each ``dot`` is started with
+RLIMIT_AS/RLIMIT_CPU applied (POSIX only), so one huge schema fails its own
+render instead of exhausting the host. The limits are set by running ``dot``
+under util-linux ``prlimit`` where it is installed; elsewhere they fall back
+to a ``preexec_fn``, which Python documents as unsafe in threaded programs
+(the forked child can deadlock on a lock another thread held), so prefer
+installing prlimit for the threaded server. Queue depth, wait time and
+running processes are reported through the metrics module and
+DotPool.stats().
+"""
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .metrics import REGISTRY
+
+try:
+    import resource
+except ImportError:  # Windows: concurrency cap only
+    resource = None
+
+DOT_QUEUE_DEPTH = REGISTRY.gauge('pypgsvg_dot_queue_depth', 'Renders waiting for a dot slot')
+DOT_RUNNING = REGISTRY.gauge('pypgsvg_dot_running', 'dot processes holding a slot')
+DOT_QUEUE_WAIT = REGISTRY.histogram('pypgsvg_dot_queue_wait_seconds', 'Time spent waiting for a dot slot')
+DOT_QUEUE_DEPTH.set(0)
+DOT_RUNNING.set(0)
+
+
+class RenderLimitExceeded(RuntimeError):
+    """dot was killed or failed while running under the configured limits."""
+
+
+class DotPool:
+    """FIFO-fair cap on concurrent dot processes, with optional rlimits."""
+
+    def __init__(self, max_processes: Optional[int] = None, memory_limit_mb: Optional[float] = None,
+                 cpu_seconds: Optional[int] = None):
+        """
+        Initialize the pool.
+
+        Args:
+            max_processes: Concurrent dot processes (default: CPU count)
+            memory_limit_mb: Address-space limit per dot process in MiB
+            cpu_seconds: CPU-time limit per dot process in seconds
+        """
+        self.max_processes = max(1, max_processes or os.cpu_count() or 1)
+        self.memory_limit_mb = memory_limit_mb
+        self.cpu_seconds = cpu_seconds
+        # Applies the limits without running Python between fork and exec
+        self.prlimit = shutil.which('prlimit') if memory_limit_mb or cpu_seconds else None
+        self._changed = threading.Condition()
+        self._running = 0
+        self._waiting: deque = deque()
+        self._waited_total = 0.0
+        self._acquired = 0
+
+    @property
+    def limits_processes(self) -> bool:
+        """True when dot must be started with rlimits (so not through graphviz's pipe)."""
+        return (self.prlimit is not None or resource is not None) and bool(self.memory_limit_mb or self.cpu_seconds)
+
+    def describe_limits(self) -> str:
+        parts = []
+        if self.memory_limit_mb:
+            parts.append(f"{self.memory_limit_mb:g} MiB address space")
+        if self.cpu_seconds:
+            parts.append(f"{self.cpu_seconds} s CPU")
+        return ', '.join(parts) or 'no limits'
+
+    @contextmanager
+    def slot(self, check: Optional[Callable[[], None]] = None) -> Iterator[float]:
+        """
+        Hold one dot slot for the enclosed block.
+
+        Waiters are served strictly in arrival order. Yields the seconds
+        spent waiting.
+
+        Args:
+            check: Called periodically while queued; an exception it raises
+                   (e.g. JobCancelled) gives up the place in the queue
+        """
+        ticket = object()
+        start = time.perf_counter()
+        with self._changed:
+            self._waiting.append(ticket)
+            DOT_QUEUE_DEPTH.inc()
+            try:
+                while not self._changed.wait_for(
+                        lambda: self._waiting[0] is ticket and self._running < self.max_processes, 0.25):
+                    if check is not None:
+                        check()
+            finally:
+                self._waiting.remove(ticket)
+                DOT_QUEUE_DEPTH.dec()
+                # The next waiter may now be at the head with a free slot
+                self._changed.notify_all()
+            self._running += 1
+            waited = time.perf_counter() - start
+            self._waited_total += waited
+            self._acquired += 1
+        DOT_RUNNING.inc()
+        DOT_QUEUE_WAIT.observe(waited)
+        try:
+            yield waited
+        finally:
+            DOT_RUNNING.dec()
+            with self._changed:
+                self._running -= 1
+                self._changed.notify_all()
+
+    def _limits(self):
+        memory = int(self.memory_limit_mb * 1024 * 1024) if self.memory_limit_mb else None
+        cpu = int(self.cpu_seconds) if self.cpu_seconds else None
+        return memory, cpu
+
+    def command(self, cmd: List[str]) -> List[str]:
+        """``cmd`` run under ``prlimit`` with the rlimits, or unchanged without prlimit or limits."""
+        if self.prlimit is None or not self.limits_processes:
+            return cmd
+        memory, cpu = self._limits()
+        prefix = [self.prlimit]
+        if memory is not None:
+            prefix.append(f'--as={memory}')
+        if cpu is not None:
+            # Soft limit sends SIGXCPU; the hard limit a second later kills
+            prefix.append(f'--cpu={cpu}:{cpu + 1}')
+        return prefix + ['--'] + list(cmd)
+
+    def preexec_fn(self) -> Optional[Callable[[], None]]:
+        """
+        Function applying the rlimits in the dot child, or None when they are
+        not needed or ``command`` applies them through prlimit.
+
+        Not safe while other threads run (see the module docstring); only
+        used where prlimit is not installed.
+        """
+        if not self.limits_processes or self.prlimit is not None:
+            return None
+        memory, cpu = self._limits()
+
+        def apply_limits():
+            if memory is not None:
+                resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+            if cpu is not None:
+                # Soft limit sends SIGXCPU; the hard limit a second later kills
+                resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+
+        return apply_limits
+
+    def stats(self) -> Dict[str, Any]:
+        with self._changed:
+            return {
+                'max_processes': self.max_processes,
+                'running': self._running,
+                'queued': len(self._waiting),
+                'acquired': self._acquired,
+                'mean_wait_seconds': round(self._waited_total / self._acquired, 4) if self._acquired else 0.0,
+                'memory_limit_mb': self.memory_limit_mb,
+                'cpu_seconds': self.cpu_seconds,
+            }
+
+
+_POOL = DotPool()
+
+
+def get_pool() -> DotPool:
+    """The process-wide DotPool."""
+    return _POOL
+
+
+def configure(max_processes: Optional[int] = None, memory_limit_mb: Optional[float] = None,
+              cpu_seconds: Optional[int] = None) -> DotPool:
+    """
+    Replace the process-wide DotPool (renders already holding a slot finish
+    under the old one).
+
+    Args:
+        max_processes: Concurrent dot processes (default: CPU count)
+        memory_limit_mb: Address-space limit per dot process in MiB
+        cpu_seconds: CPU-time limit per dot process in seconds
+
+    Returns:
+        The new pool
+    """
+    global _POOL
+    _POOL = DotPool(max_processes, memory_limit_mb, cpu_seconds)
+    return _POOL
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Stateless rendering of uploaded schema dumps (POST /api/render).
+
+A CI job POSTs a dump and gets its ERD back, independently of the ERD the
+server is viewing. The body may be a plain SQL dump, a gzip-compressed one,
+or a pg_dump custom-format archive (converted with ``pg_restore
+--schema-only``). Plain and gzip bodies are decoded and filtered line by line
+as they arrive (COPY data is dropped, see memory.iter_schema_lines), so memory
+follows the schema size rather than the upload size.
+
+Admission control bounds the uploads being read or rendered at once, by
+count and by total Content-Length; requests beyond either limit are refused
+straight away with 429 and a Retry-After estimated from recent render times,
+instead of queueing without bound. Results are cached on disk by a hash of
+the request body and the render settings, so re-posting an unchanged schema
+costs only the upload.
+"""
+import gzip
+import hashlib
+import io
+import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from .erd_service import GENERATION_DEFAULTS, parse_setting
+from .jobs import run_cancellable
+from .memory import iter_schema_lines
+from .metrics import REGISTRY
+
+RENDER_JOBS = REGISTRY.gauge('pypgsvg_render_jobs', 'Uploads admitted to /api/render and not yet finished')
+RENDER_QUEUED_BYTES = REGISTRY.gauge('pypgsvg_render_queued_bytes', 'Request bytes of the admitted uploads')
+RENDER_REJECTED = REGISTRY.counter(
+    'pypgsvg_render_rejected_total', 'Uploads refused by admission control', ('reason',))
+RENDER_JOBS.set(0)
+RENDER_QUEUED_BYTES.set(0)
+
+# Settings an upload may not change: they control where and whether the
+# output file is written, which the render cache decides
+FIXED_SETTINGS = {'skip_if_unchanged': False, 'content_addressed': False, 'deterministic': True}
+
+# Custom-format archives start with this magic (pg_dump -Fc)
+ARCHIVE_MAGIC = b'PGDMP'
+GZIP_MAGIC = b'\x1f\x8b'
+
+CHUNK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """The uploaded body cannot be read (400) or rendered (422) as a schema dump."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class Overloaded(Exception):
+    """An upload was refused by admission control."""
+
+    def __init__(self, message: str, status: int = 429, retry_after: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bound the uploads admitted at once by count and by request bytes."""
+
+    def __init__(self, max_jobs: int = 8, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Initialize the controller.
+
+        Args:
+            max_jobs: Uploads being read, queued or rendered at once
+            max_bytes: Total Content-Length of those uploads; a single body
+                       larger than this is refused with 413
+        """
+        self.max_jobs = max(1, max_jobs)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.jobs = 0
+        self.queued_bytes = 0
+        # Exponentially weighted mean of admitted job durations, in seconds
+        self.average_seconds = 1.0
+
+    def retry_after(self) -> int:
+        """Seconds a refused client should wait: the time for the admitted jobs to drain."""
+        with self._lock:
+            return max(1, min(300, math.ceil(self.average_seconds * max(1, self.jobs) / self.max_jobs)))
+
+    @contextmanager
+    def admit(self, nbytes: int) -> Iterator[None]:
+        """
+        Hold an admission for an upload of ``nbytes`` for the enclosed block.
+
+        Raises:
+            Overloaded: With status 413 if the upload alone exceeds max_bytes,
+                        429 if the job or byte limit is reached
+        """
+        if nbytes > self.max_bytes:
+            RENDER_REJECTED.inc(reason='too_large')
+            raise Overloaded(f"Upload of {nbytes} bytes exceeds the {self.max_bytes} byte limit", status=413)
+        with self._lock:
+            reason = None
+            if self.jobs >= self.max_jobs:
+                reason = 'jobs'
+            elif self.queued_bytes + nbytes > self.max_bytes:
+                reason = 'bytes'
+            if reason is None:
+                self.jobs += 1
+                self.queued_bytes += nbytes
+                RENDER_JOBS.set(self.jobs)
+                RENDER_QUEUED_BYTES.set(self.queued_bytes)
+        if reason is not None:
+            RENDER_REJECTED.inc(reason=reason)
+            raise Overloaded(f"Render queue is full ({reason})", retry_after=self.retry_after())
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.jobs -= 1
+                self.queued_bytes -= nbytes
+                self.average_seconds += 0.2 * ((time.perf_counter() - started) - self.average_seconds)
+                RENDER_JOBS.set(self.jobs)
+                RENDER_QUEUED_BYTES.set(self.queued_bytes)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'jobs': self.jobs,
+                'max_jobs': self.max_jobs,
+                'queued_bytes': self.queued_bytes,
+                'max_bytes': self.max_bytes,
+                'average_seconds': round(self.average_seconds, 3),
+            }
+
+
+_ADMISSION = AdmissionController()
+
+
+def get_admission() -> AdmissionController:
+    """The process-wide admission controller for /api/render."""
+    return _ADMISSION
+
+
+def configure(max_jobs: Optional[int] = None, max_queued_mb: Optional[float] = None) -> AdmissionController:
+    """
+    Replace the process-wide admission controller.
+
+    Args:
+        max_jobs: Uploads admitted at once (default 8)
+        max_queued_mb: Total MiB of admitted uploads (default 256)
+    """
+    global _ADMISSION
+    kwargs: Dict[str, Any] = {}
+    if max_jobs:
+        kwargs['max_jobs'] = max_jobs
+    if max_queued_mb:
+        kwargs['max_bytes'] = int(max_queued_mb * 1024 * 1024)
+    _ADMISSION = AdmissionController(**kwargs)
+    return _ADMISSION
+
+
+def render_settings(query: Dict[str, List[str]]) -> Dict[str, Any]:
+    """
+    Generation settings from /api/render query parameters.
+
+    Args:
+        query: parse_qs result, e.g. ``{'rankdir': ['LR'], 'include_tables': ['users,orders']}``
+
+    Returns:
+        Complete generation settings
+
+    Raises:
+        ValueError: For an unknown or malformed setting
+    """
+    settings = dict(GENERATION_DEFAULTS)
+    for key, values in query.items():
+        name = key.replace('-', '_')
+        if name not in GENERATION_DEFAULTS or name in FIXED_SETTINGS:
+            raise ValueError(f"Unknown setting {key!r}")
+        try:
+            settings[name] = parse_setting(name, values[-1])
+        except ValueError:
+            raise ValueError(f"Invalid value {values[-1]!r} for {key!r}")
+    settings.update(FIXED_SETTINGS)
+    return settings
+
+
+class _HashingReader(io.RawIOBase):
+    """Reads exactly ``length`` bytes of a request body, hashing them as they pass."""
+
+    def __init__(self, stream: BinaryIO, length: int):
+        self._stream = stream
+        self.remaining = length
+        self.digest = hashlib.sha256()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self.remaining <= 0:
+            return 0
+        data = self._stream.read(min(len(buffer), self.remaining))
+        if not data:
+            raise UploadError(f"Request body ended {self.remaining} bytes early")
+        self.remaining -= len(data)
+        self.digest.update(data)
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _restore_archive(body: BinaryIO) -> str:
+    """Schema SQL of a pg_dump custom-format archive, via pg_restore."""
+    with tempfile.NamedTemporaryFile(prefix='pypgsvg-upload-', suffix='.dump') as archive:
+        shutil.copyfileobj(body, archive, CHUNK_SIZE)
+        archive.flush()
+        try:
+            result = run_cancellable(
+                ['pg_restore', '--schema-only', '--no-owner', '-f', '-', archive.name],
+                capture_output=True, text=True,
+            )
+        except FileNotFoundError:
+            raise UploadError("pg_restore command not found; upload a plain SQL dump instead")
+    if result.returncode != 0:
+        raise UploadError(f"pg_restore failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+def read_upload(stream: BinaryIO, length: int) -> Tuple[str, str]:
+    """
+    Read an uploaded dump of ``length`` bytes from ``stream``.
+
+    Returns:
+        (schema SQL with COPY data removed, SHA-256 hex digest of the body)
+
+    Raises:
+        UploadError: If the body is truncated, corrupt or not a dump
+    """
+    raw = _HashingReader(stream, length)
+    body = io.BufferedReader(raw, CHUNK_SIZE)
+    try:
+        head = body.peek(len(ARCHIVE_MAGIC))[:len(ARCHIVE_MAGIC)]
+        if head.startswith(ARCHIVE_MAGIC):
+            sql = ''.join(iter_schema_lines(io.StringIO(_restore_archive(body))))
+        else:
+            source = gzip.GzipFile(fileobj=body) if head.startswith(GZIP_MAGIC) else body
+            text = io.TextIOWrapper(source, encoding='utf-8', errors='replace', newline='')
+            sql = ''.join(iter_schema_lines(text))
+        # Consume (and hash) anything the decoder left, e.g. gzip padding
+        while body.read(CHUNK_SIZE):
+            pass
+    except (OSError, EOFError, zlib.error) as e:
+        raise UploadError(f"Cannot read the uploaded dump: {e}")
+    return sql, raw.digest.hexdigest()
+
+
+class RenderCache:
+    """Rendered uploads on disk, least recently used evicted first."""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._directory: Optional[str] = None
+
+    def path_for(self, key: str) -> str:
+        """Output path (without extension) for the render with cache key ``key``."""
+        with self._lock:
+            if self._directory is None:
+                self._directory = tempfile.mkdtemp(prefix='pypgsvg-renders-')
+            return os.path.join(self._directory, key[:32])
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            path = self._entries.get(key)
+            if path is None or not os.path.exists(path):
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return path
+
+    def put(self, key: str, path: str) -> None:
+        with self._lock:
+            self._entries[key] = path
+            self._entries.move_to_end(key)
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[1])
+        for old in evicted:
+            # A response still sending the file keeps its open handle
+            if os.path.exists(old):
+                os.remove(old)
+
+    def close(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            directory, self._directory = self._directory, None
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Per-schema output splitting for pypgsvg.
+
+Partitions a parsed model by PostgreSQL schema namespace, renders one ERD per
+schema in parallel and an overview graph of schemas whose edges count the
+cross-schema foreign keys and whose nodes link to the per-schema SVGs.
+"""
+import contextvars
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Tuple
+
+from .erd_generator import generate_schema_overview
+from .erd_service import render_schema_model
+from .utils import sanitize_label
+
+
+DEFAULT_SCHEMA = 'public'
+
+
+def schema_of(name: str) -> str:
+    """Schema part of a (possibly unqualified) object name; unqualified names are public."""
+    if '.' in name:
+        return name.split('.', 1)[0]
+    return DEFAULT_SCHEMA
+
+
+def _empty_model(settings: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'tables': {},
+        'foreign_keys': [],
+        'triggers': {},
+        'errors': [],
+        'views': {},
+        'functions': {},
+        'settings': settings,
+        'constraints': {},
+        # Tables with foreign keys to or from other schemas (kept by show_standalone=False)
+        'linked_tables': [],
+    }
+
+
+def partition_by_schema(model: Dict[str, Any]) -> Tuple[Dict[str, Dict[str, Any]], Dict[Tuple[str, str], int]]:
+    """
+    Split a parsed model into one model per schema.
+
+    Args:
+        model: Model returned by build_schema_model
+
+    Returns:
+        Tuple of (models, cross_schema_edges). ``models`` maps schema name to a
+        model holding that schema's tables, views, functions, triggers and
+        intra-schema foreign keys, plus ``linked_tables``: its tables on
+        either end of a cross-schema foreign key, which render_schema_model
+        does not treat as standalone; ``cross_schema_edges`` maps
+        (referencing_schema, referenced_schema) to a foreign key count.
+    """
+    models: Dict[str, Dict[str, Any]] = {}
+
+    def schema_model(schema: str) -> Dict[str, Any]:
+        if schema not in models:
+            models[schema] = _empty_model(model['settings'])
+        return models[schema]
+
+    for name, table in model['tables'].items():
+        schema_model(schema_of(name))['tables'][name] = table
+    for name, view in model['views'].items():
+        schema_model(schema_of(name))['views'][name] = view
+    for name, function in model['functions'].items():
+        schema_model(schema_of(name))['functions'][name] = function
+    for name, table_triggers in model['triggers'].items():
+        schema_model(schema_of(name))['triggers'][name] = table_triggers
+    for name, table_constraints in model['constraints'].items():
+        schema_model(schema_of(name))['constraints'][name] = table_constraints
+
+    cross_schema_edges: Counter = Counter()
+    linked: Dict[str, set] = {}
+    for fk in model['foreign_keys']:
+        src, dst = schema_of(fk[0]), schema_of(fk[2])
+        if src == dst:
+            schema_model(src)['foreign_keys'].append(fk)
+        else:
+            cross_schema_edges[(src, dst)] += 1
+            linked.setdefault(src, set()).add(fk[0])
+            linked.setdefault(dst, set()).add(fk[2])
+    for schema, tables in linked.items():
+        if schema in models:
+            models[schema]['linked_tables'] = sorted(t for t in tables if t in models[schema]['tables'])
+
+    # Schemas that only hold functions have nothing to draw
+    models = {schema: m for schema, m in models.items() if m['tables']}
+    return models, dict(cross_schema_edges)
+
+
+def select_schema(model: Dict[str, Any], schema: str) -> Dict[str, Any]:
+    """
+    The model render_schema_split draws as ``schema``'s ERD.
+
+    Re-renders of one split ERD (the server's reloads and watch mode with
+    ``--split-schemas``) use it so they keep showing that schema only.
+
+    Args:
+        model: Model returned by build_schema_model
+        schema: Schema name
+
+    Returns:
+        The schema's model, empty if the schema no longer has tables
+    """
+    models, _ = partition_by_schema(model)
+    return models.get(schema) or _empty_model(model['settings'])
+
+
+def render_schema_split(
+    model: Dict[str, Any],
+    output_file: str,
+    input_source: str,
+    generation_params: Dict[str, Any],
+    max_workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Render one ERD per schema plus an overview graph linking to them.
+
+    Per-schema ERDs are written to ``<output_file>_<schema>.svg`` and the
+    overview to ``<output_file>.svg``.
+
+    Args:
+        model: Model returned by build_schema_model
+        output_file: Base path for output SVG files (without extension)
+        input_source: Source description for metadata
+        generation_params: Parameters for ERD generation
+        max_workers: Render threads (default: one per schema, capped at CPU count)
+
+    Returns:
+        Dict with 'overview' (path or None) and 'schemas' (schema -> path)
+    """
+    models, cross_schema_edges = partition_by_schema(model)
+    base_name = os.path.basename(output_file)
+
+    outputs = {
+        schema: f"{output_file}_{sanitize_label(schema)}"
+        for schema in models
+    }
+    workers = max_workers or min(len(models), os.cpu_count() or 1) or 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            schema: pool.submit(
+                contextvars.copy_context().run, render_schema_model, models[schema], outputs[schema],
+                input_source, generation_params
+            )
+            for schema in models
+        }
+        schema_svgs = {schema: future.result() for schema, future in futures.items()}
+
+    stats = {
+        schema: {
+            'tables': sum(1 for t in m['tables'].values() if t.get('type', 'table') == 'table'),
+            'views': len(m['views']),
+            'foreign_keys': len(m['foreign_keys']),
+        }
+        for schema, m in models.items()
+    }
+    # Links are relative so the overview and schema SVGs can be moved together
+    links = {
+        schema: f"{base_name}_{sanitize_label(schema)}.svg"
+        for schema in models
+    }
+    overview = generate_schema_overview(
+        stats, cross_schema_edges, output_file, links=links,
+        rankdir=generation_params.get('rankdir', 'LR'),
+        fontname=generation_params.get('fontname', 'Arial'),
+        fontsize=generation_params.get('fontsize', 18),
+    )
+    return {'overview': overview, 'schemas': schema_svgs}
@@ -2,27 +2,178 @@
 """
 Web server for pypgsvg to handle interactive ERD viewing with reload capabilities.
 """
+import contextvars
+import hashlib
+import http.cookies
 import http.server
+import io
 import socketserver
 import json
 import os
+import shutil
+import socket
+import tempfile
 import threading
 import webbrowser
 import time
-from urllib.parse import urlparse
-from typing import Optional, Dict, Any
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlparse, parse_qs
+from typing import Optional, Dict, Any, Tuple
 
 from .database_service import DatabaseService
-from .erd_service import ERDService
+from .erd_service import (
+    ERDService, build_schema_model, render_schema_model, diff_schema_models, schema_adjacency,
+    table_neighborhood, NEIGHBORHOOD_DIRECTIONS,
+)
 from .db_parser import parse_sql_dump, extract_constraint_info
 from .layout_optimizer import optimize_layout
+from .profiling import Profiler, profile, span
+from .jobs import FINISHED_STATES, JobManager, cancel_scope
+from .coalesce import LatestWins, SingleFlight
+from .metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE, GENERATIONS_IN_FLIGHT, HTTP_BYTES, HTTP_LATENCY, HTTP_REQUESTS,
+    REGISTRY, cache_lookup,
+)
+from .cache import content_addressed_path, output_stem, read_cache_key, render_cache_key
+from .render_pool import RenderLimitExceeded, get_pool
+from .render_service import Overloaded, RenderCache, UploadError, get_admission, read_upload, render_settings
+from .sessions import SESSION_COOKIE, SESSION_DIR, SESSION_HEADER, SessionManager, is_session_id, new_session_id
+from .state_store import STATE_FILE, MemoryStore, StateStore
+from .http_cache import RepresentationCache, is_compressible, negotiate_encoding
+from .svg_utils import ASSET_TYPES, asset_path, externalize_assets, parse_asset_url
+
+# URL prefix for the versioned interactivity assets referenced by served ERDs
+ASSET_BASE_URL = '/assets/'
+
+# POST endpoints that can run as background jobs with ?async=1
+JOB_ENDPOINTS = (
+    '/api/reload-erd',
+    '/api/apply_graphviz_settings',
+    '/api/apply_focused_settings',
+    '/api/generate_selected_svg',
+    '/api/generate_focused_erd',
+    '/api/generate_neighborhood_erd',
+    '/api/optimize_layout',
+)
+
+
+def externalize_svg(raw: bytes) -> bytes:
+    """Served form of an ERD: inlined assets replaced by /assets/ references."""
+    try:
+        svg_content = raw.decode('utf-8')
+    except UnicodeDecodeError:
+        return raw
+    return externalize_assets(svg_content, ASSET_BASE_URL).encode('utf-8')
+
+
+def settings_key(generation_params: Dict[str, Any]) -> str:
+    """Short digest identifying a set of generation settings."""
+    return hashlib.sha256(
+        json.dumps(generation_params, sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()[:12]
+
+
+def replace_with_copy(source: str, destination: str) -> None:
+    """Copy ``source`` over ``destination`` atomically (readers never see a partial file)."""
+    tmp = f"{destination}.{threading.get_ident()}.tmp"
+    shutil.copyfile(source, tmp)
+    os.replace(tmp, destination)
+
+
+# Every API path the handler answers; each is its own metrics route label
+API_ROUTES = frozenset(JOB_ENDPOINTS + (
+    '/api/events',
+    '/api/jobs',
+    '/api/list-databases',
+    '/api/metrics',
+    '/api/profile',
+    '/api/render',
+    '/api/session',
+    '/api/shutdown',
+    '/api/test-db-connection',
+))
+# Sub-resources of /api/jobs/<id>/
+JOB_ACTIONS = ('events', 'result', 'cancel')
+
+
+def metrics_route(path: str) -> str:
+    """
+    Route label for a request path, keeping the label set small.
+
+    Known API routes keep their path (job ids collapsed to ``:id``); any
+    other API path is ``other``, so scanning random URLs adds no series.
+    """
+    if path.startswith('/api/jobs/'):
+        action = path[len('/api/jobs/'):].partition('/')[2]
+        if not action:
+            return '/api/jobs/:id'
+        return f'/api/jobs/:id/{action}' if action in JOB_ACTIONS else 'other'
+    if path.startswith('/api/'):
+        return path if path in API_ROUTES else 'other'
+    if path.startswith(ASSET_BASE_URL):
+        return ASSET_BASE_URL
+    return 'svg' if path.endswith('.svg') else 'static'
+
+
+class SchemaSourceError(Exception):
+    """The configured schema source cannot be read (missing parameters or file)."""
+
+
+class UnknownTableError(Exception):
+    """A requested table is not in the current schema."""
+
+
+class ThreadingERDServer(socketserver.ThreadingTCPServer):
+    """
+    HTTP server handling each request in its own thread, so a slow render or
+    an open event stream never blocks SVG, asset or API GETs.
+    """
+
+    daemon_threads = True
+
+
+class EventBroadcaster:
+    """Latest-event fan-out for the server-sent event streams at /api/events."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._version = 0
+        self._event = None
+
+    @property
+    def version(self) -> int:
+        """Version of the most recently published event (0 before any)."""
+        with self._condition:
+            return self._version
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> int:
+        """Publish an event to every waiting stream and return its version."""
+        with self._condition:
+            self._version += 1
+            self._event = (self._version, event_type, dict(data, version=self._version))
+            self._condition.notify_all()
+            return self._version
+
+    def wait(self, since: int, timeout: float) -> Optional[Tuple[int, str, Dict[str, Any]]]:
+        """
+        Wait for an event newer than ``since``.
+
+        Returns:
+            (version, event_type, data), or None on timeout. Slow clients only
+            see the latest event, which is all an ERD refresh needs.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._version > since, timeout)
+            return self._event if self._version > since else None
 
 
 class ERDServer:
     """Server to host ERD SVG files with reload capabilities."""
 
     def __init__(self, svg_file: str, source_type: str, source_params: Dict[str, Any],
-                 generation_params: Dict[str, Any]):
+                 generation_params: Dict[str, Any], store: Optional[StateStore] = None):
         """
         Initialize ERD server.
 
@@ -31,18 +182,222 @@ class ERDServer:
             source_type: 'database' or 'file'
             source_params: Parameters for the data source (host, port, etc. for database; filepath for file)
             generation_params: Parameters for ERD generation (packmode, rankdir, etc.)
+            store: Where svg_file, source_params and generation_params live
+                   (default: this process only); values already in a shared
+                   store are kept
         """
-        self.svg_file = svg_file
+        self.store = store if store is not None else MemoryStore()
+        self.store.seed(svg_file=svg_file, source_params=source_params, generation_params=generation_params)
         self.source_type = source_type
-        self.source_params = source_params
-        self.generation_params = generation_params
         self.port = 8765
         self.server = None
 
+        # --watch state
+        self.watch = False
+        self.watcher = None
+        self.events = EventBroadcaster()
+        self._watch_digest = None
+        self._watch_model = None
+
+        # Phase timings of recent API requests, served at /api/profile
+        self.recent_profiles = deque(maxlen=20)
+
+        # Request threads share svg_file, source_params and generation_params;
+        # read them through snapshot() and replace them under state_lock
+        self.state_lock = threading.RLock()
+        # Generation (parse + layout + write) runs in a bounded pool so a burst
+        # of requests cannot start an unbounded number of dot processes
+        self.render_workers = min(4, os.cpu_count() or 1)
+        self._render_pool = None
+
+        # Background generation jobs (POST ...?async=1), see /api/jobs
+        self.jobs = JobManager(max_finished=20)
+
+        # Parsed schema of the current source as (key, entry), see load_schema
+        self._schema_cache = None
+        self._schema_lock = threading.Lock()
+
+        # Recently rendered neighbourhood ERDs: key -> (schema entry, svg path)
+        self.neighborhood_cache_size = 16
+        self._neighborhoods: 'OrderedDict[str, Tuple[Dict[str, Any], str]]' = OrderedDict()
+
+        # Full ERDs rendered ahead of time by --prewarm: settings key ->
+        # (schema entry, svg path), copied into place by a matching reload
+        self.prewarm = False
+        self.prewarmer = None
+        self.variant_cache_size = 8
+        self._variants: 'OrderedDict[str, Tuple[Dict[str, Any], str]]' = OrderedDict()
+        self._variant_dir = None
+
+        # Dumps uploaded to POST /api/render, rendered by body hash and settings
+        self.render_cache = RenderCache()
+
+        # Compressed, ETagged copies of served files, see send_head
+        self.http_cache = RepresentationCache()
+
+        # Per-client focused/neighbourhood outputs, see sessions.py
+        self.sessions = SessionManager(
+            os.path.join(os.path.dirname(os.path.abspath(self.svg_file)), SESSION_DIR),
+            shared=self.store.shared
+        )
+
+        # Identical concurrent reloads share one render; bursts of settings
+        # changes are debounced and older ones cancelled
+        self.flights = SingleFlight()
+        self.settings_updates = LatestWins(debounce=0.15)
+
         # Initialize service layer
         self.database_service = DatabaseService()
         self.erd_service = ERDService(self.database_service)
 
+    @property
+    def svg_file(self) -> str:
+        return self.store.get('svg_file')
+
+    @svg_file.setter
+    def svg_file(self, value: str):
+        self.store.update(svg_file=value)
+
+    @property
+    def source_params(self) -> Dict[str, Any]:
+        return self.store.get('source_params')
+
+    @source_params.setter
+    def source_params(self, value: Dict[str, Any]):
+        self.store.update(source_params=value)
+
+    @property
+    def generation_params(self) -> Dict[str, Any]:
+        return self.store.get('generation_params')
+
+    @generation_params.setter
+    def generation_params(self, value: Dict[str, Any]):
+        self.store.update(generation_params=value)
+
+    def snapshot(self) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
+        """Consistent copy of (svg_file, source_params, generation_params)."""
+        with self.state_lock:
+            state = self.store.load()
+        return state['svg_file'], dict(state['source_params']), dict(state['generation_params'])
+
+    def run_render(self, fn, *args, output: Optional[str] = None, **kwargs):
+        """
+        Run a generation call in the bounded render pool and wait for it.
+
+        Args:
+            fn: Callable doing the parse/layout/write work
+            *args: Positional arguments for fn
+            output: Output path (without extension); renders to the same
+                    path are serialized (across processes sharing the store)
+                    so they cannot interleave writes
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            fn's return value; exceptions raised by fn propagate
+        """
+        with self.state_lock:
+            if self._render_pool is None:
+                self._render_pool = ThreadPoolExecutor(
+                    max_workers=self.render_workers, thread_name_prefix='pypgsvg-render'
+                )
+        output_lock = self.store.lock(os.path.abspath(output)) if output else None
+
+        def call():
+            if output_lock is None:
+                return fn(*args, **kwargs)
+            with output_lock:
+                return fn(*args, **kwargs)
+
+        # copy_context keeps the request's profiler spans in the worker thread
+        with GENERATIONS_IN_FLIGHT.track():
+            return self._render_pool.submit(contextvars.copy_context().run, call).result()
+
+    def invalidate_schema_cache(self) -> None:
+        """Drop the cached schema so the next request re-reads the source."""
+        with self._schema_lock:
+            self._schema_cache = None
+
+    def load_schema(self, source_params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Parsed schema of the configured source, cached between requests.
+
+        File sources are keyed on path, mtime and size. Database sources are
+        keyed on the connection and a catalog fingerprint (one psql query
+        instead of a full pg_dump), so DDL in the database invalidates the
+        entry. Concurrent callers wait for a single load.
+
+        Args:
+            source_params: Source parameters (default: the current ones)
+
+        Returns:
+            Dict with sql_dump, view_columns, input_source, model (see
+            build_schema_model) and adjacency, a schema_adjacency index per
+            direction in NEIGHBORHOOD_DIRECTIONS
+
+        Raises:
+            SchemaSourceError: If the source parameters or file are missing
+        """
+        if source_params is None:
+            _, source_params, _ = self.snapshot()
+
+        with self._schema_lock:
+            if self.source_type == 'database':
+                host = source_params.get('host')
+                port = source_params.get('port')
+                database = source_params.get('database')
+                user = source_params.get('user')
+                password = self.cached_password or ''
+                if not all([host, port, database, user]):
+                    raise SchemaSourceError("Database connection parameters not available")
+                fingerprint = self.database_service.catalog_fingerprint(host, port, database, user, password)
+                key = ('database', host, str(port), database, user, fingerprint) if fingerprint else None
+            elif self.source_type == 'file':
+                filepath = source_params.get('filepath')
+                if not filepath or not os.path.exists(filepath):
+                    raise SchemaSourceError("Source file not available")
+                try:
+                    st = os.stat(filepath)
+                    key = ('file', os.path.abspath(filepath), st.st_mtime_ns, st.st_size)
+                except OSError:
+                    key = None
+            else:
+                raise SchemaSourceError("Unknown source type")
+
+            hit = key is not None and self._schema_cache is not None and self._schema_cache[0] == key
+            cache_lookup('schema', hit)
+            if hit:
+                return self._schema_cache[1]
+
+            if self.source_type == 'database' and self.database_service.schema_backend == 'catalog':
+                # No dump to keep: every consumer of the entry uses the model
+                with span('read', source='catalog'):
+                    model = self.database_service.fetch_catalog_model(host, port, database, user, password)
+                sql_dump = ''
+                view_columns = {name: view['columns'] for name, view in model['views'].items()}
+                input_source = f"{user}@{host}:{port}/{database}"
+            else:
+                with span('read', source=self.source_type):
+                    if self.source_type == 'database':
+                        sql_dump = self.fetch_schema_from_database(host, port, database, user, password)
+                        view_columns = self.fetch_view_columns(host, port, database, user, password)
+                        input_source = f"{user}@{host}:{port}/{database}"
+                    else:
+                        with open(filepath, 'r', encoding='utf-8') as f:
+                            sql_dump = f.read()
+                        view_columns = {}
+                        input_source = filepath
+                model = build_schema_model(sql_dump, view_columns)
+            entry = {
+                'sql_dump': sql_dump,
+                'view_columns': view_columns,
+                'input_source': input_source,
+                'model': model,
+                'adjacency': {direction: schema_adjacency(model, direction)
+                              for direction in NEIGHBORHOOD_DIRECTIONS},
+            }
+            self._schema_cache = (key, entry) if key is not None else None
+            return entry
+
     @property
     def cached_password(self) -> str:
         """Get cached password from database service."""
@@ -78,20 +433,30 @@ class ERDServer:
         """Reload ERD from database connection."""
         try:
             # Generate new filename with database name
-            svg_dir = os.path.dirname(os.path.abspath(self.svg_file))
+            svg_file, _, generation_params = self.snapshot()
+            svg_dir = os.path.dirname(os.path.abspath(svg_file))
             new_filename = f"{database}_erd"
             output_file = os.path.join(svg_dir, new_filename)
 
-            # Delegate to ERD service
-            new_svg_file, success = self.erd_service.generate_from_database(
-                host, port, database, user, password,
-                output_file,
-                self.generation_params
-            )
+            # Reuse a pre-warmed render of the current database, else delegate to ERD service
+            _, source_params, _ = self.snapshot()
+            current = [source_params.get(key) for key in ('host', 'port', 'database', 'user')]
+            new_svg_file = None
+            if [str(value) for value in current] == [str(host), str(port), database, user]:
+                new_svg_file = self.reuse_variant(generation_params, output_file)
+            if new_svg_file is None:
+                new_svg_file, success = self.run_render(
+                    self.erd_service.generate_from_database,
+                    host, port, database, user, password,
+                    output_file,
+                    generation_params,
+                    output=output_file
+                )
 
             # Update the server's SVG file reference and source params
-            self.svg_file = new_svg_file
-            self.source_params['database'] = database
+            with self.state_lock:
+                self.store.update(svg_file=new_svg_file,
+                                  source_params=dict(self.source_params, database=database))
 
             print(f"ERD reloaded successfully! New file: {new_svg_file}")
             return {
@@ -111,23 +476,33 @@ class ERDServer:
         """Reload ERD from dump file."""
         try:
             # Extract base filename without extension
-            output_file = os.path.splitext(self.svg_file)[0]
-
-            # Delegate to ERD service
-            new_svg_file, success = self.erd_service.generate_from_file(
-                filepath,
-                output_file,
-                self.generation_params
-            )
-
-            # Update source params with new filepath
-            self.source_params['filepath'] = filepath
+            svg_file, source_params, generation_params = self.snapshot()
+            output_file = output_stem(svg_file)
+
+            # Reuse a pre-warmed render of the same file, else delegate to ERD service
+            new_svg_file = None
+            if source_params.get('filepath') == filepath:
+                new_svg_file = self.reuse_variant(generation_params, output_file)
+            if new_svg_file is None:
+                new_svg_file, success = self.run_render(
+                    self.erd_service.generate_from_file,
+                    filepath,
+                    output_file,
+                    generation_params,
+                    output=output_file
+                )
+
+            # Update the SVG file reference (content-addressed names change) and the filepath
+            with self.state_lock:
+                self.store.update(svg_file=new_svg_file,
+                                  source_params=dict(self.source_params, filepath=filepath))
 
             print("ERD reloaded successfully!")
             return {
                 "success": True,
                 "message": "ERD reloaded successfully",
-                "reload": True  # Signal browser to reload
+                "reload": True,  # Signal browser to reload
+                "new_file": os.path.basename(new_svg_file)
             }
         except Exception as e:
             print(f"Reload failed: {e}")
@@ -136,11 +511,365 @@ class ERDServer:
                 "message": str(e)
             }
     
+    def output_dir_for(self, session=None) -> str:
+        """Directory for a client's focused/neighbourhood ERDs (shared without a session)."""
+        if session is not None:
+            return session.output_dir
+        with self.state_lock:
+            return os.path.dirname(os.path.abspath(self.svg_file))
+
+    def set_view(self, session, svg_file: str) -> None:
+        """Record the ERD a client now views (the shared one without a session)."""
+        with self.state_lock:
+            if session is not None:
+                session.svg_file = svg_file
+            else:
+                self.svg_file = svg_file
+
+    def served_name(self, svg_file: str, session=None) -> str:
+        """URL path, relative to the server root, of a generated ERD."""
+        if session is None:
+            return os.path.basename(svg_file)
+        with self.state_lock:
+            root = os.path.dirname(os.path.abspath(self.svg_file))
+        return os.path.relpath(os.path.abspath(svg_file), root).replace(os.sep, '/')
+
+    def render_neighborhood(self, seeds, hops: int, direction: str,
+                            graphviz_settings: Dict[str, Any], session=None) -> Dict[str, Any]:
+        """
+        Render the ERD of the tables within ``hops`` foreign-key steps of ``seeds``.
+
+        The neighbourhood is resolved from the cached schema's adjacency
+        index. Renders are kept per (seeds, hops, direction, settings) for
+        the current schema, so revisiting a neighbourhood reuses its SVG.
+
+        Args:
+            seeds: Seed table names
+            hops: Radius (0 renders only the seeds)
+            direction: One of NEIGHBORHOOD_DIRECTIONS
+            graphviz_settings: Graphviz settings for the render
+            session: Client session whose directory and cache to use (None: shared)
+
+        Returns:
+            Dict with svg_file, tables (name -> distance) and cached
+
+        Raises:
+            SchemaSourceError: If the source cannot be read
+            UnknownTableError: If a seed table does not exist
+        """
+        _, source_params, _ = self.snapshot()
+        schema = self.load_schema(source_params)
+        adjacency = schema['adjacency'][direction]
+        unknown = [seed for seed in seeds if seed not in adjacency]
+        if unknown:
+            raise UnknownTableError(f"Unknown seed tables: {', '.join(unknown)}")
+
+        with span('neighborhood', hops=hops):
+            tables = table_neighborhood(adjacency, list(seeds), hops)
+
+        key = hashlib.sha256(json.dumps(
+            [sorted(seeds), hops, direction, graphviz_settings], sort_keys=True, default=str
+        ).encode('utf-8')).hexdigest()[:12]
+        cache = session.neighborhoods if session is not None else self._neighborhoods
+        shared = None
+        with self.state_lock:
+            cached = cache.get(key)
+            hit = cached is not None and cached[0] is schema and os.path.exists(cached[1])
+            if hit:
+                cache.move_to_end(key)
+            elif session is not None:
+                shared = self._neighborhoods.get(key)
+        svg_dir = self.output_dir_for(session)
+        output_name = f'neighborhood_{key}'
+        if shared is not None and shared[0] is schema and os.path.exists(shared[1]):
+            # A shared (e.g. pre-warmed) render is copied into the session
+            cached = (schema, os.path.join(svg_dir, output_name + '.svg'))
+            replace_with_copy(shared[1], cached[1])
+            with self.state_lock:
+                cache[key] = cached
+                cache.move_to_end(key)
+            hit = True
+        cache_lookup('neighborhood', hit)
+        if hit:
+            return {'svg_file': cached[1], 'tables': tables, 'cached': True}
+
+        new_svg_file = self.run_render(
+            self.erd_service.generate_focused_erd,
+            schema['sql_dump'],
+            list(tables),
+            svg_dir,
+            schema['input_source'],
+            graphviz_settings,
+            schema['view_columns'],
+            model=schema['model'],
+            output_name=output_name,
+            output=os.path.join(svg_dir, output_name)
+        )
+
+        with self.state_lock:
+            cache[key] = (schema, new_svg_file)
+            cache.move_to_end(key)
+            evicted = []
+            while len(cache) > self.neighborhood_cache_size:
+                evicted.append(cache.popitem(last=False)[1][1])
+            current = session.svg_file if session is not None else self.svg_file
+        for path in evicted:
+            # Keep the file the viewer is showing
+            if path not in (new_svg_file, current) and os.path.exists(path):
+                os.remove(path)
+        return {'svg_file': new_svg_file, 'tables': tables, 'cached': False}
+
+    def render_variant(self, generation_params: Dict[str, Any]) -> str:
+        """
+        Render the full ERD of the current source with ``generation_params``
+        into the variant cache (used by the pre-warmer).
+
+        Args:
+            generation_params: Complete generation settings
+
+        Returns:
+            Path of the cached SVG
+
+        Raises:
+            SchemaSourceError: If the source cannot be read
+        """
+        schema = self.load_schema()
+        key = settings_key(generation_params)
+        with self.state_lock:
+            cached = self._variants.get(key)
+            if cached is not None and cached[0] is schema and os.path.exists(cached[1]):
+                return cached[1]
+            if self._variant_dir is None:
+                self._variant_dir = tempfile.mkdtemp(prefix='pypgsvg-variants-')
+            output_file = os.path.join(self._variant_dir, f'variant_{key}')
+
+        svg_file = self.run_render(
+            render_schema_model, schema['model'], output_file, schema['input_source'],
+            generation_params, output=output_file
+        )
+
+        with self.state_lock:
+            self._variants[key] = (schema, svg_file)
+            self._variants.move_to_end(key)
+            evicted = []
+            while len(self._variants) > self.variant_cache_size:
+                evicted.append(self._variants.popitem(last=False)[1][1])
+        for path in evicted:
+            if path != svg_file and os.path.exists(path):
+                os.remove(path)
+        return svg_file
+
+    def reuse_variant(self, generation_params: Dict[str, Any], output_file: str) -> Optional[str]:
+        """
+        Install a pre-warmed render of the current source as ``output_file``.svg
+        (``output_file``.<key prefix>.svg with content-addressed outputs).
+
+        Args:
+            generation_params: Settings the reload would render with
+            output_file: Reload output path (without extension)
+
+        Returns:
+            The SVG path, or None when no render for these settings and the
+            current schema is cached
+        """
+        with self.state_lock:
+            if not self._variants:
+                return None
+            cached = self._variants.get(settings_key(generation_params))
+        try:
+            # Checks the source is unchanged (file stat or catalog fingerprint)
+            schema = self.load_schema()
+        except Exception:
+            return None
+        hit = cached is not None and cached[0] is schema and os.path.exists(cached[1])
+        cache_lookup('variant', hit)
+        if not hit:
+            return None
+        key = read_cache_key(cached[1]) if generation_params.get('content_addressed') else None
+        svg_file = content_addressed_path(output_file, key) if key else output_file + '.svg'
+        self.run_render(replace_with_copy, cached[1], svg_file, output=output_file)
+        print(f"Reused pre-warmed render for {os.path.basename(svg_file)}")
+        return svg_file
+
+    def start_prewarm(self):
+        """Start rendering likely next views in the background (see prewarm.py)."""
+        from .prewarm import Prewarmer
+
+        self.prewarmer = Prewarmer(self).start()
+        print("Pre-warming likely views in the background")
+        return self.prewarmer
+
+    def close_prewarm(self) -> None:
+        """Stop the pre-warmer and remove the variant cache."""
+        if self.prewarmer is not None:
+            self.prewarmer.stop()
+            self.prewarmer = None
+        with self.state_lock:
+            self._variants.clear()
+            variant_dir, self._variant_dir = self._variant_dir, None
+        if variant_dir is not None:
+            shutil.rmtree(variant_dir, ignore_errors=True)
+
+    def render_upload(self, stream, length: int, settings: Dict[str, Any]) -> Tuple[str, bool]:
+        """
+        Render a dump uploaded to /api/render, independently of the viewed ERD.
+
+        Args:
+            stream: Request body
+            length: Body length in bytes
+            settings: Complete generation settings (see render_service.render_settings)
+
+        Returns:
+            (svg path in the render cache, True if it was served from the cache)
+
+        Raises:
+            UploadError: If the body is not a readable dump or has no tables
+        """
+        with span('upload', bytes=length):
+            sql_dump, digest = read_upload(stream, length)
+        key = render_cache_key('upload', digest, settings)
+        cached = self.render_cache.get(key)
+        cache_lookup('upload', cached is not None)
+        if cached is not None:
+            return cached, True
+
+        def render():
+            output_file = self.render_cache.path_for(key)
+            svg_file = self.run_render(self._render_dump, sql_dump, output_file,
+                                       f"upload {digest[:12]}", settings, output=output_file)
+            self.render_cache.put(key, svg_file)
+            return svg_file
+
+        # Identical uploads arriving together share one render
+        svg_file, shared = self.flights.do(('render', key), render)
+        return svg_file, shared
+
+    @staticmethod
+    def _render_dump(sql_dump: str, output_file: str, input_source: str, settings: Dict[str, Any]) -> str:
+        model = build_schema_model(sql_dump)
+        if not model['tables']:
+            raise UploadError("No tables found in the uploaded dump", status=422)
+        return render_schema_model(model, output_file, input_source, settings)
+
+    def single_flight_reload(self, method: str, *args) -> Dict[str, Any]:
+        """
+        Call reload_from_database/reload_from_file, sharing the render with
+        an identical reload (same arguments and generation settings) that is
+        already in flight.
+
+        Args:
+            method: 'reload_from_database' or 'reload_from_file'
+            *args: Arguments for the method
+
+        Returns:
+            The reload result, with ``coalesced: True`` when it was shared
+        """
+        _, _, generation_params = self.snapshot()
+        key = (method, args, json.dumps(generation_params, sort_keys=True, default=str))
+        result, shared = self.flights.do(key, lambda: getattr(self, method)(*args))
+        if shared:
+            print("Reload coalesced with an identical in-flight request")
+            return dict(result, coalesced=True)
+        return result
+
+    @contextmanager
+    def profiled(self, name: str, listener=None):
+        """
+        Collect instrumentation spans for one request or job.
+
+        The report is kept in ``recent_profiles`` for /api/profile.
+
+        Args:
+            name: Label for the report
+            listener: Optional Profiler listener (e.g. a job's progress hook)
+
+        Yields:
+            The active Profiler
+        """
+        with profile(Profiler(listener=listener)) as profiler:
+            try:
+                yield profiler
+            finally:
+                self.recent_profiles.append(dict(profiler.report(), name=name, time=time.time()))
+
+    def start_watching(self) -> bool:
+        """
+        Watch the source dump file and push regenerated ERDs to open browsers.
+
+        Returns:
+            True if a watcher was started
+        """
+        filepath = self.source_params.get('filepath')
+        if self.source_type != 'file' or not filepath:
+            print("Watch mode needs a dump file source; not watching")
+            return False
+
+        from .watcher import FileWatcher
+
+        # Seed the model so the first change can be diffed against it
+        with open(filepath, 'rb') as f:
+            raw = f.read()
+        self._watch_digest = hashlib.sha256(raw).hexdigest()
+        self._watch_model = build_schema_model(raw.decode('utf-8'))
+
+        self.watcher = FileWatcher(filepath, self.regenerate_from_watch).start()
+        print(f"Watching {filepath} for changes ({self.watcher.backend})")
+        return True
+
+    def regenerate_from_watch(self, filepath: str) -> Optional[Dict[str, Any]]:
+        """
+        Re-render after the watched dump changed and notify /api/events streams.
+
+        Rewrites that leave the parsed model unchanged (touch, comments,
+        reordering within pg_dump sections) skip layout and rendering entirely.
+
+        Returns:
+            The published event data, or None if nothing was regenerated
+        """
+        with open(filepath, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        if digest == self._watch_digest:
+            return None
+        self._watch_digest = digest
+
+        model = build_schema_model(raw.decode('utf-8'))
+        if model['errors']:
+            print(f"Not regenerating, {filepath} has parse errors:")
+            for error in model['errors']:
+                print(error)
+            return None
+        if self._watch_model is not None and model == self._watch_model:
+            print("Dump changed but schema did not; ERD is up to date")
+            return None
+
+        changes = diff_schema_models(self._watch_model, model)
+        self._watch_model = model
+        svg_file, _, generation_params = self.snapshot()
+        output_file = output_stem(svg_file)
+        new_svg_file = self.run_render(
+            render_schema_model, model, output_file, filepath, generation_params, output=output_file
+        )
+        with self.state_lock:
+            self.svg_file = new_svg_file
+        data = {'file': os.path.basename(new_svg_file), 'changes': changes}
+        version = self.events.publish('erd-updated', data)
+        print(f"ERD regenerated (update {version}): "
+              f"{len(changes['added'])} added, {len(changes['removed'])} removed, "
+              f"{len(changes['changed'])} changed tables")
+        return dict(data, version=version)
+
     def create_request_handler(self):
         """Create a custom request handler with access to server instance."""
         server_instance = self
         
         class ERDRequestHandler(http.server.SimpleHTTPRequestHandler):
+            # Keep-alive: every response carries Content-Length or closes the connection
+            protocol_version = 'HTTP/1.1'
+            # Headers and sendfile bodies are separate writes; without TCP_NODELAY
+            # Nagle holds the second one for the client's delayed ACK
+            disable_nagle_algorithm = True
+
             def __init__(self, *args, **kwargs):
                 # Serve files from the directory containing the SVG
                 svg_dir = os.path.dirname(os.path.abspath(server_instance.svg_file))
@@ -160,18 +889,331 @@ class ERDServer:
                 """Add CORS headers to allow cross-origin requests."""
                 self.send_header('Access-Control-Allow-Origin', '*')
                 self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-                self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+                self.send_header('Access-Control-Allow-Headers', f'Content-Type, {SESSION_HEADER}')
+                session_id = getattr(self, '_issue_session', None)
+                if session_id is not None:
+                    self._issue_session = None
+                    self.send_header('Set-Cookie', f'{SESSION_COOKIE}={session_id}; Path=/; HttpOnly; SameSite=Strict')
                 super().end_headers()
+
+            def parse_request(self):
+                """Start the request's latency clock once its request line has arrived."""
+                self._request_started = time.perf_counter()
+                self._response_status = None
+                self._response_bytes = 0
+                return super().parse_request()
+
+            def send_response(self, code, message=None):
+                self._response_status = code
+                super().send_response(code, message)
+
+            def send_header(self, keyword, value):
+                if keyword.lower() == 'content-length':
+                    self._response_bytes = int(value)
+                super().send_header(keyword, value)
+
+            def handle_one_request(self):
+                """Handle one request and record its route, status, latency and size."""
+                self._response_status = None
+                super().handle_one_request()
+                self.record_request()
+
+            def record_request(self):
+                """Record the handled request's route, status, latency and size in the HTTP metrics."""
+                status = getattr(self, '_response_status', None)
+                if status is None or not getattr(self, 'command', None):
+                    return
+                route = metrics_route(urlparse(self.path).path)
+                HTTP_REQUESTS.inc(method=self.command, route=route, status=str(int(status)))
+                HTTP_LATENCY.observe(time.perf_counter() - self._request_started, method=self.command, route=route)
+                if self.command != 'HEAD' and status != 304:
+                    HTTP_BYTES.inc(self._response_bytes, route=route)
+
+            def session_id(self):
+                """Session id sent by the client (header first, then cookie), or None."""
+                headers = getattr(self, 'headers', None)
+                if headers is None:
+                    return None
+                session_id = headers.get(SESSION_HEADER)
+                if not session_id and headers.get('Cookie'):
+                    cookie = http.cookies.SimpleCookie()
+                    try:
+                        cookie.load(headers.get('Cookie'))
+                    except http.cookies.CookieError:
+                        return None
+                    morsel = cookie.get(SESSION_COOKIE)
+                    session_id = morsel.value if morsel is not None else None
+                return session_id if is_session_id(session_id) else None
+
+            def current_session(self):
+                """This client's session, or None for clients without one (shared outputs)."""
+                session_id = self.session_id()
+                return server_instance.sessions.get(session_id) if session_id else None
             
             def do_OPTIONS(self):
                 """Handle preflight requests."""
                 self.send_response(200)
+                self.send_header('Content-Length', '0')
                 self.end_headers()
             
+            def do_GET(self):
+                """Serve files, plus the /api/events stream in watch mode."""
+                path = urlparse(self.path).path
+                if path == '/api/events':
+                    self.handle_events()
+                elif path == '/api/profile':
+                    prewarmer = server_instance.prewarmer
+                    self.send_json_response({
+                        "profiles": list(server_instance.recent_profiles),
+                        "dot_pool": get_pool().stats(),
+                        "prewarm": prewarmer.status() if prewarmer is not None else None,
+                        "render_admission": get_admission().stats(),
+                    })
+                elif path == '/api/jobs':
+                    self.send_json_response({"jobs": server_instance.jobs.list()})
+                elif path.startswith('/api/jobs/'):
+                    self.handle_job_get(path)
+                elif path == '/api/session':
+                    self.handle_session()
+                elif path == '/api/metrics':
+                    self.handle_metrics()
+                else:
+                    # Opening an ERD starts a session for this browser
+                    if path.endswith('.svg') and self.session_id() is None:
+                        self._issue_session = new_session_id()
+                    super().do_GET()
+                    if path.endswith('.svg') and server_instance.prewarmer is not None:
+                        server_instance.prewarmer.page_served()
+
+            def handle_metrics(self):
+                """Serve process metrics in the Prometheus text format."""
+                body = REGISTRY.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', METRICS_CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def handle_session(self):
+                """Return this client's session, starting one (with its cookie) if needed."""
+                session_id = self.session_id()
+                if session_id is None:
+                    session_id = self._issue_session = new_session_id()
+                session = server_instance.sessions.get(session_id)
+                self.send_json_response(dict(session.to_dict(), header=SESSION_HEADER,
+                                             idle_timeout=server_instance.sessions.idle_timeout))
+
+            def send_head(self):
+                """
+                Send headers for a static file and return its body to copy.
+
+                ERDs are served with their inlined assets replaced by
+                /assets/ references (the files on disk stay self-contained),
+                /assets/ serves the versioned interactivity JS/CSS with
+                immutable caching, and directories fall back to the default
+                listing. Bodies are negotiated gzip/brotli variants with
+                strong ETags; a matching If-None-Match gets a 304.
+                """
+                path = urlparse(self.path).path
+                if path.startswith(ASSET_BASE_URL):
+                    fname = parse_asset_url(path, ASSET_BASE_URL)
+                    if fname is None:
+                        self.send_error(404, "Unknown asset version")
+                        return None
+                    return self.send_representation(asset_path(fname), ASSET_TYPES[fname],
+                                                    cache_control='public, max-age=31536000, immutable')
+
+                file_path = self.translate_path(self.path)
+                parts = self.served_parts(file_path)
+                if os.path.isdir(file_path) and parts[:1] == [os.path.normcase(SESSION_DIR)]:
+                    # Listing would reveal other clients' session ids
+                    self.send_error(404, "File not found")
+                    return None
+                if any(part.startswith(os.path.normcase(STATE_FILE)) for part in parts):
+                    # Shared worker state (see wsgi.py) holds source paths; also
+                    # its .lock, .locks/ and temporary files
+                    self.send_error(404, "File not found")
+                    return None
+                if os.path.isdir(file_path) or not os.path.isfile(file_path):
+                    return super().send_head()
+                if path.endswith('.svg'):
+                    # The ERD changes on reload; revalidate instead of caching
+                    return self.send_representation(file_path, 'image/svg+xml', transform=externalize_svg)
+                return self.send_representation(file_path, self.guess_type(file_path))
+
+            def served_parts(self, file_path):
+                """
+                Components of a translate_path result relative to the served directory.
+
+                Guards must test these rather than the URL: translate_path
+                decodes and normalises it, so ``/%2Ename`` and ``/./name`` are
+                ``name`` too. Case-folded where the filesystem is.
+                """
+                relative = os.path.relpath(file_path, self.directory)
+                return [os.path.normcase(part) for part in relative.split(os.sep) if part not in ('', '.')]
+
+            def send_representation(self, file_path, content_type, transform=None, cache_control='no-cache',
+                                    extra_headers=None):
+                """Negotiate a coding of ``file_path`` and send its headers; None after a 304."""
+                try:
+                    representation = server_instance.http_cache.get(file_path, content_type, transform)
+                except OSError:
+                    self.send_error(404, "File not found")
+                    return None
+
+                coding = negotiate_encoding(self.headers.get('Accept-Encoding'), representation.files)
+                vary = is_compressible(content_type)
+                if representation.matches(self.headers.get('If-None-Match')):
+                    self.send_response(304)
+                    self.send_header('ETag', representation.etag(coding))
+                    self.send_header('Cache-Control', cache_control)
+                    if vary:
+                        self.send_header('Vary', 'Accept-Encoding')
+                    self.end_headers()
+                    return None
+
+                try:
+                    body = open(representation.files[coding], 'rb')
+                except OSError:
+                    self.send_error(404, "File not found")
+                    return None
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(os.fstat(body.fileno()).st_size))
+                if coding:
+                    self.send_header('Content-Encoding', coding)
+                if vary:
+                    self.send_header('Vary', 'Accept-Encoding')
+                self.send_header('ETag', representation.etag(coding))
+                self.send_header('Cache-Control', cache_control)
+                for keyword, value in (extra_headers or {}).items():
+                    self.send_header(keyword, value)
+                self.end_headers()
+                return body
+
+            def copyfile(self, source, outputfile):
+                """Copy file bodies to the socket with sendfile (zero-copy where the OS supports it)."""
+                if outputfile is self.wfile and isinstance(self.connection, socket.socket):
+                    self.wfile.flush()
+                    self.connection.sendfile(source)
+                else:
+                    super().copyfile(source, outputfile)
+
+            def handle_events(self):
+                """Stream ERD update notifications as server-sent events."""
+                if server_instance.watcher is None:
+                    self.send_error(404, "Watch mode is not enabled")
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                # Unbounded body: the stream ends when the connection closes
+                self.send_header('Connection', 'close')
+                self.end_headers()
+
+                since = server_instance.events.version
+                try:
+                    self.wfile.write(b'retry: 2000\n\n')
+                    self.wfile.flush()
+                    while server_instance.watcher is not None:
+                        event = server_instance.events.wait(since, timeout=15)
+                        if event is None:
+                            self.wfile.write(b': keepalive\n\n')
+                        else:
+                            since, event_type, data = event
+                            self.wfile.write(
+                                f"id: {since}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n".encode('utf-8')
+                            )
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def handle_job_get(self, path):
+                """Job status, its event stream (/events) or its captured response (/result)."""
+                job_id, _, action = path[len('/api/jobs/'):].partition('/')
+                job = server_instance.jobs.get(job_id)
+                if job is None:
+                    self.send_json_response({"success": False, "message": "Unknown job"}, 404)
+                elif action == '':
+                    self.send_json_response(job.to_dict())
+                elif action == 'events':
+                    self.stream_job_events(job)
+                elif action == 'result':
+                    if job.result is None:
+                        self.send_json_response({"success": False, "message": f"Job is {job.state}"}, 409)
+                        return
+                    content_type, body = job.result
+                    self.send_response(job.response.get('status', 200))
+                    self.send_header('Content-Type', content_type)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                else:
+                    self.send_error(404, "Endpoint not found")
+
+            def stream_job_events(self, job):
+                """Stream a job's state as server-sent events until it finishes."""
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                # Unbounded body: the stream ends when the connection closes
+                self.send_header('Connection', 'close')
+                self.end_headers()
+
+                version = -1
+                try:
+                    while True:
+                        version = job.wait(version, timeout=15)
+                        state = job.to_dict()
+                        done = state['state'] in FINISHED_STATES
+                        self.wfile.write(
+                            f"id: {version}\nevent: {'done' if done else 'progress'}\n"
+                            f"data: {json.dumps(state)}\n\n".encode('utf-8')
+                        )
+                        self.wfile.flush()
+                        if done:
+                            break
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def submit_job(self, path, data):
+                """Run a generation endpoint in the background and reply 202 with its job id."""
+                def work(job):
+                    with server_instance.profiled(path, listener=job.on_span) as profiler:
+                        capture = JobResponse(profiler, self.headers)
+                        capture.route_post(path, data)
+                    job.result = (capture.content_type, capture.wfile.getvalue())
+                    job.response = {'status': capture.status}
+                    if capture.content_type.startswith('application/json'):
+                        job.response['body'] = json.loads(job.result[1] or b'null')
+                    if capture.status >= 400:
+                        body = job.response.get('body') or {}
+                        raise Exception(body.get('message') or f"HTTP {capture.status}")
+                    return job.response
+
+                job = server_instance.jobs.submit(path, work)
+                base = f"/api/jobs/{job.id}"
+                self.send_json_response({
+                    "success": True,
+                    "job_id": job.id,
+                    "status_url": base,
+                    "events_url": f"{base}/events",
+                    "result_url": f"{base}/result",
+                    "cancel_url": f"{base}/cancel",
+                }, 202)
+
             def do_POST(self):
                 """Handle POST requests for API endpoints."""
                 parsed_path = urlparse(self.path)
-                
+                if parsed_path.path == '/api/render':
+                    # The body is a dump, read as it streams in rather than as JSON
+                    with server_instance.profiled(parsed_path.path) as profiler:
+                        self._profiler = profiler
+                        self.handle_render(parse_qs(parsed_path.query))
+                    return
+
                 # Read request body
                 content_length = int(self.headers.get('Content-Length', 0))
                 body = self.rfile.read(content_length).decode('utf-8') if content_length > 0 else '{}'
@@ -182,7 +1224,24 @@ class ERDServer:
                     self.send_error(400, "Invalid JSON")
                     return
                 
-                # Route API requests
+                if parsed_path.path in JOB_ENDPOINTS and parse_qs(parsed_path.query).get('async') == ['1']:
+                    self.submit_job(parsed_path.path, data)
+                    return
+                if parsed_path.path.startswith('/api/jobs/') and parsed_path.path.endswith('/cancel'):
+                    job = server_instance.jobs.cancel(parsed_path.path[len('/api/jobs/'):-len('/cancel')])
+                    if job is None:
+                        self.send_json_response({"success": False, "message": "Unknown job"}, 404)
+                    else:
+                        self.send_json_response(job.to_dict())
+                    return
+
+                with server_instance.profiled(parsed_path.path) as profiler:
+                    self._profiler = profiler
+                    self.route_post(parsed_path.path, data)
+
+            def route_post(self, path, data):
+                """Dispatch a POST request to its API handler."""
+                parsed_path = urlparse(path)
                 if parsed_path.path == '/api/test-db-connection':
                     self.handle_test_connection(data)
                 elif parsed_path.path == '/api/reload-erd':
@@ -195,6 +1254,8 @@ class ERDServer:
                     self.handle_generate_selected_svg(data)
                 elif parsed_path.path == '/api/generate_focused_erd':
                     self.handle_generate_focused_erd(data)
+                elif parsed_path.path == '/api/generate_neighborhood_erd':
+                    self.handle_generate_neighborhood_erd(data)
                 elif parsed_path.path == '/api/optimize_layout':
                     self.handle_optimize_layout(data)
                 elif parsed_path.path == '/api/shutdown':
@@ -204,6 +1265,58 @@ class ERDServer:
                 else:
                     self.send_error(404, "Endpoint not found")
             
+            def handle_render(self, query):
+                """Render the dump in the request body and send the SVG (see render_service.py)."""
+                try:
+                    settings = render_settings(query)
+                except ValueError as e:
+                    self.send_render_error(400, str(e))
+                    return
+                if self.headers.get('Transfer-Encoding') or self.headers.get('Content-Length') is None:
+                    self.send_render_error(411, "Content-Length required")
+                    return
+                try:
+                    length = int(self.headers.get('Content-Length'))
+                except ValueError:
+                    self.send_render_error(400, "Invalid Content-Length")
+                    return
+
+                try:
+                    with get_admission().admit(length):
+                        svg_file, cached = server_instance.render_upload(self.rfile, length, settings)
+                except Overloaded as e:
+                    self.send_render_error(e.status, str(e), e.retry_after)
+                    return
+                except UploadError as e:
+                    self.send_render_error(e.status, str(e))
+                    return
+                except RenderLimitExceeded as e:
+                    self.send_render_error(422, str(e))
+                    return
+                except Exception as e:
+                    self.send_render_error(500, f"Error rendering upload: {e}")
+                    return
+
+                body = self.send_representation(svg_file, 'image/svg+xml',
+                                                extra_headers={'X-Render-Cache': 'hit' if cached else 'miss'})
+                if body is not None:
+                    try:
+                        self.copyfile(body, self.wfile)
+                    finally:
+                        body.close()
+
+            def send_render_error(self, status_code, message, retry_after=None):
+                """JSON error for /api/render; closes the connection since the body may be unread."""
+                body = json.dumps({"success": False, "message": message}).encode('utf-8')
+                self.send_response(status_code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                if retry_after is not None:
+                    self.send_header('Retry-After', str(retry_after))
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                self.wfile.write(body)
+
             def handle_test_connection(self, data):
                 """Handle connection test request."""
                 if server_instance.source_type != 'database':
@@ -232,6 +1345,8 @@ class ERDServer:
             
             def handle_reload_erd(self, data):
                 """Handle ERD reload request."""
+                # An explicit reload always re-reads the source
+                server_instance.invalidate_schema_cache()
                 if server_instance.source_type == 'database':
                     host = data.get('host')
                     port = data.get('port')
@@ -246,7 +1361,8 @@ class ERDServer:
                         }, 400)
                         return
                     
-                    result = server_instance.reload_from_database(host, port, database, user, password)
+                    result = server_instance.single_flight_reload(
+                        'reload_from_database', host, port, database, user, password)
                 elif server_instance.source_type == 'file':
                     filepath = data.get('filepath')
                     
@@ -257,7 +1373,7 @@ class ERDServer:
                         }, 400)
                         return
                     
-                    result = server_instance.reload_from_file(filepath)
+                    result = server_instance.single_flight_reload('reload_from_file', filepath)
                 else:
                     result = {
                         "success": False,
@@ -281,6 +1397,10 @@ class ERDServer:
                     }, 400)
                     return
 
+                if data.get('stream'):
+                    self.stream_databases(host, port, user, password)
+                    return
+
                 try:
                     databases = server_instance.database_service.list_databases(
                         host, port, user, password
@@ -295,6 +1415,46 @@ class ERDServer:
                         "message": str(e)
                     }, 500)
 
+            def stream_databases(self, host, port, user, password):
+                """
+                Send the database list as server-sent events, table counts as they finish.
+
+                A ``databases`` event lists every name with ``table_count`` null,
+                then one ``database`` event per count (completion order) and a
+                final ``done``, so a picker can show the list straight away.
+                """
+                database_service = server_instance.database_service
+                try:
+                    names = database_service.database_names(host, port, user, password)
+                except Exception as e:
+                    self.send_json_response({
+                        "success": False,
+                        "message": str(e)
+                    }, 500)
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                # Unbounded body: the stream ends when the connection closes
+                self.send_header('Connection', 'close')
+                self.end_headers()
+
+                def send(event, payload):
+                    self.wfile.write(f"event: {event}\ndata: {json.dumps(payload)}\n\n".encode('utf-8'))
+                    self.wfile.flush()
+
+                counts = database_service.iter_table_counts(host, port, user, names, password)
+                try:
+                    send('databases', {"databases": [{"name": name, "table_count": None} for name in names]})
+                    for entry in counts:
+                        send('database', entry)
+                    send('done', {"success": True, "count": len(names)})
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    counts.close()
+
             def handle_apply_graphviz_settings(self, data):
                 """Handle apply Graphviz settings request - regenerate ERD with new settings."""
                 graphviz_settings = data.get('graphviz_settings', {})
@@ -307,15 +1467,43 @@ class ERDServer:
                     return
 
                 # Update generation params with new Graphviz settings
-                server_instance.generation_params.update(graphviz_settings)
+                with server_instance.state_lock:
+                    server_instance.generation_params = dict(server_instance.generation_params,
+                                                             **graphviz_settings)
+                _, source_params, _ = server_instance.snapshot()
+
+                # Only the latest of a burst of settings changes is rendered
+                updates = server_instance.settings_updates
+                ticket = updates.begin(json.dumps(graphviz_settings, sort_keys=True, default=str))
+                try:
+                    if updates.settle(ticket):
+                        with cancel_scope(ticket.token):
+                            result = self.regenerate_with_settings(source_params)
+                        if result is None:
+                            return
+                    if ticket.superseded:
+                        print("Graphviz settings request superseded by a newer one")
+                        result = {
+                            "success": True,
+                            "coalesced": True,
+                            "superseded": True,
+                            "reload": False,
+                            "message": "Superseded by a newer settings request"
+                        }
+                finally:
+                    updates.end(ticket)
 
-                # Regenerate ERD based on source type
+                status_code = 200 if result.get('success') else 500
+                self.send_json_response(result, status_code)
+
+            def regenerate_with_settings(self, source_params):
+                """Regenerate the ERD for apply_graphviz_settings; None after an error response."""
                 if server_instance.source_type == 'database':
                     # Get database connection parameters from source_params
-                    host = server_instance.source_params.get('host')
-                    port = server_instance.source_params.get('port')
-                    database = server_instance.source_params.get('database')
-                    user = server_instance.source_params.get('user')
+                    host = source_params.get('host')
+                    port = source_params.get('port')
+                    database = source_params.get('database')
+                    user = source_params.get('user')
                     password = server_instance.cached_password or ''  # Allow empty password
 
                     if not all([host, port, database, user]):
@@ -323,28 +1511,25 @@ class ERDServer:
                             "success": False,
                             "message": "Missing database connection parameters in server configuration"
                         }, 400)
-                        return
+                        return None
 
-                    result = server_instance.reload_from_database(host, port, database, user, password)
+                    return server_instance.single_flight_reload(
+                        'reload_from_database', host, port, database, user, password)
                 elif server_instance.source_type == 'file':
-                    filepath = server_instance.source_params.get('filepath')
+                    filepath = source_params.get('filepath')
 
                     if not filepath:
                         self.send_json_response({
                             "success": False,
                             "message": "Missing filepath in server configuration"
                         }, 400)
-                        return
+                        return None
 
-                    result = server_instance.reload_from_file(filepath)
-                else:
-                    result = {
-                        "success": False,
-                        "message": "Unknown source type"
-                    }
-
-                status_code = 200 if result.get('success') else 500
-                self.send_json_response(result, status_code)
+                    return server_instance.single_flight_reload('reload_from_file', filepath)
+                return {
+                    "success": False,
+                    "message": "Unknown source type"
+                }
 
             def handle_apply_focused_settings(self, data):
                 """Handle apply focused settings request - regenerate focused ERD with new settings and same tables."""
@@ -359,63 +1544,43 @@ class ERDServer:
                     return
 
                 try:
-                    # Fetch the current schema
-                    if server_instance.source_type == 'database':
-                        host = server_instance.source_params.get('host')
-                        port = server_instance.source_params.get('port')
-                        database = server_instance.source_params.get('database')
-                        user = server_instance.source_params.get('user')
-                        password = server_instance.cached_password or ''
-
-                        if not all([host, port, database, user]):
-                            self.send_json_response({
-                                "success": False,
-                                "message": "Database connection parameters not available"
-                            }, 400)
-                            return
+                    svg_file, source_params, generation_params = server_instance.snapshot()
 
-                        sql_dump = server_instance.fetch_schema_from_database(host, port, database, user, password)
-                        view_columns_from_db = server_instance.fetch_view_columns(host, port, database, user, password)
-                        input_source = f"{user}@{host}:{port}/{database}"
-                    elif server_instance.source_type == 'file':
-                        filepath = server_instance.source_params.get('filepath')
-
-                        if not filepath or not os.path.exists(filepath):
-                            self.send_json_response({
-                                "success": False,
-                                "message": "Source file not available"
-                            }, 400)
-                            return
-
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            sql_dump = f.read()
-                        view_columns_from_db = {}
-                        input_source = filepath
-                    else:
+                    # Parsed schema, reused until the source changes
+                    try:
+                        schema = server_instance.load_schema(source_params)
+                    except SchemaSourceError as e:
                         self.send_json_response({
                             "success": False,
-                            "message": "Unknown source type"
+                            "message": str(e)
                         }, 400)
                         return
-
-                    # Delegate to ERD service
-                    svg_dir = os.path.dirname(os.path.abspath(server_instance.svg_file))
-                    new_svg_file = server_instance.erd_service.generate_focused_erd(
+                    sql_dump = schema['sql_dump']
+                    view_columns_from_db = schema['view_columns']
+                    input_source = schema['input_source']
+
+                    # Delegate to ERD service; sessions get their own output directory
+                    session = self.current_session()
+                    svg_dir = server_instance.output_dir_for(session)
+                    new_svg_file = server_instance.run_render(
+                        server_instance.erd_service.generate_focused_erd,
                         sql_dump,
                         table_ids,
                         svg_dir,
                         input_source,
                         graphviz_settings,
-                        view_columns_from_db
+                        view_columns_from_db,
+                        model=schema['model'],
+                        output=os.path.join(svg_dir, 'focused_erd')
                     )
 
-                    # Update server instance to use the new focused ERD
-                    server_instance.svg_file = new_svg_file
+                    # Point this client (or the shared view) at the new focused ERD
+                    server_instance.set_view(session, new_svg_file)
 
                     # Return success with filename
                     self.send_json_response({
                         "success": True,
-                        "new_file": os.path.basename(new_svg_file),
+                        "new_file": server_instance.served_name(new_svg_file, session),
                         "message": f"Focused ERD regenerated with {len(table_ids)} tables"
                     })
 
@@ -442,66 +1607,46 @@ class ERDServer:
                     return
 
                 try:
-                    # Fetch the current schema
-                    if server_instance.source_type == 'database':
-                        host = server_instance.source_params.get('host')
-                        port = server_instance.source_params.get('port')
-                        database = server_instance.source_params.get('database')
-                        user = server_instance.source_params.get('user')
-                        password = server_instance.cached_password or ''
-
-                        if not all([host, port, database, user]):
-                            self.send_json_response({
-                                "success": False,
-                                "message": "Database connection parameters not available"
-                            }, 400)
-                            return
-
-                        sql_dump = server_instance.fetch_schema_from_database(host, port, database, user, password)
-                        view_columns_from_db = server_instance.fetch_view_columns(host, port, database, user, password)
-                        input_source = f"{user}@{host}:{port}/{database}"
-                    elif server_instance.source_type == 'file':
-                        filepath = server_instance.source_params.get('filepath')
-
-                        if not filepath or not os.path.exists(filepath):
-                            self.send_json_response({
-                                "success": False,
-                                "message": "Source file not available"
-                            }, 400)
-                            return
+                    svg_file, source_params, generation_params = server_instance.snapshot()
 
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            sql_dump = f.read()
-                        view_columns_from_db = {}
-                        input_source = filepath
-                    else:
+                    # Parsed schema, reused until the source changes
+                    try:
+                        schema = server_instance.load_schema(source_params)
+                    except SchemaSourceError as e:
                         self.send_json_response({
                             "success": False,
-                            "message": "Unknown source type"
+                            "message": str(e)
                         }, 400)
                         return
+                    sql_dump = schema['sql_dump']
+                    view_columns_from_db = schema['view_columns']
+                    input_source = schema['input_source']
 
                     # Merge settings
-                    settings = server_instance.generation_params.copy()
+                    settings = dict(generation_params)
                     settings.update(graphviz_settings)
 
                     # Delegate to ERD service
-                    svg_dir = os.path.dirname(server_instance.svg_file)
-                    svg_content = server_instance.erd_service.generate_selected_svg(
+                    svg_dir = os.path.dirname(svg_file)
+                    svg_content = server_instance.run_render(
+                        server_instance.erd_service.generate_selected_svg,
                         sql_dump,
                         table_ids,
                         svg_dir,
                         input_source,
                         settings,
-                        view_columns_from_db
+                        view_columns_from_db,
+                        model=schema['model']
                     )
 
                     # Send SVG content as response
+                    body = svg_content.encode('utf-8')
                     self.send_response(200)
                     self.send_header('Content-Type', 'image/svg+xml')
                     self.send_header('Content-Disposition', 'attachment; filename="selected_erd.svg"')
+                    self.send_header('Content-Length', str(len(body)))
                     self.end_headers()
-                    self.wfile.write(svg_content.encode('utf-8'))
+                    self.wfile.write(body)
 
                 except Exception as e:
                     print(f"Generate selected SVG failed: {e}")
@@ -526,63 +1671,43 @@ class ERDServer:
                     return
 
                 try:
-                    # Fetch the current schema
-                    if server_instance.source_type == 'database':
-                        host = server_instance.source_params.get('host')
-                        port = server_instance.source_params.get('port')
-                        database = server_instance.source_params.get('database')
-                        user = server_instance.source_params.get('user')
-                        password = server_instance.cached_password or ''
-
-                        if not all([host, port, database, user]):
-                            self.send_json_response({
-                                "success": False,
-                                "message": "Database connection parameters not available"
-                            }, 400)
-                            return
+                    svg_file, source_params, generation_params = server_instance.snapshot()
 
-                        sql_dump = server_instance.fetch_schema_from_database(host, port, database, user, password)
-                        view_columns_from_db = server_instance.fetch_view_columns(host, port, database, user, password)
-                        input_source = f"{user}@{host}:{port}/{database}"
-                    elif server_instance.source_type == 'file':
-                        filepath = server_instance.source_params.get('filepath')
-
-                        if not filepath or not os.path.exists(filepath):
-                            self.send_json_response({
-                                "success": False,
-                                "message": "Source file not available"
-                            }, 400)
-                            return
-
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            sql_dump = f.read()
-                        view_columns_from_db = {}
-                        input_source = filepath
-                    else:
+                    # Parsed schema, reused until the source changes
+                    try:
+                        schema = server_instance.load_schema(source_params)
+                    except SchemaSourceError as e:
                         self.send_json_response({
                             "success": False,
-                            "message": "Unknown source type"
+                            "message": str(e)
                         }, 400)
                         return
-
-                    # Delegate to ERD service
-                    svg_dir = os.path.dirname(os.path.abspath(server_instance.svg_file))
-                    new_svg_file = server_instance.erd_service.generate_focused_erd(
+                    sql_dump = schema['sql_dump']
+                    view_columns_from_db = schema['view_columns']
+                    input_source = schema['input_source']
+
+                    # Delegate to ERD service; sessions get their own output directory
+                    session = self.current_session()
+                    svg_dir = server_instance.output_dir_for(session)
+                    new_svg_file = server_instance.run_render(
+                        server_instance.erd_service.generate_focused_erd,
                         sql_dump,
                         table_ids,
                         svg_dir,
                         input_source,
                         graphviz_settings,
-                        view_columns_from_db
+                        view_columns_from_db,
+                        model=schema['model'],
+                        output=os.path.join(svg_dir, 'focused_erd')
                     )
 
-                    # Update server instance to use the new focused ERD
-                    server_instance.svg_file = new_svg_file
+                    # Point this client (or the shared view) at the new focused ERD
+                    server_instance.set_view(session, new_svg_file)
 
                     # Return success with filename
                     self.send_json_response({
                         "success": True,
-                        "new_file": os.path.basename(new_svg_file),
+                        "new_file": server_instance.served_name(new_svg_file, session),
                         "message": f"Focused ERD generated with {len(table_ids)} tables"
                     })
 
@@ -595,6 +1720,71 @@ class ERDServer:
                         "message": str(e)
                     }, 500)
 
+            def handle_generate_neighborhood_erd(self, data):
+                """Handle neighbourhood ERD request - focus on seed tables plus N hops of related tables."""
+                seeds = data.get('seed_tables', [])
+                hops = data.get('hops', 1)
+                direction = data.get('direction', 'both')
+                graphviz_settings = data.get('graphviz_settings', {})
+
+                if not seeds or not isinstance(seeds, list):
+                    self.send_json_response({
+                        "success": False,
+                        "message": "No seed tables given. Please provide seed_tables."
+                    }, 400)
+                    return
+                if not isinstance(hops, int) or isinstance(hops, bool) or hops < 0:
+                    self.send_json_response({
+                        "success": False,
+                        "message": "hops must be a non-negative integer"
+                    }, 400)
+                    return
+                if direction not in NEIGHBORHOOD_DIRECTIONS:
+                    self.send_json_response({
+                        "success": False,
+                        "message": f"direction must be one of: {', '.join(NEIGHBORHOOD_DIRECTIONS)}"
+                    }, 400)
+                    return
+
+                session = self.current_session()
+                try:
+                    result = server_instance.render_neighborhood(seeds, hops, direction, graphviz_settings,
+                                                                 session=session)
+                except SchemaSourceError as e:
+                    self.send_json_response({
+                        "success": False,
+                        "message": str(e)
+                    }, 400)
+                    return
+                except UnknownTableError as e:
+                    self.send_json_response({
+                        "success": False,
+                        "message": str(e)
+                    }, 404)
+                    return
+                except Exception as e:
+                    print(f"Generate neighborhood ERD failed: {e}")
+                    import traceback
+                    traceback.print_exc()
+                    self.send_json_response({
+                        "success": False,
+                        "message": str(e)
+                    }, 500)
+                    return
+
+                # Point this client (or the shared view) at the new neighbourhood ERD
+                server_instance.set_view(session, result['svg_file'])
+
+                tables = result['tables']
+                self.send_json_response({
+                    "success": True,
+                    "new_file": server_instance.served_name(result['svg_file'], session),
+                    "tables": list(tables),
+                    "distances": tables,
+                    "cached": result['cached'],
+                    "message": f"Neighborhood ERD generated with {len(tables)} tables"
+                })
+
             def handle_optimize_layout(self, data):
                 """Handle layout optimization request - analyze schema and recommend optimal settings."""
                 # Get user's CURRENT settings from the request (their defaults)
@@ -608,56 +1798,26 @@ class ERDServer:
                     return
 
                 try:
-                    # Fetch the current schema
-                    if server_instance.source_type == 'database':
-                        host = server_instance.source_params.get('host')
-                        port = server_instance.source_params.get('port')
-                        database = server_instance.source_params.get('database')
-                        user = server_instance.source_params.get('user')
-                        password = server_instance.cached_password or ''
-
-                        if not all([host, port, database, user]):
-                            self.send_json_response({
-                                "success": False,
-                                "message": "Database connection parameters not available"
-                            }, 400)
-                            return
-
-                        sql_dump = server_instance.fetch_schema_from_database(host, port, database, user, password)
-                        view_columns_from_db = server_instance.fetch_view_columns(host, port, database, user, password)
-                    elif server_instance.source_type == 'file':
-                        filepath = server_instance.source_params.get('filepath')
-
-                        if not filepath or not os.path.exists(filepath):
-                            self.send_json_response({
-                                "success": False,
-                                "message": "Source file not available"
-                            }, 400)
-                            return
+                    svg_file, source_params, generation_params = server_instance.snapshot()
 
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            sql_dump = f.read()
-                        view_columns_from_db = {}
-                    else:
+                    # Parsed schema, reused until the source changes
+                    try:
+                        schema = server_instance.load_schema(source_params)
+                    except SchemaSourceError as e:
                         self.send_json_response({
                             "success": False,
-                            "message": "Unknown source type"
+                            "message": str(e)
                         }, 400)
                         return
-
-                    # Parse the schema
-                    tables, foreign_keys, triggers, errors, views, functions, settings = parse_sql_dump(sql_dump)
-
-                    # Enhance views with column information from database (if available)
-                    for view_name, columns in view_columns_from_db.items():
-                        if view_name in views:
-                            views[view_name]['columns'] = columns
-                        if view_name in tables:
-                            tables[view_name]['columns'] = columns
+                    sql_dump = schema['sql_dump']
+                    view_columns_from_db = schema['view_columns']
+                    input_source = schema['input_source']
 
                     # Optimize layout using AI + heuristics, starting from user's current settings
+                    model = schema['model']
                     optimized_settings, explanation = optimize_layout(
-                        current_settings, tables, foreign_keys, views, triggers, use_ai=True
+                        current_settings, model['tables'], model['foreign_keys'],
+                        model['views'], model['triggers'], use_ai=True
                     )
 
                     self.send_json_response({
@@ -690,11 +1850,41 @@ class ERDServer:
             
             def send_json_response(self, data, status_code=200):
                 """Send JSON response."""
+                body = json.dumps(data).encode('utf-8')
                 self.send_response(status_code)
                 self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                profiler = getattr(self, '_profiler', None)
+                if profiler is not None and profiler.spans:
+                    self.send_header('Server-Timing', profiler.server_timing())
                 self.end_headers()
-                self.wfile.write(json.dumps(data).encode('utf-8'))
+                self.wfile.write(body)
         
+        class JobResponse(ERDRequestHandler):
+            """Stand-in handler for a job: captures the response instead of writing to a socket."""
+
+            def __init__(self, profiler, headers=None):
+                self._profiler = profiler
+                # The request's headers, so the job renders into the client's session
+                self.headers = headers
+                self.status = 200
+                self.content_type = 'application/json'
+                self.wfile = io.BytesIO()
+
+            def send_response(self, code, message=None):
+                self.status = code
+
+            def send_header(self, keyword, value):
+                if keyword.lower() == 'content-type':
+                    self.content_type = value
+
+            def end_headers(self):
+                pass
+
+            def send_error(self, code, message=None, explain=None):
+                self.status = code
+                self.wfile.write(json.dumps({"success": False, "message": message}).encode('utf-8'))
+
         return ERDRequestHandler
     
     def start(self, open_browser=True):
@@ -705,7 +1895,7 @@ class ERDServer:
         max_attempts = 10
         for attempt in range(max_attempts):
             try:
-                self.server = socketserver.TCPServer(("", self.port), handler)
+                self.server = ThreadingERDServer(("", self.port), handler)
                 break
             except OSError as e:
                 if attempt < max_attempts - 1:
@@ -730,6 +1920,11 @@ class ERDServer:
         print(f"Press Ctrl+C to stop the server")
         print(f"{'='*60}\n")
         
+        if self.watch:
+            self.start_watching()
+        if self.prewarm:
+            self.start_prewarm()
+
         if open_browser:
             # Wait a moment for server to be ready
             threading.Timer(0.5, lambda: webbrowser.open(url)).start()
@@ -740,10 +1935,22 @@ class ERDServer:
             print("\n\nServer stopped.")
             self.server.shutdown()
             self.server.server_close()
+        finally:
+            if self.watcher is not None:
+                self.watcher.stop()
+                self.watcher = None
+            self.close_prewarm()
+            if self._render_pool is not None:
+                self._render_pool.shutdown(wait=False)
+                self._render_pool = None
+            self.http_cache.close()
+            self.render_cache.close()
+            self.sessions.close()
 
 
 def start_server(svg_file: str, source_type: str, source_params: Dict[str, Any], 
-                 generation_params: Dict[str, Any], open_browser: bool = True):
+                 generation_params: Dict[str, Any], open_browser: bool = True,
+                 watch: bool = False, prewarm: bool = False, schema_backend: str = 'pg_dump'):
     """
     Start the ERD server.
     
@@ -753,6 +1960,12 @@ def start_server(svg_file: str, source_type: str, source_params: Dict[str, Any],
         source_params: Source connection parameters
         generation_params: ERD generation parameters
         open_browser: Whether to open browser automatically
+        watch: Regenerate when the dump file changes and push updates to the browser
+        prewarm: Render likely next views in the background after the first page
+        schema_backend: How database schemas are read, 'pg_dump' or 'catalog'
     """
     server = ERDServer(svg_file, source_type, source_params, generation_params)
+    server.watch = watch
+    server.prewarm = prewarm
+    server.database_service.schema_backend = schema_backend
     server.start(open_browser=open_browser)
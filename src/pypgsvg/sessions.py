@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Per-client sessions for the ERD server.
+
+Each browser (identified by the ``pypgsvg_session`` cookie, or the
+``X-PgSVG-Session`` header for scripts) gets its own output directory under
+``.pypgsvg-sessions/`` next to the served ERD. Focused and neighbourhood ERDs
+are written there, so clients no longer overwrite each other's
+``focused_erd.svg``. The session also remembers the ERD it is viewing and its
+own neighbourhood render cache. Idle sessions are evicted, and their files
+removed, so one server can host a team. Session directories are named by id,
+so worker processes sharing the output directory (``shared=True``) serve the
+same sessions; they only remove directories no worker has touched for the
+idle timeout.
+"""
+import os
+import re
+import secrets
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+SESSION_COOKIE = 'pypgsvg_session'
+SESSION_HEADER = 'X-PgSVG-Session'
+SESSION_DIR = '.pypgsvg-sessions'
+
+# Ids end up in paths, so only URL-safe tokens are accepted
+_SESSION_ID = re.compile(r'^[A-Za-z0-9_-]{16,64}$')
+
+
+def new_session_id() -> str:
+    return secrets.token_urlsafe(16)
+
+
+def is_session_id(value: Optional[str]) -> bool:
+    return bool(value) and _SESSION_ID.match(value) is not None
+
+
+class Session:
+    """One client's view and outputs."""
+
+    def __init__(self, session_id: str, output_dir: str):
+        self.id = session_id
+        self.output_dir = output_dir
+        self.created = time.time()
+        self.last_seen = self.created
+        # ERD this client last generated (None: the shared one)
+        self.svg_file: Optional[str] = None
+        # Recently rendered neighbourhood ERDs: key -> (schema entry, svg path)
+        self.neighborhoods: 'OrderedDict[str, Tuple[Dict[str, Any], str]]' = OrderedDict()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'session_id': self.id,
+            'created': self.created,
+            'last_seen': self.last_seen,
+            'svg_file': os.path.basename(self.svg_file) if self.svg_file else None,
+        }
+
+
+class SessionManager:
+    """Creates sessions on first use and evicts idle ones."""
+
+    def __init__(self, root_dir: str, idle_timeout: float = 1800.0, max_sessions: int = 64,
+                 shared: bool = False):
+        """
+        Initialize the manager.
+
+        Args:
+            root_dir: Directory holding one output directory per session
+            idle_timeout: Seconds without requests before a session is evicted
+            max_sessions: Sessions kept at most; the least recently seen go first
+            shared: Other processes use ``root_dir`` too; evicted sessions keep
+                    their directory while another process still uses it
+        """
+        self.root_dir = root_dir
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.shared = shared
+        self._sessions: 'OrderedDict[str, Session]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def get(self, session_id: Optional[str], create: bool = True) -> Optional[Session]:
+        """
+        Look up a session, marking it seen.
+
+        Args:
+            session_id: Id from the cookie or header
+            create: Create the session (and its directory) if it is unknown
+
+        Returns:
+            The session, or None for a missing or malformed id
+        """
+        if not is_session_id(session_id):
+            return None
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None and create:
+                session = Session(session_id, os.path.join(self.root_dir, session_id))
+                self._sessions[session_id] = session
+            if session is not None:
+                session.last_seen = now
+                self._sessions.move_to_end(session_id)
+            evicted = self._evict(now)
+        self._remove(evicted)
+        if session is not None:
+            os.makedirs(session.output_dir, exist_ok=True)
+            if self.shared:
+                # The directory's mtime is the session's last use across processes
+                os.utime(session.output_dir)
+        return session
+
+    def _evict(self, now: float) -> List[Session]:
+        evicted = [session for session in self._sessions.values()
+                   if now - session.last_seen > self.idle_timeout]
+        for session in evicted:
+            del self._sessions[session.id]
+        while len(self._sessions) > self.max_sessions:
+            evicted.append(self._sessions.popitem(last=False)[1])
+        return evicted
+
+    def evict_idle(self) -> List[str]:
+        """Evict idle sessions now; returns their ids."""
+        with self._lock:
+            evicted = self._evict(time.time())
+        self._remove(evicted)
+        return [session.id for session in evicted]
+
+    def _remove(self, sessions: List[Session]) -> None:
+        now = time.time()
+        for session in sessions:
+            if self.shared:
+                try:
+                    if now - os.stat(session.output_dir).st_mtime <= self.idle_timeout:
+                        continue
+                except OSError:
+                    continue
+            shutil.rmtree(session.output_dir, ignore_errors=True)
+            print(f"Session {session.id[:8]} evicted")
+
+    def close(self) -> None:
+        """Drop every session and remove the session directories (kept when shared)."""
+        with self._lock:
+            self._sessions.clear()
+        if not self.shared:
+            shutil.rmtree(self.root_dir, ignore_errors=True)
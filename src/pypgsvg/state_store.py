@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Shared viewer state for one or more ERD server processes.
+
+ERDServer keeps the ERD being viewed (``svg_file``), its source
+(``source_params``) and its generation settings (``generation_params``) in a
+StateStore, together with the locks that keep two renders from writing the
+same output file at once.
+
+MemoryStore is the single-process default. FileStore keeps the state in a
+JSON file and takes its locks with ``flock``, so several worker processes
+(see wsgi.py) serving the same output directory see each other's reloads and
+settings changes. Values read from a FileStore are copies: change them by
+assigning (``update``), not by mutating in place.
+"""
+import abc
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: FileStore locks only within the process
+    fcntl = None
+
+# Default state file, next to the served ERD (never served itself)
+STATE_FILE = '.pypgsvg-state.json'
+
+
+class StateStore(abc.ABC):
+    """Interface of the ERD server's shared state."""
+
+    # True when other processes may use the same state (see SessionManager)
+    shared = False
+
+    @abc.abstractmethod
+    def load(self) -> Dict[str, Any]:
+        """All values at one point in time."""
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.load().get(key, default)
+
+    @abc.abstractmethod
+    def update(self, **values: Any) -> None:
+        """Set several values atomically."""
+
+    @abc.abstractmethod
+    def seed(self, **values: Any) -> None:
+        """Set the values that are not set yet (a restarted worker keeps the shared state)."""
+
+    @abc.abstractmethod
+    def lock(self, name: str):
+        """Context manager excluding every other holder of ``name``."""
+
+
+class _NamedLocks:
+    def __init__(self):
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def get(self, name: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(name, threading.Lock())
+
+
+class MemoryStore(StateStore):
+    """State held by this process only."""
+
+    def __init__(self):
+        self._values: Dict[str, Any] = {}
+        self._mutex = threading.RLock()
+        self._locks = _NamedLocks()
+
+    def load(self) -> Dict[str, Any]:
+        with self._mutex:
+            return dict(self._values)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        # The stored object itself, so in-place changes are kept
+        with self._mutex:
+            return self._values.get(key, default)
+
+    def update(self, **values: Any) -> None:
+        with self._mutex:
+            self._values.update(values)
+
+    def seed(self, **values: Any) -> None:
+        with self._mutex:
+            for key, value in values.items():
+                self._values.setdefault(key, value)
+
+    def lock(self, name: str):
+        return self._locks.get(name)
+
+
+class FileStore(StateStore):
+    """State in a JSON file shared by the worker processes on one host."""
+
+    shared = True
+
+    def __init__(self, path: str):
+        """
+        Initialize the store.
+
+        Args:
+            path: JSON state file; ``<path>.lock`` and ``<path>.locks/`` hold
+                  the lock files
+        """
+        self.path = os.path.abspath(path)
+        self.lock_dir = self.path + '.locks'
+        os.makedirs(self.lock_dir, exist_ok=True)
+        self._locks = _NamedLocks()
+
+    def load(self) -> Dict[str, Any]:
+        # Writers replace the file atomically, so reads need no lock
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write(self, values: Dict[str, Any]) -> None:
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(values, f, sort_keys=True, default=str)
+        os.replace(tmp, self.path)
+
+    def update(self, **values: Any) -> None:
+        with self._flock(self.path + '.lock', self._locks.get('')):
+            state = self.load()
+            state.update(values)
+            self._write(state)
+
+    def seed(self, **values: Any) -> None:
+        with self._flock(self.path + '.lock', self._locks.get('')):
+            state = self.load()
+            missing = {key: value for key, value in values.items() if key not in state}
+            if missing:
+                state.update(missing)
+                self._write(state)
+
+    @contextmanager
+    def lock(self, name: str) -> Iterator[None]:
+        digest = hashlib.sha256(name.encode('utf-8')).hexdigest()[:16]
+        with self._flock(os.path.join(self.lock_dir, digest + '.lock'), self._locks.get(name)):
+            yield
+
+    @contextmanager
+    def _flock(self, lock_path: str, thread_lock: threading.Lock) -> Iterator[None]:
+        # flock excludes other processes; the thread lock other threads here
+        with thread_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(lock_path, 'a') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
@@ -5,9 +5,72 @@ document.addEventListener('DOMContentLoaded', () => {
     const viewportIndicator = document.getElementById('viewport-indicator');
     const overlayContainer = document.getElementById('overlay-container');
     const graphDataElement = document.getElementById('graph-data');
+    if (window.performance && performance.mark) performance.mark('pypgsvg:graph-data:start');
     const graphData = JSON.parse(graphDataElement.textContent);
+    if (window.performance && performance.measure) {
+        performance.mark('pypgsvg:graph-data:end');
+        performance.measure('pypgsvg:graph-data-parse', 'pypgsvg:graph-data:start', 'pypgsvg:graph-data:end');
+    }
     const { tables, edges } = graphData;
 
+    // --- Compressed detail payload ---
+    // With --compress-details the SQL/FK/trigger/function text lives in a base64
+    // gzip blob that is only inflated the first time a detail view needs it.
+    let graphDetailsPromise = null;
+    let graphDetailsLoaded = !graphData.compressedDetails;
+
+    function inflateBase64Gzip(b64) {
+        if (typeof DecompressionStream === 'undefined') {
+            return Promise.reject(new Error('DecompressionStream is not supported by this browser'));
+        }
+        const binary = atob(b64.trim());
+        const bytes = new Uint8Array(binary.length);
+        for (let i = 0; i < binary.length; i++) {
+            bytes[i] = binary.charCodeAt(i);
+        }
+        const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+        return new Response(stream).text();
+    }
+
+    function mergeGraphDetails(details) {
+        Object.keys(details).forEach(section => {
+            const target = graphData[section] || (graphData[section] = {});
+            const sectionDetails = details[section] || {};
+            Object.keys(sectionDetails).forEach(id => {
+                target[id] = Object.assign(target[id] || {}, sectionDetails[id]);
+            });
+        });
+    }
+
+    function ensureGraphDetails() {
+        if (graphDetailsPromise) return graphDetailsPromise;
+        const detailsElement = document.getElementById('graph-data-details');
+        if (!detailsElement) {
+            graphDetailsLoaded = true;
+            graphDetailsPromise = Promise.resolve(graphData);
+            return graphDetailsPromise;
+        }
+        if (window.performance && performance.mark) performance.mark('pypgsvg:graph-details:start');
+        graphDetailsPromise = inflateBase64Gzip(detailsElement.textContent)
+            .then(text => {
+                mergeGraphDetails(JSON.parse(text));
+                detailsElement.textContent = '';
+                if (window.performance && performance.measure) {
+                    performance.mark('pypgsvg:graph-details:end');
+                    performance.measure('pypgsvg:graph-details-inflate', 'pypgsvg:graph-details:start', 'pypgsvg:graph-details:end');
+                }
+            })
+            .catch(err => {
+                console.warn('Could not inflate graph details:', err);
+            })
+            .then(() => {
+                graphDetailsLoaded = true;
+                return graphData;
+            });
+        return graphDetailsPromise;
+    }
+    window.ensureGraphDetails = ensureGraphDetails;
+
     // --- State variables ---
     let infoWindowsVisible = true; // Flag to track if informational windows are visible
 
@@ -1153,6 +1216,11 @@ document.addEventListener('DOMContentLoaded', () => {
         const selectionContainer = document.getElementById('selection-container');
         if (!selectionContainer) return;
 
+        if (!graphDetailsLoaded) {
+            ensureGraphDetails().then(() => showSelectionWindow(selectedTables, selectedEdges, event));
+            return;
+        }
+
         // Check if the selection window was previously hidden
         const wasHidden = selectionContainer.style.display === 'none' ||
                          window.getComputedStyle(selectionContainer).display === 'none';
@@ -2266,6 +2334,75 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    // --- Live updates (--watch) ---
+    // The server pushes 'erd-updated' events over SSE; the new SVG is fetched and
+    // swapped into this document so pan/zoom and open windows survive the update.
+    function importFrom(newDoc, selector) {
+        const node = newDoc.querySelector(selector);
+        return node ? document.importNode(node, true) : null;
+    }
+
+    function applyErdUpdate(newDoc, update) {
+        const newMain = newDoc.getElementById('main-erd-group');
+        const newGraphData = newDoc.getElementById('graph-data');
+        if (!newMain || !newGraphData) {
+            window.location.reload();
+            return;
+        }
+
+        clearAllHighlights();
+        mainGroup.replaceChildren(...Array.from(newMain.childNodes, node => document.importNode(node, true)));
+        const viewBox = newDoc.documentElement.getAttribute('viewBox');
+        if (viewBox) svg.setAttribute('viewBox', viewBox);
+
+        ['#miniature-svg', '.metadata-inner-container'].forEach(selector => {
+            const current = document.querySelector(selector);
+            const replacement = importFrom(newDoc, selector);
+            if (current && replacement) current.replaceWith(replacement);
+        });
+
+        // tables/edges are captured by every handler, so update them in place
+        const next = JSON.parse(newGraphData.textContent);
+        graphDataElement.textContent = newGraphData.textContent;
+        [tables, edges].forEach(section => Object.keys(section).forEach(id => delete section[id]));
+        Object.assign(tables, next.tables || {});
+        Object.assign(edges, next.edges || {});
+        Object.keys(graphData).forEach(key => {
+            if (key !== 'tables' && key !== 'edges') delete graphData[key];
+        });
+        Object.keys(next).forEach(key => {
+            if (key !== 'tables' && key !== 'edges') graphData[key] = next[key];
+        });
+
+        const oldDetails = document.getElementById('graph-data-details');
+        if (oldDetails) oldDetails.remove();
+        const newDetails = importFrom(newDoc, '#graph-data-details');
+        if (newDetails) svg.appendChild(newDetails);
+        graphDetailsPromise = null;
+        graphDetailsLoaded = !graphData.compressedDetails;
+
+        enhanceEdgeClickability();
+        updateViewportIndicator();
+        if (window.updateTableSelector) window.updateTableSelector();
+        document.dispatchEvent(new CustomEvent('pypgsvg:erd-updated', { detail: update }));
+    }
+
+    function connectErdEvents() {
+        if (typeof EventSource === 'undefined' || !/^https?:$/.test(window.location.protocol)) return;
+        const source = new EventSource('/api/events');
+        source.addEventListener('erd-updated', event => {
+            const update = JSON.parse(event.data);
+            fetch(`${update.file}?v=${update.version}`, { cache: 'no-store' })
+                .then(response => response.text())
+                .then(text => applyErdUpdate(new DOMParser().parseFromString(text, 'image/svg+xml'), update))
+                .catch(err => {
+                    console.warn('Live update failed, reloading:', err);
+                    window.location.reload();
+                });
+        });
+    }
+    connectErdEvents();
+
     // Primary initialization on DOMContentLoaded
     document.addEventListener('DOMContentLoaded', () => {
         // Small delay to ensure SVG is fully parsed
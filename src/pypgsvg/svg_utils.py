@@ -1,8 +1,12 @@
 import base64
+import copy
+import gzip
+import hashlib
+import json
 import os
 import re
 import tempfile
-from graphviz import Digraph
+from functools import lru_cache
 
 
 def wrap_main_erd_content(*args, **kwargs):
@@ -41,34 +45,146 @@ def wrap_main_erd_content(*args, **kwargs):
     return svg_content.replace(original_g_tag, modified_g_tag, 1)
 
 
+# Fields of the graph-data payload that are only read when a user opens the
+# selection window, keyed by graph-data section.
+GRAPH_DETAIL_FIELDS = {
+    'tables': ('sql', 'triggers'),
+    'edges': ('fkText', 'triggers', 'constraints'),
+    'views': ('definition',),
+    'functions': ('parameters', 'return_type', 'language', 'body', 'full_definition'),
+}
+
+
+def split_graph_details(graph_data):
+    """
+    Split the bulky text fields out of graph_data.
+
+    Returns:
+        Tuple of (core_graph_data, details). ``core_graph_data`` is a copy with
+        ``compressedDetails`` set and the detail fields removed; ``details`` maps
+        section -> element id -> removed fields so the browser can merge it back.
+    """
+    core = copy.copy(graph_data)
+    details = {}
+    for section, fields in GRAPH_DETAIL_FIELDS.items():
+        elements = graph_data.get(section) or {}
+        core_section = {}
+        detail_section = {}
+        for element_id, element in elements.items():
+            core_section[element_id] = {k: v for k, v in element.items() if k not in fields}
+            moved = {k: element[k] for k in fields if k in element}
+            if moved:
+                detail_section[element_id] = moved
+        core[section] = core_section
+        details[section] = detail_section
+    core['compressedDetails'] = True
+    return core, details
+
+
+def compress_graph_details(details):
+    """Serialize graph details as a base64-encoded gzip blob."""
+    raw = json.dumps(details, separators=(',', ':')).encode('utf-8')
+    # mtime=0 keeps the blob byte-identical across runs for unchanged input.
+    return base64.b64encode(gzip.compress(raw, compresslevel=9, mtime=0)).decode('ascii')
+
+
+def decompress_graph_details(blob):
+    """Inverse of compress_graph_details."""
+    return json.loads(gzip.decompress(base64.b64decode(blob)).decode('utf-8'))
+
+
+# Files shipped next to this module and embedded in (or served for) every ERD
+ASSET_TYPES = {
+    'svg_interactivity.js': 'text/javascript; charset=utf-8',
+    'svg.css': 'text/css; charset=utf-8',
+}
+
+
+def asset_path(fname):
+    """Filesystem path of a packaged asset (see ASSET_TYPES)."""
+    if fname not in ASSET_TYPES:
+        raise KeyError(fname)
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), fname)
+
+
+@lru_cache(maxsize=None)
+def read_asset(fname):
+    """Contents of a packaged asset (see ASSET_TYPES)."""
+    with open(asset_path(fname), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
 def load_interactivity_js():
-    fname = 'svg_interactivity.js'
-    cwd = os.path.dirname(os.path.abspath(__file__))
-    test_fpath = os.path.join(cwd, fname)
-    if os.path.exists(test_fpath):
-        js_path = test_fpath
-    else:
-        js_path = '%s/src/pypgsvg/%s' % (fname, cwd)
-    with open(js_path, 'r', encoding='utf-8') as f:
-        js_code = f.read()
+    js_code = read_asset('svg_interactivity.js')
     return f'<script type="text/javascript"><![CDATA[\n' + js_code + '\n]]></script>'
-    
-SVG_INTERACTIVITY_SCRIPT = load_interactivity_js()
 
 
 def load_svg_css():
-    fname = 'svg.css'
-    cwd = os.path.dirname(os.path.abspath(__file__))
-    test_fpath = os.path.join(cwd, fname)
-    if os.path.exists(test_fpath):
-        css_path = test_fpath
-    else:
-        cwd = os.path.dirname(os.path.abspath(__file__))
-        css_path = '%s/src/pypgsvg/' % (cwd, fname)
+    css_code = read_asset('svg.css')
+    return f'<style type="text/css"><![CDATA[\n' + css_code + '\n]]></style>'
 
-    with open(css_path, 'r', encoding='utf-8') as f:
-        css_code = f.read()
 
-    return f'<style type="text/css"><![CDATA[\n' + css_code + '\n]]></style>'
- 
-SVG_CSS_STYLE = load_svg_css()
+@lru_cache(maxsize=None)
+def asset_version():
+    """Short content hash of the JS and CSS, used to version asset URLs."""
+    digest = hashlib.sha256()
+    for fname in sorted(ASSET_TYPES):
+        digest.update(fname.encode('utf-8') + b'\0' + read_asset(fname).encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
+def asset_url(fname, base_url='/assets/'):
+    """Versioned URL of an asset, e.g. ``/assets/svg.<version>.css``."""
+    stem, ext = os.path.splitext(fname)
+    return f"{base_url}{stem}.{asset_version()}{ext}"
+
+
+def parse_asset_url(path, base_url='/assets/'):
+    """
+    Map a versioned asset URL path back to its file name.
+
+    Returns:
+        The asset file name, or None if the path is not an asset of the
+        current version
+    """
+    if not path.startswith(base_url):
+        return None
+    stem, dot, rest = path[len(base_url):].partition('.')
+    version, _, ext = rest.partition('.')
+    fname = f"{stem}.{ext}"
+    if not dot or version != asset_version() or fname not in ASSET_TYPES:
+        return None
+    return fname
+
+
+def externalize_assets(svg_content, base_url='/assets/'):
+    """
+    Swap the inlined interactivity script and stylesheet for references to
+    versioned URLs, so a browser downloads and parses them once.
+
+    SVGs written by another pypgsvg version (whose inlined assets differ) are
+    returned unchanged.
+    """
+    css = load_svg_css()
+    script = load_interactivity_js()
+    if css not in svg_content or script not in svg_content:
+        return svg_content
+    css_tag = f'<style type="text/css">@import url("{asset_url("svg.css", base_url)}");</style>'
+    script_tag = f'<script type="text/javascript" href="{asset_url("svg_interactivity.js", base_url)}"></script>'
+    return svg_content.replace(css, css_tag, 1).replace(script, script_tag, 1)
+
+
+# SVG_INTERACTIVITY_SCRIPT and SVG_CSS_STYLE are read from disk on first
+# access rather than at import time, then cached as module globals.
+_LAZY_ASSETS = {
+    'SVG_INTERACTIVITY_SCRIPT': load_interactivity_js,
+    'SVG_CSS_STYLE': load_svg_css,
+}
+
+
+def __getattr__(name):
+    loader = _LAZY_ASSETS.get(name)
+    if loader is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = globals()[name] = loader()
+    return value
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+File watching for pypgsvg's --watch mode.
+
+Watches a single dump file with inotify where available (Linux, via ctypes so
+no extra dependency is needed) and falls back to polling ``os.stat``. Bursts
+of writes - editors and pg_dump write in chunks and often replace the file via
+rename - are debounced into a single callback.
+"""
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def _open_inotify(directory: str) -> Optional[int]:
+    """Return an inotify fd watching ``directory``, or None if unavailable."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return None
+        # Watch the directory: editors often save by writing a new file and renaming it
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+        if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class FileWatcher:
+    """Call ``callback(path)`` once a watched file has stopped changing."""
+
+    def __init__(self, path: str, callback: Callable[[str], None], debounce: float = 0.3,
+                 poll_interval: float = 0.5, use_inotify: bool = True):
+        """
+        Initialize the watcher.
+
+        Args:
+            path: File to watch
+            callback: Called with ``path`` after each debounced burst of changes
+            debounce: Quiet period in seconds before the callback fires
+            poll_interval: Stat interval in seconds for the polling fallback
+            use_inotify: Try inotify before falling back to polling
+        """
+        self.path = os.path.abspath(path)
+        self.callback = callback
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._fd = _open_inotify(os.path.dirname(self.path)) if use_inotify else None
+        self._signature = _file_signature(self.path)
+        self.backend = 'inotify' if self._fd is not None else 'poll'
+
+    def start(self) -> 'FileWatcher':
+        """Start watching in a daemon thread."""
+        self._thread = threading.Thread(target=self._run, name='pypgsvg-watch', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop watching and release the inotify descriptor."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _wait_inotify(self, timeout: float) -> bool:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return False
+        try:
+            buf = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        name = os.path.basename(self.path)
+        changed = False
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buf):
+            _, _, _, length = _EVENT_HEADER.unpack_from(buf, offset)
+            offset += _EVENT_HEADER.size
+            event_name = buf[offset:offset + length].rstrip(b'\0').decode('utf-8', errors='replace')
+            offset += length
+            if event_name == name:
+                changed = True
+        return changed
+
+    def _wait_poll(self, timeout: float) -> bool:
+        if self._stop.wait(min(timeout, self.poll_interval)):
+            return False
+        signature = _file_signature(self.path)
+        if signature != self._signature:
+            self._signature = signature
+            return True
+        return False
+
+    def _run(self) -> None:
+        wait = self._wait_inotify if self._fd is not None else self._wait_poll
+        last_change = None
+        while not self._stop.is_set():
+            timeout = self.debounce if last_change is not None else self.poll_interval
+            if wait(timeout):
+                last_change = time.monotonic()
+                continue
+            if last_change is not None and time.monotonic() - last_change >= self.debounce:
+                last_change = None
+                if not os.path.exists(self.path):
+                    # Mid-replace; the rename will produce another event
+                    continue
+                try:
+                    self.callback(self.path)
+                except Exception as e:
+                    log.error(f"Watch callback failed: {e}")
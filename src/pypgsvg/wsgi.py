@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+WSGI interface to the ERD server, for running several worker processes.
+
+make_app(server) serves an ERDServer's routes as a WSGI application. The
+routes live on the ``--view`` request handler class, which background jobs
+(JobResponse) drive too; WSGI requests run a subclass of it set up from the
+environ rather than a socket, so the API, sessions, compression, ETags and
+metrics behave identically without a second route table. The handler runs
+on the WSGI server's thread: request bodies are read from ``wsgi.input``,
+headers go to ``start_response``, body writes (including server-sent event
+streams) go to its write callable as they happen, and static files are
+handed to ``wsgi.file_wrapper`` where the server provides one.
+
+Workers serving the same ERD set share their state through a FileStore.
+``application`` builds its server from the environment on first use:
+
+- ``PYPGSVG_SVG``: the ERD to serve (required)
+- ``PYPGSVG_DUMP``: dump file source; otherwise the database given by the
+  standard ``PGHOST``/``PGPORT``/``PGDATABASE``/``PGUSER``/``PGPASSWORD``
+- ``PYPGSVG_STATE``: state file (default ``.pypgsvg-state.json`` next to the ERD)
+- ``PYPGSVG_SCHEMA_BACKEND``: ``pg_dump`` (default) or ``catalog`` (see catalog_backend.py)
+- ``PYPGSVG_RENDER_MAX_JOBS``/``PYPGSVG_RENDER_MAX_QUEUED_MB``: admission
+  limits of POST /api/render in each worker (see render_service.py)
+
+For example ``PYPGSVG_SVG=erd.svg PYPGSVG_DUMP=schema.sql gunicorn -w 4
+--threads 8 pypgsvg.wsgi:application``, or without gunicorn
+``python -m pypgsvg.wsgi --workers 4`` (a stdlib pre-fork server, POSIX only).
+"""
+import argparse
+import http.client
+import io
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+from wsgiref.util import is_hop_by_hop
+
+from . import render_service
+from .catalog_backend import SCHEMA_BACKENDS
+from .server import ERDServer
+from .state_store import STATE_FILE, FileStore
+
+
+class _ResponseBody:
+    """Handler ``wfile`` passing each write straight to the WSGI server's write callable."""
+
+    def __init__(self, exchange):
+        self._exchange = exchange
+
+    def write(self, data) -> int:
+        if self._exchange.write is None:
+            raise RuntimeError("response body written before its headers")
+        try:
+            self._exchange.write(bytes(data))
+        except (BrokenPipeError, ConnectionResetError):
+            raise
+        except OSError as e:
+            # The WSGI client went away; ends e.g. an event stream
+            raise BrokenPipeError("client disconnected") from e
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+
+def _request_path(environ: Dict[str, Any]) -> str:
+    path = quote(environ.get('PATH_INFO', '/').encode('latin-1')) or '/'
+    if environ.get('QUERY_STRING'):
+        path += '?' + environ['QUERY_STRING']
+    return path
+
+
+def _request_headers(environ: Dict[str, Any]) -> http.client.HTTPMessage:
+    headers = http.client.HTTPMessage()
+    for key, value in environ.items():
+        if key.startswith('HTTP_'):
+            headers[key[5:].replace('_', '-').title()] = value
+    if environ.get('CONTENT_TYPE'):
+        headers['Content-Type'] = environ['CONTENT_TYPE']
+    if environ.get('CONTENT_LENGTH'):
+        headers['Content-Length'] = environ['CONTENT_LENGTH']
+    return headers
+
+
+def make_app(server: ERDServer) -> Callable[[Dict[str, Any], Callable], Iterable[bytes]]:
+    """
+    WSGI application serving ``server``'s routes and files.
+
+    Args:
+        server: The ERDServer (usually with a FileStore when several
+                processes serve it)
+
+    Returns:
+        A WSGI callable
+    """
+    handler_class = server.create_request_handler()
+
+    class WSGIExchange(handler_class):
+        """
+        One WSGI request run through the ``--view`` handler's routes.
+
+        Set up from the environ instead of a socket: ``do_<METHOD>`` runs on
+        the calling WSGI thread, headers go to ``start_response`` and body
+        writes to its write callable.
+        """
+
+        def __init__(self, environ: Dict[str, Any], start_response: Callable):
+            self.environ = environ
+            self.start_response = start_response
+            self.status: Optional[str] = None
+            self.response_headers: List[Tuple[str, str]] = []
+            self.write: Optional[Callable[[bytes], Any]] = None
+            self.file_body = None
+            self.directory = os.path.dirname(os.path.abspath(server.svg_file))
+            self.client_address = (environ.get('REMOTE_ADDR', '127.0.0.1'), int(environ.get('REMOTE_PORT') or 0))
+            self.connection = None
+            self.command = environ['REQUEST_METHOD']
+            self.path = _request_path(environ)
+            self.request_version = 'HTTP/1.1'
+            self.requestline = f"{self.command} {self.path} HTTP/1.1"
+            self.close_connection = True
+            self.headers = _request_headers(environ)
+            self.rfile = environ.get('wsgi.input') or io.BytesIO()
+            self.wfile = _ResponseBody(self)
+            self._request_started = time.perf_counter()
+            self._response_status = None
+            self._response_bytes = 0
+
+        def run(self) -> None:
+            method = getattr(self, 'do_' + self.command, None)
+            if method is None:
+                self.send_error(501, f"Unsupported method ({self.command!r})")
+            else:
+                method()
+            self.record_request()
+
+        def send_response_only(self, code, message=None):
+            if message is None:
+                message = self.responses[code][0] if code in self.responses else ''
+            self.status = f"{int(code)} {message}"
+            self.response_headers = []
+
+        def send_header(self, keyword, value):
+            super().send_header(keyword, value)
+            # The WSGI server sends its own Server and Date and manages the connection
+            if not is_hop_by_hop(keyword) and keyword.lower() not in ('server', 'date'):
+                self.response_headers.append((keyword, str(value)))
+
+        def flush_headers(self):
+            self._headers_buffer = []
+            if self.write is None:
+                self.write = self.start_response(self.status, self.response_headers)
+
+        def copyfile(self, source, outputfile):
+            """Hand file bodies to ``wsgi.file_wrapper`` (sendfile in most servers)."""
+            file_wrapper = self.environ.get('wsgi.file_wrapper')
+            try:
+                fd = source.fileno()
+            except (AttributeError, OSError):
+                fd = None
+            if outputfile is self.wfile and file_wrapper is not None and fd is not None:
+                # The server sends it after the handler has closed ``source``
+                self.file_body = file_wrapper(os.fdopen(os.dup(fd), 'rb'))
+            else:
+                super().copyfile(source, outputfile)
+
+    def app(environ: Dict[str, Any], start_response: Callable) -> Iterable[bytes]:
+        exchange = WSGIExchange(environ, start_response)
+        exchange.run()
+        if exchange.write is None:
+            start_response('500 Internal Server Error', [('Content-Type', 'text/plain')])
+            return [b'No response']
+        return exchange.file_body if exchange.file_body is not None else []
+
+    return app
+
+
+def server_from_env(environ=os.environ) -> ERDServer:
+    """
+    ERDServer configured by PYPGSVG_* and PG* environment variables (see module docstring).
+
+    Raises:
+        ValueError: If PYPGSVG_SVG or a source is missing
+    """
+    svg_file = environ.get('PYPGSVG_SVG')
+    if not svg_file:
+        raise ValueError("PYPGSVG_SVG is not set")
+    svg_file = os.path.abspath(svg_file)
+    state = environ.get('PYPGSVG_STATE') or os.path.join(os.path.dirname(svg_file), STATE_FILE)
+    if environ.get('PYPGSVG_DUMP'):
+        source_type = 'file'
+        source_params = {'filepath': os.path.abspath(environ['PYPGSVG_DUMP'])}
+    elif environ.get('PGDATABASE'):
+        source_type = 'database'
+        source_params = {
+            'host': environ.get('PGHOST', 'localhost'),
+            'port': environ.get('PGPORT', '5432'),
+            'database': environ['PGDATABASE'],
+            'user': environ.get('PGUSER', ''),
+        }
+    else:
+        raise ValueError("Set PYPGSVG_DUMP or PGDATABASE")
+    if environ.get('PYPGSVG_RENDER_MAX_JOBS') or environ.get('PYPGSVG_RENDER_MAX_QUEUED_MB'):
+        render_service.configure(int(environ.get('PYPGSVG_RENDER_MAX_JOBS') or 0),
+                                 float(environ.get('PYPGSVG_RENDER_MAX_QUEUED_MB') or 0))
+    schema_backend = environ.get('PYPGSVG_SCHEMA_BACKEND') or 'pg_dump'
+    if schema_backend not in SCHEMA_BACKENDS:
+        raise ValueError(f"PYPGSVG_SCHEMA_BACKEND must be one of {', '.join(SCHEMA_BACKENDS)}")
+    server = ERDServer(svg_file, source_type, source_params, {}, store=FileStore(state))
+    if source_type == 'database':
+        server.cached_password = environ.get('PGPASSWORD', '')
+        server.database_service.schema_backend = schema_backend
+    return server
+
+
+_app = None
+_app_lock = threading.Lock()
+
+
+def application(environ: Dict[str, Any], start_response: Callable) -> Iterable[bytes]:
+    """WSGI entry point; builds the server from the environment on first use."""
+    global _app
+    if _app is None:
+        with _app_lock:
+            if _app is None:
+                _app = make_app(server_from_env())
+    return _app(environ, start_response)
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class ThreadingWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+def serve(app_factory: Callable[[], Callable], host: str = '127.0.0.1', port: int = 8765,
+          workers: int = 1, ready: Optional[Callable[[int], None]] = None) -> None:
+    """
+    Serve WSGI apps from ``workers`` pre-forked processes sharing one socket.
+
+    Each worker calls ``app_factory`` after the fork and handles requests on
+    threads. POSIX only; use gunicorn or similar elsewhere.
+
+    Args:
+        app_factory: Builds the WSGI app in each worker
+        host: Interface to bind
+        port: Port to bind (0: any free port)
+        workers: Worker processes
+        ready: Called with the bound port once the workers are started
+    """
+    listener = socket.create_server((host, port), backlog=128)
+    port = listener.getsockname()[1]
+    children = []
+    for _ in range(max(1, workers)):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, lambda *args: os._exit(0))
+            httpd = ThreadingWSGIServer((host, port), _QuietHandler, bind_and_activate=False)
+            httpd.socket.close()
+            httpd.socket = listener
+            httpd.server_name, httpd.server_port = host, port
+            httpd.setup_environ()
+            httpd.set_app(app_factory())
+            try:
+                httpd.serve_forever()
+            finally:
+                os._exit(0)
+        children.append(pid)
+    listener.close()
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    # Stopping the parent (e.g. a process manager's SIGTERM) stops the workers
+    signal.signal(signal.SIGTERM, stop)
+    print(f"Serving on http://{host}:{port}/ with {len(children)} worker(s)", flush=True)
+    if ready is not None:
+        ready(port)
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Serve the ERD viewer from several worker processes')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind')
+    parser.add_argument('--port', type=int, default=8765, help='Port to bind')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+    args = parser.parse_args(argv)
+    if not hasattr(os, 'fork'):
+        sys.exit("The pre-fork server needs os.fork; run pypgsvg.wsgi:application under a WSGI server")
+    server_from_env()  # Fail before forking on a bad configuration
+    serve(lambda: make_app(server_from_env()), args.host, args.port, args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -151,6 +151,54 @@ def malformed_sql_dumps():
     ]
 
 
+@pytest.fixture
+def fake_focused_render():
+    """generate_focused_erd stand-in writing the requested table ids as the focused SVG."""
+    def render(sql_dump, table_ids, output_dir, input_source, settings, view_columns,
+               model=None, output_name='focused_erd'):
+        path = os.path.join(output_dir, output_name + '.svg')
+        with open(path, 'w') as f:
+            f.write('<svg>' + ','.join(table_ids) + '</svg>')
+        return path
+
+    return render
+
+
+@pytest.fixture
+def live_erd_server(tmp_path):
+    """
+    Start ERDServers over HTTP on free ports; stopped and cleaned up after the test.
+
+    Call with the schema dump to serve (``tmp_path/schema.sql``); keyword
+    arguments go to ERDServer. ``tmp_path/erd.svg`` is written unless the test
+    already has. Returns ``(server, port)``.
+    """
+    import threading
+    from pypgsvg.server import ERDServer, ThreadingERDServer
+
+    running = []
+
+    def start(dump="CREATE TABLE public.users (id integer);", generation_params=None, **kwargs):
+        svg_file = tmp_path / "erd.svg"
+        if not svg_file.exists():
+            svg_file.write_text('<svg xmlns="http://www.w3.org/2000/svg"/>')
+        dump_file = tmp_path / "schema.sql"
+        dump_file.write_text(dump)
+        server = ERDServer(str(svg_file), 'file', {'filepath': str(dump_file)}, generation_params or {}, **kwargs)
+        httpd = ThreadingERDServer(("127.0.0.1", 0), server.create_request_handler())
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        running.append((server, httpd))
+        return server, httpd.server_address[1]
+
+    yield start
+    for server, httpd in running:
+        httpd.shutdown()
+        httpd.server_close()
+        server.http_cache.close()
+        server.render_cache.close()
+        server.sessions.close()
+
+
 # Pytest-playwright fixtures for browser testing
 @pytest.fixture(scope="session")
 def browser_context_args(browser_context_args):
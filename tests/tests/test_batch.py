@@ -0,0 +1,129 @@
+"""Tests for batch manifest rendering."""
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from pypgsvg import main
+from pypgsvg.batch import load_manifest, expand_jobs, run_batch
+
+
+SCHEMA = """
+CREATE TABLE users (
+    id integer NOT NULL
+);
+CREATE TABLE posts (
+    id integer NOT NULL,
+    user_id integer
+);
+ALTER TABLE ONLY posts
+    ADD CONSTRAINT posts_user_id_fkey FOREIGN KEY (user_id) REFERENCES users(id);
+"""
+
+
+def fake_generate(tables, foreign_keys, output_file, **kwargs):
+    with open(output_file + '.svg', 'w', encoding='utf-8') as f:
+        f.write(f"<svg>{kwargs['rankdir']} {sorted(tables)}</svg>")
+    return output_file + '.svg'
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    (tmp_path / 'a.sql').write_text(SCHEMA)
+    (tmp_path / 'b.sql').write_text(SCHEMA)
+    data = {
+        'output_dir': 'out',
+        'defaults': {'rankdir': 'LR'},
+        'sources': [{'name': 'a', 'file': 'a.sql'}, {'name': 'b', 'file': 'b.sql'}],
+        'variants': [
+            {'name': 'full'},
+            {'name': 'tb', 'rankdir': 'TB', 'sources': ['a']},
+        ],
+    }
+    path = tmp_path / 'manifest.json'
+    path.write_text(json.dumps(data))
+    return path
+
+
+def test_expand_jobs_cross_product(manifest):
+    data = load_manifest(str(manifest))
+    sources, jobs = expand_jobs(data, str(manifest.parent))
+
+    assert [s['name'] for s in sources] == ['a', 'b']
+    assert sorted(j['name'] for j in jobs) == ['a/full', 'a/tb', 'b/full']
+    tb = next(j for j in jobs if j['name'] == 'a/tb')
+    assert tb['generation_params'] == {'rankdir': 'TB'}
+    assert tb['output_file'] == os.path.join(str(manifest.parent), 'out', 'a_tb')
+
+
+def test_expand_jobs_rejects_unknown_variant_settings(manifest):
+    data = load_manifest(str(manifest))
+    data['variants'] = [{'name': 'bad', 'colour': 'red'}]
+    with pytest.raises(ValueError, match='colour'):
+        expand_jobs(data)
+
+
+def test_expand_jobs_rejects_unknown_default_settings(manifest):
+    data = load_manifest(str(manifest))
+    data['defaults'] = {'rankdir': 'TB', 'colour': 'red'}
+    with pytest.raises(ValueError, match='defaults have unknown settings: colour'):
+        expand_jobs(data)
+
+
+def test_load_manifest_requires_sources(tmp_path):
+    path = tmp_path / 'empty.json'
+    path.write_text('{}')
+    with pytest.raises(ValueError):
+        load_manifest(str(path))
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason="tomllib requires Python 3.11")
+def test_load_manifest_toml(tmp_path):
+    path = tmp_path / 'manifest.toml'
+    path.write_text('[[sources]]\nname = "a"\nfile = "a.sql"\n')
+    assert load_manifest(str(path))['sources'] == [{'name': 'a', 'file': 'a.sql'}]
+
+
+def test_run_batch_parses_each_source_once(manifest, tmp_path):
+    from pypgsvg import erd_service
+    real_parse = erd_service.parse_sql_dump
+    with patch('pypgsvg.erd_service.parse_sql_dump', side_effect=real_parse) as mock_parse, \
+         patch('pypgsvg.erd_service.generate_erd_with_graphviz', side_effect=fake_generate):
+        report = run_batch(str(manifest), workers=1, report_path=str(tmp_path / 'report.json'))
+
+    assert mock_parse.call_count == 2
+    assert report['failed'] == 0
+    assert [j['name'] for j in report['jobs']] == ['a/full', 'a/tb', 'b/full']
+    assert (tmp_path / 'out' / 'a_tb.svg').read_text().startswith('<svg>TB')
+    assert (tmp_path / 'out' / 'b_full.svg').read_text().startswith('<svg>LR')
+    saved = json.loads((tmp_path / 'report.json').read_text())
+    assert saved['sources'][0]['tables'] == 2
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason="relies on fork inheriting the patch")
+def test_run_batch_process_pool(manifest, tmp_path):
+    with patch('pypgsvg.erd_service.generate_erd_with_graphviz', side_effect=fake_generate):
+        report = run_batch(str(manifest), workers=2)
+
+    assert report['failed'] == 0
+    assert all(os.path.exists(j['output']) for j in report['jobs'])
+
+
+def test_run_batch_reports_missing_source(manifest, tmp_path):
+    (tmp_path / 'b.sql').unlink()
+    with patch('pypgsvg.erd_service.generate_erd_with_graphviz', side_effect=fake_generate):
+        report = run_batch(str(manifest), workers=1)
+
+    assert report['failed'] == 1
+    failed = [j for j in report['jobs'] if j['status'] != 'ok']
+    assert failed[0]['name'] == 'b/full'
+
+
+def test_main_batch_flag(manifest):
+    with patch('sys.argv', ['pypgsvg', '--batch', str(manifest), '--workers', '1']), \
+         patch('pypgsvg.erd_service.generate_erd_with_graphviz', side_effect=fake_generate), \
+         patch('sys.exit') as mock_exit:
+        main()
+    mock_exit.assert_not_called()
@@ -0,0 +1,50 @@
+"""Tests for render cache keys and deterministic timestamps."""
+from pypgsvg.cache import (
+    render_cache_key,
+    read_cache_key,
+    cache_key_comment,
+    content_addressed_path,
+    output_stem,
+    generated_timestamp,
+)
+
+
+def test_render_cache_key_is_stable_and_order_independent():
+    a = render_cache_key({'users': {'columns': []}, 'posts': {'columns': []}}, ['TB'])
+    b = render_cache_key({'posts': {'columns': []}, 'users': {'columns': []}}, ['TB'])
+    assert a == b
+    assert len(a) == 64
+    assert render_cache_key({'users': {'columns': []}}, ['LR']) != a
+
+
+def test_render_cache_key_includes_version(monkeypatch):
+    key = render_cache_key({'users': {}})
+    monkeypatch.setattr('pypgsvg.cache.pypgsvg_version', lambda: '999.0.0')
+    assert render_cache_key({'users': {}}) != key
+
+
+def test_read_cache_key_roundtrip(tmp_path):
+    svg = tmp_path / 'erd.svg'
+    svg.write_text('<svg>' + 'x' * 5000 + '</svg>' + cache_key_comment('abc123'))
+    assert read_cache_key(str(svg)) == 'abc123'
+
+    svg.write_text('<svg></svg>')
+    assert read_cache_key(str(svg)) is None
+    assert read_cache_key(str(tmp_path / 'missing.svg')) is None
+
+
+def test_content_addressed_path():
+    assert content_addressed_path('out/erd', 'f' * 64) == 'out/erd.ffffffffffffffff.svg'
+
+
+def test_output_stem_drops_key_prefix():
+    assert output_stem('out/erd.svg') == 'out/erd'
+    assert output_stem(content_addressed_path('out/erd', '0123456789abcdef' * 4)) == 'out/erd'
+    assert output_stem('out/erd.v2.svg') == 'out/erd.v2'
+
+
+def test_generated_timestamp(monkeypatch):
+    monkeypatch.delenv('SOURCE_DATE_EPOCH', raising=False)
+    assert generated_timestamp(deterministic=True) == '1970-01-01 00:00:00'
+    monkeypatch.setenv('SOURCE_DATE_EPOCH', '86400')
+    assert generated_timestamp() == '1970-01-02 00:00:00'
@@ -0,0 +1,172 @@
+"""Tests for the pg_catalog schema backend."""
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pypgsvg.catalog_backend import CATALOG_QUERY, build_catalog_model, trigger_event
+from pypgsvg.database_service import DatabaseService
+from pypgsvg.erd_service import ERDService, build_schema_model
+
+# pg_dump -s of the schema recorded in CATALOG below
+DUMP = """
+SET statement_timeout = 0;
+SET client_encoding = 'UTF8';
+
+CREATE FUNCTION public.touch() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+BEGIN NEW.updated_at := now(); RETURN NEW; END;
+$$;
+
+CREATE TABLE public.users (
+    id integer NOT NULL,
+    email character varying(255) NOT NULL,
+    updated_at timestamp with time zone DEFAULT now()
+);
+
+CREATE TABLE public.orders (
+    id integer NOT NULL,
+    user_id integer,
+    total numeric
+);
+
+CREATE VIEW public.user_totals AS
+ SELECT u.id, sum(o.total) AS total FROM (public.users u JOIN public.orders o ON ((o.user_id = u.id))) GROUP BY u.id;
+
+ALTER TABLE ONLY public.orders
+    ADD CONSTRAINT orders_pkey PRIMARY KEY (id);
+
+ALTER TABLE ONLY public.users
+    ADD CONSTRAINT users_pkey PRIMARY KEY (id);
+
+CREATE TRIGGER users_touch BEFORE UPDATE ON public.users FOR EACH ROW EXECUTE FUNCTION public.touch();
+
+ALTER TABLE ONLY public.orders
+    ADD CONSTRAINT orders_user_id_fkey FOREIGN KEY (user_id) REFERENCES public.users(id);
+"""
+
+# CATALOG_QUERY output for the same schema (PostgreSQL 16)
+CATALOG = {
+    "relations": [
+        {"name": "public.orders", "kind": "r", "definition": None, "columns": [
+            {"name": "id", "type": "integer", "not_null": True, "default": None},
+            {"name": "user_id", "type": "integer", "not_null": False, "default": None},
+            {"name": "total", "type": "numeric", "not_null": False, "default": None}]},
+        {"name": "public.user_totals", "kind": "v",
+         "definition": " SELECT u.id,\n    sum(o.total) AS total\n   FROM (public.users u\n     JOIN public.orders o ON ((o.user_id = u.id)))\n  GROUP BY u.id;",
+         "columns": [
+             {"name": "id", "type": "integer", "not_null": False, "default": None},
+             {"name": "total", "type": "numeric", "not_null": False, "default": None}]},
+        {"name": "public.users", "kind": "r", "definition": None, "columns": [
+            {"name": "id", "type": "integer", "not_null": True, "default": None},
+            {"name": "email", "type": "character varying(255)", "not_null": True, "default": None},
+            {"name": "updated_at", "type": "timestamp with time zone", "not_null": False, "default": "now()"}]},
+    ],
+    "constraints": [
+        {"table": "public.orders", "name": "orders_pkey", "type": "p", "columns": ["id"],
+         "ref_table": None, "ref_columns": None, "definition": "PRIMARY KEY (id)"},
+        {"table": "public.orders", "name": "orders_user_id_fkey", "type": "f", "columns": ["user_id"],
+         "ref_table": "public.users", "ref_columns": ["id"],
+         "definition": "FOREIGN KEY (user_id) REFERENCES public.users(id)"},
+        {"table": "public.users", "name": "users_pkey", "type": "p", "columns": ["id"],
+         "ref_table": None, "ref_columns": None, "definition": "PRIMARY KEY (id)"},
+    ],
+    "triggers": [
+        {"table": "public.users", "name": "users_touch", "type": 19, "function": "public.touch",
+         "arguments": None,
+         "definition": "CREATE TRIGGER users_touch BEFORE UPDATE ON public.users FOR EACH ROW EXECUTE FUNCTION public.touch()"},
+    ],
+    "functions": [
+        {"name": "public.touch", "arguments": "", "result": "trigger", "language": "plpgsql",
+         "body": "\nBEGIN NEW.updated_at := now(); RETURN NEW; END;\n",
+         "definition": "CREATE OR REPLACE FUNCTION public.touch()\n RETURNS trigger\n LANGUAGE plpgsql\nAS $function$\nBEGIN NEW.updated_at := now(); RETURN NEW; END;\n$function$\n"},
+    ],
+    "settings": {"client_encoding": "UTF8", "statement_timeout": "0"},
+}
+
+
+def columns_of(model):
+    return {name: [(c['name'], c['type'], c['is_primary_key'], c['is_foreign_key']) for c in table['columns']]
+            for name, table in model['tables'].items() if table['type'] == 'table'}
+
+
+def test_catalog_model_matches_parsed_dump():
+    parsed = build_schema_model(DUMP)
+    catalog = build_catalog_model(CATALOG)
+
+    assert set(catalog) == set(parsed)
+    assert set(catalog['tables']) == set(parsed['tables'])
+    assert columns_of(catalog) == columns_of(parsed)
+    assert catalog['tables']['public.users']['lines'] == parsed['tables']['public.users']['lines']
+    assert [fk[:4] for fk in catalog['foreign_keys']] == [fk[:4] for fk in parsed['foreign_keys']]
+    assert catalog['constraints'] == parsed['constraints']
+    assert catalog['tables']['public.orders']['columns'][1]['references'] == {'table': 'public.users', 'column': 'id'}
+
+    trigger_fields = ('trigger_name', 'event', 'function', 'function_args')
+    assert ([[t[k] for k in trigger_fields] for t in catalog['triggers']['public.users']]
+            == [[t[k] for k in trigger_fields] for t in parsed['triggers']['public.users']])
+    assert set(catalog['functions']) == set(parsed['functions'])
+    assert catalog['functions']['public.touch']['language'] == 'plpgsql'
+
+    # Views come with their columns; the parser needs a second psql for them
+    assert catalog['views']['public.user_totals']['type'] == 'view'
+    assert [c['name'] for c in catalog['tables']['public.user_totals']['columns']] == ['id', 'total']
+    assert catalog['errors'] == []
+
+
+def test_foreign_key_to_skipped_table_is_reported():
+    catalog = dict(CATALOG, constraints=[
+        {"table": "public.orders", "name": "orders_ext_fkey", "type": "f", "columns": ["user_id"],
+         "ref_table": None, "ref_columns": ["id"], "definition": "FOREIGN KEY (user_id) REFERENCES ext.accounts(id)"},
+    ])
+    model = build_catalog_model(catalog)
+    assert model['foreign_keys'] == []
+    assert model['errors'] and model['errors'][0].startswith('FK parsing issue')
+
+
+@pytest.mark.parametrize('tgtype, event', [
+    (19, 'BEFORE UPDATE'),
+    (5, 'AFTER INSERT'),
+    (31, 'BEFORE INSERT OR DELETE OR UPDATE'),
+    (81, 'INSTEAD OF UPDATE'),
+    (32, 'AFTER TRUNCATE'),
+])
+def test_trigger_event(tgtype, event):
+    assert trigger_event(tgtype) == event
+
+
+@pytest.mark.parametrize('stdout', [
+    json.dumps(CATALOG) + '\n',
+    # psql 15+ prints the status of every statement, e.g. a SET before the SELECT
+    'SET\n' + json.dumps(CATALOG) + '\n',
+])
+def test_fetch_catalog_model_runs_one_query(stdout, monkeypatch):
+    monkeypatch.setenv('PGOPTIONS', '-c work_mem=64MB')
+    service = DatabaseService()
+    with patch('subprocess.run') as mock_run:
+        mock_run.return_value = MagicMock(stdout=stdout, returncode=0)
+        model = service.fetch_catalog_model('localhost', '5432', 'testdb', 'testuser', 'secret')
+
+    mock_run.assert_called_once()
+    cmd = mock_run.call_args[0][0]
+    assert cmd[0] == 'psql' and cmd[-1] == CATALOG_QUERY
+    # One statement: psql prints nothing but the document for it
+    assert CATALOG_QUERY.strip().rstrip(';').count(';') == 0
+    env = mock_run.call_args[1]['env']
+    assert env['PGPASSWORD'] == 'secret'
+    assert env['PGOPTIONS'] == '-c work_mem=64MB -c search_path=pg_catalog'
+    assert service.cached_password == 'secret'
+    assert set(model['tables']) == {'public.users', 'public.orders', 'public.user_totals'}
+
+
+def test_erd_service_uses_configured_backend():
+    database_service = MagicMock()
+    database_service.schema_backend = 'catalog'
+    database_service.fetch_catalog_model.return_value = build_catalog_model(CATALOG)
+
+    model = ERDService(database_service).load_database_model('localhost', '5432', 'testdb', 'testuser', '')
+
+    assert 'public.users' in model['tables']
+    database_service.fetch_schema.assert_not_called()
+    database_service.fetch_view_columns.assert_not_called()
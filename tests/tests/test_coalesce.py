@@ -0,0 +1,99 @@
+"""Tests for single-flight deduplication and latest-wins debouncing."""
+import threading
+import time
+
+import pytest
+
+from pypgsvg.coalesce import LatestWins, SingleFlight
+from pypgsvg.jobs import CancelToken, cancel_scope
+
+
+def run_threads(*targets):
+    threads = [threading.Thread(target=target) for target in targets]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join(5)
+
+
+def test_single_flight_shares_identical_calls():
+    flights = SingleFlight()
+    calls = []
+    results = []
+
+    def work():
+        calls.append(1)
+        time.sleep(0.2)
+        return {'success': True}
+
+    run_threads(*[lambda: results.append(flights.do('key', work)) for _ in range(3)])
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True]
+    assert all(result == {'success': True} for result, _ in results)
+    # Finished flights are forgotten
+    assert flights.do('key', lambda: 'again') == ('again', False)
+
+
+def test_single_flight_propagates_errors():
+    flights = SingleFlight()
+    errors = []
+
+    def work():
+        time.sleep(0.1)
+        raise ValueError("dot failed")
+
+    def call():
+        try:
+            flights.do('key', work)
+        except ValueError as e:
+            errors.append(str(e))
+
+    run_threads(call, call)
+    assert errors == ["dot failed", "dot failed"]
+
+
+def test_newer_request_supersedes_during_debounce():
+    group = LatestWins(debounce=0.3)
+    outcome = {}
+
+    def request(name, key):
+        ticket = group.begin(key)
+        try:
+            outcome[name] = group.settle(ticket)
+        finally:
+            group.end(ticket)
+
+    run_threads(lambda: request('old', 'a'), lambda: request('new', 'b'))
+    assert outcome == {'old': False, 'new': True}
+
+
+def test_newer_request_cancels_in_flight_render_with_other_key():
+    group = LatestWins(debounce=0)
+    older = group.begin('a')
+    assert group.settle(older)
+    same = group.begin('a')
+    assert not older.token.cancelled
+
+    newer = group.begin('b')
+    assert older.superseded and older.token.cancelled
+    assert same.token.cancelled
+    assert not newer.token.cancelled
+    for ticket in (older, same, newer):
+        group.end(ticket)
+
+
+def test_ticket_token_follows_enclosing_job_token():
+    group = LatestWins(debounce=0)
+    job_token = CancelToken()
+    with cancel_scope(job_token):
+        ticket = group.begin('a')
+    job_token.cancel()
+    assert ticket.token.cancelled
+    assert not ticket.superseded
+    group.end(ticket)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -1,8 +1,15 @@
 """Tests for DatabaseService."""
+import os
+import subprocess
+import time
+
 import pytest
 from unittest.mock import patch, MagicMock
 from pypgsvg.database_service import DatabaseService
 
+# Bound before conftest's autouse fixture replaces subprocess.run
+REAL_RUN = subprocess.run
+
 
 class TestFetchSchema:
     """Tests for fetch_schema method."""
@@ -213,6 +220,29 @@ class TestTestConnection:
             assert 'Connection error' in result['message']
 
 
+class TestCatalogFingerprint:
+    """Tests for catalog_fingerprint method."""
+
+    def test_fingerprint_covers_view_rewrite_rules(self):
+        """CREATE OR REPLACE VIEW with the same columns only rewrites pg_rewrite."""
+        service = DatabaseService()
+
+        with patch('subprocess.run') as mock_run:
+            mock_run.return_value = MagicMock(stdout='0123abcd\n', returncode=0)
+            fingerprint = service.catalog_fingerprint('localhost', '5432', 'testdb', 'testuser', '')
+
+        assert fingerprint == '0123abcd'
+        query = mock_run.call_args[0][0][-1]
+        assert 'FROM pg_catalog.pg_rewrite' in query
+        assert 'ev_class' in query
+
+    def test_fingerprint_unavailable(self):
+        service = DatabaseService()
+
+        with patch('subprocess.run', side_effect=FileNotFoundError):
+            assert service.catalog_fingerprint('localhost', '5432', 'testdb', 'testuser', '') is None
+
+
 class TestListDatabases:
     """Tests for list_databases method."""
 
@@ -220,16 +250,14 @@ class TestListDatabases:
         """Test successful database listing."""
         service = DatabaseService()
 
-        # Mock the two subprocess calls: one for list, one for each database table count
-        with patch('subprocess.run') as mock_run:
-            # First call returns database names
-            # Second call returns table count for first database
-            # Third call returns table count for second database
-            mock_run.side_effect = [
-                MagicMock(stdout='testdb1\ntestdb2\n'),
-                MagicMock(stdout='5\n'),  # table count for testdb1
-                MagicMock(stdout='10\n'),  # table count for testdb2
-            ]
+        # One call lists the databases, then one per database counts its tables;
+        # the counts run concurrently, so answer by database rather than call order
+        outputs = {'postgres': 'testdb1\ntestdb2\n', 'testdb1': '5\n', 'testdb2': '10\n'}
+
+        def fake_run(cmd, **kwargs):
+            return MagicMock(stdout=outputs[cmd[cmd.index('-d') + 1]])
+
+        with patch('subprocess.run', side_effect=fake_run) as mock_run:
 
             result = service.list_databases('localhost', '5432', 'testuser', 'password')
 
@@ -337,5 +365,62 @@ class TestListDatabases:
             assert "psql command not found" in str(exc_info.value)
 
 
+FAKE_PSQL = """#!/bin/sh
+# Stand-in for psql: lists DATABASES, answers each table count after LATENCY seconds
+case "$*" in
+    *pg_database*) for db in $DATABASES; do echo "$db"; done ;;
+    *) sleep "$LATENCY"; echo 7 ;;
+esac
+"""
+
+
+class TestListDatabasesConcurrency:
+    """list_databases against a fake psql with a fixed per-query latency."""
+
+    @pytest.fixture
+    def fake_psql(self, tmp_path, monkeypatch):
+        script = tmp_path / 'psql'
+        script.write_text(FAKE_PSQL)
+        script.chmod(0o755)
+        monkeypatch.setenv('PATH', f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+        monkeypatch.setenv('DATABASES', ' '.join(f'db{i}' for i in range(8)))
+        monkeypatch.setenv('LATENCY', '0.2')
+        # conftest mocks subprocess.run for every test; this one runs the script
+        with patch('subprocess.run', REAL_RUN):
+            yield
+
+    def test_counts_run_concurrently(self, fake_psql):
+        service = DatabaseService()
+
+        started = time.perf_counter()
+        sequential = service.list_databases('localhost', '5432', 'testuser', max_workers=1)
+        sequential_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        concurrent = service.list_databases('localhost', '5432', 'testuser')
+        concurrent_seconds = time.perf_counter() - started
+
+        assert concurrent == sequential
+        assert [db['name'] for db in concurrent] == [f'db{i}' for i in range(8)]
+        assert all(db['table_count'] == 7 for db in concurrent)
+        # 8 counts of 0.2 s: at least 1.6 s one after the other, about 0.2 s at once
+        assert sequential_seconds >= 1.6
+        assert concurrent_seconds < sequential_seconds / 3
+
+    def test_iter_table_counts_yields_as_counts_finish(self, fake_psql):
+        service = DatabaseService()
+        names = service.database_names('localhost', '5432', 'testuser')
+
+        started = time.perf_counter()
+        counts = service.iter_table_counts('localhost', '5432', 'testuser', names, max_workers=2)
+        first = next(counts)
+        first_seconds = time.perf_counter() - started
+        counts.close()
+
+        assert first['table_count'] == 7
+        # All eight with two workers take 0.8 s; the first is out after one count
+        assert first_seconds < 0.6
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
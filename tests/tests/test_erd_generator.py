@@ -155,3 +155,152 @@ def test_generate_erd_cascade_constraint_styling():
         # Verify the graph was created successfully
         assert "users" in svg_content
         assert "posts" in svg_content
+
+
+FAKE_DOT_SVG = (
+    b'<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
+    b'<svg width="200pt" height="100pt" viewBox="0.00 0.00 200.00 100.00">'
+    b'<g id="graph0" class="graph"><g id="users"><text>users</text></g>'
+    b'<g id="posts"><text>posts</text></g><g id="edge-0"></g></g></svg>'
+)
+
+
+def test_generate_erd_compress_details(simple_schema):
+    from pypgsvg.svg_utils import decompress_graph_details
+    tables, foreign_keys = simple_schema
+    tables["users"]["lines"] = "users\nid integer"
+    with patch("pypgsvg.erd_generator.Digraph.pipe", return_value=FAKE_DOT_SVG), \
+         tempfile.TemporaryDirectory() as tmpdir:
+        output_file = os.path.join(tmpdir, "test_erd_compressed")
+        generate_erd_with_graphviz(tables, foreign_keys, output_file, compress_details=True)
+        with open(output_file + ".svg", "r", encoding="utf-8") as f:
+            svg_content = f.read()
+
+    m = re.search(r'<script id="graph-data" type="application/json">(.*?)</script>', svg_content, re.DOTALL)
+    graph_data = json.loads(m.group(1))
+    assert graph_data["compressedDetails"] is True
+    assert "sql" not in graph_data["tables"]["users"]
+    assert "fkText" not in graph_data["edges"]["edge-0"]
+
+    m = re.search(r'<script id="graph-data-details" type="application/gzip" data-encoding="base64">(.*?)</script>', svg_content)
+    details = decompress_graph_details(m.group(1))
+    assert details["tables"]["users"]["sql"] == "users\nid integer"
+    assert details["edges"]["edge-0"]["fkText"].startswith("FOREIGN KEY")
+
+
+def test_filter_schema_include_and_standalone():
+    from pypgsvg.erd_generator import filter_schema
+    tables = {"users": {"columns": []}, "posts": {"columns": []}, "lonely": {"columns": []}}
+    fks = [("posts", "user_id", "users", "id", "", {}, None)]
+
+    filtered_tables, filtered_fks = filter_schema(tables, fks, show_standalone=False)
+    assert sorted(filtered_tables) == ["posts", "users"]
+    assert filtered_fks == fks
+
+    filtered_tables, filtered_fks = filter_schema(tables, fks, include_tables=["posts", "lonely"])
+    assert sorted(filtered_tables) == ["lonely", "posts"]
+    assert filtered_fks == []
+
+
+def _render_dot_source(tables, foreign_keys, **kwargs):
+    from pypgsvg.erd_generator import Digraph
+    sources = []
+
+    def fake_pipe(self, *args, **kw):
+        sources.append(self.source)
+        return FAKE_DOT_SVG
+
+    with patch.object(Digraph, "pipe", autospec=True, side_effect=fake_pipe), \
+         tempfile.TemporaryDirectory() as tmpdir:
+        generate_erd_with_graphviz(tables, foreign_keys, os.path.join(tmpdir, "erd"), **kwargs)
+    return sources[0]
+
+
+@pytest.fixture
+def keyed_schema():
+    tables = {
+        "users": {"columns": [
+            {"name": "id", "type": "integer", "is_primary_key": True},
+            {"name": "nickname", "type": "text"},
+        ]},
+        "posts": {"columns": [
+            {"name": "id", "type": "integer", "is_primary_key": True},
+            {"name": "user_id", "type": "integer", "is_foreign_key": True},
+            {"name": "body", "type": "text"},
+        ]},
+    }
+    foreign_keys = [("posts", "user_id", "users", "id", "FOREIGN KEY (user_id) REFERENCES users(id)", {}, None)]
+    return tables, foreign_keys
+
+
+def test_detail_level_keys_hides_plain_columns(keyed_schema):
+    source = _render_dot_source(*keyed_schema, detail_level="keys")
+    assert 'PORT="user_id"' in source
+    assert 'PORT="nickname"' not in source
+    assert 'PORT="body"' not in source
+    assert "posts:user_id:e -> users:id:w" in source
+
+
+def test_detail_level_tables_uses_plain_edges(keyed_schema):
+    source = _render_dot_source(*keyed_schema, detail_level="tables")
+    assert "PORT=" not in source
+    assert "posts -> users" in source
+
+
+def test_detail_level_rejects_unknown_value(keyed_schema):
+    with pytest.raises(ValueError):
+        _render_dot_source(*keyed_schema, detail_level="everything")
+
+
+def test_deterministic_output_is_byte_identical(simple_schema, tmp_path, monkeypatch):
+    monkeypatch.delenv("SOURCE_DATE_EPOCH", raising=False)
+    outputs = []
+    with patch("pypgsvg.erd_generator.Digraph.pipe", return_value=FAKE_DOT_SVG):
+        for name in ("a", "b"):
+            path = generate_erd_with_graphviz(*simple_schema, str(tmp_path / name), deterministic=True)
+            with open(path, "rb") as f:
+                outputs.append(f.read())
+    assert outputs[0] == outputs[1]
+    assert b"1970-01-01 00:00:00" in outputs[0]
+
+
+def test_skip_if_unchanged_skips_render(simple_schema, tmp_path):
+    output_file = str(tmp_path / "erd")
+    with patch("pypgsvg.erd_generator.Digraph.pipe", return_value=FAKE_DOT_SVG) as mock_pipe:
+        generate_erd_with_graphviz(*simple_schema, output_file, skip_if_unchanged=True)
+        generate_erd_with_graphviz(*simple_schema, output_file, skip_if_unchanged=True)
+        assert mock_pipe.call_count == 1
+
+        generate_erd_with_graphviz(*simple_schema, output_file, rankdir="LR", skip_if_unchanged=True)
+        assert mock_pipe.call_count == 2
+
+
+def test_skip_if_unchanged_rerenders_for_deterministic_and_include_tables(simple_schema, tmp_path, monkeypatch):
+    monkeypatch.delenv("SOURCE_DATE_EPOCH", raising=False)
+    output_file = str(tmp_path / "erd")
+    with patch("pypgsvg.erd_generator.Digraph.pipe", return_value=FAKE_DOT_SVG) as mock_pipe:
+        generate_erd_with_graphviz(*simple_schema, output_file, skip_if_unchanged=True)
+        # A wall-clock stamped file is not a deterministic one
+        generate_erd_with_graphviz(*simple_schema, output_file, deterministic=True, skip_if_unchanged=True)
+        assert mock_pipe.call_count == 2
+        with open(output_file + ".svg") as f:
+            assert "1970-01-01 00:00:00" in f.read()
+
+        tables = list(simple_schema[0])
+        generate_erd_with_graphviz(*simple_schema, output_file, deterministic=True, include_tables=tables,
+                                   skip_if_unchanged=True)
+        assert mock_pipe.call_count == 3
+
+
+def test_content_addressed_output_name(simple_schema, tmp_path):
+    output_file = str(tmp_path / "erd")
+    with patch("pypgsvg.erd_generator.Digraph.pipe", return_value=FAKE_DOT_SVG) as mock_pipe:
+        first = generate_erd_with_graphviz(*simple_schema, output_file, content_addressed=True)
+        second = generate_erd_with_graphviz(*simple_schema, output_file, content_addressed=True)
+        other = generate_erd_with_graphviz(*simple_schema, output_file, rankdir="LR", content_addressed=True)
+
+    assert first == second
+    assert re.fullmatch(re.escape(output_file) + r"\.[0-9a-f]{16}\.svg", first)
+    assert other != first
+    assert mock_pipe.call_count == 2
+    assert not os.path.exists(output_file + ".svg")
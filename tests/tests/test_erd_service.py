@@ -232,6 +232,26 @@ class TestGenerateFromFile:
 
             assert success is True
 
+    def test_generate_from_file_failed_render_raises(self, erd_service, tmp_path, capsys):
+        """A Graphviz failure is an error, not a successful generation."""
+        sql_file = tmp_path / "schema.sql"
+        sql_file.write_text("CREATE TABLE users (id INT);")
+
+        with patch('pypgsvg.erd_service.generate_erd_with_graphviz', return_value=None):
+            with pytest.raises(Exception, match="Failed to render"):
+                erd_service.generate_from_file(str(sql_file), str(tmp_path / "test_erd"), {})
+        assert "ERD generated successfully" not in capsys.readouterr().out
+
+    def test_generate_from_file_cancelled_render_raises(self, erd_service, tmp_path):
+        """A cancelled layout propagates instead of being logged as a Graphviz error."""
+        from pypgsvg.jobs import JobCancelled
+        sql_file = tmp_path / "schema.sql"
+        sql_file.write_text("CREATE TABLE users (id INT);")
+
+        with patch('pypgsvg.erd_generator.pipe_svg', side_effect=JobCancelled("Job cancelled")):
+            with pytest.raises(JobCancelled):
+                erd_service.generate_from_file(str(sql_file), str(tmp_path / "test_erd"), {})
+
 
 class TestGenerateFocusedErd:
     """Tests for generate_focused_erd method."""
@@ -465,5 +485,108 @@ class TestGenerateSelectedSvg:
             assert "Failed to generate SVG file" in str(exc_info.value)
 
 
+class TestTableNeighborhood:
+    """Directional adjacency and N-hop neighbourhoods."""
+
+    MODEL = {
+        'tables': {'users': {}, 'orders': {}, 'items': {}, 'products': {}, 'tags': {}},
+        'foreign_keys': [
+            ('orders', 'user_id', 'users', 'id', '', {}, None),
+            ('items', 'order_id', 'orders', 'id', '', {}, None),
+            ('items', 'product_id', 'products', 'id', '', {}, None),
+        ],
+    }
+
+    def test_directional_adjacency(self):
+        from pypgsvg.erd_service import schema_adjacency
+        assert schema_adjacency(self.MODEL, 'referenced')['items'] == ['orders', 'products']
+        assert schema_adjacency(self.MODEL, 'referencing')['items'] == []
+        assert schema_adjacency(self.MODEL, 'referencing')['orders'] == ['items']
+        with pytest.raises(ValueError):
+            schema_adjacency(self.MODEL, 'sideways')
+
+    def test_neighborhood_hops_and_direction(self):
+        from pypgsvg.erd_service import schema_adjacency, table_neighborhood
+        both = schema_adjacency(self.MODEL)
+        assert table_neighborhood(both, ['users'], 0) == {'users': 0}
+        assert table_neighborhood(both, ['users'], 1) == {'users': 0, 'orders': 1}
+        assert table_neighborhood(both, ['users'], 5) == {'users': 0, 'orders': 1, 'items': 2, 'products': 3}
+
+        referencing = schema_adjacency(self.MODEL, 'referencing')
+        assert table_neighborhood(referencing, ['users'], 5) == {'users': 0, 'orders': 1, 'items': 2}
+        referenced = schema_adjacency(self.MODEL, 'referenced')
+        assert table_neighborhood(referenced, ['items', 'tags'], 1) == {
+            'items': 0, 'tags': 0, 'orders': 1, 'products': 1}
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
+
+
+class TestRenderSchemaVariants:
+    """Tests for rendering several variants from one parsed model."""
+
+    def _model(self):
+        from pypgsvg.erd_service import build_schema_model
+        return build_schema_model(
+            "CREATE TABLE users (\n id integer NOT NULL\n);\n"
+            "CREATE TABLE posts (\n id integer NOT NULL,\n user_id integer\n);\n"
+            "ALTER TABLE ONLY posts\n ADD CONSTRAINT posts_user_id_fkey FOREIGN KEY (user_id) REFERENCES users(id);\n"
+        )
+
+    def test_variants_share_filtering(self, tmp_path):
+        from pypgsvg.erd_service import render_schema_variants
+        from pypgsvg.erd_generator import filter_schema
+        variants = {
+            'tb': {'rankdir': 'TB'},
+            'lr': {'rankdir': 'LR'},
+            'users': {'include_tables': ['users']},
+        }
+        with patch('pypgsvg.erd_service.filter_schema', wraps=filter_schema) as mock_filter, \
+             patch('pypgsvg.erd_service.generate_erd_with_graphviz') as mock_gen:
+            outputs = render_schema_variants(
+                self._model(), str(tmp_path / 'erd'), 'schema.sql', {'packmode': 'array'}, variants
+            )
+
+        assert outputs == {name: str(tmp_path / f'erd_{name}.svg') for name in variants}
+        # tb and lr share one filter pass, users needs its own
+        assert mock_filter.call_count == 2
+        assert mock_gen.call_count == 3
+        by_output = {c[0][2]: c[1] for c in mock_gen.call_args_list}
+        assert by_output[str(tmp_path / 'erd_lr')]['rankdir'] == 'LR'
+        assert by_output[str(tmp_path / 'erd_lr')]['packmode'] == 'array'
+        assert list(by_output[str(tmp_path / 'erd_users')]['filtered'][0]) == ['users']
+        assert by_output[str(tmp_path / 'erd_tb')]['filtered'] is by_output[str(tmp_path / 'erd_lr')]['filtered']
+
+    def test_generate_variants_from_file_parses_once(self, erd_service, tmp_path):
+        from pypgsvg.db_parser import parse_sql_dump
+        sql_file = tmp_path / 'schema.sql'
+        sql_file.write_text("CREATE TABLE users (\n id integer NOT NULL\n);\n")
+        with patch('pypgsvg.erd_service.parse_sql_dump', wraps=parse_sql_dump) as mock_parse, \
+             patch('pypgsvg.erd_service.generate_erd_with_graphviz') as mock_gen:
+            outputs = erd_service.generate_variants_from_file(
+                str(sql_file), str(tmp_path / 'erd'), {},
+                {'a': {'rankdir': 'LR'}, 'b': {'detail_level': 'keys'}}
+            )
+
+        assert mock_parse.call_count == 1
+        assert mock_gen.call_count == 2
+        assert set(outputs) == {'a', 'b'}
+
+    def test_parse_variant_spec(self):
+        from pypgsvg.erd_service import parse_variant_spec
+        name, overrides = parse_variant_spec('core:include-tables=users, posts;detail_level=keys;show_standalone=false;fontsize=20')
+        assert name == 'core'
+        assert overrides == {
+            'include_tables': ['users', 'posts'],
+            'detail_level': 'keys',
+            'show_standalone': False,
+            'fontsize': 20,
+        }
+
+    def test_parse_variant_spec_rejects_unknown_setting(self):
+        from pypgsvg.erd_service import parse_variant_spec
+        with pytest.raises(ValueError):
+            parse_variant_spec('x:colour=red')
+        with pytest.raises(ValueError):
+            parse_variant_spec(':rankdir=LR')
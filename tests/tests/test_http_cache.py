@@ -0,0 +1,103 @@
+"""Tests for content-coding negotiation, ETags and compressed representations."""
+import gzip
+import os
+
+import pytest
+
+from pypgsvg.http_cache import RepresentationCache, negotiate_encoding, parse_etags
+
+
+@pytest.fixture
+def cache():
+    cache = RepresentationCache()
+    yield cache
+    cache.close()
+
+
+def test_negotiate_encoding_respects_q_values():
+    assert negotiate_encoding(None, {None: 'x', 'gzip': 'y'}) is None
+    assert negotiate_encoding('gzip, deflate', {None: 'x', 'gzip': 'y'}) == 'gzip'
+    assert negotiate_encoding('gzip;q=0', {None: 'x', 'gzip': 'y'}) is None
+    assert negotiate_encoding('*', {None: 'x', 'gzip': 'y'}) == 'gzip'
+    # Only codings the representation exists in
+    assert negotiate_encoding('gzip', {None: 'x'}) is None
+
+
+def test_parse_etags_drops_weak_prefix():
+    assert parse_etags('W/"a", "b"') == {'"a"', '"b"'}
+    assert parse_etags(None) == set()
+
+
+def test_compressible_file_gets_gzip_variant_and_distinct_etags(cache, tmp_path):
+    svg = tmp_path / "erd.svg"
+    svg.write_text('<svg>' + '<g class="node"/>' * 500 + '</svg>')
+
+    representation = cache.get(str(svg), 'image/svg+xml')
+    assert representation.files[None] == str(svg)
+    with open(representation.files['gzip'], 'rb') as f:
+        assert gzip.decompress(f.read()) == svg.read_bytes()
+    assert representation.size('gzip') < representation.size(None) / 10
+    assert representation.etag(None) != representation.etag('gzip')
+    assert representation.matches(representation.etag('gzip'))
+    assert not representation.matches('"other"')
+    # Built once per file version
+    assert cache.get(str(svg), 'image/svg+xml') is representation
+
+
+def test_transform_and_new_version(cache, tmp_path):
+    svg = tmp_path / "erd.svg"
+    svg.write_text('<svg>one</svg>')
+
+    representation = cache.get(str(svg), 'image/svg+xml', transform=bytes.upper)
+    with open(representation.files[None], 'rb') as f:
+        assert f.read() == b'<SVG>ONE</SVG>'
+
+    svg.write_text('<svg>two, longer</svg>')
+    assert cache.get(str(svg), 'image/svg+xml', transform=bytes.upper).etag() != representation.etag()
+
+    directory = cache.directory
+    cache.close()
+    assert not os.path.exists(directory)
+
+
+def test_fresh_sidecar_is_used_and_binary_types_are_not_compressed(cache, tmp_path):
+    svg = tmp_path / "erd.svg"
+    svg.write_text('<svg/>')
+    sidecar = tmp_path / "erd.svg.gz"
+    sidecar.write_bytes(gzip.compress(b'<svg/>'))
+    os.utime(sidecar, ns=(os.stat(svg).st_mtime_ns + 1, os.stat(svg).st_mtime_ns + 1))
+    assert cache.get(str(svg), 'image/svg+xml').files['gzip'] == str(sidecar)
+
+    png = tmp_path / "erd.png"
+    png.write_bytes(b'\x89PNG')
+    assert set(cache.get(str(png), 'image/png').files) == {None}
+    # Nothing had to be written
+    assert cache.directory is None
+
+
+def test_evicted_variants_are_deleted_but_served_files_and_shared_variants_are_kept(tmp_path):
+    cache = RepresentationCache(max_entries=2)
+    first = tmp_path / "first.svg"
+    first.write_text('<svg>first</svg>')
+    sidecar = tmp_path / "first.svg.gz"
+    sidecar.write_bytes(gzip.compress(b'<svg>first</svg>'))
+    os.utime(sidecar, ns=(os.stat(first).st_mtime_ns + 1, os.stat(first).st_mtime_ns + 1))
+    copy = tmp_path / "copy.svg"
+    copy.write_text('<svg>copy</svg>')
+    same = tmp_path / "same.svg"
+    same.write_text('<svg>copy</svg>')
+
+    evicted = cache.get(str(first), 'image/svg+xml', transform=bytes.upper)
+    untransformed = cache.get(str(first), 'image/svg+xml')
+    shared = cache.get(str(copy), 'image/svg+xml')
+    written = [name for name in evicted.files.values() if os.path.dirname(name) == cache.directory]
+    assert written and not any(os.path.exists(name) for name in written)
+    assert first.exists() and sidecar.exists()
+    assert untransformed.files['gzip'] == str(sidecar)
+
+    # same.svg has copy.svg's content: its variant file outlives copy.svg's entry
+    cache.get(str(same), 'image/svg+xml')
+    cache.get(str(first), 'image/svg+xml', transform=bytes.upper)
+    assert os.path.exists(shared.files['gzip'])
+    assert len(os.listdir(cache.directory)) == 3
+    cache.close()
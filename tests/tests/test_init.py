@@ -291,6 +291,52 @@ class TestMainFunction:
             call_args = mock_start_server.call_args
             assert call_args[0][1] == 'file'  # source_type
 
+    def test_main_with_variant_and_view_serves_main_erd(self, tmp_path):
+        """--variant with --view serves the main ERD, not the last variant."""
+        from pypgsvg import main
+
+        sql_file = tmp_path / "schema.sql"
+        sql_file.write_text("CREATE TABLE users (id INT);")
+        output_file = tmp_path / "output"
+
+        with patch('sys.argv', ['pypgsvg', str(sql_file), '-o', str(output_file), '--view',
+                                '--variant', 'lr:rankdir=LR', '--variant', 'keys:detail_level=keys']), \
+             patch('pypgsvg.generate_erd_with_graphviz'), \
+             patch('pypgsvg.erd_service.render_schema_variants') as mock_variants, \
+             patch('pypgsvg.server.start_server') as mock_start_server:
+
+            mock_variants.return_value = {'lr': f"{output_file}_lr.svg", 'keys': f"{output_file}_keys.svg"}
+
+            main()
+
+            mock_variants.assert_called_once()
+            mock_start_server.assert_called_once()
+            assert mock_start_server.call_args[0][0] == f"{output_file}.svg"
+
+    def test_main_with_split_schemas_and_view_serves_schema_erd(self, tmp_path):
+        """--split-schemas with --view serves an interactive schema ERD, not the overview."""
+        from pypgsvg import main
+
+        sql_file = tmp_path / "schema.sql"
+        sql_file.write_text("CREATE TABLE users (id INT);")
+        output_file = tmp_path / "output"
+
+        with patch('sys.argv', ['pypgsvg', str(sql_file), '-o', str(output_file), '--view', '--split-schemas']), \
+             patch('pypgsvg.schema_split.render_schema_split') as mock_split, \
+             patch('pypgsvg.server.start_server') as mock_start_server:
+
+            mock_split.return_value = {
+                'overview': f"{output_file}.svg",
+                'schemas': {'audit': f"{output_file}_audit.svg", 'public': f"{output_file}_public.svg"},
+            }
+
+            main()
+
+            assert mock_start_server.call_args[0][0] == f"{output_file}_public.svg"
+            # Reloads and watch events re-render the served schema, not the whole dump
+            assert mock_start_server.call_args[0][3]['schema'] == 'public'
+            assert 'schema' not in mock_split.call_args[0][3]
+
     def test_main_with_view_flag_database_source(self):
         """Test main function with --view flag and database source."""
         from pypgsvg import main
@@ -451,5 +497,26 @@ class TestMainFunction:
             mock_generate.assert_called_once()
 
 
+class TestLazyImports:
+    """`import pypgsvg` and --help must not pay for graphviz or the SVG assets."""
+
+    def test_import_does_not_load_graphviz_or_assets(self):
+        import os
+        src = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+        code = (
+            "import sys, pypgsvg, pypgsvg.svg_utils as su\n"
+            "print('graphviz' in sys.modules, 'SVG_CSS_STYLE' in vars(su))\n"
+            "from pypgsvg.erd_generator import Digraph\n"
+            "print('graphviz' in sys.modules, su.SVG_CSS_STYLE.startswith('<style'))\n"
+        )
+        # subprocess.run is patched by conftest; Popen is not
+        proc = subprocess.Popen([sys.executable, '-c', code], stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, text=True,
+                                env=dict(os.environ, PYTHONPATH=os.path.abspath(src)))
+        stdout, stderr = proc.communicate(timeout=60)
+        assert proc.returncode == 0, stderr
+        assert stdout.split() == ['False', 'False', 'True', 'True']
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -0,0 +1,140 @@
+"""Tests for background generation jobs: progress, cancellation and the job API."""
+import http.client
+import json
+import subprocess
+import sys
+import time
+from unittest.mock import patch
+
+import pytest
+
+from pypgsvg.jobs import JobManager, run_cancellable
+from pypgsvg.profiling import profile, Profiler, span
+
+
+SLEEPER = [sys.executable, '-c', 'import time; time.sleep(30)']
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+
+def test_job_records_progress_and_finished_jobs_are_bounded():
+    manager = JobManager(max_finished=2)
+
+    def work(job):
+        with profile(Profiler(listener=job.on_span)):
+            with span('parse', tables=3):
+                pass
+            with span('render'):
+                pass
+        return {'ok': True}
+
+    jobs = [manager.submit('test', work) for _ in range(3)]
+    assert wait_for(lambda: all(job.done for job in jobs))
+    assert jobs[-1].state == 'succeeded'
+    assert jobs[-1].response == {'ok': True}
+    assert [p['phase'] for p in jobs[-1].progress] == ['parse', 'render']
+    assert jobs[-1].progress[0]['counts'] == {'tables': 3}
+    assert manager.get(jobs[0].id) is None
+    assert [job['id'] for job in manager.list()] == [jobs[1].id, jobs[2].id]
+
+
+def test_cancel_kills_running_subprocess():
+    manager = JobManager()
+    job = manager.submit('sleep', lambda job: run_cancellable(SLEEPER, capture_output=True))
+    assert wait_for(lambda: job.token._processes)
+    start = time.monotonic()
+    manager.cancel(job.id)
+    assert wait_for(lambda: job.done)
+    assert job.state == 'cancelled'
+    assert time.monotonic() - start < 5
+
+
+def test_failed_job_keeps_error():
+    manager = JobManager()
+
+    def work(job):
+        raise ValueError("boom")
+
+    job = manager.submit('fail', work)
+    assert wait_for(lambda: job.done)
+    assert (job.state, job.error) == ('failed', 'boom')
+
+
+def test_run_cancellable_outside_job_is_subprocess_run():
+    # conftest replaces subprocess.run with a mock
+    run_cancellable(['pg_dump', '--version'], capture_output=True, text=True)
+    subprocess.run.assert_called_once_with(['pg_dump', '--version'], capture_output=True, text=True)
+
+
+@pytest.fixture
+def job_server(live_erd_server):
+    server, port = live_erd_server()
+    return server, port, server.source_params['filepath']
+
+
+def request(port, method, path, body=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.request(method, path, json.dumps(body) if body is not None else None,
+                 {'Content-Type': 'application/json'})
+    response = conn.getresponse()
+    data = response.read()
+    conn.close()
+    return response.status, data
+
+
+def test_async_reload_reports_phases_and_result(job_server):
+    server, port, dump = job_server
+
+    def render(filepath, output_file, generation_params):
+        with span('parse'):
+            time.sleep(0.2)
+        with span('render'):
+            pass
+        return output_file + '.svg', True
+
+    with patch.object(server.erd_service, 'generate_from_file', side_effect=render):
+        status, data = request(port, 'POST', '/api/reload-erd?async=1', {'filepath': dump})
+        assert status == 202
+        submitted = json.loads(data)
+
+        status, data = request(port, 'GET', submitted['events_url'])
+        events = [block for block in data.decode('utf-8').split('\n\n') if block]
+        assert status == 200
+        assert events[-1].startswith('id: ') and '\nevent: done\n' in events[-1]
+
+    status, data = request(port, 'GET', submitted['status_url'])
+    job = json.loads(data)
+    assert job['state'] == 'succeeded'
+    assert [p['phase'] for p in job['progress']] == ['parse', 'render']
+    assert job['response']['body']['success'] is True
+
+    status, data = request(port, 'GET', submitted['result_url'])
+    assert status == 200 and json.loads(data)['success'] is True
+
+
+def test_cancel_endpoint_stops_render(job_server):
+    server, port, dump = job_server
+
+    def render(filepath, output_file, generation_params):
+        run_cancellable(SLEEPER)
+        return output_file + '.svg', True
+
+    with patch.object(server.erd_service, 'generate_from_file', side_effect=render):
+        _, data = request(port, 'POST', '/api/reload-erd?async=1', {'filepath': dump})
+        submitted = json.loads(data)
+        job = server.jobs.get(submitted['job_id'])
+        assert wait_for(lambda: job.token._processes)
+
+        status, data = request(port, 'POST', submitted['cancel_url'], {})
+        assert status == 200
+        assert wait_for(lambda: job.done)
+    assert job.state == 'cancelled'
+    status, _ = request(port, 'GET', '/api/jobs/unknown')
+    assert status == 404
@@ -0,0 +1,141 @@
+"""Tests for --max-memory planning, low-memory strategies and memory peaks."""
+import sys
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+
+from pypgsvg.db_parser import parse_sql_dump
+from pypgsvg.memory import (
+    LOW_MEMORY_STRATEGIES,
+    estimate_peak_mb,
+    plan_memory_strategies,
+    iter_schema_lines,
+    read_schema_dump,
+)
+from pypgsvg.metadata_injector import generate_miniature_from_coordinates
+from pypgsvg.profiling import Profiler, profile, span
+
+
+DUMP = """SET statement_timeout = 0;
+CREATE TABLE public.users (
+    id integer NOT NULL
+);
+CREATE TABLE public.posts (
+    id integer NOT NULL,
+    user_id integer
+);
+COPY public.users (id) FROM stdin;
+1
+2
+\\.
+SELECT pg_catalog.setval('public.users_id_seq', 2, true);
+ALTER TABLE ONLY public.posts
+    ADD CONSTRAINT posts_user_id_fkey FOREIGN KEY (user_id) REFERENCES public.users(id);
+"""
+
+LAYOUT_SVG = (
+    '<svg width="200pt" height="100pt" viewBox="0.00 0.00 200.00 100.00">'
+    '<g id="graph0" class="graph" transform="scale(1 1) rotate(0) translate(4 96)">'
+    '<g id="users" class="node"><title>users</title>'
+    '<polygon fill="#ffffff" stroke="none" points="0,0 50,0 50,-40 0,-40"/>'
+    '<polygon fill="#e8a8a8" stroke="none" points="5,-5 45,-5 45,-20 5,-20"/><text>users</text></g>'
+    '<g id="edge-0" class="edge"><title>posts-&gt;users</title>'
+    '<path fill="none" stroke="#e8a8a8:#9bb0c0" d="M60,-20C70,-20 80,-20 90,-20"/></g>'
+    '</g><script id="graph-data" type="application/json">{}</script></svg>'
+)
+
+
+def test_plan_enables_strategies_in_order():
+    assert not any(plan_memory_strategies(10 * 1024 * 1024, None).values())
+    assert not any(plan_memory_strategies(1024, 512).values())
+
+    ten_mb = 10 * 1024 * 1024
+    budget = estimate_peak_mb(ten_mb, ['stream_read', 'spill_svg']) + 0.1
+    plan = plan_memory_strategies(ten_mb, budget)
+    assert [name for name in LOW_MEMORY_STRATEGIES if plan[name]] == ['stream_read', 'spill_svg']
+
+    assert all(plan_memory_strategies(ten_mb, 1).values())
+
+
+def test_stream_read_skips_data_and_parses_the_same(tmp_path):
+    lines = list(iter_schema_lines(DUMP.splitlines(keepends=True)))
+    assert '1\n' not in lines
+    assert not any('setval' in line or line.startswith('COPY') for line in lines)
+
+    path = tmp_path / 'dump.sql'
+    path.write_text(DUMP)
+    streamed = read_schema_dump(str(path), stream=True)
+    assert len(streamed) < len(DUMP)
+    assert parse_sql_dump(streamed)[:3] == parse_sql_dump(DUMP)[:3]
+
+
+def test_minimap_from_coordinates():
+    svg, width, height = generate_miniature_from_coordinates(LAYOUT_SVG)
+    assert (width, height) == (200, 100)
+    assert 'viewBox="0.00 0.00 200.00 100.00"' in svg
+    assert 'transform="scale(1 1) rotate(0) translate(4 96)"' in svg
+    assert '<g id="users" class="node"><polygon fill="#e8a8a8"' in svg
+    assert 'points="0.0,-40.0 50.0,-40.0 50.0,0.0 0.0,0.0"' in svg
+    assert 'stroke="#e8a8a8"' in svg and 'd="M60,-20C70,-20 80,-20 90,-20"' in svg
+    assert '<text' not in svg and 'graph-data' not in svg
+
+
+def test_profiler_tracks_memory_peaks():
+    with profile(Profiler(track_memory=True)) as profiler:
+        with span('outer'):
+            with span('allocate'):
+                blob = bytearray(8 * 1024 * 1024)
+            del blob
+    outer, inner = profiler.spans
+    assert inner.memory['py_peak_mb'] >= 8
+    assert outer.memory['py_peak_mb'] >= inner.memory['py_peak_mb']
+    assert profiler.peak_rss_mb() is None or profiler.peak_rss_mb() > 0
+    assert 'py peak MB' in profiler.format_table()
+
+
+def test_cli_max_memory_uses_low_memory_strategies(tmp_path):
+    from pypgsvg import main
+    from pypgsvg.erd_generator import Digraph
+    dump = tmp_path / 'schema.sql'
+    dump.write_text(DUMP)
+
+    def fake_render(self, *args, outfile=None, **kwargs):
+        with open(outfile, 'w', encoding='utf-8') as f:
+            f.write(LAYOUT_SVG.replace('<script id="graph-data" type="application/json">{}</script>', ''))
+        return outfile
+
+    out = StringIO()
+    argv = ['pypgsvg', str(dump), '-o', str(tmp_path / 'erd'), '--max-memory', '1']
+    with patch.object(sys, 'argv', argv), patch('sys.stdout', out), \
+         patch.object(Digraph, 'render', autospec=True, side_effect=fake_render), \
+         patch.object(Digraph, 'pipe', side_effect=AssertionError('spill_svg should not pipe')):
+        main()
+
+    output = out.getvalue()
+    assert 'stream_read, spill_svg, minimap_from_coordinates, compress_details' in output
+    assert 'py peak MB' in output
+    assert 'MiB budget' in output
+    svg = (tmp_path / 'erd.svg').read_text()
+    assert 'id="graph-data-details"' in svg
+    assert not (tmp_path / 'erd.svg.layout.svg').exists()
+
+
+def test_spill_svg_removes_partial_layout_file_when_render_fails(tmp_path):
+    from pypgsvg.erd_generator import generate_erd_with_graphviz
+    from pypgsvg.jobs import JobCancelled
+    parsed = parse_sql_dump(DUMP)
+    output = str(tmp_path / 'erd')
+
+    def cancelled_render(dot, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('<svg')
+        raise JobCancelled('cancelled')
+
+    with patch('pypgsvg.erd_generator.render_svg_file', side_effect=cancelled_render), \
+         patch('pypgsvg.erd_generator.pipe_svg', side_effect=AssertionError('spill_svg should not pipe')), \
+         pytest.raises(JobCancelled):
+        generate_erd_with_graphviz(parsed[0], parsed[1], output, spill_svg=True)
+
+    assert not (tmp_path / 'erd.svg.layout.svg').exists()
+    assert not (tmp_path / 'erd.svg').exists()
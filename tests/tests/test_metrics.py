@@ -0,0 +1,120 @@
+"""Tests for the Prometheus metrics registry and the /api/metrics endpoint."""
+import http.client
+import re
+import threading
+import time
+
+import pytest
+
+from pypgsvg.jobs import CancelToken, cancel_scope, run_cancellable
+from pypgsvg.metrics import (
+    CACHE_REQUESTS, SUBPROCESS_DURATION, SUBPROCESS_FAILURES, Registry, cache_lookup,
+)
+from pypgsvg.server import ERDServer, ThreadingERDServer, metrics_route
+
+
+def parse_samples(text):
+    """{(name, labels string): value} from Prometheus text output."""
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        match = re.match(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[^}]*\})? (\S+)$', line)
+        assert match, f"Malformed sample line: {line!r}"
+        samples[(match.group(1), match.group(2) or '')] = float(match.group(3))
+    return samples
+
+
+def test_registry_renders_counters_gauges_and_histograms():
+    registry = Registry()
+    requests = registry.counter('demo_requests_total', 'Requests', ('route',))
+    in_flight = registry.gauge('demo_in_flight', 'In flight')
+    latency = registry.histogram('demo_seconds', 'Latency', ('route',), buckets=(0.1, 1))
+    requests.inc(route='/a "quoted"')
+    requests.inc(2, route='/a "quoted"')
+    in_flight.set(3)
+    latency.observe(0.05, route='/a')
+    latency.observe(0.5, route='/a')
+    latency.observe(5, route='/a')
+
+    text = registry.render()
+    assert '# TYPE demo_requests_total counter' in text
+    assert '# TYPE demo_seconds histogram' in text
+    samples = parse_samples(text)
+    assert samples[('demo_requests_total', '{route="/a \\"quoted\\""}')] == 3
+    assert samples[('demo_in_flight', '')] == 3
+    assert samples[('demo_seconds_bucket', '{route="/a",le="0.1"}')] == 1
+    assert samples[('demo_seconds_bucket', '{route="/a",le="1"}')] == 2
+    assert samples[('demo_seconds_bucket', '{route="/a",le="+Inf"}')] == 3
+    assert samples[('demo_seconds_count', '{route="/a"}')] == 3
+    assert samples[('demo_seconds_sum', '{route="/a"}')] == pytest.approx(5.55)
+
+    with pytest.raises(ValueError):
+        requests.inc(method='GET')
+    with pytest.raises(ValueError):
+        registry.counter('demo_requests_total', 'Again')
+
+
+def test_cancelled_subprocess_is_a_failure():
+    before = SUBPROCESS_FAILURES.value(command='sleep')
+    token = CancelToken()
+    threading.Timer(0.1, token.cancel).start()
+    with cancel_scope(token):
+        with pytest.raises(Exception):
+            run_cancellable(['sleep', '5'])
+    assert SUBPROCESS_FAILURES.value(command='sleep') == before + 1
+    assert SUBPROCESS_DURATION.count(command='sleep') >= 1
+
+
+def test_metrics_route_labels_are_bounded():
+    assert metrics_route('/api/reload-erd') == '/api/reload-erd'
+    assert metrics_route('/api/jobs/1-abc') == '/api/jobs/:id'
+    assert metrics_route('/api/jobs/2-def/events') == '/api/jobs/:id/events'
+    assert metrics_route('/assets/svg_interactivity.0123.js') == '/assets/'
+    assert metrics_route('/erd.svg') == 'svg'
+    unknown = ['/api/nope', '/api/../etc/passwd', '/api/reload-erd/x', '/api/jobs/1-abc/nope',
+               '/api/jobs/1-abc/events/x'] + [f'/api/scan{i}' for i in range(50)]
+    assert {metrics_route(path) for path in unknown} == {'other'}
+
+
+def test_metrics_endpoint_scrape(tmp_path):
+    svg_file = tmp_path / "erd.svg"
+    svg_file.write_text('<svg xmlns="http://www.w3.org/2000/svg"/>')
+    server = ERDServer(str(svg_file), 'file', {'filepath': str(tmp_path / "schema.sql")}, {})
+    httpd = ThreadingERDServer(("127.0.0.1", 0), server.create_request_handler())
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    cache_lookup('test', True)
+    cache_lookup('test', False)
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=5)
+        for _ in range(2):
+            conn.request("GET", "/erd.svg")
+            conn.getresponse().read()
+        conn.request("GET", "/missing.svg")
+        conn.getresponse().read()
+        # The 404 closes its connection, so it may be recorded just after the
+        # scrape (on a new connection) is served
+        for _ in range(50):
+            conn.request("GET", "/api/metrics")
+            response = conn.getresponse()
+            text = response.read().decode('utf-8')
+            if 'route="svg",status="404"' in text:
+                break
+            time.sleep(0.02)
+        conn.close()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        server.http_cache.close()
+
+    assert response.getheader('Content-Type').startswith('text/plain; version=0.0.4')
+    samples = parse_samples(text)
+    assert samples[('pypgsvg_http_requests_total', '{method="GET",route="svg",status="200"}')] >= 2
+    assert samples[('pypgsvg_http_requests_total', '{method="GET",route="svg",status="404"}')] >= 1
+    assert samples[('pypgsvg_http_request_duration_seconds_count', '{method="GET",route="svg"}')] >= 3
+    assert samples[('pypgsvg_http_response_bytes_total', '{route="svg"}')] > 0
+    assert samples[('pypgsvg_cache_hit_ratio', '{cache="test"}')] == pytest.approx(
+        CACHE_REQUESTS.value(cache='test', result='hit')
+        / (CACHE_REQUESTS.value(cache='test', result='hit') + CACHE_REQUESTS.value(cache='test', result='miss')))
+    assert samples[('pypgsvg_cache_requests_total', '{cache="http",result="hit"}')] >= 1
+    assert ('pypgsvg_generations_in_flight', '') in samples
@@ -0,0 +1,101 @@
+"""Tests for background pre-warming of likely ERD views."""
+import os
+from unittest.mock import patch
+
+import pytest
+
+from pypgsvg.erd_service import hub_tables
+from pypgsvg.prewarm import Prewarmer, prewarm_candidates
+from pypgsvg.server import ERDServer
+from pypgsvg.sessions import new_session_id
+
+DUMP = (
+    "CREATE TABLE public.users (id integer PRIMARY KEY);\n"
+    "CREATE TABLE public.orders (id integer PRIMARY KEY, user_id integer);\n"
+    "CREATE TABLE public.items (id integer PRIMARY KEY, order_id integer);\n"
+    "CREATE TABLE public.notes (id integer PRIMARY KEY);\n"
+    "ALTER TABLE ONLY public.orders ADD CONSTRAINT orders_user_fk "
+    "FOREIGN KEY (user_id) REFERENCES public.users(id);\n"
+    "ALTER TABLE ONLY public.items ADD CONSTRAINT items_order_fk "
+    "FOREIGN KEY (order_id) REFERENCES public.orders(id);\n"
+)
+
+
+@pytest.fixture
+def prewarm_server(tmp_path, fake_focused_render):
+    svg_file = tmp_path / "erd.svg"
+    svg_file.write_text('<svg/>')
+    dump = tmp_path / "schema.sql"
+    dump.write_text(DUMP)
+    server = ERDServer(str(svg_file), 'file', {'filepath': str(dump)}, {'rankdir': 'TB', 'packmode': 'array'})
+
+    def fake_variant(model, output_file, input_source, params):
+        with open(output_file + '.svg', 'w') as f:
+            f.write(f"<svg>{params['rankdir']}</svg>")
+        return output_file + '.svg'
+
+    with patch('pypgsvg.server.render_schema_model', side_effect=fake_variant) as variant, \
+            patch.object(server.erd_service, 'generate_focused_erd', side_effect=fake_focused_render) as focused, \
+            patch.object(server.erd_service, 'generate_from_file') as full:
+        yield server, variant, focused, full
+    server.close_prewarm()
+    server.sessions.close()
+
+
+def test_hub_tables_ranks_by_degree():
+    adjacency = {'a': ['b', 'c'], 'b': ['a'], 'c': ['a', 'd'], 'd': ['c'], 'e': []}
+    assert hub_tables(adjacency, 2) == ['a', 'c']
+    assert hub_tables(adjacency, 10) == ['a', 'c', 'b', 'd']
+
+
+def test_candidates_cover_orientations_optimizer_and_hubs(prewarm_server):
+    server = prewarm_server[0]
+    candidates = prewarm_candidates({'rankdir': 'TB', 'packmode': 'array'}, server.load_schema(), hubs=1)
+    variants = [spec for kind, spec in candidates if kind == 'variant']
+    assert [spec['rankdir'] for spec in variants[:3]] == ['LR', 'BT', 'RL']
+    assert len(variants) == len({str(sorted(spec.items())) for spec in variants})
+    neighborhoods = [spec for kind, spec in candidates if kind == 'neighborhood']
+    assert neighborhoods == [{'seeds': ['public.orders'], 'hops': 1, 'direction': 'both',
+                              'graphviz_settings': {'rankdir': 'TB', 'packmode': 'array'}}]
+
+
+def test_prewarmed_views_are_served_without_rendering(prewarm_server):
+    server, variant, focused, full = prewarm_server
+    prewarmer = Prewarmer(server, hubs=1, first_page_timeout=5, idle_poll=0.01)
+    server.prewarmer = prewarmer
+    prewarmer.start()
+    prewarmer.page_served()
+    prewarmer._thread.join(10)
+    assert prewarmer.status()['state'] == 'done'
+    assert not prewarmer.failed
+    rendered = variant.call_count
+
+    # Switching to LR copies the pre-warmed render into place
+    server.generation_params['rankdir'] = 'LR'
+    result = server.reload_from_file(server.source_params['filepath'])
+    assert result['success'] is True
+    full.assert_not_called()
+    with open(server.svg_file) as f:
+        assert f.read() == '<svg>LR</svg>'
+
+    # A session's first request for a hub neighbourhood is copied from the shared one
+    session = server.sessions.get(new_session_id())
+    result = server.render_neighborhood(['public.orders'], 1, 'both', {'rankdir': 'TB', 'packmode': 'array'},
+                                        session=session)
+    assert result['cached'] is True
+    assert os.path.dirname(result['svg_file']) == session.output_dir
+    assert focused.call_count == 1
+    assert variant.call_count == rendered
+
+    # Settings nobody pre-warmed still render normally
+    server.generation_params['node_sep'] = '2'
+    server.reload_from_file(server.source_params['filepath'])
+    full.assert_called_once()
+
+
+def test_stop_cancels_waiting_prewarmer(prewarm_server):
+    server = prewarm_server[0]
+    prewarmer = Prewarmer(server, first_page_timeout=30).start()
+    prewarmer.stop()
+    assert prewarmer.status()['state'] == 'stopped'
+    assert not prewarmer.rendered
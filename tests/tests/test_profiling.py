@@ -0,0 +1,127 @@
+"""Tests for phase instrumentation and the --profile report."""
+import json
+import os
+import sys
+from io import StringIO
+from unittest.mock import patch, MagicMock
+
+from pypgsvg.db_parser import parse_sql_dump
+from pypgsvg.erd_generator import generate_erd_with_graphviz
+from pypgsvg.profiling import Profiler, PhaseTimer, profile, span, active_profiler
+from pypgsvg.server import ERDServer
+
+
+FAKE_DOT_SVG = (
+    b'<svg width="200pt" height="100pt" viewBox="0.00 0.00 200.00 100.00">'
+    b'<g id="graph0" class="graph"><g id="users"><text>users</text></g>'
+    b'<g id="posts"><text>posts</text></g><g id="edge-0"></g></g></svg>'
+)
+
+SCHEMA = """
+CREATE TABLE public.users (
+    id integer NOT NULL
+);
+CREATE TABLE public.posts (
+    id integer NOT NULL,
+    user_id integer
+);
+ALTER TABLE ONLY public.posts
+    ADD CONSTRAINT posts_user_id_fkey FOREIGN KEY (user_id) REFERENCES public.users(id);
+"""
+
+
+def span_names(profiler):
+    return [s.name for s in profiler.spans]
+
+
+def test_spans_nest_and_noop_without_profiler():
+    with span('ignored') as s:
+        assert s is None
+    assert active_profiler() is None
+
+    with profile() as profiler:
+        with span('outer', tables=3):
+            with span('inner') as inner:
+                inner.count(bytes=10)
+        phases = PhaseTimer('step.')
+        phases.mark('one')
+    assert active_profiler() is None
+
+    assert [(s.name, s.depth) for s in profiler.spans] == [('outer', 0), ('inner', 1), ('step.one', 0)]
+    report = profiler.report()
+    assert report['spans'][0]['counts'] == {'tables': 3}
+    assert report['spans'][1]['counts'] == {'bytes': 10}
+    assert 'outer' in profiler.format_table()
+    assert profiler.server_timing().startswith('outer;dur=')
+
+
+def test_parse_records_extractor_spans():
+    with profile() as profiler:
+        parse_sql_dump(SCHEMA)
+    names = span_names(profiler)
+    assert names == ['parse.settings', 'parse.tables', 'parse.functions', 'parse.views',
+                     'parse.foreign_keys', 'parse.keys', 'parse.triggers']
+    tables_span = profiler.spans[1]
+    assert tables_span.counts['tables'] == 2
+
+
+def test_generate_records_render_phases(tmp_path):
+    tables, foreign_keys = parse_sql_dump(SCHEMA)[:2]
+    with patch('pypgsvg.erd_generator.Digraph.pipe', return_value=FAKE_DOT_SVG), profile() as profiler:
+        generate_erd_with_graphviz(tables, foreign_keys, str(tmp_path / 'erd'))
+
+    names = span_names(profiler)
+    for phase in ('filter', 'cache_key', 'dot_build', 'layout', 'postprocess', 'metadata', 'minimap', 'write'):
+        assert phase in names
+    spans = {s.name: s for s in profiler.spans}
+    assert spans['minimap'].depth == spans['metadata'].depth + 1
+    assert spans['layout'].counts['bytes'] == len(FAKE_DOT_SVG)
+    assert spans['filter'].counts == {'tables': 2, 'edges': 1}
+
+
+def test_cli_profile_table_and_json(tmp_path):
+    from pypgsvg import main
+    dump = tmp_path / 'schema.sql'
+    dump.write_text(SCHEMA)
+    report_path = tmp_path / 'profile.json'
+    argv = ['pypgsvg', str(dump), '-o', str(tmp_path / 'erd'), '--profile', '--profile-json', str(report_path)]
+    out = StringIO()
+    with patch.object(sys, 'argv', argv), patch('sys.stdout', out), \
+         patch('pypgsvg.erd_generator.Digraph.pipe', return_value=FAKE_DOT_SVG):
+        main()
+
+    assert 'parse.tables' in out.getvalue()
+    report = json.loads(report_path.read_text())
+    names = [s['name'] for s in report['spans']]
+    assert names[:2] == ['read', 'parse']
+    assert 'layout' in names and 'write' in names
+    assert active_profiler() is None
+
+
+def test_server_records_request_profiles(tmp_path):
+    svg = tmp_path / 'erd.svg'
+    svg.write_text('<svg></svg>')
+    server = ERDServer(str(svg), 'file', {'filepath': 'x.sql'}, {})
+    handler_class = server.create_request_handler()
+    handler = handler_class.__new__(handler_class)
+    handler.path = '/api/example'
+    handler.headers = {'Content-Length': '0'}
+    handler.send_error = MagicMock()
+
+    def route(path, data):
+        with span('render'):
+            pass
+    handler.route_post = route
+    handler.do_POST()
+
+    assert server.recent_profiles[-1]['name'] == '/api/example'
+    assert [s['name'] for s in server.recent_profiles[-1]['spans']] == ['render']
+
+    handler.send_response = MagicMock()
+    handler.send_header = MagicMock()
+    handler.end_headers = MagicMock()
+    handler.wfile = MagicMock()
+    handler.path = '/api/profile'
+    handler.do_GET()
+    body = json.loads(handler.wfile.write.call_args[0][0])
+    assert body['profiles'][-1]['name'] == '/api/example'
@@ -0,0 +1,121 @@
+"""Tests for the process-wide dot pool: fairness, concurrency cap and rlimits."""
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from pypgsvg import render_pool
+from pypgsvg.jobs import CancelToken, JobCancelled, cancel_scope, pipe_svg
+from pypgsvg.render_pool import DOT_QUEUE_WAIT, DotPool, RenderLimitExceeded
+
+posix_only = pytest.mark.skipif(render_pool.resource is None, reason="rlimits need the resource module")
+
+
+@pytest.fixture
+def pool():
+    previous = render_pool.get_pool()
+    yield
+    render_pool._POOL = previous
+
+
+def test_slots_are_capped_and_granted_in_arrival_order():
+    pool = DotPool(max_processes=2)
+    order, running, peak = [], [0], [0]
+    lock = threading.Lock()
+    release = threading.Event()
+
+    def render(i):
+        with pool.slot():
+            with lock:
+                order.append(i)
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            release.wait(5)
+            with lock:
+                running[0] -= 1
+
+    before = DOT_QUEUE_WAIT.count()
+    threads = []
+    for i in range(6):
+        thread = threading.Thread(target=render, args=(i,))
+        thread.start()
+        threads.append(thread)
+        # Let each thread join the queue before the next one
+        deadline = time.time() + 2
+        while pool.stats()['running'] + pool.stats()['queued'] < i + 1 and time.time() < deadline:
+            time.sleep(0.005)
+
+    stats = pool.stats()
+    assert stats['running'] == 2 and stats['queued'] == 4
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert order == list(range(6))
+    assert peak[0] == 2
+    assert DOT_QUEUE_WAIT.count() == before + 6
+    stats = pool.stats()
+    assert stats['running'] == 0 and stats['queued'] == 0 and stats['acquired'] == 6
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    pool = DotPool(max_processes=1)
+    token = CancelToken()
+    with pool.slot():
+        threading.Timer(0.1, token.cancel).start()
+        with pytest.raises(JobCancelled):
+            with pool.slot(check=token.check):
+                pass
+        assert pool.stats()['queued'] == 0
+    with pool.slot():
+        assert pool.stats()['running'] == 1
+
+
+LIMITS_SCRIPT = ("import resource; "
+                 "print(resource.getrlimit(resource.RLIMIT_AS)[0], resource.getrlimit(resource.RLIMIT_CPU))")
+
+
+@pytest.mark.skipif(shutil.which('prlimit') is None, reason="needs util-linux prlimit")
+def test_command_applies_rlimits_through_prlimit():
+    assert DotPool().command(['dot']) == ['dot']
+    pool = DotPool(memory_limit_mb=512, cpu_seconds=7)
+    assert pool.limits_processes
+    assert pool.preexec_fn() is None
+    cmd = pool.command([sys.executable, '-c', LIMITS_SCRIPT])
+    assert cmd[:4] == [pool.prlimit, f'--as={512 * 1024 * 1024}', '--cpu=7:8', '--']
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE) as process:
+        out, _ = process.communicate(timeout=10)
+    assert out.decode().split(None, 1) == [str(512 * 1024 * 1024), '(7, 8)\n']
+
+
+@posix_only
+def test_preexec_fn_applies_rlimits_without_prlimit(monkeypatch):
+    monkeypatch.setattr(render_pool.shutil, 'which', lambda name: None)
+    assert DotPool().preexec_fn() is None
+    pool = DotPool(memory_limit_mb=512, cpu_seconds=7)
+    assert pool.command(['dot']) == ['dot']
+    assert pool.limits_processes
+    assert pool.describe_limits() == '512 MiB address space, 7 s CPU'
+    with subprocess.Popen([sys.executable, '-c', LIMITS_SCRIPT], stdout=subprocess.PIPE,
+                          preexec_fn=pool.preexec_fn()) as process:
+        out, _ = process.communicate(timeout=10)
+    assert out.decode().split(None, 1) == [str(512 * 1024 * 1024), '(7, 8)\n']
+
+
+@posix_only
+def test_failure_under_limits_names_the_limit(tmp_path, pool):
+    engine = tmp_path / "fake-dot"
+    engine.write_text("#!/bin/sh\ncat > /dev/null\necho 'out of memory' >&2\nexit 1\n")
+    os.chmod(engine, 0o755)
+    graph = SimpleNamespace(engine=str(engine), source='digraph { a -> b }', encoding='utf-8')
+
+    render_pool.configure(max_processes=1, memory_limit_mb=256)
+    with cancel_scope(CancelToken()):
+        with pytest.raises(RenderLimitExceeded, match='256 MiB address space.*out of memory'):
+            pipe_svg(graph)
+    assert render_pool.get_pool().stats()['acquired'] == 1
@@ -0,0 +1,125 @@
+"""Tests for the stateless /api/render endpoint and its admission control."""
+import gzip
+import http.client
+import io
+from unittest.mock import patch
+
+import pytest
+
+from pypgsvg import render_service
+from pypgsvg.render_service import AdmissionController, Overloaded, UploadError, read_upload, render_settings
+
+DUMP = (
+    "CREATE TABLE public.users (id integer PRIMARY KEY);\n"
+    "COPY public.users (id) FROM stdin;\n"
+    "1\n2\n\\.\n"
+    "SELECT pg_catalog.setval('public.users_id_seq', 2, true);\n"
+    "CREATE TABLE public.orders (id integer PRIMARY KEY, user_id integer);\n"
+)
+
+
+def test_read_upload_filters_plain_and_gzip_bodies():
+    plain, plain_digest = read_upload(io.BytesIO(DUMP.encode('utf-8')), len(DUMP))
+    assert 'COPY' not in plain and 'setval' not in plain
+    assert plain.count('CREATE TABLE') == 2
+
+    compressed = gzip.compress(DUMP.encode('utf-8'))
+    unzipped, gzip_digest = read_upload(io.BytesIO(compressed), len(compressed))
+    assert unzipped == plain
+    assert gzip_digest != plain_digest
+
+    with pytest.raises(UploadError, match='early'):
+        read_upload(io.BytesIO(DUMP.encode('utf-8')), len(DUMP) + 10)
+    with pytest.raises(UploadError):
+        read_upload(io.BytesIO(compressed[:20]), 20)
+
+
+def test_render_settings_from_query():
+    settings = render_settings({'rankdir': ['LR'], 'include-tables': ['users,orders'], 'show_standalone': ['false']})
+    assert settings['rankdir'] == 'LR'
+    assert settings['include_tables'] == ['users', 'orders']
+    assert settings['show_standalone'] is False
+    assert settings['deterministic'] is True
+    for query in ({'nope': ['1']}, {'content_addressed': ['true']}, {'fontsize': ['big']}):
+        with pytest.raises(ValueError):
+            render_settings(query)
+
+
+def test_admission_limits_jobs_and_bytes():
+    admission = AdmissionController(max_jobs=2, max_bytes=100)
+    with pytest.raises(Overloaded) as too_large:
+        with admission.admit(101):
+            pass
+    assert too_large.value.status == 413
+
+    with admission.admit(60):
+        with pytest.raises(Overloaded) as full:
+            with admission.admit(50):
+                pass
+        assert full.value.status == 429 and full.value.retry_after >= 1
+        with admission.admit(40):
+            assert admission.stats()['jobs'] == 2
+            with pytest.raises(Overloaded):
+                with admission.admit(0):
+                    pass
+    assert admission.stats()['jobs'] == 0
+    assert admission.stats()['queued_bytes'] == 0
+
+
+@pytest.fixture
+def render_server(live_erd_server):
+    server, port = live_erd_server()
+
+    def fake_render(model, output_file, input_source, params):
+        with open(output_file + '.svg', 'w') as f:
+            f.write(f"<svg>{','.join(sorted(model['tables']))} {params['rankdir']}</svg>")
+        return output_file + '.svg'
+
+    with patch('pypgsvg.server.render_schema_model', side_effect=fake_render) as render:
+        yield port, render
+
+
+def post(port, body, path='/api/render?rankdir=LR', headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        conn.request("POST", path, body, headers or {})
+        response = conn.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        conn.close()
+
+
+def test_render_endpoint_renders_and_caches_by_content(render_server):
+    port, render = render_server
+    status, headers, body = post(port, DUMP.encode('utf-8'))
+    assert status == 200
+    assert headers['Content-Type'] == 'image/svg+xml'
+    assert headers['X-Render-Cache'] == 'miss'
+    assert body == b'<svg>public.orders,public.users LR</svg>'
+
+    status, headers, body = post(port, DUMP.encode('utf-8'))
+    assert headers['X-Render-Cache'] == 'hit'
+    assert render.call_count == 1
+
+    # Other settings are another cache entry; a gzip body is decoded
+    status, headers, body = post(port, gzip.compress(DUMP.encode('utf-8')), '/api/render?rankdir=TB')
+    assert status == 200 and body.endswith(b' TB</svg>')
+    assert render.call_count == 2
+
+    status, headers, body = post(port, b'-- nothing here\n')
+    assert status == 422
+    status, headers, body = post(port, b'x', '/api/render?bogus=1')
+    assert status == 400
+
+
+def test_render_endpoint_refuses_when_full(render_server):
+    port, render = render_server
+    with patch.object(render_service, '_ADMISSION', AdmissionController(max_jobs=1, max_bytes=1000)) as admission:
+        status, headers, _ = post(port, b'x' * 2000)
+        assert status == 413
+        with admission.admit(10):
+            status, headers, _ = post(port, DUMP.encode('utf-8'))
+        assert status == 429
+        assert int(headers['Retry-After']) >= 1
+        assert headers['Connection'] == 'close'
+    render.assert_not_called()
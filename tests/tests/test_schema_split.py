@@ -0,0 +1,124 @@
+"""Tests for per-schema output splitting."""
+import os
+from unittest.mock import patch
+
+from pypgsvg.erd_service import build_schema_model, render_schema_model
+from pypgsvg.schema_split import schema_of, partition_by_schema, render_schema_split, select_schema
+
+
+MULTI_SCHEMA_DUMP = """
+CREATE TABLE public.users (
+    id integer NOT NULL
+);
+CREATE TABLE billing.invoices (
+    id integer NOT NULL,
+    user_id integer
+);
+CREATE TABLE billing.lines (
+    id integer NOT NULL,
+    invoice_id integer
+);
+CREATE TABLE audit.events (
+    id integer NOT NULL,
+    invoice_id integer,
+    user_id integer
+);
+ALTER TABLE ONLY billing.invoices
+    ADD CONSTRAINT invoices_user_id_fkey FOREIGN KEY (user_id) REFERENCES public.users(id);
+ALTER TABLE ONLY billing.lines
+    ADD CONSTRAINT lines_invoice_id_fkey FOREIGN KEY (invoice_id) REFERENCES billing.invoices(id);
+ALTER TABLE ONLY audit.events
+    ADD CONSTRAINT events_invoice_id_fkey FOREIGN KEY (invoice_id) REFERENCES billing.invoices(id);
+ALTER TABLE ONLY audit.events
+    ADD CONSTRAINT events_user_id_fkey FOREIGN KEY (user_id) REFERENCES public.users(id);
+"""
+
+
+def test_schema_of():
+    assert schema_of('billing.invoices') == 'billing'
+    assert schema_of('users') == 'public'
+
+
+def test_partition_by_schema():
+    models, cross = partition_by_schema(build_schema_model(MULTI_SCHEMA_DUMP))
+
+    assert sorted(models) == ['audit', 'billing', 'public']
+    assert sorted(models['billing']['tables']) == ['billing.invoices', 'billing.lines']
+    assert [fk[0] for fk in models['billing']['foreign_keys']] == ['billing.lines']
+    assert models['audit']['foreign_keys'] == []
+    assert models['audit']['linked_tables'] == ['audit.events']
+    assert models['public']['linked_tables'] == ['public.users']
+    assert cross == {
+        ('billing', 'public'): 1,
+        ('audit', 'billing'): 1,
+        ('audit', 'public'): 1,
+    }
+
+
+def test_select_schema():
+    model = build_schema_model(MULTI_SCHEMA_DUMP)
+    assert sorted(select_schema(model, 'billing')['tables']) == ['billing.invoices', 'billing.lines']
+    assert select_schema(model, 'gone')['tables'] == {}
+
+
+def test_render_schema_model_with_schema_param_renders_that_schema(tmp_path):
+    output_file = str(tmp_path / 'erd_billing')
+    with patch('pypgsvg.erd_service.generate_erd_with_graphviz', return_value=output_file + '.svg') as mock_gen:
+        render_schema_model(build_schema_model(MULTI_SCHEMA_DUMP), output_file, 'dump.sql', {'schema': 'billing'})
+        render_schema_model(build_schema_model(MULTI_SCHEMA_DUMP), output_file, 'dump.sql', {})
+
+    assert sorted(mock_gen.call_args_list[0][0][0]) == ['billing.invoices', 'billing.lines']
+    assert len(mock_gen.call_args_list[1][0][0]) == 4
+
+
+def test_render_schema_split(tmp_path):
+    output_file = str(tmp_path / 'erd')
+    with patch('pypgsvg.erd_service.generate_erd_with_graphviz') as mock_gen, \
+         patch('pypgsvg.schema_split.generate_schema_overview', return_value=output_file + '.svg') as mock_overview:
+        result = render_schema_split(
+            build_schema_model(MULTI_SCHEMA_DUMP), output_file, 'dump.sql', {'rankdir': 'TB'}
+        )
+
+    assert result['overview'] == output_file + '.svg'
+    assert result['schemas']['billing'] == output_file + '_billing.svg'
+    rendered = sorted(sorted(c[0][0]) for c in mock_gen.call_args_list)
+    assert rendered == [['audit.events'], ['billing.invoices', 'billing.lines'], ['public.users']]
+
+    stats, cross, overview_file = mock_overview.call_args[0]
+    assert overview_file == output_file
+    assert stats['billing'] == {'tables': 2, 'views': 0, 'foreign_keys': 1}
+    assert cross[('audit', 'public')] == 1
+    assert mock_overview.call_args[1]['links']['audit'] == 'erd_audit.svg'
+
+
+def test_split_keeps_tables_whose_foreign_keys_all_cross_schemas(tmp_path):
+    dump = MULTI_SCHEMA_DUMP + "CREATE TABLE audit.notes (id integer NOT NULL);\n"
+    output_file = str(tmp_path / 'erd')
+    with patch('pypgsvg.erd_service.generate_erd_with_graphviz') as mock_gen, \
+         patch('pypgsvg.schema_split.generate_schema_overview', return_value=output_file + '.svg'):
+        render_schema_split(build_schema_model(dump), output_file, 'dump.sql', {'show_standalone': False})
+
+    rendered = sorted(sorted(c[1]['filtered'][0]) for c in mock_gen.call_args_list)
+    assert rendered == [['audit.events'], ['billing.invoices', 'billing.lines'], ['public.users']]
+
+
+def test_generate_schema_overview_links(tmp_path):
+    from pypgsvg.erd_generator import Digraph, generate_schema_overview
+    sources = []
+
+    def fake_pipe(self, *args, **kwargs):
+        sources.append(self.source)
+        return b'<svg></svg>'
+
+    with patch.object(Digraph, 'pipe', autospec=True, side_effect=fake_pipe):
+        path = generate_schema_overview(
+            {'billing': {'tables': 2}, 'public': {'tables': 1}},
+            {('billing', 'public'): 3},
+            str(tmp_path / 'overview'),
+            links={'billing': 'erd_billing.svg'},
+        )
+
+    assert os.path.exists(path)
+    assert 'href="erd_billing.svg"' in sources[0]
+    assert 'billing -> public' in sources[0]
+    assert 'label=3' in sources[0]
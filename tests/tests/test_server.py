@@ -704,5 +704,552 @@ class TestIncludeTablesParameter:
                 os.remove(output_file)
 
 
+
+class TestVersionedAssets:
+    """Served ERDs reference cacheable /assets/ instead of inlining JS/CSS."""
+
+    @pytest.fixture
+    def http_server(self, tmp_path):
+        import socketserver
+        import threading
+        from pypgsvg.svg_utils import load_interactivity_js, load_svg_css
+
+        svg_file = tmp_path / "erd.svg"
+        svg_file.write_text(
+            '<svg xmlns="http://www.w3.org/2000/svg"><g id="graph0"/>'
+            + load_svg_css() + load_interactivity_js() + '</svg>'
+        )
+        server = ERDServer(str(svg_file), 'file', {'filepath': 'x.sql'}, {})
+        httpd = socketserver.TCPServer(("127.0.0.1", 0), server.create_request_handler())
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        yield svg_file, httpd.server_address[1]
+        httpd.shutdown()
+        httpd.server_close()
+
+    def get(self, port, path, headers=None):
+        import http.client
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        conn.request("GET", path, headers=headers or {})
+        response = conn.getresponse()
+        body = response.read()
+        conn.close()
+        return response, body
+
+    def test_svg_references_versioned_assets(self, http_server):
+        from pypgsvg.svg_utils import asset_url
+        svg_file, port = http_server
+        response, body = self.get(port, "/erd.svg")
+        assert response.status == 200
+        assert response.getheader('Cache-Control') == 'no-cache'
+        body = body.decode('utf-8')
+        assert asset_url('svg_interactivity.js') in body
+        assert asset_url('svg.css') in body
+        assert 'CDATA' not in body
+        assert len(body) < len(svg_file.read_text()) / 10
+        # The file on disk stays self-contained
+        assert 'CDATA' in svg_file.read_text()
+
+    def test_assets_are_immutable_and_revalidate(self, http_server):
+        from pypgsvg.svg_utils import asset_url, read_asset
+        _, port = http_server
+        response, body = self.get(port, asset_url('svg_interactivity.js'))
+        assert response.status == 200
+        assert response.getheader('Content-Type').startswith('text/javascript')
+        assert 'immutable' in response.getheader('Cache-Control')
+        assert body.decode('utf-8') == read_asset('svg_interactivity.js')
+
+        etag = self.get(port, asset_url('svg.css'))[0].getheader('ETag')
+        response, _ = self.get(port, asset_url('svg.css'), {'If-None-Match': etag})
+        assert response.status == 304
+
+        response, _ = self.get(port, '/assets/svg.0000stale0000.css')
+        assert response.status == 404
+
+    def test_gzip_etag_and_keep_alive(self, http_server):
+        import gzip
+        import http.client
+        svg_file, port = http_server
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+
+        conn.request("GET", "/erd.svg")
+        plain = conn.getresponse()
+        plain_body = plain.read()
+        assert plain.version == 11
+        assert plain.getheader('Content-Encoding') is None
+
+        # Same connection: gzip negotiated, identical content, different strong ETag
+        conn.request("GET", "/erd.svg", headers={'Accept-Encoding': 'gzip'})
+        zipped = conn.getresponse()
+        zipped_body = zipped.read()
+        assert zipped.getheader('Content-Encoding') == 'gzip'
+        assert zipped.getheader('Vary') == 'Accept-Encoding'
+        assert int(zipped.getheader('Content-Length')) == len(zipped_body) < len(plain_body)
+        assert gzip.decompress(zipped_body) == plain_body
+        assert zipped.getheader('ETag') != plain.getheader('ETag')
+
+        conn.request("GET", "/erd.svg", headers={'Accept-Encoding': 'gzip',
+                                                  'If-None-Match': zipped.getheader('ETag')})
+        revalidated = conn.getresponse()
+        assert revalidated.status == 304
+        assert revalidated.read() == b''
+
+        # A new version of the file gets a new ETag
+        svg_file.write_text('<svg xmlns="http://www.w3.org/2000/svg"><g id="graph1"/></svg>')
+        conn.request("GET", "/erd.svg", headers={'If-None-Match': plain.getheader('ETag')})
+        changed = conn.getresponse()
+        assert changed.status == 200
+        assert b'graph1' in changed.read()
+        conn.close()
+
+
+
+class TestConcurrentServer:
+    """Slow renders run in the bounded pool without blocking other requests."""
+
+    def test_gets_stay_fast_during_long_render(self, live_erd_server):
+        import http.client
+        import threading
+        import time
+
+        server, port = live_erd_server()
+        dump = server.source_params['filepath']
+        render_started = threading.Event()
+
+        def slow_render(filepath, output_file, generation_params):
+            render_started.set()
+            time.sleep(1.5)
+            return output_file + '.svg', True
+
+        reload_status = []
+
+        def post_reload():
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            conn.request("POST", "/api/reload-erd", json.dumps({'filepath': str(dump)}),
+                         {'Content-Type': 'application/json'})
+            reload_status.append(conn.getresponse().status)
+            conn.close()
+
+        with patch.object(server.erd_service, 'generate_from_file', side_effect=slow_render):
+            reloader = threading.Thread(target=post_reload)
+            reloader.start()
+            assert render_started.wait(5)
+            for _ in range(5):
+                start = time.perf_counter()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                conn.request("GET", "/erd.svg")
+                response = conn.getresponse()
+                response.read()
+                conn.close()
+                assert response.status == 200
+                assert time.perf_counter() - start < 0.5
+            assert reloader.is_alive()
+            reloader.join(5)
+        assert reload_status == [200]
+
+    def test_render_pool_is_bounded_and_serializes_outputs(self, file_server):
+        import threading
+        import time
+
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def render(name):
+            with lock:
+                active.append(name)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.remove(name)
+            return name
+
+        file_server.render_workers = 2
+        threads = [
+            threading.Thread(target=file_server.run_render, args=(render, f"job{i}"),
+                             kwargs={'output': f"/tmp/out{i % 3}"})
+            for i in range(6)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        assert max(peak) <= 2
+
+        # Two renders of the same output never overlap, even with free workers
+        file_server.render_workers = 4
+        file_server._render_pool = None
+        peak.clear()
+        threads = [
+            threading.Thread(target=file_server.run_render, args=(render, f"same{i}"),
+                             kwargs={'output': "/tmp/same"})
+            for i in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        assert max(peak) == 1
+
+
+
+class TestSchemaCache:
+    """Focus/select/optimize reuse the parsed schema until the source changes."""
+
+    def test_file_schema_cached_until_file_changes(self, file_server, tmp_path):
+        import pypgsvg.server as server_module
+        dump = tmp_path / "schema.sql"
+        dump.write_text("CREATE TABLE public.users (id integer);\n")
+        file_server.source_params = {'filepath': str(dump)}
+
+        with patch.object(server_module, 'build_schema_model',
+                          wraps=server_module.build_schema_model) as mock_build:
+            first = file_server.load_schema()
+            assert file_server.load_schema() is first
+            assert mock_build.call_count == 1
+            assert set(first['model']['tables']) == {'public.users'}
+
+            dump.write_text("CREATE TABLE public.users (id integer);\nCREATE TABLE public.posts (id integer);\n")
+            second = file_server.load_schema()
+            assert mock_build.call_count == 2
+            assert set(second['model']['tables']) == {'public.users', 'public.posts'}
+
+            file_server.invalidate_schema_cache()
+            file_server.load_schema()
+            assert mock_build.call_count == 3
+
+    def test_focused_erd_uses_cached_model(self, file_server, tmp_path):
+        dump = tmp_path / "schema.sql"
+        dump.write_text("CREATE TABLE public.users (id integer);\n")
+        file_server.source_params = {'filepath': str(dump)}
+        handler_class = file_server.create_request_handler()
+        handler = handler_class.__new__(handler_class)
+        handler.send_json_response = MagicMock()
+
+        with patch.object(file_server.erd_service, 'generate_focused_erd',
+                          return_value=str(tmp_path / 'focused_erd.svg')) as mock_gen:
+            handler.handle_generate_focused_erd({'table_ids': ['users']})
+            handler.handle_generate_focused_erd({'table_ids': ['users']})
+        models = [call.kwargs['model'] for call in mock_gen.call_args_list]
+        assert models[0] is models[1]
+        assert handler.send_json_response.call_args[0][0]['success'] is True
+
+    def test_database_schema_revalidated_by_catalog_fingerprint(self, database_server):
+        fingerprints = iter(['v1', 'v1', 'v2', None, None])
+        with patch.object(database_server.database_service, 'catalog_fingerprint',
+                          side_effect=lambda *args: next(fingerprints)), \
+             patch.object(database_server, 'fetch_schema_from_database',
+                          return_value="CREATE TABLE public.users (id integer);") as mock_fetch, \
+             patch.object(database_server, 'fetch_view_columns', return_value={}):
+            database_server.load_schema()
+            database_server.load_schema()
+            assert mock_fetch.call_count == 1
+            database_server.load_schema()
+            assert mock_fetch.call_count == 2
+            # Without a fingerprint nothing is reused
+            database_server.load_schema()
+            database_server.load_schema()
+            assert mock_fetch.call_count == 4
+
+    def test_schema_adjacency(self):
+        from pypgsvg.erd_service import schema_adjacency
+        model = {
+            'tables': {'users': {}, 'posts': {}, 'tags': {}},
+            'foreign_keys': [('posts', 'user_id', 'users', 'id', '', {}, None),
+                             ('users', 'manager_id', 'users', 'id', '', {}, None)],
+        }
+        assert schema_adjacency(model) == {'users': ['posts'], 'posts': ['users'], 'tags': []}
+
+
+    def test_content_addressed_reload_and_watch_track_the_rendered_file(self, tmp_path):
+        import re
+        dump = tmp_path / "schema.sql"
+        dump.write_text("CREATE TABLE public.users (id integer);\n")
+        svg = (b'<svg width="10pt" height="10pt" viewBox="0 0 10 10">'
+               b'<g id="graph0" class="graph"><g id="users"><text>users</text></g></g></svg>')
+        server = ERDServer(str(tmp_path / "erd.svg"), 'file', {'filepath': str(dump)},
+                           {'content_addressed': True})
+
+        with patch('pypgsvg.erd_generator.pipe_svg', return_value=svg):
+            server.reload_from_file(str(dump))
+            first = server.svg_file
+            dump.write_text("CREATE TABLE public.users (id integer);\nCREATE TABLE public.posts (id integer);\n")
+            result = server.regenerate_from_watch(str(dump))
+
+        assert re.fullmatch(re.escape(str(tmp_path / "erd")) + r"\.[0-9a-f]{16}\.svg", first)
+        assert os.path.exists(first)
+        # The next render replaces the key prefix rather than adding one
+        assert re.fullmatch(re.escape(str(tmp_path / "erd")) + r"\.[0-9a-f]{16}\.svg", server.svg_file)
+        assert server.svg_file != first and os.path.exists(server.svg_file)
+        assert result['file'] == os.path.basename(server.svg_file)
+
+
+class TestSettingsCoalescing:
+    """Bursts of settings changes render once; identical reloads share a render."""
+
+    @pytest.fixture
+    def coalescing_server(self, tmp_path):
+        svg_file = tmp_path / "erd.svg"
+        svg_file.write_text('<svg/>')
+        server = ERDServer(str(svg_file), 'file', {'filepath': str(tmp_path / "schema.sql")}, {})
+        server.settings_updates.debounce = 0.2
+        return server
+
+    def apply(self, server, settings, responses):
+        handler = server.create_request_handler().__new__(server.create_request_handler())
+        handler.send_json_response = lambda data, status=200: responses.append((data, status))
+        handler.handle_apply_graphviz_settings({'graphviz_settings': settings})
+
+    def test_burst_renders_latest_only(self, coalescing_server):
+        import threading
+        import time
+        rendered = []
+
+        def reload(filepath):
+            _, _, params = coalescing_server.snapshot()
+            rendered.append(params['ranksep'])
+            return {'success': True, 'reload': True}
+
+        responses = []
+        with patch.object(coalescing_server, 'reload_from_file', side_effect=reload):
+            threads = []
+            for ranksep in (1, 2, 3):
+                thread = threading.Thread(target=self.apply,
+                                          args=(coalescing_server, {'ranksep': ranksep}, responses))
+                thread.start()
+                threads.append(thread)
+                time.sleep(0.03)
+            for thread in threads:
+                thread.join(5)
+
+        assert rendered == [3]
+        superseded = [data for data, status in responses if data.get('superseded')]
+        assert len(superseded) == 2
+        assert all(data['coalesced'] and data['reload'] is False for data in superseded)
+        assert [data for data, _ in responses if data.get('reload')] == [{'success': True, 'reload': True}]
+
+    def test_newer_settings_cancel_in_flight_render(self, coalescing_server):
+        import threading
+        import time
+        from pypgsvg.jobs import current_token
+        coalescing_server.settings_updates.debounce = 0
+        cancelled = threading.Event()
+
+        def reload(filepath):
+            _, _, params = coalescing_server.snapshot()
+            if params['ranksep'] == 1:
+                token = current_token()
+                for _ in range(200):
+                    if token.cancelled:
+                        cancelled.set()
+                        return {'success': False, 'message': 'Job cancelled'}
+                    time.sleep(0.01)
+            return {'success': True, 'reload': True}
+
+        responses = []
+        with patch.object(coalescing_server, 'reload_from_file', side_effect=reload):
+            first = threading.Thread(target=self.apply, args=(coalescing_server, {'ranksep': 1}, responses))
+            first.start()
+            time.sleep(0.1)
+            self.apply(coalescing_server, {'ranksep': 2}, responses)
+            first.join(5)
+
+        assert cancelled.is_set()
+        assert sorted((data.get('superseded', False), status) for data, status in responses) == \
+            [(False, 200), (True, 200)]
+
+    def test_identical_reloads_share_one_render(self, coalescing_server):
+        import threading
+        import time
+        calls = []
+
+        def reload(filepath):
+            calls.append(filepath)
+            time.sleep(0.2)
+            return {'success': True}
+
+        results = []
+        with patch.object(coalescing_server, 'reload_from_file', side_effect=reload):
+            threads = [threading.Thread(target=lambda: results.append(
+                coalescing_server.single_flight_reload('reload_from_file', 'schema.sql'))) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+
+        assert calls == ['schema.sql']
+        assert sorted(result.get('coalesced', False) for result in results) == [False, True]
+
+
+
+class TestNeighborhoodEndpoint:
+    """/api/generate_neighborhood_erd resolves N-hop neighbourhoods and caches renders."""
+
+    @pytest.fixture
+    def neighborhood_server(self, tmp_path, fake_focused_render):
+        svg_file = tmp_path / "erd.svg"
+        svg_file.write_text('<svg/>')
+        dump = tmp_path / "schema.sql"
+        dump.write_text(
+            "CREATE TABLE public.users (id integer PRIMARY KEY);\n"
+            "CREATE TABLE public.orders (id integer PRIMARY KEY, user_id integer);\n"
+            "CREATE TABLE public.items (id integer PRIMARY KEY, order_id integer);\n"
+            "ALTER TABLE ONLY public.orders ADD CONSTRAINT orders_user_fk "
+            "FOREIGN KEY (user_id) REFERENCES public.users(id);\n"
+            "ALTER TABLE ONLY public.items ADD CONSTRAINT items_order_fk "
+            "FOREIGN KEY (order_id) REFERENCES public.orders(id);\n"
+        )
+        server = ERDServer(str(svg_file), 'file', {'filepath': str(dump)}, {})
+        with patch.object(server.erd_service, 'generate_focused_erd', side_effect=fake_focused_render) as render:
+            yield server, render
+
+    def post(self, server, data):
+        responses = []
+        handler = server.create_request_handler().__new__(server.create_request_handler())
+        handler.send_json_response = lambda body, status=200: responses.append((body, status))
+        handler.handle_generate_neighborhood_erd(data)
+        return responses[0]
+
+    def test_renders_neighborhood_and_reuses_cached_render(self, neighborhood_server):
+        server, render = neighborhood_server
+        body, status = self.post(server, {'seed_tables': ['public.items'], 'hops': 1,
+                                          'direction': 'referenced'})
+        assert status == 200
+        assert body['tables'] == ['public.items', 'public.orders']
+        assert body['cached'] is False
+        assert body['new_file'].startswith('neighborhood_')
+        assert server.svg_file.endswith(body['new_file'])
+
+        body, _ = self.post(server, {'seed_tables': ['public.items'], 'hops': 1, 'direction': 'referenced'})
+        assert body['cached'] is True
+        assert render.call_count == 1
+
+        body, _ = self.post(server, {'seed_tables': ['public.items'], 'hops': 2})
+        assert body['distances'] == {'public.items': 0, 'public.orders': 1, 'public.users': 2}
+        assert render.call_count == 2
+
+    def test_cache_evicts_least_recent_renders(self, neighborhood_server):
+        server, render = neighborhood_server
+        server.neighborhood_cache_size = 2
+        first, _ = self.post(server, {'seed_tables': ['public.users'], 'hops': 0})
+        first_path = os.path.join(os.path.dirname(server.svg_file), first['new_file'])
+        self.post(server, {'seed_tables': ['public.orders'], 'hops': 0})
+        assert os.path.exists(first_path)
+        self.post(server, {'seed_tables': ['public.items'], 'hops': 0})
+        assert not os.path.exists(first_path)
+        assert self.post(server, {'seed_tables': ['public.users'], 'hops': 0})[0]['cached'] is False
+
+    def test_rejects_bad_requests(self, neighborhood_server):
+        server, render = neighborhood_server
+        assert self.post(server, {'hops': 1})[1] == 400
+        assert self.post(server, {'seed_tables': ['public.users'], 'hops': -1})[1] == 400
+        assert self.post(server, {'seed_tables': ['public.users'], 'direction': 'up'})[1] == 400
+        body, status = self.post(server, {'seed_tables': ['public.nope']})
+        assert status == 404
+        assert 'public.nope' in body['message']
+        render.assert_not_called()
+
+
+
+class TestSessions:
+    """Clients with different sessions get isolated focused ERDs."""
+
+    @pytest.fixture
+    def session_server(self, live_erd_server, fake_focused_render):
+        server, port = live_erd_server(
+            "CREATE TABLE public.users (id integer);\nCREATE TABLE public.posts (id integer);")
+        with patch.object(server.erd_service, 'generate_focused_erd', side_effect=fake_focused_render):
+            yield server, port
+
+    def request(self, port, method, path, body=None, headers=None):
+        import http.client
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        conn.request(method, path, json.dumps(body) if body is not None else None, headers or {})
+        response = conn.getresponse()
+        data = response.read()
+        conn.close()
+        return response, data
+
+    def test_opening_erd_issues_session_cookie(self, session_server):
+        server, port = session_server
+        response, _ = self.request(port, "GET", "/erd.svg")
+        cookie = response.getheader('Set-Cookie')
+        assert cookie.startswith('pypgsvg_session=') and 'HttpOnly' in cookie
+        session_id = cookie.split(';')[0].split('=', 1)[1]
+
+        response, _ = self.request(port, "GET", "/erd.svg", headers={'Cookie': f'pypgsvg_session={session_id}'})
+        assert response.getheader('Set-Cookie') is None
+        response, data = self.request(port, "GET", "/api/session",
+                                      headers={'Cookie': f'pypgsvg_session={session_id}'})
+        assert json.loads(data)['session_id'] == session_id
+
+    def test_focused_erds_are_isolated_per_session(self, session_server, tmp_path):
+        server, port = session_server
+        alice, bob = ('a' * 22, 'b' * 22)
+        _, data = self.request(port, "POST", "/api/generate_focused_erd",
+                               {'table_ids': ['public.users']}, {'Cookie': f'pypgsvg_session={alice}'})
+        alice_file = json.loads(data)['new_file']
+        _, data = self.request(port, "POST", "/api/generate_focused_erd",
+                               {'table_ids': ['public.posts']}, {'X-PgSVG-Session': bob})
+        bob_file = json.loads(data)['new_file']
+
+        assert alice_file == f'.pypgsvg-sessions/{alice}/focused_erd.svg'
+        assert bob_file == f'.pypgsvg-sessions/{bob}/focused_erd.svg'
+        assert self.request(port, "GET", '/' + alice_file)[1] == b'<svg>public.users</svg>'
+        assert self.request(port, "GET", '/' + bob_file)[1] == b'<svg>public.posts</svg>'
+        # The shared view is untouched
+        assert server.svg_file == str(tmp_path / "erd.svg")
+        # Session directories are not listed
+        assert self.request(port, "GET", '/.pypgsvg-sessions/')[0].status == 404
+
+    @pytest.mark.parametrize('path', [
+        '/.pypgsvg-sessions/',
+        '/.pypgsvg-sessions',
+        '/./.pypgsvg-sessions/',
+        '/%2Epypgsvg-sessions/',
+        '/%2epypgsvg%2Dsessions/',
+        '/erd.svg/../.pypgsvg-sessions/',
+        '//.pypgsvg-sessions/',
+    ])
+    def test_session_directory_listing_cannot_be_reached_by_encoding(self, session_server, path):
+        server, port = session_server
+        session_id = 'c' * 22
+        self.request(port, "POST", "/api/generate_focused_erd",
+                     {'table_ids': ['public.users']}, {'X-PgSVG-Session': session_id})
+
+        response, data = self.request(port, "GET", path)
+        assert response.status == 404
+        assert session_id.encode() not in data
+        # A session's own files are still served
+        assert self.request(port, "GET", f'/%2Epypgsvg-sessions/{session_id}/focused_erd.svg')[0].status == 200
+
+    @pytest.mark.parametrize('endpoint, body, name', [
+        ('/api/generate_focused_erd', {'table_ids': ['public.users']}, 'focused_erd.svg'),
+        ('/api/generate_neighborhood_erd', {'seed_tables': ['public.users'], 'hops': 0}, 'neighborhood_'),
+    ])
+    def test_async_requests_render_into_the_session(self, session_server, tmp_path, endpoint, body, name):
+        server, port = session_server
+        session_id = 'd' * 22
+        headers = {'X-PgSVG-Session': session_id}
+        _, data = self.request(port, "POST", endpoint + '?async=1', body, headers)
+        submitted = json.loads(data)
+        self.request(port, "GET", submitted['events_url'], headers=headers)
+
+        response, data = self.request(port, "GET", submitted['result_url'], headers=headers)
+        assert response.status == 200
+        new_file = json.loads(data)['new_file']
+        assert new_file.startswith(f'.pypgsvg-sessions/{session_id}/{name}')
+        assert self.request(port, "GET", '/' + new_file)[0].status == 200
+        # Neither the shared directory nor the shared view saw the render
+        assert not list(tmp_path.glob(name + '*'))
+        assert server.svg_file == str(tmp_path / "erd.svg")
+
+    def test_requests_without_session_use_shared_output(self, session_server, tmp_path):
+        server, port = session_server
+        _, data = self.request(port, "POST", "/api/generate_focused_erd", {'table_ids': ['public.users']})
+        assert json.loads(data)['new_file'] == 'focused_erd.svg'
+        assert server.svg_file == str(tmp_path / "focused_erd.svg")
+        assert len(server.sessions) == 0
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
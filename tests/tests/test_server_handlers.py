@@ -1,4 +1,6 @@
 """Tests for server.py HTTP handlers and error paths."""
+import io
+import json
 import pytest
 from unittest.mock import patch, MagicMock
 from pypgsvg.server import ERDServer
@@ -70,11 +72,14 @@ class TestRequestHandler:
         handler = handler_class.__new__(handler_class)
 
         handler.send_response = MagicMock()
+        handler.send_header = MagicMock()
         handler.end_headers = MagicMock()
 
         handler.do_OPTIONS()
 
         handler.send_response.assert_called_once_with(200)
+        # Keep-alive needs an explicit empty body
+        handler.send_header.assert_called_once_with('Content-Length', '0')
         handler.end_headers.assert_called_once()
 
     def test_do_post_invalid_json(self, file_server):
@@ -710,7 +715,7 @@ class TestServerStartup:
 
     def test_server_start_port_already_in_use(self, file_server):
         """Test server startup when port is already in use."""
-        with patch('socketserver.TCPServer') as mock_tcp:
+        with patch('pypgsvg.server.ThreadingERDServer') as mock_tcp:
             # First 9 attempts fail, 10th succeeds
             mock_tcp.side_effect = [OSError("Port in use")] * 9 + [MagicMock()]
 
@@ -724,7 +729,7 @@ class TestServerStartup:
 
     def test_server_start_all_ports_in_use(self, file_server):
         """Test server startup when all ports are in use."""
-        with patch('socketserver.TCPServer') as mock_tcp:
+        with patch('pypgsvg.server.ThreadingERDServer') as mock_tcp:
             # All attempts fail
             mock_tcp.side_effect = OSError("Port in use")
 
@@ -738,7 +743,7 @@ class TestServerStartup:
         mock_server = MagicMock()
         mock_server.serve_forever.side_effect = KeyboardInterrupt()
 
-        with patch('socketserver.TCPServer', return_value=mock_server), \
+        with patch('pypgsvg.server.ThreadingERDServer', return_value=mock_server), \
              patch('threading.Timer') as mock_timer, \
              patch('webbrowser.open'):
             try:
@@ -877,6 +882,31 @@ class TestHandleListDatabasesValidation:
             assert 'Database error' in call_args[0][0]['message']
             assert call_args[0][1] == 500
 
+    def test_handle_list_databases_stream(self, database_server):
+        """Streaming sends the names first, then each table count as an event."""
+        handler_class = database_server.create_request_handler()
+        handler = handler_class.__new__(handler_class)
+        handler.send_response = MagicMock()
+        handler.send_header = MagicMock()
+        handler.end_headers = MagicMock()
+        handler.wfile = io.BytesIO()
+
+        service = database_server.database_service
+        with patch.object(service, 'database_names', return_value=['db1', 'db2']), \
+             patch.object(service, 'iter_table_counts',
+                          return_value=(entry for entry in [{'name': 'db2', 'table_count': 3},
+                                                            {'name': 'db1', 'table_count': -1}])):
+            data = {'host': 'localhost', 'port': '5432', 'user': 'user', 'stream': True}
+            handler.handle_list_databases(data)
+
+        handler.send_response.assert_called_once_with(200)
+        handler.send_header.assert_any_call('Content-Type', 'text/event-stream')
+        events = [block.split('\n') for block in handler.wfile.getvalue().decode('utf-8').strip().split('\n\n')]
+        assert [lines[0] for lines in events] == ['event: databases', 'event: database', 'event: database', 'event: done']
+        assert json.loads(events[0][1][len('data: '):])['databases'] == [
+            {'name': 'db1', 'table_count': None}, {'name': 'db2', 'table_count': None}]
+        assert json.loads(events[1][1][len('data: '):]) == {'name': 'db2', 'table_count': 3}
+
 
 class TestHandleApplyFocusedSettingsValidation:
     """Tests for handle_apply_focused_settings validation errors."""
@@ -1245,7 +1275,7 @@ class TestServerStartupPrintStatements:
         mock_server = MagicMock()
         mock_server.serve_forever.side_effect = KeyboardInterrupt()
 
-        with patch('socketserver.TCPServer', return_value=mock_server):
+        with patch('pypgsvg.server.ThreadingERDServer', return_value=mock_server):
             try:
                 database_server.start(open_browser=False)
             except KeyboardInterrupt:
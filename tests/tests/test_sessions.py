@@ -0,0 +1,41 @@
+"""Tests for per-client sessions: creation, id validation and eviction."""
+import os
+import time
+
+from pypgsvg.sessions import SessionManager, is_session_id, new_session_id
+
+
+def test_session_ids_are_validated():
+    assert is_session_id(new_session_id())
+    assert not is_session_id(None)
+    assert not is_session_id('short')
+    assert not is_session_id('../../etc/passwd/aaaaaaaaaaaaaaaa')
+
+
+def test_sessions_are_created_with_their_own_directory(tmp_path):
+    manager = SessionManager(str(tmp_path / "sessions"))
+    first = manager.get(new_session_id())
+    second = manager.get(new_session_id())
+    assert first.output_dir != second.output_dir
+    assert os.path.isdir(first.output_dir) and os.path.isdir(second.output_dir)
+    assert manager.get(first.id) is first
+    assert manager.get('not a valid id') is None
+    assert manager.get(new_session_id(), create=False) is None
+    assert len(manager) == 2
+
+
+def test_idle_and_excess_sessions_are_evicted(tmp_path):
+    manager = SessionManager(str(tmp_path / "sessions"), idle_timeout=0.1, max_sessions=2)
+    idle = manager.get(new_session_id())
+    time.sleep(0.15)
+    assert manager.evict_idle() == [idle.id]
+    assert not os.path.exists(idle.output_dir)
+
+    manager.idle_timeout = 60
+    sessions = [manager.get(new_session_id()) for _ in range(3)]
+    assert len(manager) == 2
+    assert manager.get(sessions[0].id, create=False) is None
+    assert not os.path.exists(sessions[0].output_dir)
+
+    manager.close()
+    assert not os.path.exists(str(tmp_path / "sessions"))
@@ -0,0 +1,76 @@
+"""Tests for the ERD server's state stores."""
+import threading
+import time
+
+import pytest
+
+from pypgsvg.server import ERDServer
+from pypgsvg.state_store import FileStore, MemoryStore, StateStore
+
+
+def test_state_store_is_abstract():
+    with pytest.raises(TypeError):
+        StateStore()
+
+    class LoadOnly(StateStore):
+        def load(self):
+            return {}
+
+    with pytest.raises(TypeError):
+        LoadOnly()
+
+
+def test_memory_store_keeps_objects_and_seeds_missing_values():
+    store = MemoryStore()
+    params = {'rankdir': 'TB'}
+    store.seed(svg_file='a.svg', generation_params=params)
+    store.seed(svg_file='b.svg')
+    assert store.get('svg_file') == 'a.svg'
+    assert store.get('generation_params') is params
+    store.update(svg_file='c.svg')
+    assert store.load() == {'svg_file': 'c.svg', 'generation_params': params}
+
+
+def test_file_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "state.json")
+    first, second = FileStore(path), FileStore(path)
+    first.seed(svg_file='erd.svg', generation_params={})
+    second.seed(svg_file='other.svg')
+    assert second.get('svg_file') == 'erd.svg'
+    second.update(generation_params={'rankdir': 'LR'})
+    assert first.get('generation_params') == {'rankdir': 'LR'}
+
+
+def test_file_store_locks_exclude_other_holders(tmp_path):
+    path = str(tmp_path / "state.json")
+    stores = [FileStore(path), FileStore(path)]
+    inside, overlaps = [0], []
+
+    def hold(store):
+        for _ in range(5):
+            with store.lock('/out/erd'):
+                inside[0] += 1
+                overlaps.append(inside[0])
+                time.sleep(0.005)
+                inside[0] -= 1
+
+    threads = [threading.Thread(target=hold, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(overlaps) == 1
+
+
+def test_servers_sharing_a_file_store_see_each_others_state(tmp_path):
+    svg_file = tmp_path / "erd.svg"
+    svg_file.write_text('<svg/>')
+    path = str(tmp_path / "state.json")
+    a = ERDServer(str(svg_file), 'file', {'filepath': 'schema.sql'}, {'rankdir': 'TB'}, store=FileStore(path))
+    # A restarted worker does not reset the shared state
+    a.generation_params = dict(a.generation_params, rankdir='LR')
+    b = ERDServer(str(svg_file), 'file', {'filepath': 'schema.sql'}, {'rankdir': 'TB'}, store=FileStore(path))
+    assert b.snapshot()[2] == {'rankdir': 'LR'}
+    b.set_view(None, str(tmp_path / "focused_erd.svg"))
+    assert a.svg_file == str(tmp_path / "focused_erd.svg")
+    assert a.sessions.shared and b.sessions.shared
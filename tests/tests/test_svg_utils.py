@@ -0,0 +1,97 @@
+"""Tests for svg_utils graph-data helpers."""
+import base64
+import gzip
+import json
+
+from pypgsvg.svg_utils import (
+    split_graph_details,
+    compress_graph_details,
+    decompress_graph_details,
+)
+
+
+def _graph_data():
+    return {
+        "tables": {
+            "users": {
+                "originalName": "users",
+                "defaultColor": "#E8A8A8",
+                "edges": ["edge-0"],
+                "sql": "users\nid integer NOT NULL",
+                "triggers": [{"trigger_name": "t_users"}],
+            }
+        },
+        "edges": {
+            "edge-0": {
+                "tables": ["posts", "users"],
+                "fkText": "ALTER TABLE posts ADD CONSTRAINT ...",
+                "triggers": {},
+                "constraints": None,
+                "fromColumn": "user_id",
+            }
+        },
+        "views": {"v": {"name": "v", "definition": "SELECT 1", "type": "view"}},
+        "functions": {"f": {"name": "f", "body": "BEGIN END", "language": "plpgsql"}},
+        "settings": {"search_path": "public"},
+    }
+
+
+def test_split_graph_details_moves_text_fields():
+    graph_data = _graph_data()
+    core, details = split_graph_details(graph_data)
+
+    assert core["compressedDetails"] is True
+    assert "sql" not in core["tables"]["users"]
+    assert "triggers" not in core["tables"]["users"]
+    assert core["tables"]["users"]["edges"] == ["edge-0"]
+    assert "fkText" not in core["edges"]["edge-0"]
+    assert core["edges"]["edge-0"]["fromColumn"] == "user_id"
+    assert core["views"]["v"] == {"name": "v", "type": "view"}
+    assert core["functions"]["f"] == {"name": "f"}
+    assert core["settings"] == {"search_path": "public"}
+
+    assert details["tables"]["users"]["sql"].startswith("users")
+    assert details["edges"]["edge-0"]["fkText"].startswith("ALTER TABLE")
+    assert details["functions"]["f"] == {"body": "BEGIN END", "language": "plpgsql"}
+
+    # The input is left untouched
+    assert "sql" in graph_data["tables"]["users"]
+    assert "compressedDetails" not in graph_data
+
+
+def test_compress_graph_details_round_trip():
+    _, details = split_graph_details(_graph_data())
+    blob = compress_graph_details(details)
+
+    # Plain base64 gzip, so DecompressionStream('gzip') can inflate it
+    assert gzip.decompress(base64.b64decode(blob))
+    assert decompress_graph_details(blob) == details
+
+
+def test_compress_graph_details_is_deterministic():
+    _, details = split_graph_details(_graph_data())
+    assert compress_graph_details(details) == compress_graph_details(details)
+
+
+def test_compress_graph_details_shrinks_repetitive_sql():
+    details = {"tables": {f"t{i}": {"sql": "id integer NOT NULL,\n" * 50} for i in range(50)}}
+    blob = compress_graph_details(details)
+    assert len(blob) < len(json.dumps(details)) / 5
+
+
+def test_externalize_assets_only_replaces_current_assets():
+    from pypgsvg.svg_utils import (
+        asset_url, externalize_assets, load_interactivity_js, load_svg_css, parse_asset_url,
+    )
+    svg = '<svg>' + load_svg_css() + load_interactivity_js() + '</svg>'
+    served = externalize_assets(svg, '/static/')
+    assert served == (
+        '<svg><style type="text/css">@import url("' + asset_url('svg.css', '/static/') + '");</style>'
+        '<script type="text/javascript" href="' + asset_url('svg_interactivity.js', '/static/') + '"></script></svg>'
+    )
+    stale = '<svg><style type="text/css"><![CDATA[\nold\n]]></style></svg>'
+    assert externalize_assets(stale) == stale
+
+    assert parse_asset_url(asset_url('svg.css')) == 'svg.css'
+    assert parse_asset_url('/assets/svg.deadbeef.css') is None
+    assert parse_asset_url('/assets/other.' + asset_url('svg.css').split('.')[1] + '.js') is None
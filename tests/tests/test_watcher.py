@@ -0,0 +1,155 @@
+"""Tests for --watch mode: file watching, change diffing and the event stream."""
+import http.client
+import socketserver
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from pypgsvg.erd_service import build_schema_model, diff_schema_models
+from pypgsvg.server import ERDServer, EventBroadcaster
+from pypgsvg.watcher import FileWatcher
+
+
+SCHEMA_V1 = """
+CREATE TABLE public.users (
+    id integer NOT NULL
+);
+"""
+
+SCHEMA_V2 = SCHEMA_V1 + """
+CREATE TABLE public.posts (
+    id integer NOT NULL,
+    user_id integer
+);
+ALTER TABLE ONLY public.posts
+    ADD CONSTRAINT posts_user_id_fkey FOREIGN KEY (user_id) REFERENCES public.users(id);
+"""
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_file_watcher_debounces_bursts(tmp_path, use_inotify):
+    dump = tmp_path / "schema.sql"
+    dump.write_text(SCHEMA_V1)
+    calls = []
+    watcher = FileWatcher(str(dump), calls.append, debounce=0.2, poll_interval=0.05,
+                          use_inotify=use_inotify).start()
+    try:
+        for i in range(5):
+            dump.write_text(SCHEMA_V1 + f"-- edit {i}\n" * (i + 1))
+            time.sleep(0.03)
+        assert wait_for(lambda: calls)
+        time.sleep(0.4)
+        assert calls == [str(dump)]
+    finally:
+        watcher.stop()
+
+
+def test_file_watcher_follows_rename_replace(tmp_path):
+    dump = tmp_path / "schema.sql"
+    dump.write_text(SCHEMA_V1)
+    calls = []
+    watcher = FileWatcher(str(dump), calls.append, debounce=0.1, poll_interval=0.05).start()
+    try:
+        replacement = tmp_path / "schema.sql.tmp"
+        replacement.write_text(SCHEMA_V2)
+        replacement.replace(dump)
+        assert wait_for(lambda: calls)
+    finally:
+        watcher.stop()
+
+
+def test_diff_schema_models():
+    old = build_schema_model(SCHEMA_V1)
+    new = build_schema_model(SCHEMA_V2)
+    assert diff_schema_models(old, new) == {'added': ['public.posts'], 'removed': [], 'changed': []}
+    assert diff_schema_models(new, old)['removed'] == ['public.posts']
+    assert diff_schema_models(None, old)['added'] == ['public.users']
+
+
+def test_event_broadcaster_wait():
+    events = EventBroadcaster()
+    assert events.wait(0, timeout=0.01) is None
+    version = events.publish('erd-updated', {'file': 'erd.svg'})
+    assert events.wait(0, timeout=0.01) == (version, 'erd-updated', {'file': 'erd.svg', 'version': version})
+    assert events.wait(version, timeout=0.01) is None
+
+
+@pytest.fixture
+def watch_server(tmp_path):
+    dump = tmp_path / "schema.sql"
+    dump.write_text(SCHEMA_V1)
+    svg = tmp_path / "erd.svg"
+    svg.write_text("<svg></svg>")
+    server = ERDServer(str(svg), 'file', {'filepath': str(dump)}, {'rankdir': 'TB'})
+    with patch('pypgsvg.watcher.FileWatcher.start', lambda self: self):
+        assert server.start_watching()
+    yield server, dump
+    server.watcher.stop()
+    server.watcher = None
+
+
+def test_regenerate_from_watch_skips_unchanged_schema(watch_server):
+    server, dump = watch_server
+    with patch('pypgsvg.server.render_schema_model', side_effect=lambda m, out, *a: out + '.svg') as mock_render:
+        dump.write_text(SCHEMA_V1 + "-- just a comment\n")
+        assert server.regenerate_from_watch(str(dump)) is None
+
+        dump.write_text(SCHEMA_V2)
+        data = server.regenerate_from_watch(str(dump))
+
+    assert mock_render.call_count == 1
+    assert data['file'] == 'erd.svg'
+    assert data['changes']['added'] == ['public.posts']
+    assert data['version'] == server.events.version
+
+
+def test_events_endpoint_streams_updates(watch_server):
+    server, dump = watch_server
+    httpd = socketserver.ThreadingTCPServer(("127.0.0.1", 0), server.create_request_handler())
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=5)
+        conn.request("GET", "/api/events")
+        response = conn.getresponse()
+        assert response.status == 200
+        assert response.getheader('Content-Type') == 'text/event-stream'
+        assert response.fp.readline() == b'retry: 2000\n'
+        response.fp.readline()
+
+        server.events.publish('erd-updated', {'file': 'erd.svg'})
+        lines = [response.fp.readline() for _ in range(3)]
+        assert lines[0] == b'id: 1\n'
+        assert lines[1] == b'event: erd-updated\n'
+        assert b'"file": "erd.svg"' in lines[2]
+        conn.close()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_events_endpoint_requires_watch_mode(tmp_path):
+    svg = tmp_path / "erd.svg"
+    svg.write_text("<svg></svg>")
+    server = ERDServer(str(svg), 'file', {'filepath': 'x.sql'}, {})
+    httpd = socketserver.TCPServer(("127.0.0.1", 0), server.create_request_handler())
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=5)
+        conn.request("GET", "/api/events")
+        assert conn.getresponse().status == 404
+        conn.close()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
@@ -0,0 +1,151 @@
+"""Tests for the WSGI interface and the pre-fork worker server."""
+import gzip
+import http.client
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+from wsgiref.util import setup_testing_defaults
+
+import pytest
+
+from pypgsvg.server import ERDServer
+from pypgsvg.state_store import STATE_FILE, FileStore
+from pypgsvg.wsgi import make_app
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src')
+DUMP = (
+    "CREATE TABLE public.users (id integer PRIMARY KEY);\n"
+    "CREATE TABLE public.orders (id integer PRIMARY KEY, user_id integer);\n"
+    "ALTER TABLE ONLY public.orders ADD CONSTRAINT orders_user_fk "
+    "FOREIGN KEY (user_id) REFERENCES public.users(id);\n"
+)
+
+
+@pytest.fixture
+def erd_dir(tmp_path):
+    (tmp_path / "erd.svg").write_text('<svg xmlns="http://www.w3.org/2000/svg">' + 'x' * 4000 + '</svg>')
+    (tmp_path / "schema.sql").write_text(DUMP)
+    return tmp_path
+
+
+def call(app, method, path, body=None, headers=None, environ=None):
+    environ = dict(environ or {}, REQUEST_METHOD=method, PATH_INFO=path)
+    if body is not None:
+        data = json.dumps(body).encode('utf-8')
+        environ.update({'CONTENT_TYPE': 'application/json', 'CONTENT_LENGTH': str(len(data)),
+                        'wsgi.input': io.BytesIO(data)})
+    for name, value in (headers or {}).items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = value
+    setup_testing_defaults(environ)
+    started = {}
+    written = []
+
+    def start_response(status, response_headers):
+        started['status'], started['headers'] = status, dict(response_headers)
+        return written.append
+
+    result = app(environ, start_response)
+    chunks = b''.join(written) + b''.join(result)
+    return started['status'], started['headers'], chunks
+
+
+def test_wsgi_app_serves_files_and_api(erd_dir):
+    server = ERDServer(str(erd_dir / "erd.svg"), 'file', {'filepath': str(erd_dir / "schema.sql")}, {},
+                       store=FileStore(str(erd_dir / STATE_FILE)))
+    app = make_app(server)
+    try:
+        status, headers, body = call(app, 'GET', '/erd.svg', headers={'Accept-Encoding': 'gzip'})
+        assert status == '200 OK'
+        assert headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(body).startswith(b'<svg')
+        assert 'Set-Cookie' in headers
+        assert not {'Connection', 'Keep-Alive', 'Server', 'Date'} & set(headers)
+
+        status, _, body = call(app, 'POST', '/api/optimize_layout', {'current_settings': {'rankdir': 'TB'}})
+        assert status == '200 OK'
+        assert json.loads(body)['success'] is True
+
+        status, _, _ = call(app, 'GET', '/' + STATE_FILE)
+        assert status.startswith('404')
+    finally:
+        server.http_cache.close()
+
+
+def test_wsgi_app_runs_the_handler_on_the_calling_thread(erd_dir, monkeypatch):
+    server = ERDServer(str(erd_dir / "erd.svg"), 'file', {'filepath': str(erd_dir / "schema.sql")}, {})
+    app = make_app(server)
+    started = threading.active_count()
+    monkeypatch.setattr(threading.Thread, 'start', lambda self: pytest.fail("WSGI request started a thread"))
+    wrapped = []
+
+    def file_wrapper(f, block_size=8192):
+        wrapped.append(f)
+        return iter(lambda: f.read(block_size), b'')
+
+    try:
+        status, headers, body = call(app, 'GET', '/erd.svg', environ={'wsgi.file_wrapper': file_wrapper})
+        assert status == '200 OK'
+        assert body.startswith(b'<svg') and len(body) == int(headers['Content-Length'])
+        assert len(wrapped) == 1
+        wrapped[0].close()
+
+        status, _, _ = call(app, 'BREW', '/erd.svg')
+        assert status.startswith('501')
+        assert threading.active_count() == started
+    finally:
+        server.http_cache.close()
+
+
+STATE_PATHS = [
+    '/' + STATE_FILE,
+    '/./' + STATE_FILE,
+    '/%2E' + STATE_FILE[1:],
+    '/%2e' + STATE_FILE[1:].replace('-', '%2D'),
+    '/erd.svg/../' + STATE_FILE,
+    '//' + STATE_FILE,
+    '/' + STATE_FILE + '.lock',
+    '/%2E' + STATE_FILE[1:] + '.lock',
+    '/' + STATE_FILE + '.locks/',
+    '/./' + STATE_FILE + '.locks/',
+]
+
+
+@pytest.mark.parametrize('path', STATE_PATHS)
+def test_state_files_are_not_served(erd_dir, live_erd_server, path):
+    server, port = live_erd_server(DUMP, store=FileStore(str(erd_dir / STATE_FILE)))
+    with server.store.lock('render'):
+        pass
+    assert os.path.exists(erd_dir / STATE_FILE)
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.request('GET', path)
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    assert response.status == 404
+    assert b'schema.sql' not in body
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="pre-fork server needs os.fork")
+def test_prefork_workers_share_state(erd_dir):
+    env = dict(os.environ, PYPGSVG_SVG=str(erd_dir / "erd.svg"), PYPGSVG_DUMP=str(erd_dir / "schema.sql"),
+               PYTHONPATH=SRC)
+    process = subprocess.Popen([sys.executable, '-m', 'pypgsvg.wsgi', '--port', '0', '--workers', '2'],
+                               env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        port = int(re.search(r':(\d+)/', process.stdout.readline()).group(1))
+        for _ in range(4):
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+            conn.request('GET', '/erd.svg')
+            response = conn.getresponse()
+            assert response.status == 200
+            assert response.read().startswith(b'<svg')
+            conn.close()
+        with open(erd_dir / STATE_FILE) as f:
+            assert json.load(f)['source_params'] == {'filepath': str(erd_dir / "schema.sql")}
+    finally:
+        process.terminate()
+        process.wait(10)
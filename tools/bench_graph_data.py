@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Compare the inline graph-data JSON against --compress-details.
+
+Builds a synthetic schema, produces the graph-data payload both ways and
+reports payload size plus decode time (json.loads for the first paint,
+gzip + json.loads for the lazily inflated details). In the browser the same
+phases are exposed as the performance measures ``pypgsvg:graph-data-parse``
+and ``pypgsvg:graph-details-inflate``.
+
+Usage:
+    python tools/bench_graph_data.py [--tables 2000] [--columns 25] [--repeat 20]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from pypgsvg.colors import color_palette  # noqa: E402
+from pypgsvg.erd_generator import build_graph_data  # noqa: E402
+from pypgsvg.svg_utils import (  # noqa: E402
+    split_graph_details,
+    compress_graph_details,
+    decompress_graph_details,
+)
+
+
+def synthetic_schema(table_count, column_count):
+    tables = {}
+    foreign_keys = []
+    functions = {}
+    for t in range(table_count):
+        name = f"table_{t}"
+        columns = [{'name': f"col_{c}", 'type': 'character varying(255)'} for c in range(column_count)]
+        lines = [name] + [f"col_{c} character varying(255) NOT NULL DEFAULT ''::character varying" for c in range(column_count)]
+        tables[name] = {'columns': columns, 'lines': "\n".join(lines), 'type': 'table'}
+        if t:
+            ref = f"table_{t // 2}"
+            line = (f"ALTER TABLE ONLY public.{name} ADD CONSTRAINT {name}_col_0_fkey "
+                    f"FOREIGN KEY (col_0) REFERENCES public.{ref}(col_0) ON DELETE CASCADE;")
+            foreign_keys.append((name, 'col_0', ref, 'col_0', line, {}, None))
+        functions[f"fn_{t}"] = {
+            'parameters': 'p_id integer',
+            'return_type': 'trigger',
+            'language': 'plpgsql',
+            'body': "BEGIN\n  UPDATE audit SET touched = now() WHERE id = NEW.id;\n  RETURN NEW;\nEND;\n" * 4,
+            'full_definition': '',
+        }
+    return tables, foreign_keys, functions
+
+
+def best_of(repeat, fn):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tables', type=int, default=2000)
+    parser.add_argument('--columns', type=int, default=25)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    tables, foreign_keys, functions = synthetic_schema(args.tables, args.columns)
+    colors = {name: color_palette[i % len(color_palette)] for i, name in enumerate(sorted(tables))}
+    graph_data = build_graph_data(tables, foreign_keys, colors, functions=functions)
+
+    inline_json = json.dumps(graph_data)
+    core, details = split_graph_details(graph_data)
+    core_json = json.dumps(core)
+    blob = compress_graph_details(details)
+
+    inline_ms = best_of(args.repeat, lambda: json.loads(inline_json))
+    core_ms = best_of(args.repeat, lambda: json.loads(core_json))
+    inflate_ms = best_of(args.repeat, lambda: decompress_graph_details(blob))
+
+    print(f"Schema: {args.tables} tables x {args.columns} columns, {len(foreign_keys)} FKs")
+    print(f"{'mode':<22}{'bytes':>14}{'first paint ms':>18}{'details ms':>14}")
+    print(f"{'inline JSON':<22}{len(inline_json):>14,}{inline_ms:>18.2f}{'-':>14}")
+    print(f"{'compressed details':<22}{len(core_json) + len(blob):>14,}{core_ms:>18.2f}{inflate_ms:>14.2f}")
+    print(f"Payload reduction: {100 * (1 - (len(core_json) + len(blob)) / len(inline_json)):.1f}%")
+
+
+if __name__ == '__main__':
+    main()
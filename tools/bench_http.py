@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Measure what the ERD server sends for a large SVG.
+
+Serves an ERD from an in-process server and fetches it repeatedly as a
+browser would: a new connection per request with no compression (the old
+HTTP/1.0 behaviour), then over one keep-alive connection uncompressed, with
+gzip (and brotli when installed), and revalidated with If-None-Match. Reports
+body bytes and mean time per request for each.
+
+Usage:
+    python tools/bench_http.py [--svg erd.svg] [--tables 400] [--repeat 20]
+"""
+import argparse
+import http.client
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from pypgsvg.http_cache import ENCODINGS  # noqa: E402
+from pypgsvg.server import ERDServer, ThreadingERDServer  # noqa: E402
+from pypgsvg.svg_utils import load_interactivity_js, load_svg_css  # noqa: E402
+
+
+def synthetic_svg(tables):
+    """An ERD-shaped SVG with inlined assets and ``tables`` table nodes."""
+    nodes = []
+    for i in range(tables):
+        rows = ''.join(
+            f'<text x="{i * 7 % 3000}" y="{j * 14}" font-family="Arial">column_{j} integer NOT NULL</text>'
+            for j in range(12)
+        )
+        nodes.append(f'<g id="node{i}" class="node"><title>public.table_{i}</title>'
+                     f'<polygon fill="#e8f0fe" points="0,0 200,0 200,180 0,180"/>{rows}</g>'
+                     f'<g id="edge{i}" class="edge"><path d="M{i},0C{i + 40},80 {i + 80},120 {i + 120},200"/></g>')
+    return ('<svg xmlns="http://www.w3.org/2000/svg"><g id="graph0">' + ''.join(nodes) + '</g>'
+            + load_svg_css() + load_interactivity_js() + '</svg>')
+
+
+def fetch(conn, path, headers):
+    conn.request('GET', path, headers=headers)
+    response = conn.getresponse()
+    body = response.read()
+    return response, len(body)
+
+
+def run(port, path, repeat, headers, keep_alive):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    fetch(conn, path, headers)  # warm the representation cache
+    total_bytes = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        if not keep_alive:
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        response, size = fetch(conn, path, dict(headers, Connection='keep-alive' if keep_alive else 'close'))
+        total_bytes += size
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return response.status, total_bytes / repeat, elapsed / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--svg', help='ERD to serve (default: a synthetic one)')
+    parser.add_argument('--tables', type=int, default=400, help='Tables in the synthetic ERD')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        svg_file = os.path.join(tmp, 'erd.svg')
+        if args.svg:
+            with open(args.svg, 'rb') as src, open(svg_file, 'wb') as dst:
+                dst.write(src.read())
+        else:
+            with open(svg_file, 'w', encoding='utf-8') as f:
+                f.write(synthetic_svg(args.tables))
+
+        server = ERDServer(svg_file, 'file', {'filepath': svg_file}, {})
+        httpd = ThreadingERDServer(('127.0.0.1', 0), server.create_request_handler())
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        port = httpd.server_address[1]
+        try:
+            print(f"file on disk:  {os.path.getsize(svg_file) / 1024:10.1f} KiB\n")
+            print(f"{'scenario':<32}{'status':>7}{'body KiB':>12}{'ms/request':>12}")
+            scenarios = [('new connection, identity', {}, False),
+                         ('keep-alive, identity', {}, True)]
+            scenarios += [(f'keep-alive, {coding}', {'Accept-Encoding': coding}, True) for coding in ENCODINGS]
+            conn = http.client.HTTPConnection('127.0.0.1', port)
+            response, _ = fetch(conn, '/erd.svg', {'Accept-Encoding': ENCODINGS[0]})
+            conn.close()
+            scenarios.append(('keep-alive, If-None-Match',
+                              {'Accept-Encoding': ENCODINGS[0], 'If-None-Match': response.getheader('ETag')}, True))
+            for name, headers, keep_alive in scenarios:
+                status, size, seconds = run(port, '/erd.svg', args.repeat, headers, keep_alive)
+                print(f"{name:<32}{status:>7}{size / 1024:>12.1f}{seconds * 1000:>12.2f}")
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+            server.http_cache.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Measure pypgsvg cold-start cost.
+
+Runs ``python -X importtime -c "import pypgsvg"`` and ``python -m pypgsvg
+--help`` in fresh interpreters, reports the best wall time of each, the
+slowest imported modules and whether graphviz was imported eagerly, and exits
+non-zero when ``--help`` exceeds the target.
+
+Usage:
+    python tools/bench_startup.py [--repeat 5] [--top 15] [--target-ms 150]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# Cold start budget for `pypgsvg --help`, interpreter startup included
+DEFAULT_TARGET_MS = 150.0
+
+
+def run_fresh(args):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SRC, os.environ.get('PYTHONPATH')])))
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable] + args, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        sys.exit(f"{' '.join(args)} failed:\n{result.stderr}")
+    return elapsed, result.stderr
+
+
+def parse_importtime(stderr):
+    """Return [(cumulative_us, self_us, module)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='Slowest imports to list')
+    parser.add_argument('--target-ms', type=float, default=DEFAULT_TARGET_MS,
+                        help='Fail when `pypgsvg --help` takes longer than this')
+    args = parser.parse_args()
+
+    baseline = min(run_fresh(['-c', 'pass'])[0] for _ in range(args.repeat))
+    import_runs = [run_fresh(['-X', 'importtime', '-c', 'import pypgsvg']) for _ in range(args.repeat)]
+    import_time = min(elapsed for elapsed, _ in import_runs)
+    help_time = min(run_fresh(['-m', 'pypgsvg', '--help'])[0] for _ in range(args.repeat))
+
+    rows = parse_importtime(import_runs[-1][1])
+    package = next((row for row in rows if row[2].strip() == 'pypgsvg'), None)
+
+    print(f"python -c pass:        {baseline * 1000:8.1f} ms")
+    print(f"import pypgsvg:        {import_time * 1000:8.1f} ms")
+    print(f"pypgsvg --help:        {help_time * 1000:8.1f} ms  (target {args.target_ms:.0f} ms)")
+    if package:
+        print(f"pypgsvg imports (-X importtime cumulative): {package[0] / 1000:.1f} ms")
+    eager = sorted({name.strip().split('.')[0] for _, _, name in rows} & {'graphviz', 'http', 'socketserver'})
+    print(f"eager heavy imports:   {', '.join(eager) or 'none'}")
+
+    print(f"\n{'cumulative ms':>14}{'self ms':>10}  module")
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {name}")
+
+    if help_time * 1000 > args.target_ms:
+        sys.exit(f"\n--help cold start {help_time * 1000:.1f} ms exceeds the {args.target_ms:.0f} ms target")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Compare ERD server throughput with one worker process and with several.
+
+Starts ``python -m pypgsvg.wsgi`` (the pre-fork WSGI server) on a synthetic
+schema for each worker count, drives it from concurrent keep-alive clients
+with a mix of ERD GETs (gzip and identity), session and profile API calls and
+layout-optimization POSTs, and reports requests per second and p50/p95
+latency per run.
+
+Usage:
+    python tools/bench_workers.py [--workers 1 4] [--clients 16] [--seconds 5] [--tables 300]
+"""
+import argparse
+import http.client
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+REQUESTS = [
+    ('GET', '/erd.svg', None, {'Accept-Encoding': 'gzip'}),
+    ('GET', '/erd.svg', None, {}),
+    ('GET', '/api/session', None, {}),
+    ('GET', '/api/profile', None, {}),
+    ('POST', '/api/optimize_layout', {'current_settings': {'rankdir': 'TB', 'packmode': 'array'}},
+     {'Content-Type': 'application/json'}),
+]
+
+
+def synthetic_dump(tables):
+    """A dump with ``tables`` tables in a chain of foreign keys."""
+    lines = []
+    for i in range(tables):
+        columns = ', '.join(f'col_{j} text' for j in range(10))
+        lines.append(f'CREATE TABLE public.table_{i} (id integer PRIMARY KEY, parent_id integer, {columns});')
+    for i in range(1, tables):
+        lines.append(f'ALTER TABLE ONLY public.table_{i} ADD CONSTRAINT table_{i}_fk '
+                     f'FOREIGN KEY (parent_id) REFERENCES public.table_{i - 1}(id);')
+    return '\n'.join(lines) + '\n'
+
+
+def synthetic_svg(tables):
+    nodes = ''.join(
+        f'<g id="node{i}" class="node"><title>public.table_{i}</title>'
+        + ''.join(f'<text x="0" y="{j * 14}">col_{j} text</text>' for j in range(10)) + '</g>'
+        for i in range(tables)
+    )
+    return f'<svg xmlns="http://www.w3.org/2000/svg"><g id="graph0">{nodes}</g></svg>'
+
+
+def start_workers(directory, workers):
+    env = dict(os.environ, PYPGSVG_SVG=os.path.join(directory, 'erd.svg'),
+               PYPGSVG_DUMP=os.path.join(directory, 'schema.sql'),
+               PYTHONPATH=os.path.join(ROOT, 'src') + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'pypgsvg.wsgi', '--port', '0', '--workers', str(workers)],
+        env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+    line = process.stdout.readline()
+    match = re.search(r':(\d+)/', line)
+    if not match:
+        process.kill()
+        raise RuntimeError(f"Server did not start: {line!r}")
+    # Drain the workers' output so they never block on a full pipe
+    threading.Thread(target=process.stdout.read, daemon=True).start()
+    return process, int(match.group(1))
+
+
+def client(port, seconds, latencies, errors):
+    deadline = time.perf_counter() + seconds
+    i = 0
+    while time.perf_counter() < deadline:
+        method, path, body, headers = REQUESTS[i % len(REQUESTS)]
+        i += 1
+        # wsgiref speaks HTTP/1.0, so every request uses a new connection
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, json.dumps(body) if body is not None else None, headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors.append(response.status)
+        except OSError as e:
+            errors.append(str(e))
+        finally:
+            conn.close()
+        latencies.append(time.perf_counter() - start)
+
+
+def run(directory, workers, clients, seconds):
+    process, port = start_workers(directory, workers)
+    try:
+        # Warm up: parse the schema and fill the HTTP caches in every worker
+        client(port, 1.0, [], [])
+        latencies, errors = [], []
+        threads = [threading.Thread(target=client, args=(port, seconds, latencies, errors))
+                   for _ in range(clients)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        process.terminate()
+        process.wait(10)
+    latencies.sort()
+    return {
+        'workers': workers,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 2])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--tables', type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, 'schema.sql'), 'w') as f:
+            f.write(synthetic_dump(args.tables))
+        with open(os.path.join(directory, 'erd.svg'), 'w') as f:
+            f.write(synthetic_svg(args.tables))
+
+        print(f"{'workers':>8} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        for workers in args.workers:
+            result = run(directory, workers, args.clients, args.seconds)
+            print(f"{result['workers']:>8} {result['requests']:>9} {result['errors']:>7} "
+                  f"{result['rps']:>9.1f} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
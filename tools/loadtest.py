@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Load-test the ERD server's API and static routes.
+
+Starts a server on a synthetic schema whose database is played by fake
+``pg_dump`` and ``psql`` scripts (plus a fake ``dot`` when Graphviz is not
+installed, or with --fake-dot), then runs each scenario for --seconds from
+concurrent keep-alive clients, each with its own session. Reports throughput
+and p50/p95/p99 latency per scenario and per route.
+
+The server is the threaded ``--view`` server by default, or the pre-fork
+WSGI server (``python -m pypgsvg.wsgi``) with --server wsgi.
+
+--save-baseline writes the results to the --baseline JSON file. Without it,
+an existing baseline is compared with the run, and the exit status is 1 when
+a scenario's p95 latency or throughput is worse by more than --tolerance, or
+when it has errors the baseline did not have. Baselines are only comparable
+on the same machine and with the same options.
+
+Usage:
+    python tools/loadtest.py [--scenario static api database generate mixed] [--clients 8]
+                             [--seconds 5] [--tables 200] [--pg-latency 0.02]
+                             [--server view|wsgi] [--workers 2] [--fake-dot]
+                             [--baseline tools/loadtest_baseline.json] [--save-baseline]
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from pypgsvg.sessions import SESSION_HEADER  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'loadtest_baseline.json')
+DB_PARAMS = {'host': 'localhost', 'port': '5432', 'database': 'loadtest', 'user': 'loadtest'}
+# Database reloads write <database>_erd.svg
+SVG_NAME = f"{DB_PARAMS['database']}_erd.svg"
+
+# Stand-ins for the PostgreSQL client tools. LOADTEST_PG_LATENCY adds a
+# per-call delay like a network round trip.
+FAKE_PG_DUMP = r'''#!@PYTHON@
+import os, sys, time
+time.sleep(float(os.environ.get('LOADTEST_PG_LATENCY', '0')))
+with open(os.environ['LOADTEST_DUMP']) as f:
+    sys.stdout.write(f.read())
+'''
+
+FAKE_PSQL = r'''#!@PYTHON@
+import os, sys, time
+time.sleep(float(os.environ.get('LOADTEST_PG_LATENCY', '0')))
+query = sys.argv[sys.argv.index('-c') + 1] if '-c' in sys.argv else ''
+if 'pg_database' in query:
+    print('\n'.join('loadtest_%d' % i for i in range(int(os.environ.get('LOADTEST_DATABASES', '10')))))
+elif 'COUNT(*)' in query:
+    print(os.environ.get('LOADTEST_TABLES', '0'))
+elif 'md5(' in query:
+    # Catalog fingerprint: unchanged, so the schema cache stays valid
+    print('loadtest-fingerprint')
+'''
+
+# Lays every node out on a grid; enough SVG for pypgsvg's post-processing
+FAKE_DOT = r'''#!@PYTHON@
+import html, re, sys
+if '-V' in sys.argv:
+    sys.stderr.write('dot - graphviz version 0.0 (loadtest stand-in)\n')
+    sys.exit(0)
+source = sys.stdin.read()
+nodes = re.findall(r'^\s*"([^"]+)"\s*\[', source, re.M)
+edges = re.findall(r'^\s*"([^"]+)"\s*->\s*"([^"]+)"', source, re.M)
+position = {}
+parts = []
+for i, name in enumerate(nodes):
+    x, y = (i % 20) * 250, (i // 20) * 200
+    position[name] = (x, y)
+    parts.append('<g id="node%d" class="node"><title>%s</title>'
+                 '<polygon fill="#e8f0fe" points="%d,%d %d,%d %d,%d %d,%d"/>'
+                 '<text x="%d" y="%d">%s</text></g>'
+                 % (i + 1, html.escape(name), x, y, x + 200, y, x + 200, y + 150, x, y + 150,
+                    x + 10, y + 20, html.escape(name)))
+for i, (tail, head) in enumerate(edges):
+    (x1, y1), (x2, y2) = position.get(tail, (0, 0)), position.get(head, (0, 0))
+    parts.append('<g id="edge%d" class="edge"><title>%s&#45;&gt;%s</title><path d="M%d,%dC%d,%d %d,%d %d,%d"/></g>'
+                 % (i + 1, html.escape(tail), html.escape(head), x1, y1, x1, y2, x2, y1, x2, y2))
+width, height = 20 * 250, (len(nodes) // 20 + 1) * 200
+sys.stdout.write('<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
+                 '<svg width="%dpt" height="%dpt" viewBox="0.00 0.00 %d.00 %d.00" '
+                 'xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">\n'
+                 '<g id="graph0" class="graph">%s</g>\n</svg>\n' % (width, height, width, height, ''.join(parts)))
+'''
+
+
+def synthetic_dump(tables, seed=0):
+    """A dump with ``tables`` tables, a foreign-key chain plus random links, a view and a trigger."""
+    rng = random.Random(seed)
+    lines = ["CREATE FUNCTION public.touch() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN RETURN NEW; END; $$;"]
+    for i in range(tables):
+        columns = ', '.join(f'col_{j} text' for j in range(8))
+        lines.append(f'CREATE TABLE public.table_{i} (id integer NOT NULL, parent_id integer, '
+                     f'other_id integer, {columns});')
+        lines.append(f'ALTER TABLE ONLY public.table_{i} ADD CONSTRAINT table_{i}_pkey PRIMARY KEY (id);')
+    for i in range(1, tables):
+        lines.append(f'ALTER TABLE ONLY public.table_{i} ADD CONSTRAINT table_{i}_parent_fk '
+                     f'FOREIGN KEY (parent_id) REFERENCES public.table_{i - 1}(id);')
+        if i % 4 == 0:
+            lines.append(f'ALTER TABLE ONLY public.table_{i} ADD CONSTRAINT table_{i}_other_fk '
+                         f'FOREIGN KEY (other_id) REFERENCES public.table_{rng.randrange(i)}(id);')
+    lines.append('CREATE VIEW public.table_summary AS SELECT id, parent_id FROM public.table_0;')
+    lines.append('CREATE TRIGGER table_0_touch BEFORE UPDATE ON public.table_0 '
+                 'FOR EACH ROW EXECUTE FUNCTION public.touch();')
+    return '\n'.join(lines) + '\n'
+
+
+def write_fakes(bin_dir, fake_dot):
+    scripts = {'pg_dump': FAKE_PG_DUMP, 'psql': FAKE_PSQL}
+    if fake_dot:
+        scripts['dot'] = FAKE_DOT
+    for name, script in scripts.items():
+        path = os.path.join(bin_dir, name)
+        with open(path, 'w') as f:
+            f.write(script.replace('@PYTHON@', sys.executable))
+        os.chmod(path, 0o755)
+
+
+def json_request(path, body):
+    return 'POST', path, json.dumps(body).encode('utf-8'), {'Content-Type': 'application/json'}
+
+
+class Context:
+    """What request builders need: table names, the dump and this client's ETag."""
+
+    def __init__(self, tables, dump):
+        self.tables = [f'public.table_{i}' for i in range(tables)]
+        self.dump = dump.encode('utf-8')
+        self.etag = None
+
+
+def _conditional_svg(rng, ctx):
+    headers = {'Accept-Encoding': 'gzip'}
+    if ctx.etag:
+        headers['If-None-Match'] = ctx.etag
+    return 'GET', '/' + SVG_NAME, None, headers
+
+
+def _neighborhood(rng, ctx):
+    return json_request('/api/generate_neighborhood_erd', {
+        'seed_tables': [rng.choice(ctx.tables)], 'hops': 1, 'direction': 'both', 'graphviz_settings': {},
+    })
+
+
+def _focused(rng, ctx):
+    return json_request('/api/generate_focused_erd', {
+        'table_ids': rng.sample(ctx.tables, min(3, len(ctx.tables))), 'graphviz_settings': {},
+    })
+
+
+def _render(rng, ctx):
+    # Four settings, so most uploads hit the render cache
+    return 'POST', f"/api/render?rankdir={rng.choice(('TB', 'LR', 'BT', 'RL'))}", ctx.dump, {}
+
+
+ROUTES = {
+    'GET svg gzip': (lambda rng, ctx: ('GET', '/' + SVG_NAME, None, {'Accept-Encoding': 'gzip'})),
+    'GET svg': (lambda rng, ctx: ('GET', '/' + SVG_NAME, None, {})),
+    'GET svg 304': _conditional_svg,
+    'GET /api/session': (lambda rng, ctx: ('GET', '/api/session', None, {})),
+    'GET /api/profile': (lambda rng, ctx: ('GET', '/api/profile', None, {})),
+    'GET /api/jobs': (lambda rng, ctx: ('GET', '/api/jobs', None, {})),
+    'GET /api/metrics': (lambda rng, ctx: ('GET', '/api/metrics', None, {})),
+    'POST /api/test-db-connection': (lambda rng, ctx: json_request(
+        '/api/test-db-connection', dict(DB_PARAMS, password=''))),
+    'POST /api/list-databases': (lambda rng, ctx: json_request(
+        '/api/list-databases', {'host': DB_PARAMS['host'], 'port': DB_PARAMS['port'],
+                                'user': DB_PARAMS['user'], 'password': ''})),
+    'POST /api/generate_neighborhood_erd': _neighborhood,
+    'POST /api/generate_focused_erd': _focused,
+    'POST /api/optimize_layout': (lambda rng, ctx: json_request(
+        '/api/optimize_layout', {'current_settings': {'rankdir': 'TB', 'packmode': 'array'}})),
+    'POST /api/render': _render,
+    'POST /api/apply_graphviz_settings': (lambda rng, ctx: json_request(
+        '/api/apply_graphviz_settings', {'graphviz_settings': {'rankdir': rng.choice(('TB', 'LR'))}})),
+}
+
+# Scenario -> {route: weight}
+SCENARIOS = {
+    'static': {'GET svg gzip': 3, 'GET svg 304': 3, 'GET svg': 1},
+    'api': {'GET /api/session': 2, 'GET /api/profile': 1, 'GET /api/jobs': 1, 'GET /api/metrics': 1},
+    'database': {'POST /api/test-db-connection': 1, 'POST /api/list-databases': 1},
+    'generate': {'POST /api/generate_neighborhood_erd': 3, 'POST /api/generate_focused_erd': 1,
+                 'POST /api/optimize_layout': 1, 'POST /api/render': 2},
+    'mixed': {'GET svg gzip': 6, 'GET svg 304': 6, 'GET /api/session': 2, 'GET /api/profile': 1,
+              'POST /api/generate_neighborhood_erd': 2, 'POST /api/optimize_layout': 1,
+              'POST /api/render': 1, 'POST /api/apply_graphviz_settings': 1},
+}
+
+
+def start_session(port):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        conn.request('GET', '/api/session')
+        return json.loads(conn.getresponse().read())['session_id']
+    finally:
+        conn.close()
+
+
+def client(port, weights, ctx, seed, deadline, samples):
+    """Send weighted random requests until ``deadline``; append (route, seconds, status) to samples."""
+    rng = random.Random(seed)
+    routes, cumulative = list(weights), []
+    for route in routes:
+        cumulative.append((cumulative[-1] if cumulative else 0) + weights[route])
+    session = {SESSION_HEADER: start_session(port)}
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    while time.perf_counter() < deadline:
+        route = rng.choices(routes, cum_weights=cumulative)[0]
+        method, path, body, headers = ROUTES[route](rng, ctx)
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body, dict(headers, **session))
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+            if path == '/' + SVG_NAME and response.getheader('ETag'):
+                ctx.etag = response.getheader('ETag')
+            if response.getheader('Connection', '').lower() == 'close':
+                conn.close()
+        except (OSError, http.client.HTTPException) as e:
+            status = type(e).__name__
+            conn.close()
+        samples.append((route, time.perf_counter() - start, status))
+    conn.close()
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(seconds for _, seconds, _ in samples)
+    ok = (200, 304)
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for _, _, status in samples if status not in ok and status != 429),
+        'rejected': sum(1 for _, _, status in samples if status == 429),
+        'rps': round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def run_scenario(port, name, ctx_args, clients, seconds):
+    weights = SCENARIOS[name]
+    # Warm up: one request per route, so first-render costs are not measured
+    for route in weights:
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+        method, path, body, headers = ROUTES[route](random.Random(0), Context(*ctx_args))
+        conn.request(method, path, body, headers)
+        conn.getresponse().read()
+        conn.close()
+
+    samples = []
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=client, args=(port, weights, Context(*ctx_args), i, deadline, samples))
+               for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    result = summarize(samples, elapsed)
+    result['routes'] = {
+        route: summarize([sample for sample in samples if sample[0] == route], elapsed)
+        for route in weights
+    }
+    return result
+
+
+def start_server(directory, env, server, workers):
+    """Start the server process; returns (process, port)."""
+    if server == 'wsgi':
+        # Render the initial ERD first; the WSGI server expects it to exist
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--serve', directory, '--prepare-only'],
+                       env=env, check=True, stdout=subprocess.DEVNULL)
+        wsgi_env = dict(env, PYPGSVG_SVG=os.path.join(directory, SVG_NAME), PGHOST=DB_PARAMS['host'],
+                        PGPORT=DB_PARAMS['port'], PGDATABASE=DB_PARAMS['database'], PGUSER=DB_PARAMS['user'])
+        cmd = [sys.executable, '-m', 'pypgsvg.wsgi', '--port', '0', '--workers', str(workers)]
+        process = subprocess.Popen(cmd, env=wsgi_env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    else:
+        cmd = [sys.executable, os.path.abspath(__file__), '--serve', directory]
+        process = subprocess.Popen(cmd, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    for line in process.stdout:
+        match = re.search(r'(?:port |:)(\d+)/?\b', line) if ('Serving on' in line or line.startswith('port ')) else None
+        if match:
+            # Drain the server's output so it never blocks on a full pipe
+            threading.Thread(target=process.stdout.read, daemon=True).start()
+            return process, int(match.group(1))
+    process.kill()
+    raise RuntimeError("Server did not start")
+
+
+def serve(directory, prepare_only=False):
+    """Child process: render the initial ERD and serve it with the threaded --view server."""
+    from pypgsvg.server import ERDServer, ThreadingERDServer
+
+    server = ERDServer(os.path.join(directory, SVG_NAME), 'database', dict(DB_PARAMS), {})
+    server.cached_password = ''
+    result = server.reload_from_database(DB_PARAMS['host'], DB_PARAMS['port'], DB_PARAMS['database'],
+                                         DB_PARAMS['user'], '')
+    if not result.get('success'):
+        sys.exit(f"Initial render failed: {result.get('message')}")
+    if prepare_only:
+        return
+    httpd = ThreadingERDServer(('127.0.0.1', 0), server.create_request_handler())
+    server.server = httpd
+    print(f"port {httpd.server_address[1]}", flush=True)
+    httpd.serve_forever()
+
+
+def compare(results, baseline, tolerance):
+    """Print each scenario against the baseline; returns the regressed scenario names."""
+    regressed = []
+    print(f"\n{'scenario':<10} {'p95 ms':>18} {'req/s':>18}  verdict")
+    for name, result in results.items():
+        base = baseline.get('scenarios', {}).get(name)
+        if base is None:
+            print(f"{name:<10} {'(not in baseline)':>38}")
+            continue
+        problems = []
+        if base['p95_ms'] and result['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            problems.append('p95')
+        if result['rps'] < base['rps'] * (1 - tolerance):
+            problems.append('throughput')
+        if result['errors'] and not base['errors']:
+            problems.append('errors')
+        if problems:
+            regressed.append(name)
+        print(f"{name:<10} {base['p95_ms']:>8.2f} -> {result['p95_ms']:>7.2f} {base['rps']:>8.1f} -> "
+              f"{result['rps']:>7.1f}  {'REGRESSED (' + ', '.join(problems) + ')' if problems else 'ok'}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scenario', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--tables', type=int, default=200)
+    parser.add_argument('--databases', type=int, default=10, help='Databases the fake psql lists')
+    parser.add_argument('--pg-latency', type=float, default=0.02, help='Seconds each fake pg_dump/psql call takes')
+    parser.add_argument('--server', choices=('view', 'wsgi'), default='view')
+    parser.add_argument('--workers', type=int, default=2, help='WSGI worker processes (--server wsgi)')
+    parser.add_argument('--fake-dot', action='store_true', help='Use the stand-in dot even if Graphviz is installed')
+    parser.add_argument('--routes', action='store_true', help='Also print per-route results')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative regression (0.25 = 25%%)')
+    parser.add_argument('--serve', metavar='DIR', help=argparse.SUPPRESS)
+    parser.add_argument('--prepare-only', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.prepare_only)
+        return
+
+    fake_dot = args.fake_dot or shutil.which('dot') is None
+    with tempfile.TemporaryDirectory() as directory:
+        bin_dir = os.path.join(directory, 'bin')
+        os.mkdir(bin_dir)
+        write_fakes(bin_dir, fake_dot)
+        dump = synthetic_dump(args.tables)
+        with open(os.path.join(directory, 'schema.sql'), 'w') as f:
+            f.write(dump)
+        env = dict(os.environ, PATH=bin_dir + os.pathsep + os.environ.get('PATH', ''),
+                   PYTHONPATH=os.path.join(ROOT, 'src') + os.pathsep + os.environ.get('PYTHONPATH', ''),
+                   LOADTEST_DUMP=os.path.join(directory, 'schema.sql'), LOADTEST_TABLES=str(args.tables),
+                   LOADTEST_DATABASES=str(args.databases), LOADTEST_PG_LATENCY=str(args.pg_latency))
+
+        print(f"{args.server} server, {args.clients} clients, {args.seconds:g} s per scenario, "
+              f"{args.tables} tables, {'stand-in' if fake_dot else 'Graphviz'} dot")
+        process, port = start_server(directory, env, args.server, args.workers)
+        results = {}
+        try:
+            width = 38 if args.routes else 10
+            print(f"{'scenario':<{width}} {'requests':>9} {'errors':>7} {'429s':>5} {'req/s':>9} "
+                  f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+            for name in args.scenario:
+                result = results[name] = run_scenario(port, name, (args.tables, dump), args.clients, args.seconds)
+                rows = [(name, result)]
+                if args.routes:
+                    rows += [('  ' + route, stats) for route, stats in result['routes'].items()]
+                for label, stats in rows:
+                    print(f"{label:<{width}} {stats['requests']:>9} {stats['errors']:>7} {stats['rejected']:>5} "
+                          f"{stats['rps']:>9.1f} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} "
+                          f"{stats['p99_ms']:>8.2f}")
+        finally:
+            process.terminate()
+            process.wait(10)
+
+    meta = {
+        'server': args.server, 'workers': args.workers if args.server == 'wsgi' else None,
+        'clients': args.clients, 'seconds': args.seconds, 'tables': args.tables,
+        'pg_latency': args.pg_latency, 'fake_dot': fake_dot,
+        'cpus': os.cpu_count(), 'python': platform.python_version(), 'platform': platform.platform(),
+    }
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'meta': meta, 'scenarios': results}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nBaseline written to {args.baseline}")
+        return
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        differs = [key for key in ('server', 'workers', 'clients', 'tables', 'pg_latency', 'fake_dot', 'cpus')
+                   if baseline.get('meta', {}).get(key) != meta[key]]
+        if differs:
+            print(f"\nNote: baseline was recorded with different {', '.join(differs)}")
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()